@@ -43,6 +43,13 @@ from gpm.configs import (  # noqa
 from gpm.dataset.dataset import open_dataset  # noqa
 from gpm.dataset.datatree import open_datatree  # noqa
 from gpm.dataset.granule import open_granule  # noqa
+from gpm.dataset.optimize import optimize_archive  # noqa
+from gpm.dataset.overpasses import find_overpasses  # noqa
+from gpm.dataset.references import index_archive  # noqa
+from gpm.dataset.stream import stream_granules  # noqa
+from gpm.imerg.aggregation import aggregate_imerg, iterate_imerg_aggregates  # noqa
+from gpm.imerg.cube import build_imerg_cube  # noqa
+from gpm.imerg.extraction import extract_imerg_points  # noqa
 from gpm.io.download import download_archive as download  # noqa
 from gpm.io.download import (  # noqa
     download_daily_data,
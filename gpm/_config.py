@@ -57,6 +57,16 @@ _CONFIG_DEFAULTS = {
     "warn_multiple_product_versions": True,
     "viz_hide_antimeridian_data": True,
     "remove_corrupted_files": False,
+    "local_catalog": False,
+    "listing_cache_dir": None,
+    "listing_cache_ttl": 600,
+    "listing_cache_offline": False,
+    "download_lease_timeout": 600,
+    "local_archive_quota": None,
+    "use_optimized_archive": True,
+    "granule_reader_engine": "netcdf4",
+    "structure_cache_dir": None,
+    "chunks_target_size": "128MB",
 }
 _CONFIG_DEFAULTS.update(_get_default_configs())
 
@@ -82,6 +82,22 @@ class GPM_Base_Accessor:
         if not isinstance(xarray_obj, (xr.DataArray, xr.Dataset)):
             raise TypeError("The 'gpm' accessor is available only for xarray.Dataset and xarray.DataArray.")
         self._obj = xarray_obj
+        self._checks_results = {}
+
+    def _get_check_result(self, name, check_function):
+        """Return the result of a dataset quality check, computing it only once.
+
+        The result is memoized on the accessor, which xarray caches on the xarray object.
+        The check is run again if the coordinates of the xarray object have been replaced.
+        """
+        coords = tuple(self._obj.coords.variables.values())
+        if name in self._checks_results:
+            memo_coords, result = self._checks_results[name]
+            if len(memo_coords) == len(coords) and all(a is b for a, b in zip(memo_coords, coords)):
+                return result
+        result = check_function(self._obj)
+        self._checks_results[name] = (coords, result)
+        return result
 
     @auto_wrap_docstring
     def isel(self, indexers=None, drop=False, **indexers_kwargs):
@@ -455,31 +471,31 @@ class GPM_Base_Accessor:
     def is_regular(self):
         from gpm.utils.checks import is_regular
 
-        return is_regular(self._obj)
+        return self._get_check_result("is_regular", is_regular)
 
     @property
     def has_regular_time(self):
         from gpm.utils.checks import has_regular_time
 
-        return has_regular_time(self._obj)
+        return self._get_check_result("has_regular_time", has_regular_time)
 
     @property
     def has_contiguous_scans(self):
         from gpm.utils.checks import has_contiguous_scans
 
-        return has_contiguous_scans(self._obj)
+        return self._get_check_result("has_contiguous_scans", has_contiguous_scans)
 
     @property
     def has_missing_granules(self):
         from gpm.utils.checks import has_missing_granules
 
-        return has_missing_granules(self._obj)
+        return self._get_check_result("has_missing_granules", has_missing_granules)
 
     @property
     def has_valid_geolocation(self):
         from gpm.utils.checks import has_valid_geolocation
 
-        return has_valid_geolocation(self._obj)
+        return self._get_check_result("has_valid_geolocation", has_valid_geolocation)
 
     #### Subsetting utility
     @auto_wrap_docstring
@@ -39,6 +39,7 @@ from gpm.bucket.io import get_bucket_partitioning, get_filepaths_by_partition, w
 from gpm.bucket.writers import preprocess_writer_kwargs, write_dataset_metadata, write_partitioned_dataset
 from gpm.io.info import group_filepaths
 from gpm.utils.dask import clean_memory, get_client
+from gpm.utils.list import split_list_in_blocks
 from gpm.utils.parallel import compute_list_delayed
 from gpm.utils.timing import print_task_elapsed_time
 
@@ -46,10 +47,6 @@ from gpm.utils.timing import print_task_elapsed_time
 #### Bucket Granules
 
 
-def split_list_in_blocks(values, block_size):
-    return [values[i : i + block_size] for i in range(0, len(values), block_size)]
-
-
 def write_granule_bucket(
     src_filepath,
     bucket_dir,
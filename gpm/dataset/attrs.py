@@ -26,6 +26,7 @@
 # -----------------------------------------------------------------------------.
 """This module contains functions to parse GPM granule attributes."""
 import ast
+import re
 
 import numpy as np
 
@@ -179,16 +180,46 @@ def _has_nested_dictionary(attrs):
     return np.any([isinstance(v, dict) for v in attrs.values()])
 
 
-def get_granule_attrs(dt):
-    """Get granule global attributes."""
-    # Retrieve attributes dictionary (per group)
-    nested_attrs = decode_attrs(dt.attrs)
-    # Flatten attributes (without group)
+def _search_attrs_values(attrs, keys):
+    """Retrieve the value of specific keys of GPM string dictionaries attributes.
+
+    Contrary to ``decode_attrs``, only the values of the specified keys are parsed.
+    """
+    pattern = re.compile(r"(?:^|;)\n*(" + "|".join(keys) + r")=([^;]*)")
+    values = {}
+    for string in attrs.values():
+        if isinstance(string, str):
+            values.update({key: _parse_attr_string(value) for key, value in pattern.findall(string.replace("\t", ""))})
+    return values
+
+
+def _get_flattened_attrs(attrs):
+    """Decode and flatten (without group) the GPM nested dictionary attributes."""
+    nested_attrs = decode_attrs(attrs)
     if _has_nested_dictionary(nested_attrs):
-        attrs = {}
-        _ = [attrs.update(group_attrs) for group, group_attrs in nested_attrs.items()]
+        flattened_attrs = {}
+        _ = [flattened_attrs.update(group_attrs) for group, group_attrs in nested_attrs.items()]
+        return flattened_attrs
+    return nested_attrs
+
+
+def get_static_granule_attrs(attrs):
+    """Get the granule global attributes which do not change between granules of a product."""
+    attrs = _get_flattened_attrs(attrs)
+    return {key: attrs[key] for key in STATIC_GLOBAL_ATTRS if key in attrs}
+
+
+def get_granule_attrs(dt, static_attrs=None):
+    """Get granule global attributes.
+
+    If ``static_attrs`` is specified (see ``get_static_granule_attrs``), only the granule specific
+    attributes are parsed from the granule.
+    """
+    if static_attrs is None:
+        attrs = _get_flattened_attrs(dt.attrs)
     else:
-        attrs = nested_attrs
+        attrs = _search_attrs_values(dt.attrs, keys=GRANULE_ONLY_GLOBAL_ATTRS + DYNAMIC_GLOBAL_ATTRS)
+        attrs.update(static_attrs)
     # Subset only required attributes
     valid_keys = GRANULE_ONLY_GLOBAL_ATTRS + DYNAMIC_GLOBAL_ATTRS + STATIC_GLOBAL_ATTRS
     return {key: attrs[key] for key in valid_keys if key in attrs}
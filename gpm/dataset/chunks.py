@@ -0,0 +1,180 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module contains the automatic chunking policy of the GPM datasets.
+
+The chunks of the GPM HDF5 granules are small. Reading the granules with the file chunks (``chunks={}``)
+creates a huge number of tasks, while reading each granule array in a single chunk (``chunks=-1``)
+creates chunks which can not fit in memory (i.e. the DPR 3D variables).
+
+With ``chunks="auto"``, the granules are opened lazily without dask (``chunks=None``), the chunks of each
+dimension are derived from the file chunks and the shapes of the variables, and the variables are then
+wrapped into dask arrays which chunks are multiples of the file chunks and which size is lower than the
+``chunks_target_size`` GPM-API config. Each dask chunk is read by a single task: no rechunking is required.
+The chunk sizes depend only on the variable dtype, the file chunks and the shape of the dimensions
+other than the concatenation dimension (``along_track`` or ``time``), so that the same chunk sizes
+are used for all granules of a product.
+"""
+import numpy as np
+
+from gpm import config
+from gpm.utils.directories import convert_size_to_bytes
+
+
+def get_chunks_target_size():
+    """Return the target size (in bytes) of the chunks defined with ``chunks="auto"``.
+
+    The target size is defined by the ``chunks_target_size`` GPM-API config (i.e. ``"128MB"``).
+    """
+    target_size = convert_size_to_bytes(config.get("chunks_target_size"))
+    if target_size <= 0:
+        raise ValueError("The 'chunks_target_size' GPM-API config must be a positive size.")
+    return target_size
+
+
+def get_variable_file_chunks(var):
+    """Return the file chunks of a variable.
+
+    The file chunks are retrieved from the ``preferred_chunks`` (or ``chunksizes``) encoding.
+    Returns ``None`` if the variable is not chunked on disk.
+    """
+    preferred_chunks = var.encoding.get("preferred_chunks", None)
+    if preferred_chunks:
+        # Use values() to remove phony_dim_* keys
+        return tuple(min(chunk, size) for chunk, size in zip(preferred_chunks.values(), var.shape))
+    chunksizes = var.encoding.get("chunksizes", None)
+    if chunksizes:
+        return tuple(min(chunk, size) for chunk, size in zip(chunksizes, var.shape))
+    return None
+
+
+def get_auto_chunks(dims, shape, itemsize, file_chunks, target_size, concat_dim="along_track"):
+    """Return the chunk sizes of a variable with shape ``shape`` stored on disk with ``file_chunks``.
+
+    The chunk sizes are multiples of the file chunks (or the full dimension size):
+
+    - the dimensions other than ``concat_dim`` are read entirely. If a chunk does not fit in the
+      ``target_size`` budget, the largest dimensions are halved until it fits (or the file chunks are reached).
+    - the ``concat_dim`` chunks are then enlarged to fit the ``target_size`` budget.
+    """
+    chunks = list(file_chunks)
+    other_axes = [i for i, dim in enumerate(dims) if dim != concat_dim]
+    for i in other_axes:
+        chunks[i] = shape[i]
+
+    # Halve the largest dimensions until the chunk fits in the budget
+    while np.prod(chunks) * itemsize > target_size:
+        axes = [i for i in other_axes if chunks[i] > file_chunks[i]]
+        if len(axes) == 0:
+            break
+        i = max(axes, key=lambda axis: chunks[axis])
+        chunks[i] = max(chunks[i] // 2 // file_chunks[i] * file_chunks[i], file_chunks[i])
+
+    # Enlarge the chunks along the concatenation dimension
+    if concat_dim in dims:
+        i = dims.index(concat_dim)
+        n_file_chunks = max(int(target_size // (np.prod(chunks) * itemsize)), 1)
+        chunks[i] = min(n_file_chunks * file_chunks[i], shape[i])
+    return dict(zip(dims, chunks))
+
+
+def _is_lazy_variable(ds, name):
+    """Check if a dataset variable is a (non-index) variable not loaded in memory.
+
+    It includes the dask variables and the variables lazily read from disk (i.e. opened with ``chunks=None``).
+    """
+    return name not in ds.indexes and not ds.variables[name]._in_memory
+
+
+def get_dataset_auto_chunks(ds, concat_dim, target_size):
+    """Return the chunk size of each dimension of the dataset variables chunked on disk.
+
+    The chunk sizes of each variable are defined with ``get_auto_chunks``.
+    Since the variables of a dataset must share the same chunks along each dimension,
+    the smallest chunk size is selected and rounded to a multiple of the file chunks of all variables.
+    """
+    dict_chunks = {}
+    dict_file_chunks = {}
+    for name in ds.variables:
+        var = ds.variables[name]
+        file_chunks = get_variable_file_chunks(var)
+        if not _is_lazy_variable(ds, name) or var.dtype == object or file_chunks is None:
+            continue
+        chunks = get_auto_chunks(
+            dims=var.dims,
+            shape=var.shape,
+            itemsize=var.dtype.itemsize,
+            file_chunks=file_chunks,
+            target_size=target_size,
+            concat_dim=concat_dim,
+        )
+        for dim, file_chunk in zip(var.dims, file_chunks):
+            dict_chunks.setdefault(dim, []).append(chunks[dim])
+            dict_file_chunks.setdefault(dim, []).append(file_chunk)
+    dims_chunks = {}
+    for dim, chunks in dict_chunks.items():
+        chunk = min(chunks)
+        file_chunk = int(np.lcm.reduce(dict_file_chunks[dim]))
+        dims_chunks[dim] = chunk // file_chunk * file_chunk if chunk >= file_chunk else chunk
+    return dims_chunks
+
+
+def chunk_dataset(ds, concat_dim=None, target_size=None):
+    """Chunk the dataset variables with the automatic chunking policy.
+
+    The variables should be opened lazily without dask (i.e. ``chunks=None``), so that each dask chunk
+    is read from disk by a single task. Dask variables (i.e. opened with ``chunks={}``) are rechunked.
+    See ``get_dataset_auto_chunks`` for the description of the policy.
+    The variables not chunked on disk are chunked with the same chunks along each dimension.
+
+    Parameters
+    ----------
+    ds : xarray.Dataset
+        Dataset with the variables lazily opened from disk.
+    concat_dim : str, optional
+        Dimension over which the chunks are enlarged.
+        If ``None`` (the default), ``time`` if it is a dimension of the dataset, otherwise ``along_track``.
+    target_size : int, optional
+        Target size of the chunks in bytes.
+        If ``None`` (the default), it is defined by the ``chunks_target_size`` GPM-API config.
+
+    Returns
+    -------
+    xarray.Dataset
+        Chunked dataset.
+
+    """
+    if concat_dim is None:
+        concat_dim = "time" if "time" in ds.dims else "along_track"
+    if target_size is None:
+        target_size = get_chunks_target_size()
+    dims_chunks = get_dataset_auto_chunks(ds, concat_dim=concat_dim, target_size=target_size)
+    for name in list(ds.variables):
+        var = ds.variables[name]
+        if not _is_lazy_variable(ds, name):
+            continue
+        ds[name] = var.chunk({dim: dims_chunks[dim] for dim in var.dims if dim in dims_chunks})
+    return ds
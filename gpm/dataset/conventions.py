@@ -47,6 +47,14 @@ from gpm.utils.time import (
 from gpm.utils.warnings import GPM_Warning
 
 EPOCH = "seconds since 1970-01-01 00:00:00"
+VALIDATE_MODES = ["eager", "lazy", "off"]
+
+
+def check_validate(validate):
+    """Check the validity of the dataset validation mode."""
+    if validate not in VALIDATE_MODES:
+        raise ValueError(f"Invalid validate '{validate}'. Valid modes are {VALIDATE_MODES}.")
+    return validate
 
 
 def _check_time_period_coverage(ds, start_time=None, end_time=None, raise_error=False):
@@ -124,8 +132,38 @@ def reshape_dataset(ds):
     return ds
 
 
-def finalize_dataset(ds, product, decode_cf, scan_mode, start_time=None, end_time=None):
-    """Finalize GPM xarray.Dataset object."""
+def _warn_dataset_quality(ds):
+    """Warn about non-contiguous scans, non-regular timesteps and invalid geolocation coordinates."""
+    from gpm import config
+
+    # Put lon/lat in memory first to avoid recomputing it
+    ds["lon"] = ds["lon"].compute()
+    ds["lat"] = ds["lat"].compute()
+    try:
+        if is_grid(ds):
+            if config.get("warn_non_contiguous_scans") and not is_regular(ds):
+                msg = "Missing timesteps across the dataset !"
+                warnings.warn(msg, GPM_Warning, stacklevel=3)
+        elif is_orbit(ds):
+            if config.get("warn_invalid_geolocation") and not has_valid_geolocation(ds):
+                msg = "Presence of invalid geolocation coordinates !"
+                warnings.warn(msg, GPM_Warning, stacklevel=3)
+            if config.get("warn_non_contiguous_scans") and not is_regular(ds):
+                msg = "Presence of non-contiguous scans !"
+                warnings.warn(msg, GPM_Warning, stacklevel=3)
+    except Exception:
+        pass
+    return ds
+
+
+def finalize_dataset(ds, product, decode_cf, scan_mode, start_time=None, end_time=None, validate="eager"):
+    """Finalize GPM xarray.Dataset object.
+
+    With ``validate="eager"``, the longitude and latitude coordinates are loaded in memory and the
+    dataset quality checks are run to warn about non-contiguous scans or invalid geolocation.
+    With ``validate="lazy"``, the quality checks are run only when accessed (i.e. ``ds.gpm.is_regular``).
+    With ``validate="off"``, the time period coverage is not checked either.
+    """
     import pyproj
 
     from gpm import config
@@ -209,30 +247,17 @@ def finalize_dataset(ds, product, decode_cf, scan_mode, start_time=None, end_tim
     # - Skip subsetting if time_bnds in dataset coordinates (i.e. IMERG case)
     if "time_bnds" not in ds:
         ds = subset_by_time(ds, start_time=start_time, end_time=end_time)
-    _check_time_period_coverage(ds, start_time=start_time, end_time=end_time, raise_error=False)
+    if validate != "off":
+        _check_time_period_coverage(ds, start_time=start_time, end_time=end_time, raise_error=False)
 
     ###-----------------------------------------------------------------------.
     # Warn if:
     # - non-contiguous scans in orbit data
     # - non-regular timesteps in grid data
     # - invalid geolocation coordinates
-    # --> Put lon/lat in memory first to avoid recomputing it
-    ds["lon"] = ds["lon"].compute()
-    ds["lat"] = ds["lat"].compute()
-    try:
-        if is_grid(ds):
-            if config.get("warn_non_contiguous_scans") and not is_regular(ds):
-                msg = "Missing timesteps across the dataset !"
-                warnings.warn(msg, GPM_Warning, stacklevel=2)
-        elif is_orbit(ds):
-            if config.get("warn_invalid_geolocation") and not has_valid_geolocation(ds):
-                msg = "Presence of invalid geolocation coordinates !"
-                warnings.warn(msg, GPM_Warning, stacklevel=2)
-            if config.get("warn_non_contiguous_scans") and not is_regular(ds):
-                msg = "Presence of non-contiguous scans !"
-                warnings.warn(msg, GPM_Warning, stacklevel=2)
-    except Exception:
-        pass
+    # --> With validate="lazy", the checks are run only when accessed with the gpm accessor
+    if validate == "eager":
+        ds = _warn_dataset_quality(ds)
 
     ###-----------------------------------------------------------------------.
     return ds
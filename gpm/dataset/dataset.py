@@ -25,12 +25,14 @@
 
 # -----------------------------------------------------------------------------.
 """This module contains functions to read files into a GPM-API Dataset."""
+import os
 import warnings
 from functools import partial
 
 import xarray as xr
 
-from gpm.dataset.conventions import finalize_dataset
+from gpm.dataset.conventions import check_validate, finalize_dataset
+from gpm.dataset.footprints import crop_granule, get_granules_isel_dicts, get_request_extent
 from gpm.dataset.granule import _open_granule
 from gpm.io.checks import (
     check_groups,
@@ -41,7 +43,9 @@ from gpm.io.checks import (
     check_variables,
 )
 from gpm.io.find import find_filepaths
+from gpm.io.quota import record_local_access
 from gpm.utils.checks import has_missing_granules
+from gpm.utils.time import get_time_subset_slice
 from gpm.utils.warnings import GPM_Warning
 
 
@@ -80,8 +84,74 @@ def _get_scheduler(get=None, collection=None):
     return "threaded"
 
 
-def _try_open_granule(filepath, scan_mode, variables, groups, prefix_group, decode_cf, chunks):
-    """Try open a granule."""
+def _check_engine(engine):
+    """Check the validity of the granules reading engine."""
+    valid_engines = [None, "references"]
+    if engine not in valid_engines:
+        raise ValueError(f"Invalid engine '{engine}'. Valid engines are {valid_engines}.")
+    return engine
+
+
+def _check_parallel(parallel):
+    """Check the validity of the granules opening parallelism."""
+    valid_parallel = [False, True, "processes"]
+    if parallel not in valid_parallel:
+        raise ValueError(f"Invalid parallel '{parallel}'. Valid values are {valid_parallel}.")
+    return parallel
+
+
+def _subset_granule_by_time(ds, start_time=None, end_time=None):
+    """Select the along-track scans of an ORBIT granule within the time period.
+
+    The scans are searched with a binary search on the granule scan times, so that only the
+    scans within the time period are read. If the scan times are not sorted (or contain NaT),
+    the granule is not subsetted and the time subsetting is left to ``finalize_dataset``.
+    Returns ``None`` if no scans are within the time period.
+    """
+    if (start_time is None and end_time is None) or ds["time"].dims != ("along_track",):
+        return ds
+    time_slice = get_time_subset_slice(ds["time"].to_numpy(), start_time=start_time, end_time=end_time)
+    if time_slice is None:
+        return ds
+    if time_slice.start == time_slice.stop:
+        return None
+    return ds.isel(along_track=time_slice)
+
+
+def _subset_granule(ds, start_time=None, end_time=None, extent=None, isel_dict=None):
+    """Subset a granule dataset before the granules are concatenated.
+
+    The hyperslab ``isel_dict`` is selected first, then the scans within the time period
+    and finally the granule is cropped over the ``extent`` (see ``gpm.dataset.footprints.crop_granule``).
+    Returns ``None`` if the granule has no data within the time period or the extent.
+    """
+    if isel_dict:
+        ds = ds.isel(isel_dict)
+    ds = _subset_granule_by_time(ds, start_time=start_time, end_time=end_time)
+    if ds is not None and extent is not None:
+        ds = crop_granule(ds, extent=extent)
+    return ds
+
+
+def _try_open_granule(
+    filepath,
+    scan_mode,
+    variables,
+    groups,
+    prefix_group,
+    decode_cf,
+    chunks,
+    engine=None,
+    start_time=None,
+    end_time=None,
+    extent=None,
+    isel_dict=None,
+):
+    """Try open a granule.
+
+    The granule is subsetted with ``_subset_granule`` and ``None`` is returned if it has
+    no data within the time period or the extent.
+    """
     try:
         ds = _open_granule(
             filepath,
@@ -91,7 +161,12 @@ def _try_open_granule(filepath, scan_mode, variables, groups, prefix_group, deco
             decode_cf=decode_cf,
             prefix_group=prefix_group,
             chunks=chunks,
+            engine=engine,
         )
+        ds_subset = _subset_granule(ds, start_time=start_time, end_time=end_time, extent=extent, isel_dict=isel_dict)
+        if ds_subset is None:
+            ds.close()
+        ds = ds_subset
     except Exception as e:
         msg = f"The following error occurred while opening the {filepath} granule: {e}"
         warnings.warn(msg, GPM_Warning, stacklevel=3)
@@ -99,8 +174,95 @@ def _try_open_granule(filepath, scan_mode, variables, groups, prefix_group, deco
     return ds
 
 
-def _get_datasets_and_closers(filepaths, parallel, **open_kwargs):
-    """Open the granule in parallel with dask delayed."""
+def _load_granule(filepath, isel_dict=None, **open_kwargs):
+    """Open, subset and load in memory a granule within a pool process.
+
+    The granule data are returned through shared memory (see ``gpm.utils.parallel.dataset_to_shared_memory``).
+    The warnings raised while opening the granule are returned to be raised in the main process.
+    """
+    from gpm.utils.parallel import dataset_to_shared_memory
+
+    description = None
+    with warnings.catch_warnings(record=True) as list_warnings:
+        warnings.simplefilter("always")
+        ds = _try_open_granule(filepath, isel_dict=isel_dict, **open_kwargs)
+        if ds is not None:
+            try:
+                ds = ds.load(scheduler="synchronous")
+                description = dataset_to_shared_memory(ds)
+            except Exception as e:
+                msg = f"The following error occurred while loading the {filepath} granule: {e}"
+                warnings.warn(msg, GPM_Warning, stacklevel=2)
+            finally:
+                ds.close()
+    return description, [(str(w.message), w.category) for w in list_warnings]
+
+
+def _get_datasets_with_processes(filepaths, isel_dicts, **open_kwargs):
+    """Open and load the granules in memory with a pool of processes.
+
+    The HDF5 reading and the decoding of the granules are not limited by the GIL and the netCDF4 lock.
+    The granules arrays are mapped from shared memory without being copied.
+    """
+    from concurrent.futures import ProcessPoolExecutor, wait
+    from multiprocessing import resource_tracker
+
+    from gpm import config
+    from gpm.utils.parallel import (
+        dataset_from_shared_memory,
+        get_process_pool_context,
+        init_pool_process,
+        release_shared_memory,
+    )
+
+    # The pool processes register the shared memory blocks in the resource tracker of the main process,
+    # which unlinks the blocks not released if the main process terminates
+    resource_tracker.ensure_running()
+    max_workers = min(len(filepaths), os.cpu_count() or 1)
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=get_process_pool_context(),
+        initializer=init_pool_process,
+        initargs=(config.to_dict(),),
+    ) as executor:
+        futures = [
+            executor.submit(_load_granule, filepath, isel_dict=isel_dicts.get(filepath), **open_kwargs)
+            for filepath in filepaths
+        ]
+        wait(futures)
+
+    # Retrieve the granules datasets
+    # - If an error occurs, the shared memory blocks not yet mapped are unlinked
+    results = [future.result() if future.exception() is None else None for future in futures]
+    list_ds = []
+    try:
+        for future in futures:
+            if future.exception() is not None:
+                raise future.exception()
+        for i, (description, list_warnings) in enumerate(results):
+            for msg, category in list_warnings:
+                warnings.warn(msg, category, stacklevel=4)
+            if description is not None:
+                results[i] = None
+                list_ds.append(dataset_from_shared_memory(description))
+    finally:
+        for result in results:
+            if result is not None and result[0] is not None:
+                release_shared_memory(result[0])
+    # The granules files are already closed
+    return list_ds, []
+
+
+def _get_datasets_and_closers(filepaths, parallel, isel_dicts=None, **open_kwargs):
+    """Open the granule in parallel with dask delayed.
+
+    If ``parallel="processes"``, the granules are opened and loaded in memory with a pool of processes.
+    ``isel_dicts`` is an optional dictionary with the hyperslab to select in each granule.
+    """
+    isel_dicts = {} if isel_dicts is None else isel_dicts
+    if parallel == "processes":
+        return _get_datasets_with_processes(filepaths, isel_dicts=isel_dicts, **open_kwargs)
+
     if parallel:
         import dask
 
@@ -111,7 +273,7 @@ def _get_datasets_and_closers(filepaths, parallel, **open_kwargs):
         open_ = _try_open_granule
         getattr_ = getattr
 
-    list_ds = [open_(p, **open_kwargs) for p in filepaths]
+    list_ds = [open_(p, isel_dict=isel_dicts.get(p), **open_kwargs) for p in filepaths]
     list_closers = [getattr_(ds, "_close", None) for ds in list_ds]
 
     # If parallel=True, compute the delayed datasets lists here
@@ -139,10 +301,17 @@ def _open_valid_granules(
     prefix_group,
     chunks,
     parallel=False,
+    engine=None,
+    start_time=None,
+    end_time=None,
+    extent=None,
+    isel_dicts=None,
 ):
     """Open a list of HDF granules.
 
     Corrupted granules are not returned !
+    The granules are subsetted over the time period and the ``extent`` (see ``_subset_granule``)
+    and the granules without data within the time period or the extent are not returned.
 
     Does not apply yet CF decoding !
 
@@ -154,8 +323,8 @@ def _open_valid_granules(
          List of xarray.Datasets closers.
 
     """
-    if parallel and chunks is None:
-        return ValueError("If parallel=True, 'chunks' can not be None.")
+    if parallel is True and chunks is None:
+        raise ValueError("If parallel=True, 'chunks' can not be None.")
     list_ds, list_closers = _get_datasets_and_closers(
         filepaths,
         scan_mode=scan_mode,
@@ -165,6 +334,11 @@ def _open_valid_granules(
         prefix_group=prefix_group,
         chunks=chunks,
         parallel=parallel,
+        engine=engine,
+        start_time=start_time,
+        end_time=end_time,
+        extent=extent,
+        isel_dicts=isel_dicts,
     )
 
     if len(list_ds) == 0:
@@ -172,11 +346,72 @@ def _open_valid_granules(
     return list_ds, list_closers
 
 
+def _get_concat_dim(ds):
+    """Return the dimension over which the granules datasets are concatenated."""
+    return "time" if "time" in list(ds.dims) else "along_track"
+
+
+def _get_variables_layout(ds, concat_dim):
+    """Return the dimensions and the shape (excluding the concatenation dimension) of each variable."""
+    return {
+        name: (var.dims, tuple(size for dim, size in zip(var.dims, var.shape) if dim != concat_dim))
+        for name, var in ds.variables.items()
+    }
+
+
+def _is_stackable(l_datasets, concat_dim):
+    """Check if the datasets have the same variables with same shapes (excluding the concatenation dimension).
+
+    The data variables must all have the concatenation dimension.
+    """
+    ds_ref = l_datasets[0]
+    if any(concat_dim not in ds_ref[var].dims for var in ds_ref.data_vars):
+        return False
+    layout = _get_variables_layout(ds_ref, concat_dim=concat_dim)
+    coords = set(ds_ref.coords)
+    return all(
+        set(ds.coords) == coords and _get_variables_layout(ds, concat_dim=concat_dim) == layout for ds in l_datasets[1:]
+    )
+
+
+def _stack_datasets(l_datasets, concat_dim):
+    """Concatenate datasets with identical variables and shapes (excluding the concatenation dimension).
+
+    Each output variable is created with a single array concatenation.
+    Variables without the concatenation dimension, attributes and encodings are taken from the first dataset.
+    """
+    import dask.array
+    import numpy as np
+
+    ds_ref = l_datasets[0]
+    variables = {}
+    for name, var in ds_ref.variables.items():
+        if concat_dim not in var.dims:
+            variables[name] = var
+            continue
+        axis = var.dims.index(concat_dim)
+        arrays = [ds.variables[name].data for ds in l_datasets]
+        if any(isinstance(arr, dask.array.Array) for arr in arrays):
+            data = dask.array.concatenate(arrays, axis=axis)
+        else:
+            data = np.concatenate(arrays, axis=axis)
+        variables[name] = xr.Variable(var.dims, data, attrs=var.attrs, encoding=var.encoding)
+    return xr.Dataset(
+        data_vars={name: variables[name] for name in ds_ref.data_vars},
+        coords={name: variables[name] for name in ds_ref.coords},
+        attrs=ds_ref.attrs,
+    )
+
+
 def _concat_datasets(l_datasets):
-    """Concatenate datasets together."""
-    dims = list(l_datasets[0].dims)
-    is_grid = "time" in dims
-    concat_dim = "time" if is_grid else "along_track"
+    """Concatenate datasets together.
+
+    If all datasets have the same variables and shapes (excluding the concatenation dimension),
+    the variables are concatenated directly. Otherwise, ``xarray.concat`` is used.
+    """
+    concat_dim = _get_concat_dim(l_datasets[0])
+    if _is_stackable(l_datasets, concat_dim=concat_dim):
+        return _stack_datasets(l_datasets, concat_dim=concat_dim)
 
     # Concatenate the datasets
     return xr.concat(
@@ -201,6 +436,12 @@ def open_dataset(
     decode_cf=True,
     parallel=False,
     prefix_group=False,
+    engine=None,
+    validate="eager",
+    extent=None,
+    country=None,
+    point=None,
+    distance=None,
     verbose=False,
 ):
     """Lazily map HDF5 data into xarray.Dataset with relevant GPM data and attributes.
@@ -253,7 +494,9 @@ def open_dataset(
 
         - ``chunks=-1`` loads the dataset with dask using a single chunk for each granule arrays.
         - ``chunks={}`` loads the dataset with dask using the file chunks.
-        - ``chunks='auto'`` will use dask ``auto`` chunking taking into account the file chunks.
+        - ``chunks='auto'`` loads the dataset with dask using multiples of the file chunks.
+          The chunks size is bounded by the ``chunks_target_size`` GPM-API config and
+          the same chunks are used for all granules (see ``gpm.dataset.chunks``).
 
         If you want to load data in memory directly, specify ``chunks=None``.
         The default is ``auto``.
@@ -268,11 +511,47 @@ def open_dataset(
         If you aim to save the Dataset to disk as netCDF or Zarr, you need to set ``prefix_group=False``
         or later remove the prefix before writing the dataset.
         The default is ``False``.
-    parallel : bool
+    parallel : bool or str
         If ``True``, the dataset are opened in parallel using :py:class:`dask.delayed.delayed`.
         If ``parallel=True``, ``'chunks'`` can not be ``None``.
         The underlying data must be :py:class:`dask.array.Array`.
+        If ``'processes'``, the granules are opened, decoded and loaded in memory by a pool of processes.
+        The granules arrays are returned through shared memory and the dataset is not backed by dask.
         The default is ``False``.
+    engine : str, optional
+        If ``engine="references"``, the granules are opened from their reference files without
+        opening the HDF5 files. The chunks of the variables are read only when the data are computed.
+        The reference files must be created in advance with ``gpm.index_archive``.
+        The default is ``None`` (the HDF5 granules are opened).
+    validate : str, optional
+        How the dataset quality checks are run:
+
+        - ``'eager'``: check the dataset scans contiguity and geolocation validity when opening the dataset.
+        - ``'lazy'``: run the checks only when accessed (i.e. ``ds.gpm.is_regular``). Results are memoized.
+        - ``'off'``: skip also the warnings about the time period coverage and the missing granules.
+
+        With ``'lazy'`` and ``'off'``, the longitude and latitude coordinates are not loaded in memory.
+        The default is ``'eager'``.
+    extent : list or tuple, optional
+        Area of interest ``[x_min, x_max, y_min, y_max]``.
+        Only the granules intersecting the area are opened and they are cropped over the area.
+        For ORBIT products, each granule is cropped to the along-track scans from the first to the last
+        scan with pixels within the area. The granules are selected using their footprint, which is
+        cached in the local granules catalog if the ``local_catalog`` GPM-API config is enabled
+        (see ``gpm.dataset.footprints``).
+        Since the scans of successive overpasses are not contiguous, the dataset is opened with
+        ``validate='off'``, whatever the ``validate`` value: the time period coverage and missing granules
+        checks are skipped and the other quality checks are run only when accessed (i.e. ``ds.gpm.is_regular``).
+        The default is ``None``.
+    country : str, optional
+        Name of the country defining the area of interest. See ``extent``.
+        The default is ``None``.
+    point : tuple, optional
+        ``(lon, lat)`` point defining, together with ``distance``, the area of interest. See ``extent``.
+        The default is ``None``.
+    distance : float, optional
+        Distance (in meters) from the ``point`` in each direction.
+        The default is ``None``.
 
     Returns
     -------
@@ -283,6 +562,10 @@ def open_dataset(
     product = check_product(product, product_type=product_type)
     variables = check_variables(variables)
     groups = check_groups(groups)
+    engine = _check_engine(engine)
+    parallel = _check_parallel(parallel)
+    validate = check_validate(validate)
+    extent = get_request_extent(extent=extent, country=country, point=point, distance=distance)
 
     ## Check scan_mode
     scan_mode = check_scan_mode(scan_mode, product, version=version)
@@ -308,6 +591,16 @@ def open_dataset(
     if len(filepaths) == 0:
         raise ValueError("No files found on disk. Please download them before.")
 
+    ##------------------------------------------------------------------------.
+    # Select the granules intersecting the area of interest
+    isel_dicts = None
+    if extent is not None:
+        isel_dicts = get_granules_isel_dicts(filepaths, scan_mode=scan_mode, extent=extent)
+        filepaths = [filepath for filepath in filepaths if filepath in isel_dicts]
+        if len(filepaths) == 0:
+            raise ValueError("No granules intersect the specified area.")
+    record_local_access(filepaths)
+
     ##------------------------------------------------------------------------.
     # Initialize list (to store Dataset of each granule )
     list_ds, list_closers = _open_valid_granules(
@@ -318,6 +611,11 @@ def open_dataset(
         prefix_group=prefix_group,
         parallel=parallel,
         chunks=chunks,
+        engine=engine,
+        start_time=start_time,
+        end_time=end_time,
+        extent=extent,
+        isel_dicts=isel_dicts,
     )
 
     ##-------------------------------------------------------------------------.
@@ -342,6 +640,9 @@ def open_dataset(
 
     ##-------------------------------------------------------------------------.
     # Finalize dataset
+    # - The scans of the overpasses of an area of interest are not contiguous and
+    #   do not cover the time period: the checks are only run if accessed with the gpm accessor
+    is_spatial_request = extent is not None
     ds = finalize_dataset(
         ds=ds,
         product=product,
@@ -349,11 +650,13 @@ def open_dataset(
         decode_cf=decode_cf,
         start_time=start_time,
         end_time=end_time,
+        validate="off" if is_spatial_request else validate,
     )
 
     ##------------------------------------------------------------------------.
     # Warns about missing granules
-    if has_missing_granules(ds):
+    # - The check only requires the granule ids and is also run with validate='lazy'
+    if validate != "off" and not is_spatial_request and has_missing_granules(ds):
         msg = "The GPM Dataset has missing granules !"
         warnings.warn(msg, GPM_Warning, stacklevel=1)
 
@@ -31,8 +31,16 @@ import datatree
 import xarray as xr
 
 import gpm
-from gpm.dataset.attrs import decode_string
-from gpm.dataset.dimensions import _rename_datatree_dimensions
+from gpm.dataset.attrs import _search_attrs_values, get_static_granule_attrs
+from gpm.dataset.chunks import chunk_dataset
+from gpm.dataset.dimensions import _rename_dataset_dimensions, _rename_datatree_dimensions, get_dimension_names
+from gpm.dataset.groups_variables import _get_relevant_groups_variables
+from gpm.dataset.structure_cache import get_cached_structure, get_structure_key, set_cached_structure
+
+ORBIT_COORDS_VARIABLES = ["Latitude", "Longitude"]
+GRID_COORDS_VARIABLES = ["lon", "lat"]
+SCAN_TIME_VARIABLES = ["Year", "Month", "DayOfMonth", "Hour", "Minute", "Second"]
+VALID_READER_ENGINES = ["netcdf4", "h5netcdf"]
 
 # TODO:
 # --> open datatrees and concat datatrees
@@ -46,27 +54,38 @@ def open_datatree(filepath, chunks={}, decode_cf=False, use_api_defaults=True):
 
     - chunks={} --> Lazy map to dask.array
       --> Wait for https://github.com/pydata/xarray/pull/7948
-      --> Maybe need to implement "auto" option manually that defaults to full shape"
-    - chunks="auto" --> datatree fails. Can not estimate size of object dtype !
+    - chunks="auto" --> Lazy map to dask.array with multiples of the file chunks (see ``gpm.dataset.chunks``)
+      --> The dask "auto" chunking fails because it can not estimate the size of object dtype !
     - chunks=None --> lazy map to numpy.array
     """
     try:
-        dt = datatree.open_datatree(filepath, engine="netcdf4", chunks=chunks, decode_cf=decode_cf)
+        dt = datatree.open_datatree(
+            filepath,
+            engine="netcdf4",
+            chunks=None if chunks == "auto" else chunks,
+            decode_cf=decode_cf,
+        )
         check_non_empty_granule(dt, filepath)
     except Exception as e:
         check_valid_granule(filepath)
         raise ValueError(e)
 
     # Assign dimension names
-    return _rename_datatree_dimensions(dt, use_api_defaults=use_api_defaults)
+    dt = _rename_datatree_dimensions(dt, use_api_defaults=use_api_defaults)
+    if chunks == "auto":
+        dt = dt.map_over_subtree(lambda ds: chunk_dataset(ds.copy()))
+    return dt
+
+
+def _is_empty_granule(attrs):
+    """Return ``True`` if the ``FileHeader`` attribute specifies an empty granule."""
+    file_header = _search_attrs_values({"FileHeader": attrs["FileHeader"]}, keys=("EmptyGranule",))
+    return file_header["EmptyGranule"] != "NOT_EMPTY"
 
 
 def check_non_empty_granule(dt, filepath):
     """Check that the datatree (or dataset) is not empty."""
-    attrs = dt.attrs
-    attrs = decode_string(attrs["FileHeader"])
-    is_empty_granule = attrs["EmptyGranule"] != "NOT_EMPTY"
-    if is_empty_granule:
+    if _is_empty_granule(dt.attrs):
         raise ValueError(f"{filepath} is an EMPTY granule !")
 
 
@@ -105,3 +124,304 @@ def _identify_error(e, filepath):
         raise ValueError(msg)
     msg = f"The following file is corrupted. Error is {e}. Redownload the file."
     raise ValueError(msg)
+
+
+####--------------------------------------------------------------------------.
+########################
+#### HDF5 structure ####
+########################
+
+
+def _decode_hdf5_attribute(value):
+    if isinstance(value, bytes):
+        return value.decode()
+    return value
+
+
+def get_hdf5_metadata(filepath, engine="netcdf4"):
+    """Return the metadata of a HDF5 file.
+
+    The variables data are not read.
+    The group paths follow the DataTree paths convention (i.e. ``"/"``, ``"/FS"``, ``"/FS/SLV"``).
+
+    Returns
+    -------
+    metadata : dict
+        Dictionary with the following keys:
+
+        - ``"variables"``: the list of variables of each group.
+        - ``"dimensions"``: the ``DimensionNames`` of the variables of each group.
+        - ``"attrs"``: the root group attributes.
+
+    """
+    structure = {}
+    dimensions = {}
+    if engine == "h5netcdf":
+        import h5py
+
+        def _add_group(group):
+            path = group.name
+            variables = {name: obj for name, obj in group.items() if isinstance(obj, h5py.Dataset)}
+            structure[path] = list(variables)
+            dimensions[path] = {
+                name: get_dimension_names({k: _decode_hdf5_attribute(v) for k, v in obj.attrs.items()})
+                for name, obj in variables.items()
+            }
+            for obj in group.values():
+                if isinstance(obj, h5py.Group):
+                    _add_group(obj)
+
+        with h5py.File(filepath, "r") as f:
+            _add_group(f)
+            attrs = {key: _decode_hdf5_attribute(value) for key, value in f.attrs.items()}
+        return {"variables": structure, "dimensions": dimensions, "attrs": attrs}
+
+    import netCDF4
+    from xarray.backends.netCDF4_ import NETCDF4_PYTHON_LOCK
+
+    def _add_group(group, path):
+        structure[path] = list(group.variables)
+        dimensions[path] = {name: get_dimension_names(var.__dict__) for name, var in group.variables.items()}
+        for name, subgroup in group.groups.items():
+            _add_group(subgroup, path=f"{path.rstrip('/')}/{name}")
+
+    with NETCDF4_PYTHON_LOCK, netCDF4.Dataset(filepath, "r") as nc:
+        _add_group(nc, path="/")
+        attrs = nc.__dict__
+    return {"variables": structure, "dimensions": dimensions, "attrs": attrs}
+
+
+def get_hdf5_structure(filepath, engine="netcdf4"):
+    """Return the list of variables of each group of a HDF5 file.
+
+    The variables data are not read.
+    The group paths follow the DataTree paths convention (i.e. ``"/"``, ``"/FS"``, ``"/FS/SLV"``).
+    """
+    return get_hdf5_metadata(filepath, engine=engine)["variables"]
+
+
+def _get_skeleton_datatree(structure):
+    """Create a DataTree with the structure of a HDF5 file, without any data."""
+    return datatree.DataTree.from_dict(
+        {path: xr.Dataset({var: ((), 0) for var in variables}) for path, variables in structure.items()},
+    )
+
+
+def _get_groups_variables_paths(structure, scan_mode, groups, variables):
+    """Return the variables to read from each group of a HDF5 file.
+
+    ``groups`` and ``variables`` must be the output of ``_get_relevant_groups_variables``.
+    """
+    scan_mode_path = f"/{scan_mode}"
+    required = {"/": []}
+    for group in groups:
+        path = scan_mode_path if group in ["", scan_mode] else f"{scan_mode_path}/{group}"
+        group_variables = structure[path]
+        required[path] = None if variables is None else [var for var in group_variables if var in variables]
+    # Add the variables required to define the coordinates
+    if scan_mode == "Grid":
+        coords_variables = {scan_mode_path: GRID_COORDS_VARIABLES}
+    else:
+        coords_variables = {scan_mode_path: ORBIT_COORDS_VARIABLES, f"{scan_mode_path}/ScanTime": SCAN_TIME_VARIABLES}
+    for path, coords_vars in coords_variables.items():
+        if required.get(path, []) is not None:
+            required[path] = list(dict.fromkeys(required.get(path, []) + coords_vars))
+    return required
+
+
+def _get_required_groups_variables(structure, scan_mode, variables=None, groups=None):
+    """Return the variables to read from each group of a HDF5 file.
+
+    It includes the variables requested with ``variables`` and ``groups`` as well as
+    the variables required to define the granule coordinates (see ``gpm.dataset.coords.get_coords``).
+    If the variables of a group are ``None``, all the group variables are read.
+    """
+    dt_skeleton = _get_skeleton_datatree(structure)
+    groups, variables = _get_relevant_groups_variables(
+        dt_skeleton,
+        scan_mode=scan_mode,
+        variables=variables,
+        groups=groups,
+    )
+    return _get_groups_variables_paths(structure, scan_mode=scan_mode, groups=groups, variables=variables)
+
+
+####--------------------------------------------------------------------------.
+###########################
+#### Granule structure ####
+###########################
+
+
+def _create_granule_structure(filepath, scan_mode, engine):
+    """Retrieve the granule structure which is shared by all granules of a product.
+
+    It includes the variables of each group, the variables dimension names and the static global attributes.
+    """
+    metadata = get_hdf5_metadata(filepath, engine=engine)
+    # Empty granules do not have the structure of the product
+    if _is_empty_granule(metadata["attrs"]):
+        raise ValueError(f"{filepath} is an EMPTY granule !")
+    if f"/{scan_mode}" not in metadata["variables"]:
+        raise ValueError(f"The scan mode {scan_mode} is not available in {filepath}.")
+    return {
+        "variables": metadata["variables"],
+        "dimensions": metadata["dimensions"],
+        "static_attrs": get_static_granule_attrs(metadata["attrs"]),
+    }
+
+
+def get_granule_structure(filepath, scan_mode):
+    """Return the structure of a granule scan mode.
+
+    The structure is read from the granule only if the structure of the product
+    is not yet available in the structure cache (see ``gpm.dataset.structure_cache``).
+    """
+    key = get_structure_key(filepath, scan_mode=scan_mode)
+    granule_structure = get_cached_structure(key)
+    if granule_structure is not None:
+        return granule_structure
+    try:
+        granule_structure = _create_granule_structure(filepath, scan_mode=scan_mode, engine=get_reader_engine())
+    except Exception as e:
+        check_valid_granule(filepath)
+        raise ValueError(e)
+    return set_cached_structure(key, granule_structure)
+
+
+def get_structure_groups_variables(granule_structure, scan_mode, variables=None, groups=None):
+    """Return the relevant groups and variables and the variables to read from each group.
+
+    The results are memoized in the granule structure for each combination of ``variables`` and ``groups``.
+    See ``_get_relevant_groups_variables`` and ``_get_required_groups_variables``.
+    """
+    key = (
+        None if variables is None else tuple(variables),
+        None if groups is None else tuple(groups),
+    )
+    memo = granule_structure.setdefault("_groups_variables", {})
+    if key not in memo:
+        structure = granule_structure["variables"]
+        relevant_groups, relevant_variables = _get_relevant_groups_variables(
+            _get_skeleton_datatree(structure),
+            scan_mode=scan_mode,
+            variables=variables,
+            groups=groups,
+        )
+        required = _get_groups_variables_paths(
+            structure,
+            scan_mode=scan_mode,
+            groups=relevant_groups,
+            variables=relevant_variables,
+        )
+        memo[key] = (relevant_groups, relevant_variables, required)
+    # Return copies so that the memoized values can not be modified
+    relevant_groups, relevant_variables, required = memo[key]
+    relevant_variables = None if relevant_variables is None else list(relevant_variables)
+    required = {path: None if group_vars is None else list(group_vars) for path, group_vars in required.items()}
+    return list(relevant_groups), relevant_variables, required
+
+
+####--------------------------------------------------------------------------.
+#################################
+#### Partial DataTree reader ####
+#################################
+
+
+def get_reader_engine():
+    """Return the xarray engine used to read the GPM granules.
+
+    The engine is defined by the ``granule_reader_engine`` GPM-API config.
+    With ``h5netcdf``, the granules are read without the xarray HDF5 lock.
+    Note that h5py still serializes all HDF5 calls with its own global lock: reads from multiple
+    threads do not run concurrently. Use processes (i.e. a dask distributed cluster) to read
+    granules in parallel.
+    """
+    engine = gpm.config.get("granule_reader_engine", "netcdf4")
+    if engine not in VALID_READER_ENGINES:
+        raise ValueError(f"Invalid 'granule_reader_engine' {engine}. Valid engines are {VALID_READER_ENGINES}.")
+    return engine
+
+
+def _get_engine_kwargs(engine):
+    """Return the engine specific arguments of xarray.open_dataset."""
+    if engine == "h5netcdf":
+        # GPM HDF5 files do not define dimension scales
+        # - h5py guards all HDF5 calls with its own global lock, so the xarray HDF5 lock is redundant.
+        #   Reads from multiple threads remain serialized.
+        return {"phony_dims": "access", "lock": False}
+    return {}
+
+
+def open_partial_datatree(
+    filepath,
+    scan_mode,
+    variables=None,
+    groups=None,
+    chunks={},
+    decode_cf=False,
+    use_api_defaults=True,
+    granule_structure=None,
+):
+    """Open in a DataTree object only the HDF5 groups and variables required to create a scan mode dataset.
+
+    Contrary to ``open_datatree``, it does not create the xarray objects of the variables which are not
+    requested with ``variables`` and ``groups``, nor required to define the granule coordinates.
+    The returned DataTree can be processed with ``gpm.dataset.granule._get_scan_mode_dataset``.
+
+    If ``granule_structure`` is not specified, it is retrieved with ``get_granule_structure``.
+    """
+    engine = get_reader_engine()
+    if granule_structure is None:
+        granule_structure = get_granule_structure(filepath, scan_mode=scan_mode)
+    dict_ds = {}
+    try:
+        structure = granule_structure["variables"]
+        if f"/{scan_mode}" not in structure:
+            raise ValueError(f"The scan mode {scan_mode} is not available in {filepath}.")
+        _, _, required = get_structure_groups_variables(
+            granule_structure,
+            scan_mode=scan_mode,
+            variables=variables,
+            groups=groups,
+        )
+        for path, group_variables in required.items():
+            drop_variables = None
+            if group_variables is not None:
+                drop_variables = [var for var in structure[path] if var not in group_variables]
+            dict_ds[path] = xr.open_dataset(
+                filepath,
+                engine=engine,
+                group=path,
+                chunks=chunks,
+                decode_cf=decode_cf,
+                drop_variables=drop_variables,
+                **_get_engine_kwargs(engine),
+            )
+            # Check the granule is not empty before opening the other groups
+            if path == "/":
+                check_non_empty_granule(dict_ds[path], filepath)
+        # Rename the dimensions using the cached dimension names
+        dict_renamed_ds = {
+            path: _rename_dataset_dimensions(
+                ds,
+                use_api_defaults=use_api_defaults,
+                dim_names=granule_structure["dimensions"].get(path),
+            )
+            for path, ds in dict_ds.items()
+        }
+        # Parent groups must be inserted before their children
+        dt = datatree.DataTree.from_dict(dict(sorted(dict_renamed_ds.items(), key=lambda item: item[0].count("/"))))
+    except Exception as e:
+        # Close the groups already opened
+        for ds in dict_ds.values():
+            ds.close()
+        check_valid_granule(filepath)
+        raise ValueError(e)
+
+    # Define the closer of the opened groups
+    def _close():
+        for ds in dict_ds.values():
+            ds.close()
+
+    dt._close = _close
+    return dt
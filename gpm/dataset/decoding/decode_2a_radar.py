@@ -25,21 +25,36 @@
 
 # -----------------------------------------------------------------------------.
 """This module contains functions to decode GPM DPR, PR, Ka and Ku products."""
+import numpy as np
 import xarray as xr
 
 from gpm.dataset.decoding.utils import (
     add_decoded_flag,
-    ceil_dataarray,
+    decode_with_lookup_table,
     is_dataarray_decoded,
-    remap_numeric_array,
 )
 
 
+def _decode_hundreds(values):
+    """Decode codes whose hundreds define the category (< 0 set to np.nan)."""
+    return np.where(values >= 0, np.ceil(values / 100), np.nan)
+
+
+def _decode_phase_values(values):
+    """Decode the phase codes (the codes from -99 to -1 are set to 0, < -99 set to np.nan)."""
+    values = np.ceil(values / 100)
+    return np.where(values >= 0, values, np.nan)
+
+
+def _decode_flagShallowRain_values(values):
+    """Decode the flagShallowRain codes (-11111 and unknown codes set to np.nan)."""
+    remapping_dict = {0: 0, 10: 1, 11: 2, 20: 3, 21: 4}
+    return np.array([remapping_dict.get(value, np.nan) for value in values.tolist()])
+
+
 def decode_landSurfaceType(da):
     """Decode the 2A-<RADAR> variable landSurfaceType."""
-    da = da.where(da >= 0)  # < 0 set to np.nan
-    da = da / 100
-    da = ceil_dataarray(da)
+    da = decode_with_lookup_table(da, _decode_hundreds, valid_range=(0, 399))
     value_dict = {
         0: "Ocean",
         1: "Land",
@@ -69,9 +84,7 @@ def decode_snowIceCover(da):
 
 def decode_phase(da):
     """Decode the 2A-<RADAR> variable phase."""
-    da = da / 100
-    da = ceil_dataarray(da)
-    da = da.where(da >= 0)  # < 0 set to np.nan
+    da = decode_with_lookup_table(da, _decode_phase_values, valid_range=(-99, 299))
     da.attrs["flag_values"] = [0, 1, 2]
     da.attrs["flag_meanings"] = ["solid", "mixed_phase", "liquid"]
     da.attrs["description"] = "Precipitation Phase State"
@@ -80,9 +93,7 @@ def decode_phase(da):
 
 def decode_phaseNearSurface(da):
     """Decode the 2A-<RADAR> variable phaseNearSurface."""
-    da = da / 100
-    da = ceil_dataarray(da)
-    da = da.where(da >= 0)  # < 0 set to np.nan
+    da = decode_with_lookup_table(da, _decode_phase_values, valid_range=(-99, 299))
     da.attrs["flag_values"] = [0, 1, 2]
     da.attrs["flag_meanings"] = ["solid", "mixed_phase", "liquid"]
     da.attrs["description"] = "Precipitation phase state near the surface"
@@ -163,9 +174,7 @@ def decode_reliabFlag(da):
 
 def decode_flagShallowRain(da):
     """Decode the 2A-<RADAR> variable flagShallowRain."""
-    da = da.where(da >= 0)  # -11111 is set to np.nan
-    remapping_dict = {0: 0, 10: 1, 11: 2, 20: 3, 21: 4}
-    da.data = remap_numeric_array(da.data, remapping_dict)
+    da = decode_with_lookup_table(da, _decode_flagShallowRain_values, valid_range=(0, 21))
     value_dict = {
         0: "No shallow rain",
         1: "Shallow isolated (maybe)",
@@ -25,6 +25,9 @@
 
 # -----------------------------------------------------------------------------.
 """This module contains utilities for the decoding of GPM product variables."""
+import functools
+
+import dask
 import dask.array
 import numpy as np
 
@@ -80,3 +83,96 @@ def ceil_dataarray(da):
     data = np.ceil(data) if hasattr(data, "chunks") else dask.array.ceil(data)
     da.data = data
     return da
+
+
+####--------------------------------------------------------------------------.
+#### Lookup tables
+
+
+def get_decoded_dtype(dtype):
+    """Return the floating dtype of the decoded values of a source dtype.
+
+    Integers up to 16 bits are decoded to ``float32``, larger integers to ``float64``,
+    as with ``xarray.DataArray.where``.
+    """
+    return np.result_type(np.dtype(dtype), np.float32)
+
+
+@functools.lru_cache
+def compile_lookup_table(decode_values, dtype, valid_range):
+    """Compile an elementwise decoding function into a dense lookup table.
+
+    If the source ``dtype`` is an integer of at most 16 bits, the lookup table covers all its values.
+    Otherwise, the lookup table covers the ``valid_range`` ``(vmin, vmax)`` values.
+
+    Returns
+    -------
+    lut : numpy.ndarray
+        The decoded value of each source value ``vmin + i``.
+    vmin : int
+        The source value of the first entry of the lookup table.
+
+    """
+    dtype = np.dtype(dtype)
+    if np.issubdtype(dtype, np.integer) and dtype.itemsize <= 2:
+        vmin, vmax = np.iinfo(dtype).min, np.iinfo(dtype).max
+    else:
+        vmin, vmax = valid_range
+    with np.errstate(invalid="ignore", divide="ignore"):
+        lut = np.asarray(decode_values(np.arange(vmin, vmax + 1)), dtype=get_decoded_dtype(dtype))
+    lut.flags.writeable = False
+    return lut, int(vmin)
+
+
+def _np_apply_lookup_table(arr, lut, vmin, decode_values=None, fill_value=np.nan):
+    # Source values outside the lookup table (and NaN) are decoded elementwise or set to fill_value
+    is_valid = (arr >= vmin) & (arr <= vmin + lut.size - 1)
+    index = np.where(is_valid, arr, vmin).astype(np.intp, copy=False)
+    decoded = lut.take(index - vmin)
+    if decode_values is None:
+        decoded[~is_valid] = fill_value
+    elif not np.all(is_valid):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            decoded[~is_valid] = decode_values(arr[~is_valid])
+    return decoded
+
+
+def _dask_apply_lookup_table(arr, lut, vmin, decode_values=None, fill_value=np.nan):
+    # The lookup table is added once to the graph and shared by the tasks of all chunks
+    lut_delayed = dask.delayed(lut, pure=True)
+    return dask.array.map_blocks(
+        _np_apply_lookup_table,
+        arr,
+        lut_delayed,
+        vmin,
+        decode_values,
+        fill_value,
+        dtype=lut.dtype,
+    )
+
+
+def apply_lookup_table(arr, lut, vmin, decode_values=None, fill_value=np.nan):
+    """Decode the values of a numeric array with a lookup table.
+
+    The array can be a float array with NaN (i.e. CF-decoded integer codes):
+    the values are cast to integer indices. The NaN and the values outside the
+    lookup table are decoded with the elementwise ``decode_values`` function if
+    specified, otherwise they are set to ``fill_value``.
+    """
+    if hasattr(arr, "chunks"):
+        return _dask_apply_lookup_table(arr, lut, vmin, decode_values=decode_values, fill_value=fill_value)
+    return _np_apply_lookup_table(np.asarray(arr), lut, vmin, decode_values=decode_values, fill_value=fill_value)
+
+
+def decode_with_lookup_table(da, decode_values, valid_range):
+    """Decode a xarray.DataArray of integer codes in a single pass.
+
+    The elementwise ``decode_values`` function is compiled into a lookup table over the values
+    of the source dtype (i.e. the file dtype before CF decoding), and the lookup table is applied
+    with a single task per chunk. The DataArray is expected to be already CF-decoded
+    (i.e. float with NaN fill values). NaN and the values outside the lookup table
+    are decoded with ``decode_values``, so that the decoding does not depend on ``valid_range``.
+    """
+    source_dtype = da.encoding.get("dtype", da.dtype)
+    lut, vmin = compile_lookup_table(decode_values, np.dtype(source_dtype), tuple(valid_range))
+    return da.copy(data=apply_lookup_table(da.data, lut, vmin, decode_values=decode_values))
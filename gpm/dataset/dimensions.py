@@ -110,12 +110,28 @@ def _has_a_phony_dim(xr_obj):
     return np.any([dim.startswith("phony_dim") for dim in list(xr_obj.dims)]).item()
 
 
-def _get_dataarray_dim_dict(da):
-    """Return a dictionary mapping each xarray.DataArray phony_dim to the actual dimension name."""
+def get_dimension_names(attrs):
+    """Return the list of dimension names specified in the HDF5 ``DimensionNames`` attribute.
+
+    Returns ``None`` if the attribute is not specified.
+    """
+    dim_names_str = attrs.get("DimensionNames", None)
+    if dim_names_str is None:
+        return None
+    if isinstance(dim_names_str, bytes):
+        dim_names_str = dim_names_str.decode()
+    return dim_names_str.split(",")
+
+
+def _get_dataarray_dim_dict(da, dim_names=None):
+    """Return a dictionary mapping each xarray.DataArray phony_dim to the actual dimension name.
+
+    If ``dim_names`` is not specified, the dimension names are retrieved from the ``DimensionNames`` attribute.
+    """
     dim_dict = {}
-    dim_names_str = da.attrs.get("DimensionNames", None)
-    if dim_names_str is not None:
-        dim_names = dim_names_str.split(",")
+    if dim_names is None:
+        dim_names = get_dimension_names(da.attrs)
+    if dim_names is not None:
         for dim, new_dim in zip(list(da.dims), dim_names):
             # Deal with missing DimensionNames in
             # - sunVectorInBodyFrame variable in V5 products
@@ -154,21 +170,23 @@ def _get_gpm_api_dims_dict(ds):
     return rename_dim_dict
 
 
-def _rename_dataarray_dimensions(da):
+def _rename_dataarray_dimensions(da, dim_names=None):
     """Rename xarray.DataArray dimensions."""
     if _has_a_phony_dim(da):
-        da = da.rename(_get_dataarray_dim_dict(da))
+        da = da.rename(_get_dataarray_dim_dict(da, dim_names=dim_names))
     return da
 
 
-def _rename_dataset_dimensions(ds, use_api_defaults=True):
+def _rename_dataset_dimensions(ds, use_api_defaults=True, dim_names=None):
     """Rename xarray.Dataset dimension to the actual dimension names.
 
-    The actual dimensions names are retrieved from the xarray.DataArrays DimensionNames attribute.
+    The actual dimensions names are retrieved from the xarray.DataArrays DimensionNames attribute,
+    unless they are provided for each variable with the ``dim_names`` dictionary.
     The dimension renaming is performed at each Dataset level.
     If use_api_defaults is True (the default), it sets the GPM-API dimension names.
     """
-    dict_da = {var: _rename_dataarray_dimensions(ds[var]) for var in ds.data_vars}
+    dim_names = {} if dim_names is None else dim_names
+    dict_da = {var: _rename_dataarray_dimensions(ds[var], dim_names=dim_names.get(var)) for var in ds.data_vars}
     ds = xr.Dataset(dict_da, attrs=ds.attrs)
     if use_api_defaults:
         ds = ds.rename_dims(_get_gpm_api_dims_dict(ds))
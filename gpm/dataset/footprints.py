@@ -0,0 +1,371 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module contains functions to compute and cache the spatial footprint of GPM granules.
+
+The footprint of an orbit granule is defined by the longitude and latitude bounding box and
+the time window of consecutive blocks of scans. It enables to select the granules (and the along-track scans)
+intersecting an area of interest without opening the granules (see also ``gpm.find_overpasses``).
+
+The footprints are cached in the ``footprints`` table of the local granules catalog
+(see ``gpm.io.catalog``) if the ``local_catalog`` GPM-API config is enabled.
+If the catalog can not be opened (i.e. read-only ``base_dir``), the footprints are computed in memory.
+"""
+import sqlite3
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from gpm import config
+from gpm.io.catalog import _open_catalog
+from gpm.io.data_integrity import _get_file_signature
+
+FOOTPRINT_BLOCK_SIZE = 10
+_MAX_QUERY_FILEPATHS = 500
+
+
+####--------------------------------------------------------------------------.
+###########################
+#### Granule footprint ####
+###########################
+
+
+def _read_granule_geolocation(filepath, scan_mode):
+    """Read the longitude, latitude and scan time of an orbit granule scan mode.
+
+    The longitude and latitude arrays have shape (n_scans, n_pixels).
+    Invalid geolocation values are set to NaN and invalid scan times to NaT.
+    """
+    import netCDF4
+    from xarray.backends.netCDF4_ import NETCDF4_PYTHON_LOCK
+
+    with NETCDF4_PYTHON_LOCK, netCDF4.Dataset(filepath, "r") as nc:
+        nc.set_auto_mask(False)
+        group = nc[scan_mode]
+        lon = np.array(group["Longitude"][:], dtype="float64")
+        lat = np.array(group["Latitude"][:], dtype="float64")
+        dict_time = {
+            key: group["ScanTime"][name][:]
+            for key, name in [
+                ("year", "Year"),
+                ("month", "Month"),
+                ("day", "DayOfMonth"),
+                ("hour", "Hour"),
+                ("minute", "Minute"),
+                ("second", "Second"),
+            ]
+        }
+    lon = lon.reshape(lon.shape[0], -1)
+    lat = lat.reshape(lat.shape[0], -1)
+    is_invalid = (np.abs(lon) > 180) | (np.abs(lat) > 90)
+    lon[is_invalid] = np.nan
+    lat[is_invalid] = np.nan
+    time = pd.to_datetime(dict_time, errors="coerce").to_numpy().astype("M8[s]")
+    return lon, lat, time
+
+
+def _get_blocks_bounds(arr, block_size):
+    """Return the minimum and maximum value of each block of ``block_size`` rows."""
+    arr = arr.reshape(arr.shape[0], -1)
+    n_blocks = int(np.ceil(arr.shape[0] / block_size))
+    n_padding = n_blocks * block_size - arr.shape[0]
+    arr = np.pad(arr, ((0, n_padding), (0, 0)), constant_values=np.nan).reshape(n_blocks, -1)
+    # Blocks without valid values have NaN bounds
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        return np.nanmin(arr, axis=1), np.nanmax(arr, axis=1)
+
+
+def _get_blocks_lon_bounds(lon, block_size):
+    """Return the longitude bounds of each block of scans.
+
+    The bounds of the blocks crossing the antimeridian are defined in the [0, 360] longitude frame,
+    so that their longitude range is not the entire globe.
+    """
+    lon_min, lon_max = _get_blocks_bounds(lon, block_size=block_size)
+    lon360_min, lon360_max = _get_blocks_bounds(lon % 360, block_size=block_size)
+    is_crossing_antimeridian = (lon360_max - lon360_min) < (lon_max - lon_min)
+    lon_min = np.where(is_crossing_antimeridian, lon360_min, lon_min)
+    lon_max = np.where(is_crossing_antimeridian, lon360_max, lon_max)
+    return lon_min, lon_max
+
+
+def _get_blocks_time_bounds(time, block_size):
+    """Return the first and last scan time of each block of scans."""
+    time_min, time_max = _get_blocks_bounds(_datetime_to_seconds(time), block_size=block_size)
+    return _seconds_to_datetime(np.stack([time_min, time_max], axis=1))
+
+
+def _seconds_to_datetime(seconds):
+    """Convert an array of seconds since 1970-01-01 (with NaN) to a datetime64 array (with NaT)."""
+    time = np.full(seconds.shape, np.datetime64("NaT"), dtype="M8[s]")
+    is_valid = ~np.isnan(seconds)
+    time[is_valid] = seconds[is_valid].astype("int64").astype("M8[s]")
+    return time
+
+
+def _datetime_to_seconds(time):
+    """Convert a datetime64 array (with NaT) to an array of seconds since 1970-01-01 (with NaN)."""
+    seconds = time.astype("M8[s]").astype("int64").astype("float64")
+    seconds[np.isnat(time)] = np.nan
+    return seconds
+
+
+def compute_granule_footprint(filepath, scan_mode, block_size=None):
+    """Compute the footprint of an orbit granule scan mode.
+
+    Parameters
+    ----------
+    filepath : str
+        Filepath of the GPM granule.
+    scan_mode : str
+        Scan mode of the GPM granule.
+    block_size : int, optional
+        Number of scans of each footprint block.
+        The default is ``None`` (``FOOTPRINT_BLOCK_SIZE``).
+
+    Returns
+    -------
+    footprint : dict
+        Dictionary with the following keys:
+
+        - ``"bounds"``: array of shape (n_blocks, 4) with the ``[lon_min, lon_max, lat_min, lat_max]``
+          bounding box of each block of scans. The longitude bounds of the blocks crossing the
+          antimeridian are defined in the [0, 360] longitude frame.
+        - ``"time_bounds"``: array of shape (n_blocks, 2) with the first and last scan time of each block.
+        - ``"block_size"``: the number of scans of each block.
+        - ``"n_scans"``: the number of scans of the granule.
+
+    """
+    block_size = block_size or FOOTPRINT_BLOCK_SIZE
+    lon, lat, time = _read_granule_geolocation(filepath, scan_mode=scan_mode)
+    lon_min, lon_max = _get_blocks_lon_bounds(lon, block_size=block_size)
+    lat_min, lat_max = _get_blocks_bounds(lat, block_size=block_size)
+    return {
+        "bounds": np.stack([lon_min, lon_max, lat_min, lat_max], axis=1),
+        "time_bounds": _get_blocks_time_bounds(time, block_size=block_size),
+        "block_size": block_size,
+        "n_scans": lon.shape[0],
+    }
+
+
+####--------------------------------------------------------------------------.
+#########################
+#### Footprint cache ####
+#########################
+
+
+def _get_footprints_base_dir(base_dir=None):
+    """Return the base directory where the footprints are cached, or ``None`` if not configured."""
+    return base_dir or config.get("base_dir", None)
+
+
+def read_cached_footprints(filepaths, scan_mode, base_dir=None):
+    """Return the cached footprints of the granules which did not change since their footprint was computed.
+
+    If the cache can not be read, no footprints are returned.
+    """
+    base_dir = _get_footprints_base_dir(base_dir)
+    if base_dir is None or len(filepaths) == 0:
+        return {}
+    rows = []
+    try:
+        with _open_catalog(base_dir=base_dir) as connection:
+            for i in range(0, len(filepaths), _MAX_QUERY_FILEPATHS):
+                subset_filepaths = filepaths[i : i + _MAX_QUERY_FILEPATHS]
+                query = (
+                    "SELECT filepath, size, mtime, block_size, n_scans, bounds, time_bounds FROM footprints "
+                    f"WHERE scan_mode = ? AND filepath IN ({', '.join('?' * len(subset_filepaths))})"
+                )
+                rows += connection.execute(query, (scan_mode, *subset_filepaths)).fetchall()
+    except (OSError, sqlite3.Error):
+        return {}
+    footprints = {}
+    for filepath, size, mtime, block_size, n_scans, bounds, time_bounds in rows:
+        if _get_file_signature(filepath) == (size, mtime) and block_size == FOOTPRINT_BLOCK_SIZE:
+            footprints[filepath] = {
+                "bounds": np.frombuffer(bounds, dtype="float64").reshape(-1, 4),
+                "time_bounds": _seconds_to_datetime(np.frombuffer(time_bounds, dtype="float64").reshape(-1, 2)),
+                "block_size": block_size,
+                "n_scans": n_scans,
+            }
+    return footprints
+
+
+def update_cached_footprints(footprints, scan_mode, base_dir=None):
+    """Record the footprints of granules in the local granules catalog.
+
+    If the cache can not be written (i.e. read-only ``base_dir``), the footprints are not recorded.
+    """
+    base_dir = _get_footprints_base_dir(base_dir)
+    if base_dir is None or len(footprints) == 0:
+        return
+    records = []
+    for filepath, footprint in footprints.items():
+        signature = _get_file_signature(filepath)
+        if signature is not None:
+            bounds = np.ascontiguousarray(footprint["bounds"], dtype="float64").tobytes()
+            time_bounds = _datetime_to_seconds(footprint["time_bounds"]).tobytes()
+            records.append(
+                (filepath, scan_mode, *signature, footprint["block_size"], footprint["n_scans"], bounds, time_bounds),
+            )
+    try:
+        with _open_catalog(base_dir=base_dir) as connection:
+            connection.executemany("INSERT OR REPLACE INTO footprints VALUES (?, ?, ?, ?, ?, ?, ?, ?)", records)
+    except (OSError, sqlite3.Error):
+        return
+
+
+def get_granules_footprints(filepaths, scan_mode, base_dir=None, use_cache=None):
+    """Return the footprint of the granules scan mode.
+
+    Only the footprints not available in the cache are computed.
+    The footprint of granules which can not be read is ``None``.
+    If ``use_cache=None``, the cache is used only if the ``local_catalog`` GPM-API config is enabled.
+    """
+    if use_cache is None:
+        use_cache = bool(config.get("local_catalog", False))
+    footprints = read_cached_footprints(filepaths, scan_mode=scan_mode, base_dir=base_dir) if use_cache else {}
+    new_footprints = {}
+    for filepath in filepaths:
+        if filepath in footprints:
+            continue
+        try:
+            new_footprints[filepath] = compute_granule_footprint(filepath, scan_mode=scan_mode)
+        except Exception:
+            footprints[filepath] = None
+    if use_cache:
+        update_cached_footprints(new_footprints, scan_mode=scan_mode, base_dir=base_dir)
+    footprints.update(new_footprints)
+    return footprints
+
+
+####--------------------------------------------------------------------------.
+#########################
+#### Spatial request ####
+#########################
+
+
+def get_request_extent(extent=None, country=None, point=None, distance=None):
+    """Return the extent of the area of interest of a spatial request, or ``None`` if not specified."""
+    from gpm.utils.geospatial import check_extent, get_country_extent, get_geographic_extent_around_point
+
+    if sum(arg is not None for arg in [extent, country, point]) > 1:
+        raise ValueError("Specify only one of 'extent', 'country' and 'point'.")
+    if country is not None:
+        return get_country_extent(country)
+    if point is not None:
+        if distance is None:
+            raise ValueError("Specify the 'distance' (in meters) around the 'point'.")
+        lon, lat = point
+        return get_geographic_extent_around_point(lon=lon, lat=lat, distance=distance)
+    if extent is not None:
+        extent = check_extent(extent)
+    return extent
+
+
+def get_intersecting_blocks(footprint, extent):
+    """Return a boolean array indicating the footprint blocks intersecting the extent.
+
+    The extent must follow the ``[x_min, x_max, y_min, y_max]`` convention.
+    """
+    lon_min, lon_max, lat_min, lat_max = footprint["bounds"].T
+    # Blocks crossing the antimeridian are defined in the [0, 360] longitude frame
+    # Blocks without valid geolocation (NaN bounds) do not intersect
+    is_lat_intersecting = (lat_max >= extent[2]) & (lat_min <= extent[3])
+    is_lon_intersecting = (lon_max >= extent[0]) & (lon_min <= extent[1])
+    is_lon_intersecting |= (lon_max >= extent[0] + 360) & (lon_min <= extent[1] + 360)
+    return is_lat_intersecting & is_lon_intersecting
+
+
+def get_footprint_along_track_slice(footprint, extent):
+    """Return the along-track slice covering the footprint blocks intersecting the extent.
+
+    Returns ``None`` if the footprint does not intersect the extent.
+    The extent must follow the ``[x_min, x_max, y_min, y_max]`` convention.
+    """
+    indices = np.where(get_intersecting_blocks(footprint, extent=extent))[0]
+    if indices.size == 0:
+        return None
+    block_size = footprint["block_size"]
+    start = int(indices[0]) * block_size
+    stop = min((int(indices[-1]) + 1) * block_size, footprint["n_scans"])
+    return slice(start, stop)
+
+
+def get_granules_isel_dicts(filepaths, scan_mode, extent, base_dir=None):
+    """Return the along-track hyperslab of the granules which intersect the extent.
+
+    The granules which do not intersect the extent are not returned.
+    The granules of GRID products and the granules whose footprint can not be computed
+    are returned with an empty isel dictionary.
+
+    Returns
+    -------
+    isel_dicts : dict
+        Dictionary with the isel dictionary of each granule filepath.
+
+    """
+    if scan_mode == "Grid":
+        return {filepath: {} for filepath in filepaths}
+    footprints = get_granules_footprints(filepaths, scan_mode=scan_mode, base_dir=base_dir)
+    isel_dicts = {}
+    for filepath in filepaths:
+        footprint = footprints[filepath]
+        if footprint is None:
+            isel_dicts[filepath] = {}
+            continue
+        along_track_slice = get_footprint_along_track_slice(footprint, extent=extent)
+        if along_track_slice is not None:
+            isel_dicts[filepath] = {"along_track": along_track_slice}
+    return isel_dicts
+
+
+def crop_granule(ds, extent, isel_dict=None):
+    """Crop a granule dataset over the extent.
+
+    The hyperslab defined by ``isel_dict`` is selected before searching the pixels within the extent
+    with ``gpm.utils.geospatial.get_crop_slices_by_extent``. Only this hyperslab of the coordinates is read.
+    For ORBIT granules, the along-track slice from the first to the last scan with pixels within the extent
+    is selected.
+
+    Returns ``None`` if the granule has no pixels within the extent.
+    """
+    from gpm.utils.geospatial import get_crop_slices_by_extent
+
+    if isel_dict:
+        ds = ds.isel(isel_dict)
+    try:
+        slices = get_crop_slices_by_extent(ds, extent)
+    except ValueError:
+        return None
+    if isinstance(slices, list):
+        along_track_slices = [isel_dict["along_track"] for isel_dict in slices]
+        start = min(slc.start for slc in along_track_slices)
+        stop = max(slc.stop for slc in along_track_slices)
+        slices = {"along_track": slice(start, stop)}
+    return ds.isel(slices)
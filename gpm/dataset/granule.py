@@ -31,7 +31,8 @@ import numpy as np
 import xarray as xr
 
 from gpm.dataset.attrs import get_granule_attrs
-from gpm.dataset.conventions import finalize_dataset
+from gpm.dataset.chunks import chunk_dataset
+from gpm.dataset.conventions import check_validate, finalize_dataset
 from gpm.dataset.coords import get_coords
 from gpm.dataset.groups_variables import _get_relevant_groups_variables
 from gpm.io.checks import (
@@ -40,6 +41,7 @@ from gpm.io.checks import (
     check_variables,
 )
 from gpm.io.info import get_product_from_filepath, get_version_from_filepath
+from gpm.io.quota import record_local_access
 
 
 def _prefix_dataset_group_variables(ds, group):
@@ -81,22 +83,37 @@ def _process_group_dataset(ds, group, variables, prefix_group=False):
     return ds
 
 
-def _get_scan_mode_info(dt, scan_mode, variables, groups):
-    """Retrieve coordinates, attributes and valid variables and groups."""
+def _get_scan_mode_info(dt, scan_mode, variables, groups, granule_structure=None):
+    """Retrieve coordinates, attributes and valid variables and groups.
+
+    If the ``granule_structure`` is specified (see ``gpm.dataset.datatree.get_granule_structure``),
+    the static global attributes and the relevant groups and variables are retrieved from it.
+    """
+    from gpm.dataset.datatree import get_structure_groups_variables
+
     # Get global attributes from the root
-    attrs = get_granule_attrs(dt)
+    static_attrs = None if granule_structure is None else granule_structure["static_attrs"]
+    attrs = get_granule_attrs(dt, static_attrs=static_attrs)
     attrs["ScanMode"] = scan_mode
 
     # Get coordinates
     coords = get_coords(dt, scan_mode)
 
     # Get groups to process (filtering out groups without any `variables`)
-    groups, variables = _get_relevant_groups_variables(
-        dt,
-        scan_mode=scan_mode,
-        variables=variables,
-        groups=groups,
-    )
+    if granule_structure is None:
+        groups, variables = _get_relevant_groups_variables(
+            dt,
+            scan_mode=scan_mode,
+            variables=variables,
+            groups=groups,
+        )
+    else:
+        groups, variables, _ = get_structure_groups_variables(
+            granule_structure,
+            scan_mode=scan_mode,
+            variables=variables,
+            groups=groups,
+        )
     return (coords, attrs, groups, variables)
 
 
@@ -120,6 +137,7 @@ def _get_scan_mode_dataset(
     variables=None,
     groups=None,
     prefix_group=False,
+    granule_structure=None,
 ):
     """Retrieve scan mode xarray.Dataset."""
     # Retrieve granule info
@@ -128,6 +146,7 @@ def _get_scan_mode_dataset(
         scan_mode=scan_mode,
         variables=variables,
         groups=groups,
+        granule_structure=granule_structure,
     )
 
     # Create flattened dataset for a specific scan_mode
@@ -192,12 +211,74 @@ def _open_granule(
     decode_cf,
     chunks,
     prefix_group,
+    use_optimized=True,
+    engine=None,
 ):
-    """Open granule file into xarray Dataset."""
-    from gpm.dataset.datatree import open_datatree
+    """Open granule file into xarray Dataset.
 
-    # Open datatree
-    dt = open_datatree(filepath=filepath, chunks=chunks, decode_cf=decode_cf, use_api_defaults=True)
+    If ``use_optimized=True``, the optimized granule is read if available (see ``gpm.optimize_archive``).
+    If ``engine="references"``, the granule is read through its reference file (see ``gpm.index_archive``).
+    With ``chunks="auto"``, the granule is opened lazily and the variables are then chunked
+    with multiples of the file chunks (see ``gpm.dataset.chunks``).
+    """
+    from gpm.dataset.datatree import get_granule_structure, open_partial_datatree
+    from gpm.dataset.optimize import open_optimized_granule
+    from gpm.dataset.references import open_references_granule
+
+    if chunks == "auto":
+        ds = _open_granule(
+            filepath,
+            scan_mode=scan_mode,
+            groups=groups,
+            variables=variables,
+            decode_cf=decode_cf,
+            chunks=None if engine != "references" else {},
+            prefix_group=prefix_group,
+            use_optimized=use_optimized,
+            engine=engine,
+        )
+        return chunk_dataset(ds)
+
+    # Open the granule from its references
+    if engine == "references":
+        return open_references_granule(
+            filepath,
+            scan_mode=scan_mode,
+            groups=groups,
+            variables=variables,
+            decode_cf=decode_cf,
+            chunks=chunks,
+            prefix_group=prefix_group,
+        )
+
+    # Open the optimized granule if available
+    if use_optimized:
+        ds = open_optimized_granule(
+            filepath,
+            scan_mode=scan_mode,
+            groups=groups,
+            variables=variables,
+            decode_cf=decode_cf,
+            chunks=chunks,
+            prefix_group=prefix_group,
+        )
+        if ds is not None:
+            return ds
+
+    # Retrieve the product granule structure (cached after the first granule)
+    granule_structure = get_granule_structure(filepath, scan_mode=scan_mode)
+
+    # Open the datatree groups and variables required to create the scan mode dataset
+    dt = open_partial_datatree(
+        filepath=filepath,
+        scan_mode=scan_mode,
+        variables=variables,
+        groups=groups,
+        chunks=chunks,
+        decode_cf=decode_cf,
+        use_api_defaults=True,
+        granule_structure=granule_structure,
+    )
 
     # Retrieve the granule dataset (without cf decoding)
     ds = _get_scan_mode_dataset(
@@ -206,6 +287,7 @@ def _open_granule(
         groups=groups,
         variables=variables,
         prefix_group=prefix_group,
+        granule_structure=granule_structure,
     )
 
     ###-----------------------------------------------------------------------.
@@ -230,6 +312,7 @@ def open_granule(
     decode_cf=True,
     chunks={},
     prefix_group=False,
+    validate="eager",
 ):
     """Create a lazy xarray.Dataset with relevant GPM data and attributes for a specific granule.
 
@@ -258,7 +341,8 @@ def open_granule(
 
         - ``chunks=-1`` loads the dataset with dask using a single chunk for all arrays.
         - ``chunks={}`` loads the dataset with dask using the file chunks.
-        - ``chunks='auto'`` will use dask ``auto`` chunking taking into account the file chunks.
+        - ``chunks='auto'`` loads the dataset with dask using multiples of the file chunks.
+          The chunks size is bounded by the ``chunks_target_size`` GPM-API config (see ``gpm.dataset.chunks``).
 
         If you want to load data in memory directly, specify ``chunks=None``.
         The default is ``{}``.
@@ -271,6 +355,15 @@ def open_granule(
     prefix_group: bool, optional
         Whether to add the group as a prefix to the variable names.
         THe default is ``True``.
+    validate : str, optional
+        How the dataset quality checks are run:
+
+        - ``'eager'``: check the dataset scans contiguity and geolocation validity when opening the dataset.
+        - ``'lazy'``: run the checks only when accessed (i.e. ``ds.gpm.is_regular``). Results are memoized.
+        - ``'off'``: skip also the warnings about the time period coverage.
+
+        With ``'lazy'`` and ``'off'``, the longitude and latitude coordinates are not loaded in memory.
+        The default is ``'eager'``.
 
     Returns
     -------
@@ -280,6 +373,7 @@ def open_granule(
     # Check variables and groups
     variables = check_variables(variables)
     groups = check_groups(groups)
+    validate = check_validate(validate)
 
     # Get product and version
     product = get_product_from_filepath(filepath)
@@ -289,6 +383,7 @@ def open_granule(
     scan_mode = check_scan_mode(scan_mode, product, version)
 
     # Open granule
+    record_local_access(filepath)
     ds = _open_granule(
         filepath=filepath,
         scan_mode=scan_mode,
@@ -307,4 +402,5 @@ def open_granule(
         decode_cf=decode_cf,
         start_time=None,
         end_time=None,
+        validate=validate,
     )
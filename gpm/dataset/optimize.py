@@ -0,0 +1,383 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module contains functions to create an optimized mirror of the local GPM archive.
+
+The raw GPM HDF5 granules use small chunks and contain hundreds of variables.
+``optimize_archive`` converts the granules into compressed netCDF files which contain only the
+variables of interest, stored with large chunks.
+
+The optimized granules are stored in ``<base_dir>/GPM/OPTIMIZED`` with the same directory structure
+of the local archive. The file ``<filename>.<scan_mode>.nc`` contains the ``scan_mode`` dataset of
+the ``<filename>`` granule, before the GPM-API conventions are applied (see ``finalize_dataset``).
+
+If the ``use_optimized_archive`` GPM-API config is ``True`` (the default), ``gpm.open_dataset``
+and ``gpm.open_granule`` read the optimized granules when they contain all the requested variables.
+"""
+import os
+
+import dask
+import numpy as np
+import xarray as xr
+
+from gpm._config import config
+from gpm.encoding.routines import set_encoding
+from gpm.io.checks import (
+    check_groups,
+    check_product,
+    check_scan_mode,
+    check_start_end_time,
+    check_valid_time_request,
+    check_variables,
+)
+from gpm.io.find import find_filepaths
+from gpm.io.info import get_product_from_filepath, get_version_from_filepath
+from gpm.io.local import get_mirror_filepath, get_partial_filepath, is_mirror_file_updated
+from gpm.utils.list import split_list_in_blocks
+from gpm.utils.parallel import compute_list_delayed
+
+OPTIMIZED_DIRNAME = "OPTIMIZED"
+OPTIMIZED_ALL_VARIABLES_ATTR = "gpm_api_optimized_all_variables"
+
+
+####--------------------------------------------------------------------------.
+##############################
+#### Optimized file paths ####
+##############################
+
+
+def get_optimized_filepath(filepath, scan_mode, base_dir=None):
+    """Return the file path of the optimized granule of a local granule.
+
+    Returns ``None`` if the granule is not located in the local GPM archive.
+    """
+    return get_mirror_filepath(filepath, dirname=OPTIMIZED_DIRNAME, extension=f".{scan_mode}.nc", base_dir=base_dir)
+
+
+def is_optimized_granule_available(filepath, scan_mode, base_dir=None):
+    """Return ``True`` if an up-to-date optimized granule exists."""
+    optimized_filepath = get_optimized_filepath(filepath, scan_mode=scan_mode, base_dir=base_dir)
+    return is_mirror_file_updated(filepath, mirror_filepath=optimized_filepath)
+
+
+####--------------------------------------------------------------------------.
+##########################
+#### Granule encoding ####
+##########################
+
+
+def check_compression(compression):
+    """Check the validity of the compression algorithm."""
+    valid_compressions = ["zstd", "zlib", None]
+    if compression not in valid_compressions:
+        raise ValueError(f"Invalid compression '{compression}'. Valid compressions are {valid_compressions}.")
+    if compression == "zstd":
+        import netCDF4
+
+        if not getattr(netCDF4, "__has_zstandard_support__", False):
+            raise ValueError("The netCDF4 library does not support the zstd compression. Use 'zlib' instead.")
+    return compression
+
+
+def _get_chunksizes(da, chunks):
+    """Return the on-disk chunk sizes of a variable.
+
+    Dimensions not specified in ``chunks`` (or with value ``-1``) are stored in a single chunk.
+    """
+    return tuple(
+        size if chunks.get(dim, -1) in [-1, None] else min(chunks[dim], size) for dim, size in zip(da.dims, da.shape)
+    )
+
+
+def get_optimized_encoding_dict(ds, compression="zstd", complevel=3, chunks=None):
+    """Define the encoding of the variables of an optimized granule."""
+    chunks = {} if chunks is None else chunks
+    compression_encoding = {}
+    if compression == "zstd":
+        compression_encoding = {"compression": "zstd", "complevel": complevel, "shuffle": True}
+    elif compression == "zlib":
+        compression_encoding = {"zlib": True, "complevel": complevel, "shuffle": True}
+    encoding_dict = {}
+    for name, da in ds.variables.items():
+        if da.ndim == 0 or da.dtype.kind in ["O", "U", "S", "M", "m"]:
+            continue
+        encoding_dict[name] = {**compression_encoding, "chunksizes": _get_chunksizes(da, chunks)}
+    return encoding_dict
+
+
+def _sanitize_attrs(attrs):
+    """Convert the attributes values which can not be written into a netCDF file."""
+    sanitized_attrs = {}
+    for key, value in attrs.items():
+        if value is None:
+            continue
+        if isinstance(value, (bool, np.bool_)):
+            value = int(value)
+        elif not isinstance(value, (str, int, float, np.number, np.ndarray, list, tuple)):
+            value = str(value)
+        sanitized_attrs[key] = value
+    return sanitized_attrs
+
+
+def _prepare_optimized_dataset(ds, compression, complevel, chunks):
+    """Reset the source encodings and define the encodings of the optimized granule."""
+    ds.attrs = _sanitize_attrs(ds.attrs)
+    for name in ds.variables:
+        ds[name].attrs = _sanitize_attrs(ds[name].attrs)
+        ds[name].encoding = {}
+    encoding_dict = get_optimized_encoding_dict(ds, compression=compression, complevel=complevel, chunks=chunks)
+    return set_encoding(ds, encoding_dict=encoding_dict)
+
+
+####--------------------------------------------------------------------------.
+##############################
+#### Granule optimization ####
+##############################
+
+
+def optimize_granule(
+    filepath,
+    scan_mode=None,
+    variables=None,
+    groups=None,
+    compression="zstd",
+    complevel=3,
+    chunks=None,
+    force=False,
+    base_dir=None,
+):
+    """Write the optimized granule of a local granule.
+
+    Returns the file path of the optimized granule.
+    """
+    from gpm.dataset.granule import _open_granule
+
+    product = get_product_from_filepath(filepath)
+    version = get_version_from_filepath(filepath)
+    scan_mode = check_scan_mode(scan_mode, product, version=version)
+    optimized_filepath = get_optimized_filepath(filepath, scan_mode=scan_mode, base_dir=base_dir)
+    if optimized_filepath is None:
+        raise ValueError(f"{filepath} is not located in the local GPM archive.")
+    if not force and is_optimized_granule_available(filepath, scan_mode=scan_mode, base_dir=base_dir):
+        return optimized_filepath
+
+    # Read the granule into memory
+    ds = _open_granule(
+        filepath,
+        scan_mode=scan_mode,
+        groups=groups,
+        variables=variables,
+        decode_cf=False,
+        chunks=None,
+        prefix_group=False,
+        use_optimized=False,
+    )
+    ds = _prepare_optimized_dataset(ds, compression=compression, complevel=complevel, chunks=chunks)
+    ds.attrs[OPTIMIZED_ALL_VARIABLES_ATTR] = int(variables is None and groups is None)
+
+    # Write the optimized granule
+    # - The file is first written to a partial file, which is then moved to its final path
+    os.makedirs(os.path.dirname(optimized_filepath), exist_ok=True)
+    partial_filepath = get_partial_filepath(optimized_filepath)
+    try:
+        ds.to_netcdf(partial_filepath, engine="netcdf4")
+    finally:
+        ds.close()
+    os.replace(partial_filepath, optimized_filepath)
+    return optimized_filepath
+
+
+def _try_optimize_granule(**kwargs):
+    """Optimize a granule and return the error information if it fails."""
+    try:
+        with dask.config.set(scheduler="single-threaded"):
+            optimize_granule(**kwargs)
+        info = None
+    except Exception as e:
+        info = kwargs["filepath"], str(e)
+    return info
+
+
+def optimize_archive(
+    product,
+    start_time,
+    end_time,
+    variables=None,
+    groups=None,
+    scan_mode=None,
+    version=None,
+    product_type="RS",
+    compression="zstd",
+    complevel=3,
+    chunks=None,
+    force=False,
+    parallel=True,
+    max_concurrent_tasks=None,
+    max_dask_total_tasks=500,
+    verbose=False,
+):
+    """Create an optimized mirror of the local granules of a product.
+
+    The optimized granules contain only the requested variables, are compressed and stored with large chunks.
+    Once created, ``gpm.open_dataset`` reads the optimized granules instead of the raw HDF5 granules
+    when they contain all the requested variables.
+
+    Parameters
+    ----------
+    product : str
+        GPM product acronym.
+    start_time :  datetime.datetime, datetime.date, numpy.datetime64 or str
+        Start time.
+        Accepted types: ``datetime.datetime``, ``datetime.date``, ``numpy.datetime64`` or ``str``.
+        If string type, it expects the isoformat ``YYYY-MM-DD hh:mm:ss``.
+    end_time :  datetime.datetime, datetime.date, numpy.datetime64 or str
+        End time.
+        Accepted types: ``datetime.datetime``, ``datetime.date``, ``numpy.datetime64`` or ``str``.
+        If string type, it expects the isoformat ``YYYY-MM-DD hh:mm:ss``.
+    variables : list, str, optional
+        Variables to store in the optimized granules.
+        The default is ``None`` (all variables).
+    groups : list, str, optional
+        HDF5 Groups from which to store all variables.
+        The default is ``None`` (all groups).
+    scan_mode : str, optional
+        Scan mode of the GPM product. The default is ``None``.
+        Use ``gpm.available_scan_modes(product, version)`` to get the available scan modes for a specific product.
+    version : int, optional
+        GPM version of the data to optimize if ``product_type = "RS"``.
+    product_type : str, optional
+        GPM product type. Either ``'RS'`` (Research) or ``'NRT'`` (Near-Real-Time).
+        The default is ``'RS'``.
+    compression : str, optional
+        Compression algorithm. Either ``"zstd"``, ``"zlib"`` or ``None``.
+        The default is ``"zstd"``.
+    complevel : int, optional
+        Compression level. The default is 3.
+    chunks : dict, optional
+        On-disk chunk size of each dimension (i.e. ``{"along_track": 1000}``).
+        Dimensions not specified are stored in a single chunk.
+        The default is ``None`` (a single chunk per variable).
+    force : bool, optional
+        Whether to recreate the optimized granules which already exist. The default is ``False``.
+    parallel : bool, optional
+        Whether to optimize several granules in parallel with dask. The default is ``True``.
+    max_concurrent_tasks : int, optional
+        The maximum number of Dask tasks to be concurrently executed.
+        If ``None``, let the Dask Scheduler to choose.
+        The default is ``None``.
+    max_dask_total_tasks : int, optional
+        The maximum number of Dask tasks to be scheduled.
+        The default is 500.
+    verbose : bool, optional
+        Whether to print processing details. The default is ``False``.
+
+    Returns
+    -------
+    errors : list
+        List of tuples ``(filepath, error)`` of the granules which could not be optimized.
+
+    """
+    product = check_product(product, product_type=product_type)
+    variables = check_variables(variables)
+    groups = check_groups(groups)
+    compression = check_compression(compression)
+    start_time, end_time = check_start_end_time(start_time, end_time)
+    start_time, end_time = check_valid_time_request(start_time, end_time, product)
+
+    # Find the local granules
+    filepaths = find_filepaths(
+        storage="LOCAL",
+        version=version,
+        product=product,
+        product_type=product_type,
+        start_time=start_time,
+        end_time=end_time,
+        verbose=verbose,
+    )
+    if len(filepaths) == 0:
+        raise ValueError("No files found on disk. Please download them before.")
+
+    # Optimize the granules by blocks to avoid dask overhead
+    func = dask.delayed(_try_optimize_granule) if parallel else _try_optimize_granule
+    list_errors = []
+    for block_filepaths in split_list_in_blocks(filepaths, block_size=max_dask_total_tasks):
+        list_results = [
+            func(
+                filepath=filepath,
+                scan_mode=scan_mode,
+                variables=variables,
+                groups=groups,
+                compression=compression,
+                complevel=complevel,
+                chunks=chunks,
+                force=force,
+            )
+            for filepath in block_filepaths
+        ]
+        if parallel:
+            list_results = compute_list_delayed(list_results, max_concurrent_tasks=max_concurrent_tasks)
+        list_errors += [error_info for error_info in list_results if error_info is not None]
+
+    for filepath, error_str in list_errors:
+        print(f"An error occurred while optimizing {filepath}: {error_str}")
+    return list_errors
+
+
+####--------------------------------------------------------------------------.
+##################################
+#### Optimized granule reader ####
+##################################
+
+
+def open_optimized_granule(filepath, scan_mode, groups, variables, decode_cf, chunks, prefix_group):
+    """Open the optimized granule of a local granule.
+
+    Returns ``None`` if the optimized granule does not exist or does not contain the requested variables.
+    """
+    from gpm.dataset.granule import _subset_dataset_variables, remove_unused_var_dims
+
+    if not config.get("use_optimized_archive") or groups is not None or prefix_group:
+        return None
+    if not is_optimized_granule_available(filepath, scan_mode=scan_mode):
+        return None
+    ds = xr.open_dataset(
+        get_optimized_filepath(filepath, scan_mode=scan_mode),
+        engine="netcdf4",
+        chunks=chunks,
+        mask_and_scale=decode_cf,
+        decode_times=True,
+    )
+    # Check the optimized granule contains the requested variables
+    if variables is None:
+        is_valid = bool(ds.attrs.get(OPTIMIZED_ALL_VARIABLES_ATTR, 0))
+    else:
+        is_valid = set(variables).issubset(ds.data_vars)
+    if not is_valid:
+        ds.close()
+        return None
+    ds.attrs.pop(OPTIMIZED_ALL_VARIABLES_ATTR, None)
+    ds = _subset_dataset_variables(ds, variables)
+    return remove_unused_var_dims(ds)
@@ -0,0 +1,184 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module contains functions to search the satellite overpasses of an area of interest."""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from gpm.dataset.footprints import get_granules_footprints, get_intersecting_blocks, get_request_extent
+from gpm.io.checks import (
+    check_product,
+    check_scan_mode,
+    check_start_end_time,
+    check_valid_time_request,
+)
+from gpm.io.find import find_filepaths
+from gpm.io.info import get_info_from_filepaths
+from gpm.utils.slices import get_list_slices_from_indices
+from gpm.utils.warnings import GPM_Warning
+
+OVERPASSES_COLUMNS = ["filepath", "granule_id", "start_time", "end_time", "along_track_slice"]
+
+
+def get_granule_overpasses(footprint, extent):
+    """Return the overpasses of the extent in a granule footprint.
+
+    An overpass is a sequence of consecutive footprint blocks intersecting the extent.
+    Since the footprint blocks bounding boxes are used, the along-track slice and the time window
+    of an overpass can include a few scans (less than the footprint block size) without pixels
+    within the extent at their start and end.
+
+    Returns
+    -------
+    overpasses : list
+        List of dictionaries with the ``start_time``, ``end_time`` and ``along_track_slice`` of each overpass.
+
+    """
+    block_size = footprint["block_size"]
+    indices = np.where(get_intersecting_blocks(footprint, extent=extent))[0]
+    overpasses = []
+    for blocks_slice in get_list_slices_from_indices(indices):
+        time_bounds = footprint["time_bounds"][blocks_slice]
+        overpasses.append(
+            {
+                "start_time": np.nanmin(time_bounds[:, 0]),
+                "end_time": np.nanmax(time_bounds[:, 1]),
+                "along_track_slice": slice(
+                    blocks_slice.start * block_size,
+                    min(blocks_slice.stop * block_size, footprint["n_scans"]),
+                ),
+            },
+        )
+    return overpasses
+
+
+def find_overpasses(
+    product,
+    start_time,
+    end_time,
+    extent=None,
+    country=None,
+    point=None,
+    distance=None,
+    scan_mode=None,
+    version=None,
+    product_type="RS",
+    verbose=False,
+):
+    """Find the overpasses of an area of interest by the granules of the local archive.
+
+    The overpasses are searched using the footprint of the granules, without opening the granules.
+    If the ``local_catalog`` GPM-API config is enabled, the footprint of each granule is computed once
+    and cached in the local granules catalog (see ``gpm.dataset.footprints``). The footprints of new or
+    updated granules are computed on the fly.
+
+    Parameters
+    ----------
+    product : str
+        GPM ORBIT product acronym.
+    start_time :  datetime.datetime, datetime.date, numpy.datetime64 or str
+        Start time.
+    end_time :  datetime.datetime, datetime.date, numpy.datetime64 or str
+        End time.
+    extent : list or tuple, optional
+        Area of interest ``[x_min, x_max, y_min, y_max]``.
+        The default is ``None``.
+    country : str, optional
+        Name of the country defining the area of interest.
+        The default is ``None``.
+    point : tuple, optional
+        ``(lon, lat)`` point defining, together with ``distance``, the area of interest.
+        The default is ``None``.
+    distance : float, optional
+        Distance (in meters) from the ``point`` in each direction.
+        The default is ``None``.
+    scan_mode : str, optional
+        Scan mode of the GPM product. The default is ``None``.
+    version : int, optional
+        GPM version of the data to retrieve if ``product_type = "RS"``.
+        The default is ``None`` (the last version).
+    product_type : str, optional
+        GPM product type. Either ``RS`` (Research) or ``NRT`` (Near-Real-Time).
+        The default is ``"RS"``.
+    verbose : bool, optional
+        Whether to print processing details. The default is ``False``.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Table with one row per overpass, sorted by time, with the columns:
+
+        - ``filepath``: the granule file path.
+        - ``granule_id``: the granule number.
+        - ``start_time`` and ``end_time``: the time window of the overpass.
+        - ``along_track_slice``: the along-track slice of the overpass in the granule.
+
+        The time window and the along-track slice are defined at the resolution of the footprint blocks
+        (see ``gpm.dataset.overpasses.get_granule_overpasses``).
+
+    """
+    product = check_product(product, product_type=product_type)
+    scan_mode = check_scan_mode(scan_mode, product, version=version)
+    start_time, end_time = check_start_end_time(start_time, end_time)
+    start_time, end_time = check_valid_time_request(start_time, end_time, product)
+    extent = get_request_extent(extent=extent, country=country, point=point, distance=distance)
+    if extent is None:
+        raise ValueError("Specify the area of interest with 'extent', 'country' or 'point'.")
+    if scan_mode == "Grid":
+        raise ValueError("The overpasses can be searched only for ORBIT products.")
+
+    # Find the granules of the period
+    filepaths = find_filepaths(
+        storage="LOCAL",
+        version=version,
+        product=product,
+        product_type=product_type,
+        start_time=start_time,
+        end_time=end_time,
+        verbose=verbose,
+    )
+    if len(filepaths) == 0:
+        raise ValueError("No files found on disk. Please download them before.")
+
+    # Search the overpasses in the granules footprints
+    footprints = get_granules_footprints(filepaths, scan_mode=scan_mode)
+    granule_ids = dict(zip(filepaths, get_info_from_filepaths(filepaths)["granule_id"]))
+    rows = []
+    for filepath in filepaths:
+        footprint = footprints[filepath]
+        if footprint is None:
+            msg = f"The footprint of the {filepath} granule can not be computed."
+            warnings.warn(msg, GPM_Warning, stacklevel=2)
+            continue
+        granule_info = {"filepath": filepath, "granule_id": granule_ids[filepath]}
+        rows += [{**granule_info, **overpass} for overpass in get_granule_overpasses(footprint, extent=extent)]
+    df = pd.DataFrame(rows, columns=OVERPASSES_COLUMNS)
+
+    # Select the overpasses within the period
+    df = df[(df["end_time"] >= np.datetime64(start_time)) & (df["start_time"] <= np.datetime64(end_time))]
+    return df.sort_values("start_time").reset_index(drop=True)
@@ -0,0 +1,558 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module contains functions to create and read virtual references of the local GPM granules.
+
+The reference file of a granule records, for each variable of a scan mode, the byte ranges and the
+filters of the HDF5 chunks, following the kerchunk (version 1) JSON format. The variables required to
+define the time coordinate are inlined in the reference file.
+
+The reference files are stored in ``<base_dir>/GPM/REFERENCES`` with the same directory structure of
+the local archive. The file ``<filename>.<scan_mode>.json`` contains the references of the ``scan_mode``
+group of the ``<filename>`` granule.
+
+With ``gpm.open_dataset(..., engine="references")``, the granules datasets are created from the reference
+files without opening the HDF5 granules: the chunks of the variables are read with byte range requests
+only when the data are computed. Use ``gpm.index_archive`` to create the reference files in advance.
+"""
+import base64
+import importlib
+import itertools
+import json
+import os
+
+import dask
+import dask.array
+import datatree
+import numpy as np
+import xarray as xr
+
+from gpm.dataset.datatree import (
+    GRID_COORDS_VARIABLES,
+    SCAN_TIME_VARIABLES,
+    _get_required_groups_variables,
+    _is_empty_granule,
+    check_non_empty_granule,
+)
+from gpm.dataset.dimensions import _rename_dataset_dimensions, get_dimension_names
+from gpm.io.checks import (
+    check_product,
+    check_scan_mode,
+    check_start_end_time,
+    check_valid_time_request,
+)
+from gpm.io.find import find_filepaths
+from gpm.io.info import get_product_from_filepath, get_version_from_filepath
+from gpm.io.local import get_mirror_filepath, get_partial_filepath, is_mirror_file_updated
+from gpm.utils.list import split_list_in_blocks
+from gpm.utils.parallel import compute_list_delayed
+
+REFERENCES_DIRNAME = "REFERENCES"
+REFERENCES_FORMAT_VERSION = 1
+INLINE_THRESHOLD = 500  # bytes
+INLINE_VARIABLES = SCAN_TIME_VARIABLES + GRID_COORDS_VARIABLES
+
+
+####--------------------------------------------------------------------------.
+##############################
+#### Reference file paths ####
+##############################
+
+
+def get_references_filepath(filepath, scan_mode, base_dir=None):
+    """Return the file path of the reference file of a local granule.
+
+    Returns ``None`` if the granule is not located in the local GPM archive.
+    """
+    return get_mirror_filepath(filepath, dirname=REFERENCES_DIRNAME, extension=f".{scan_mode}.json", base_dir=base_dir)
+
+
+def is_references_available(filepath, scan_mode, base_dir=None):
+    """Return ``True`` if an up-to-date reference file exists."""
+    references_filepath = get_references_filepath(filepath, scan_mode=scan_mode, base_dir=base_dir)
+    return is_mirror_file_updated(filepath, mirror_filepath=references_filepath)
+
+
+####--------------------------------------------------------------------------.
+#########################
+#### HDF5 references ####
+#########################
+
+
+def _to_json_value(value):
+    """Convert a HDF5 attribute value to a JSON serializable value."""
+    if isinstance(value, bytes):
+        return value.decode()
+    if isinstance(value, np.ndarray):
+        if value.size == 1:
+            return _to_json_value(value.item())
+        return [_to_json_value(v) for v in value.tolist()]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _encode_fill_value(fill_value, dtype):
+    """Encode the fill value of a HDF5 dataset following the zarr (version 2) JSON conventions."""
+    if fill_value is None:
+        return None
+    if dtype.kind == "f":
+        if np.isnan(fill_value):
+            return "NaN"
+        if np.isinf(fill_value):
+            return "Infinity" if fill_value > 0 else "-Infinity"
+        return float(fill_value)
+    if dtype.kind in ["i", "u", "b"]:
+        return fill_value.item()
+    return base64.b64encode(np.asarray(fill_value, dtype=dtype).tobytes()).decode()
+
+
+def _decode_fill_value(fill_value, dtype):
+    """Decode the fill value of the ``.zarray`` of a referenced variable."""
+    if fill_value is None:
+        return np.zeros((), dtype=dtype)[()]
+    if dtype.kind in ["f", "i", "u", "b"]:
+        return np.array(float(fill_value) if isinstance(fill_value, str) else fill_value, dtype=dtype)[()]
+    return np.frombuffer(base64.b64decode(fill_value), dtype=dtype)[0]
+
+
+def _get_hdf5_attrs(obj):
+    return {key: _to_json_value(value) for key, value in obj.attrs.items()}
+
+
+def _get_array_dimensions(dset, attrs):
+    """Return the dimension names of a HDF5 dataset.
+
+    Dimensions without a name in the ``DimensionNames`` attribute are named ``phony_dim_<size>``.
+    """
+    dim_names = get_dimension_names(attrs)
+    if dim_names is None or len(dim_names) != dset.ndim:
+        dim_names = [""] * dset.ndim
+    return [name if name != "" else f"phony_dim_{size}" for name, size in zip(dim_names, dset.shape)]
+
+
+def _get_hdf5_filters(dset):
+    """Return the numcodecs definition of the HDF5 filters of a dataset, in the HDF5 pipeline order."""
+    if dset.scaleoffset is not None or dset.compression not in [None, "gzip"]:
+        raise ValueError(f"The HDF5 filters of the {dset.name} variable are not supported.")
+    filters = []
+    if dset.shuffle:
+        filters.append({"id": "shuffle", "elementsize": dset.dtype.itemsize})
+    if dset.compression == "gzip":
+        filters.append({"id": "zlib", "level": dset.compression_opts})
+    if dset.fletcher32:
+        filters.append({"id": "fletcher32"})
+    return filters or None
+
+
+def _get_chunk_key(key, index):
+    return f"{key}/{'.'.join(map(str, index)) if len(index) > 0 else '0'}"
+
+
+def _get_variable_references(dset, filepath, inline=False):
+    """Return the references of a HDF5 dataset."""
+    key = dset.name.lstrip("/")
+    attrs = _get_hdf5_attrs(dset)
+    attrs["_ARRAY_DIMENSIONS"] = _get_array_dimensions(dset, attrs)
+    zarray = {
+        "shape": list(dset.shape),
+        "dtype": dset.dtype.str,
+        "compressor": None,
+        "fill_value": _encode_fill_value(dset.fillvalue, dtype=dset.dtype),
+        "order": "C",
+        "zarr_format": 2,
+    }
+    refs = {f"{key}/.zattrs": json.dumps(attrs)}
+    # Inline the data of small variables
+    if inline or dset.nbytes <= INLINE_THRESHOLD:
+        data = np.ascontiguousarray(dset[()])
+        zarray.update({"chunks": list(dset.shape), "dtype": data.dtype.str, "filters": None})
+        refs[f"{key}/.zarray"] = json.dumps(zarray)
+        refs[_get_chunk_key(key, [0] * dset.ndim)] = "base64:" + base64.b64encode(data.tobytes()).decode()
+        return refs
+    # Reference the HDF5 chunks
+    chunks = dset.chunks if dset.chunks is not None else dset.shape
+    zarray.update({"chunks": [max(size, 1) for size in chunks], "filters": _get_hdf5_filters(dset)})
+    refs[f"{key}/.zarray"] = json.dumps(zarray)
+    if dset.chunks is None:
+        offset = dset.id.get_offset()
+        if offset is not None:
+            refs[_get_chunk_key(key, [0] * dset.ndim)] = [filepath, offset, dset.id.get_storage_size()]
+        return refs
+    for i in range(dset.id.get_num_chunks()):
+        info = dset.id.get_chunk_info(i)
+        index = [offset // size for offset, size in zip(info.chunk_offset, chunks)]
+        refs[_get_chunk_key(key, index)] = [filepath, info.byte_offset, info.size]
+    return refs
+
+
+def get_granule_references(filepath, scan_mode):
+    """Return the references of the ``scan_mode`` group of a HDF5 granule.
+
+    The references follow the kerchunk (version 1) JSON format.
+    """
+    import h5py
+
+    filepath = os.path.abspath(filepath)
+    refs = {".zgroup": json.dumps({"zarr_format": 2})}
+    with h5py.File(filepath, "r") as f:
+        root_attrs = _get_hdf5_attrs(f)
+        if _is_empty_granule(root_attrs):
+            raise ValueError(f"{filepath} is an EMPTY granule !")
+        if scan_mode not in f:
+            raise ValueError(f"The scan mode {scan_mode} is not available in {filepath}.")
+        refs[".zattrs"] = json.dumps(root_attrs)
+
+        def _add_group(group):
+            key = group.name.lstrip("/")
+            refs[f"{key}/.zgroup"] = json.dumps({"zarr_format": 2})
+            refs[f"{key}/.zattrs"] = json.dumps(_get_hdf5_attrs(group))
+            for name, obj in group.items():
+                if isinstance(obj, h5py.Group):
+                    _add_group(obj)
+                elif obj.dtype.kind != "O":
+                    refs.update(_get_variable_references(obj, filepath=filepath, inline=name in INLINE_VARIABLES))
+
+        _add_group(f[scan_mode])
+    return {"version": REFERENCES_FORMAT_VERSION, "refs": refs}
+
+
+####--------------------------------------------------------------------------.
+###########################
+#### Granules indexing ####
+###########################
+
+
+def _check_h5py_installed():
+    if importlib.util.find_spec("h5py") is None:
+        raise ImportError(
+            "The 'h5py' package required to create the reference files is not installed. \n"
+            "Please install it using the following command:  conda install -c conda-forge h5py",
+        )
+
+
+def _check_numcodecs_installed():
+    if importlib.util.find_spec("numcodecs") is None:
+        raise ImportError(
+            "The 'numcodecs' package required to read the reference files is not installed. \n"
+            "Please install it using the following command:  conda install -c conda-forge numcodecs",
+        )
+
+
+def index_granule(filepath, scan_mode=None, force=False, base_dir=None):
+    """Write the reference file of a local granule.
+
+    Returns the file path of the reference file.
+    """
+    _check_h5py_installed()
+    product = get_product_from_filepath(filepath)
+    version = get_version_from_filepath(filepath)
+    scan_mode = check_scan_mode(scan_mode, product, version=version)
+    references_filepath = get_references_filepath(filepath, scan_mode=scan_mode, base_dir=base_dir)
+    if references_filepath is None:
+        raise ValueError(f"{filepath} is not located in the local GPM archive.")
+    if not force and is_references_available(filepath, scan_mode=scan_mode, base_dir=base_dir):
+        return references_filepath
+
+    references = get_granule_references(filepath, scan_mode=scan_mode)
+
+    # Write the reference file
+    # - The file is first written to a partial file, which is then moved to its final path
+    os.makedirs(os.path.dirname(references_filepath), exist_ok=True)
+    partial_filepath = get_partial_filepath(references_filepath)
+    with open(partial_filepath, "w") as f:
+        json.dump(references, f)
+    os.replace(partial_filepath, references_filepath)
+    return references_filepath
+
+
+def _try_index_granule(**kwargs):
+    """Index a granule and return the error information if it fails."""
+    try:
+        index_granule(**kwargs)
+        info = None
+    except Exception as e:
+        info = kwargs["filepath"], str(e)
+    return info
+
+
+def index_archive(
+    product,
+    start_time,
+    end_time,
+    scan_mode=None,
+    version=None,
+    product_type="RS",
+    force=False,
+    parallel=True,
+    max_concurrent_tasks=None,
+    max_dask_total_tasks=500,
+    verbose=False,
+):
+    """Create the reference files of the local granules of a product.
+
+    Once created, ``gpm.open_dataset(..., engine="references")`` opens the granules
+    without opening the HDF5 files.
+
+    Parameters
+    ----------
+    product : str
+        GPM product acronym.
+    start_time :  datetime.datetime, datetime.date, numpy.datetime64 or str
+        Start time.
+        Accepted types: ``datetime.datetime``, ``datetime.date``, ``numpy.datetime64`` or ``str``.
+        If string type, it expects the isoformat ``YYYY-MM-DD hh:mm:ss``.
+    end_time :  datetime.datetime, datetime.date, numpy.datetime64 or str
+        End time.
+        Accepted types: ``datetime.datetime``, ``datetime.date``, ``numpy.datetime64`` or ``str``.
+        If string type, it expects the isoformat ``YYYY-MM-DD hh:mm:ss``.
+    scan_mode : str, optional
+        Scan mode of the GPM product. The default is ``None``.
+        Use ``gpm.available_scan_modes(product, version)`` to get the available scan modes for a specific product.
+    version : int, optional
+        GPM version of the data to index if ``product_type = "RS"``.
+    product_type : str, optional
+        GPM product type. Either ``'RS'`` (Research) or ``'NRT'`` (Near-Real-Time).
+        The default is ``'RS'``.
+    force : bool, optional
+        Whether to recreate the reference files which already exist. The default is ``False``.
+    parallel : bool, optional
+        Whether to index several granules in parallel with dask. The default is ``True``.
+    max_concurrent_tasks : int, optional
+        The maximum number of Dask tasks to be concurrently executed.
+        If ``None``, let the Dask Scheduler to choose.
+        The default is ``None``.
+    max_dask_total_tasks : int, optional
+        The maximum number of Dask tasks to be scheduled.
+        The default is 500.
+    verbose : bool, optional
+        Whether to print processing details. The default is ``False``.
+
+    Returns
+    -------
+    errors : list
+        List of tuples ``(filepath, error)`` of the granules which could not be indexed.
+
+    """
+    _check_h5py_installed()
+    product = check_product(product, product_type=product_type)
+    start_time, end_time = check_start_end_time(start_time, end_time)
+    start_time, end_time = check_valid_time_request(start_time, end_time, product)
+
+    # Find the local granules
+    filepaths = find_filepaths(
+        storage="LOCAL",
+        version=version,
+        product=product,
+        product_type=product_type,
+        start_time=start_time,
+        end_time=end_time,
+        verbose=verbose,
+    )
+    if len(filepaths) == 0:
+        raise ValueError("No files found on disk. Please download them before.")
+
+    # Index the granules by blocks to avoid dask overhead
+    func = dask.delayed(_try_index_granule) if parallel else _try_index_granule
+    list_errors = []
+    for block_filepaths in split_list_in_blocks(filepaths, block_size=max_dask_total_tasks):
+        list_results = [func(filepath=filepath, scan_mode=scan_mode, force=force) for filepath in block_filepaths]
+        if parallel:
+            list_results = compute_list_delayed(list_results, max_concurrent_tasks=max_concurrent_tasks)
+        list_errors += [error_info for error_info in list_results if error_info is not None]
+
+    for filepath, error_str in list_errors:
+        print(f"An error occurred while indexing {filepath}: {error_str}")
+    return list_errors
+
+
+####--------------------------------------------------------------------------.
+###########################
+#### References reader ####
+###########################
+
+
+def read_granule_references(filepath, scan_mode):
+    """Read the references of a local granule.
+
+    The HDF5 granule is not opened: an error is raised if the reference file does not exist
+    or is outdated. Use ``gpm.index_archive`` to create the reference files.
+    """
+    if not is_references_available(filepath, scan_mode=scan_mode):
+        raise ValueError(
+            f"The {scan_mode} reference file of {filepath} is not available or outdated. "
+            "Please create the reference files with gpm.index_archive before opening the granules "
+            "with engine='references'.",
+        )
+    references_filepath = get_references_filepath(filepath, scan_mode=scan_mode)
+    with open(references_filepath) as f:
+        references = json.load(f)
+    if references.get("version") != REFERENCES_FORMAT_VERSION:
+        raise ValueError(f"Unsupported reference file format for {filepath}.")
+    return references["refs"]
+
+
+def _decode_filters(data, filters):
+    """Decode the chunk bytes applying the filters in reverse order.
+
+    The fletcher32 codec raises an error if the checksum of the chunk does not match.
+    """
+    import numcodecs
+
+    for codec in reversed(filters or []):
+        data = numcodecs.get_codec(dict(codec)).decode(data)
+    return data
+
+
+def _read_chunk(reference, zarray, shape):
+    """Read a chunk of a referenced variable."""
+    dtype = np.dtype(zarray["dtype"])
+    native_dtype = dtype.newbyteorder("=")
+    # Chunks without reference have not been written and are filled with the HDF5 fill value
+    if reference is None:
+        return np.full(shape, _decode_fill_value(zarray["fill_value"], dtype=dtype), dtype=native_dtype)
+    if isinstance(reference, str):
+        data = base64.b64decode(reference.removeprefix("base64:"))
+    else:
+        filepath, offset, size = reference
+        with open(filepath, "rb") as f:
+            f.seek(offset)
+            data = f.read(size)
+    data = _decode_filters(data, filters=zarray["filters"])
+    array = np.frombuffer(data, dtype=dtype).reshape(zarray["chunks"])
+    # Chunks at the array edges are stored with the full chunk shape
+    return array[tuple(slice(0, size) for size in shape)].astype(native_dtype)
+
+
+def _get_normalized_chunks(shape, chunks):
+    """Return the dask chunks of an array stored with regular chunks."""
+    return tuple(
+        tuple(min(chunk, size - start) for start in range(0, size, chunk)) or (0,) for size, chunk in zip(shape, chunks)
+    )
+
+
+def _get_reference_dask_array(refs, key, zarray):
+    """Create a dask array reading the chunks of a referenced variable."""
+    chunks = _get_normalized_chunks(zarray["shape"], zarray["chunks"])
+    chunk_keys = [k for k in refs if k.startswith(f"{key}/") and not k.endswith((".zarray", ".zattrs"))]
+    name = "references-" + dask.base.tokenize(key, zarray, [refs[k] for k in chunk_keys])
+    graph = {}
+    for index in itertools.product(*[range(len(dim_chunks)) for dim_chunks in chunks]):
+        shape = tuple(dim_chunks[i] for dim_chunks, i in zip(chunks, index))
+        graph[(name, *index)] = (_read_chunk, refs.get(_get_chunk_key(key, index)), zarray, shape)
+    dtype = np.dtype(zarray["dtype"]).newbyteorder("=")
+    return dask.array.Array(graph, name, chunks=chunks, dtype=dtype)
+
+
+def _get_references_structure(refs):
+    """Return the list of variables of each group of the references.
+
+    The group paths follow the DataTree paths convention (i.e. ``"/"``, ``"/FS"``, ``"/FS/SLV"``).
+    """
+    structure = {"/": []}
+    for key in refs:
+        if key.endswith("/.zgroup"):
+            structure.setdefault("/" + key.removesuffix("/.zgroup"), [])
+    for key in refs:
+        if key.endswith("/.zarray"):
+            group, var = os.path.split(key.removesuffix("/.zarray"))
+            structure["/" + group].append(var)
+    return structure
+
+
+def _get_reference_variable(refs, key):
+    """Create the lazy xarray.Variable of a referenced variable."""
+    zarray = json.loads(refs[f"{key}/.zarray"])
+    attrs = json.loads(refs[f"{key}/.zattrs"])
+    dims = attrs.pop("_ARRAY_DIMENSIONS")
+    data = _get_reference_dask_array(refs, key=key, zarray=zarray)
+    # Numeric attributes are stored as JSON numbers
+    if "_FillValue" in attrs:
+        attrs["_FillValue"] = np.array(attrs["_FillValue"], dtype=data.dtype)[()]
+    # Define the encodings that the netCDF4 backend would set
+    encoding = {"dtype": data.dtype, "original_shape": data.shape, "chunksizes": None}
+    if zarray["filters"] is not None or zarray["chunks"] != zarray["shape"]:
+        encoding["chunksizes"] = tuple(zarray["chunks"])
+        encoding["preferred_chunks"] = dict(zip(dims, zarray["chunks"]))
+    return xr.Variable(dims, data, attrs=attrs, encoding=encoding)
+
+
+def open_references_datatree(filepath, scan_mode, variables=None, groups=None, use_api_defaults=True):
+    """Open in a DataTree object the groups and variables required to create a scan mode dataset.
+
+    The DataTree is created from the references of the granule (see ``index_granule``)
+    and the HDF5 granule is not opened.
+    """
+    _check_numcodecs_installed()
+    refs = read_granule_references(filepath, scan_mode=scan_mode)
+    attrs = json.loads(refs[".zattrs"])
+    check_non_empty_granule(xr.Dataset(attrs=attrs), filepath)
+    structure = _get_references_structure(refs)
+    required = _get_required_groups_variables(structure, scan_mode=scan_mode, variables=variables, groups=groups)
+    dict_ds = {}
+    for path, group_variables in required.items():
+        prefix = path.strip("/") + "/" if path != "/" else ""
+        names = [var for var in structure[path] if group_variables is None or var in group_variables]
+        ds = xr.Dataset(
+            {var: _get_reference_variable(refs, key=f"{prefix}{var}") for var in names},
+            attrs=json.loads(refs[f"{prefix}.zattrs"]),
+        )
+        dict_ds[path] = _rename_dataset_dimensions(ds, use_api_defaults=use_api_defaults)
+    # Parent groups must be inserted before their children
+    return datatree.DataTree.from_dict(dict(sorted(dict_ds.items(), key=lambda item: item[0].count("/"))))
+
+
+def _rechunk_dataset(ds, chunks):
+    """Rechunk the variables read from the references (stored with the HDF5 chunks)."""
+    if chunks is None:
+        return ds.compute()
+    if isinstance(chunks, dict) and len(chunks) == 0:
+        return ds
+    for name, da in ds.variables.items():
+        if isinstance(da.data, dask.array.Array):
+            ds[name] = ds[name].chunk(chunks)
+    return ds
+
+
+def open_references_granule(filepath, scan_mode, groups, variables, decode_cf, chunks, prefix_group):
+    """Open a local granule from its references.
+
+    See ``gpm.dataset.granule._open_granule`` for the description of the arguments.
+    """
+    from gpm.dataset.granule import _get_scan_mode_dataset, remove_unused_var_dims
+
+    dt = open_references_datatree(filepath, scan_mode=scan_mode, variables=variables, groups=groups)
+    ds = _get_scan_mode_dataset(
+        dt=dt,
+        scan_mode=scan_mode,
+        groups=groups,
+        variables=variables,
+        prefix_group=prefix_group,
+    )
+    ds = remove_unused_var_dims(ds)
+    if decode_cf:
+        ds = xr.decode_cf(ds)
+    return _rechunk_dataset(ds, chunks=chunks)
@@ -0,0 +1,278 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module contains functions to open the GPM granules while they are downloaded."""
+import os
+import warnings
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+from gpm.dataset.conventions import check_validate
+from gpm.dataset.granule import open_granule
+from gpm.io.checks import (
+    check_groups,
+    check_product,
+    check_product_type,
+    check_product_version,
+    check_remote_storage,
+    check_scan_mode,
+    check_start_end_time,
+    check_transfer_tool,
+    check_valid_time_request,
+    check_variables,
+)
+from gpm.io.data_integrity import check_filepaths_integrity
+from gpm.io.download import _download_files, get_filepaths_from_filenames
+from gpm.io.find import find_filepaths
+from gpm.utils.warnings import GPM_Warning, GPMDownloadWarning
+
+
+def _download_granule(remote_filepath, local_filepath, storage, transfer_tool, check_integrity):
+    """Download a granule and return ``True`` if it is available on disk."""
+    status = _download_files(
+        remote_filepaths=[remote_filepath],
+        local_filepaths=[local_filepath],
+        storage=storage,
+        transfer_tool=transfer_tool,
+        n_threads=1,
+        progress_bar=False,
+        verbose=False,
+    )
+    if status[0] == 0:
+        msg = f"The download of {remote_filepath} failed."
+        warnings.warn(msg, GPMDownloadWarning, stacklevel=2)
+        return False
+    if check_integrity and len(check_filepaths_integrity([local_filepath], verbose=False, parallel=False)) > 0:
+        msg = f"The downloaded {local_filepath} granule is corrupted and has been removed."
+        warnings.warn(msg, GPMDownloadWarning, stacklevel=2)
+        return False
+    return True
+
+
+def _get_available_future():
+    """Return a completed future for a granule already available on disk."""
+    future = Future()
+    future.set_result(True)
+    return future
+
+
+def stream_granules(
+    product,
+    start_time,
+    end_time,
+    variables=None,
+    groups=None,
+    scan_mode=None,
+    version=None,
+    product_type="RS",
+    storage="PPS",
+    chunks={},
+    decode_cf=True,
+    prefix_group=False,
+    validate="eager",
+    prefetch=4,
+    n_threads=4,
+    transfer_tool="CURL",
+    force_download=False,
+    check_integrity=True,
+    ordered=False,
+    verbose=False,
+):
+    """Download the granules of a time period and yield them as soon as they are available on disk.
+
+    The granules are downloaded in the background while the previous granules are processed.
+    At most ``prefetch`` granules are downloaded ahead of the granule being processed.
+    The granules already available on disk do not count in the ``prefetch`` downloads and,
+    with ``ordered=False`` (the default), they are yielded without waiting for the downloads.
+    The granules which can not be downloaded or opened are skipped with a warning.
+
+    Parameters
+    ----------
+    product : str
+        GPM product acronym. See ``gpm.available_products()``.
+    start_time : datetime.datetime, datetime.date, numpy.datetime64 or str
+        Start time.
+        Accepted types: ``datetime.datetime``, ``datetime.date``, ``numpy.datetime64`` or ``str``.
+        If string type, it expects the isoformat ``YYYY-MM-DD hh:mm:ss``.
+    end_time : datetime.datetime, datetime.date, numpy.datetime64 or str
+        End time.
+        Accepted types: ``datetime.datetime``, ``datetime.date``, ``numpy.datetime64`` or ``str``.
+        If string type, it expects the isoformat ``YYYY-MM-DD hh:mm:ss``.
+    variables : list, str, optional
+        Variables to read from the HDF5 file.
+        The default is ``None`` (all variables).
+    groups : list, str, optional
+        HDF5 Groups from which to read all variables.
+        The default is ``None`` (all groups).
+    scan_mode : str, optional
+        Scan mode of the GPM product. The default is ``None``.
+        Use ``gpm.available_scan_modes(product, version)`` to get the available scan modes for a specific product.
+        The radar products have the following scan modes:
+
+        - ``'FS'``: Full Scan. For Ku, Ka and DPR (since version 7 products).
+        - ``'NS'``: Normal Scan. For Ku band and DPR (till version 6 products).
+        - ``'MS'``: Matched Scan. For Ka band and DPR (till version 6 products).
+        - ``'HS'``: High-sensitivity Scan. For Ka band and DPR.
+
+    version : int, optional
+        GPM version of the data to retrieve if ``product_type = "RS"``.
+    product_type : str, optional
+        GPM product type. Either ``'RS'`` (Research) or ``'NRT'`` (Near-Real-Time).
+        The default is ``'RS'``.
+    storage : str, optional
+        The remote repository from where to download.
+        Either ``pps`` or ``ges_disc``. The default is ``pps``.
+    chunks : int, dict, str or None, optional
+        Chunk size for dask array. See ``gpm.open_granule``.
+        The default is ``{}``.
+    decode_cf: bool, optional
+        Whether to decode the dataset. The default is ``True``.
+    prefix_group: bool, optional
+        Whether to add the group as a prefix to the variable names.
+        The default is ``False``.
+    validate : str, optional
+        How the dataset quality checks are run. See ``gpm.open_granule``.
+        The default is ``'eager'``.
+    prefetch : int, optional
+        Maximum number of granules downloaded ahead of the granule being processed.
+        The default is 4.
+    n_threads : int, optional
+        Number of parallel downloads. The default is 4.
+    transfer_tool : str, optional
+        Whether to use ``curl``, ``wget`` or the in-process ``native`` backend for data download.
+        The default is  ``curl``.
+    force_download : bool, optional
+        Whether to redownload data if already existing on disk. The default is ``False``.
+    check_integrity: bool, optional
+        Check integrity of the downloaded files. Corrupted files are removed and skipped.
+        By default is ``True``.
+    ordered : bool, optional
+        If ``False`` (the default), the granules are yielded in the order they become available on disk:
+        the granules already on disk are yielded at once, before the granules being downloaded.
+        If ``True``, the granules are yielded in time order: each granule waits for the download
+        of all the previous granules.
+    verbose : bool, optional
+        Whether to print processing details. The default is ``False``.
+
+    Yields
+    ------
+    xarray.Dataset
+        The granule dataset, as returned by ``gpm.open_granule``.
+
+    """
+    ## Check inputs
+    storage = check_remote_storage(storage)
+    product_type = check_product_type(product_type=product_type)
+    product = check_product(product=product, product_type=product_type)
+    version = check_product_version(version, product)
+    transfer_tool = check_transfer_tool(transfer_tool)
+    variables = check_variables(variables)
+    groups = check_groups(groups)
+    validate = check_validate(validate)
+    scan_mode = check_scan_mode(scan_mode, product, version=version)
+    start_time, end_time = check_start_end_time(start_time, end_time)
+    start_time, end_time = check_valid_time_request(start_time, end_time, product)
+    if not isinstance(prefetch, int) or prefetch < 1:
+        raise ValueError("'prefetch' must be a positive integer.")
+
+    ## Retrieve the granules of the time period available on the NASA server
+    remote_filepaths = find_filepaths(
+        storage=storage,
+        product=product,
+        start_time=start_time,
+        end_time=end_time,
+        product_type=product_type,
+        version=version,
+        verbose=verbose,
+    )
+    if len(remote_filepaths) == 0:
+        raise ValueError(f"No {product} granules available on {storage} for the specified time period.")
+    remote_filepaths = sorted(remote_filepaths, key=os.path.basename)
+    local_filepaths = get_filepaths_from_filenames(remote_filepaths, storage="LOCAL", product_type=product_type)
+    if verbose:
+        print(f"Streaming {len(local_filepaths)} {product} granules.")
+
+    ## Download the granules in the background
+    open_kwargs = {
+        "scan_mode": scan_mode,
+        "groups": groups,
+        "variables": variables,
+        "decode_cf": decode_cf,
+        "chunks": chunks,
+        "prefix_group": prefix_group,
+        "validate": validate,
+    }
+    files = iter(zip(remote_filepaths, local_filepaths))
+    pending = deque()
+    executor = ThreadPoolExecutor(max_workers=max(min(n_threads, prefetch), 1))
+
+    def _submit_downloads():
+        # Keep at most 'prefetch' granules downloaded ahead of the processing
+        # - The granules already on disk are not downloaded and are not counted
+        while sum(is_download for _, _, is_download in pending) < prefetch:
+            remote_filepath, local_filepath = next(files, (None, None))
+            if remote_filepath is None:
+                return
+            is_download = force_download or not os.path.exists(local_filepath)
+            if not is_download:
+                future = _get_available_future()
+            else:
+                future = executor.submit(
+                    _download_granule,
+                    remote_filepath,
+                    local_filepath,
+                    storage=storage,
+                    transfer_tool=transfer_tool,
+                    check_integrity=check_integrity,
+                )
+            pending.append((local_filepath, future, is_download))
+
+    try:
+        _submit_downloads()
+        while len(pending) > 0:
+            # Retrieve the next granule available on disk
+            if ordered:
+                local_filepath, future, _ = pending.popleft()
+            else:
+                wait([future for _, future, _ in pending], return_when=FIRST_COMPLETED)
+                index = next(i for i, (_, future, _) in enumerate(pending) if future.done())
+                local_filepath, future, _ = pending[index]
+                del pending[index]
+            is_available = future.result()
+            # Download the next granules while the current granule is processed
+            _submit_downloads()
+            if not is_available:
+                continue
+            try:
+                ds = open_granule(local_filepath, **open_kwargs)
+            except Exception as e:
+                msg = f"The following error occurred while opening the {local_filepath} granule: {e}"
+                warnings.warn(msg, GPM_Warning, stacklevel=2)
+                continue
+            yield ds
+    finally:
+        # Cancel the queued downloads if the iteration is stopped
+        executor.shutdown(wait=True, cancel_futures=True)
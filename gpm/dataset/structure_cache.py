@@ -0,0 +1,175 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module contains functions to cache the structure of the GPM granules.
+
+The HDF5 structure of the granules (i.e. the groups and variables, the variables dimension names
+and the static global attributes) does not change between granules of the same product, product
+version and scan mode. The structure of the first granule read is kept in memory and reused for all
+the other granules of the same product.
+
+If the ``structure_cache_dir`` GPM-API config is specified, the structures are also saved as JSON
+files in such directory and reused across Python sessions.
+The cache can be reset with ``clear_structure_cache``.
+"""
+import contextlib
+import glob
+import json
+import os
+import threading
+
+import numpy as np
+
+from gpm._config import config
+from gpm.io.catalog import _get_product_type_from_local_filepath
+from gpm.io.info import get_info_from_filepath
+
+STRUCTURE_CACHE_FORMAT = 1
+_STRUCTURE_CACHE = {}
+_STRUCTURE_CACHE_LOCK = threading.Lock()
+
+
+def get_structure_cache_dir():
+    """Return the directory where granule structures are saved. Return ``None`` if not specified."""
+    cache_dir = config.get("structure_cache_dir", None)
+    if cache_dir is None:
+        return None
+    return os.path.expanduser(str(cache_dir))
+
+
+def get_structure_key(filepath, scan_mode):
+    """Return the structure cache key of a granule.
+
+    The product type is inferred from the local directory structure if the file is stored
+    in the GPM-API ``base_dir``, otherwise from the file name.
+    Returns ``None`` if the product or the product version can not be inferred from the file name.
+    """
+    try:
+        info_dict = get_info_from_filepath(filepath)
+    except Exception:
+        return None
+    product_type = info_dict["product_type"]
+    base_dir = config.get("base_dir", None)
+    if base_dir is not None:
+        product_type = _get_product_type_from_local_filepath(filepath, base_dir=base_dir, default=product_type)
+    return f"{info_dict['product']}_{product_type}_{info_dict['version']}_{scan_mode}"
+
+
+def _get_structure_filepath(key, cache_dir):
+    return os.path.join(cache_dir, f"{key}.json")
+
+
+def _read_structure_file(key):
+    cache_dir = get_structure_cache_dir()
+    if cache_dir is None:
+        return None
+    try:
+        with open(_get_structure_filepath(key, cache_dir=cache_dir)) as f:
+            structure = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if structure.pop("format", None) != STRUCTURE_CACHE_FORMAT:
+        return None
+    return structure
+
+
+def _json_default(value):
+    """Convert the numpy and bytes values of the granule attributes to JSON serializable objects."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _write_structure_file(key, structure):
+    cache_dir = get_structure_cache_dir()
+    if cache_dir is None:
+        return
+    # Serialize first so that a non serializable structure never leaves a file behind
+    try:
+        content = json.dumps({"format": STRUCTURE_CACHE_FORMAT, **structure}, default=_json_default)
+    except (TypeError, ValueError):
+        return
+    os.makedirs(cache_dir, exist_ok=True)
+    filepath = _get_structure_filepath(key, cache_dir=cache_dir)
+    # Write to a temporary file first so that concurrent readers never see a partial file
+    tmp_filepath = f"{filepath}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_filepath, "w") as f:
+            f.write(content)
+        os.replace(tmp_filepath, filepath)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_filepath)
+        raise
+
+
+def get_cached_structure(key):
+    """Return the cached structure associated to ``key``. Return ``None`` if not available."""
+    if key is None:
+        return None
+    with _STRUCTURE_CACHE_LOCK:
+        structure = _STRUCTURE_CACHE.get(key)
+    if structure is not None:
+        return structure
+    structure = _read_structure_file(key)
+    if structure is not None:
+        with _STRUCTURE_CACHE_LOCK:
+            structure = _STRUCTURE_CACHE.setdefault(key, structure)
+    return structure
+
+
+def set_cached_structure(key, structure):
+    """Cache the structure associated to ``key``.
+
+    The structure should be a JSON serializable dictionary. Numpy and bytes values are converted
+    when saved to disk. Structures that can not be serialized are only kept in memory.
+    Keys starting with an underscore are kept in memory but are not saved to disk.
+    """
+    if key is None:
+        return structure
+    with _STRUCTURE_CACHE_LOCK:
+        structure = _STRUCTURE_CACHE.setdefault(key, structure)
+    with contextlib.suppress(OSError):
+        _write_structure_file(key, {k: v for k, v in structure.items() if not k.startswith("_")})
+    return structure
+
+
+def clear_structure_cache(disk=False):
+    """Clear the granule structures cached in memory.
+
+    If ``disk=True``, it also removes the structures saved in the ``structure_cache_dir`` directory.
+    """
+    with _STRUCTURE_CACHE_LOCK:
+        _STRUCTURE_CACHE.clear()
+    cache_dir = get_structure_cache_dir()
+    if disk and cache_dir is not None:
+        for filepath in glob.glob(os.path.join(cache_dir, "*.json")):
+            with contextlib.suppress(OSError):
+                os.remove(filepath)
@@ -67,7 +67,7 @@ def get_product_encoding_dict(product):
     """Read encoding dictionary from GPM product YAML file."""
     # Define retrievals for 2A-<RADAR> products
     if product in available_products(product_categories="RADAR", product_levels="2A"):
-        module_name = "gpm.dataset.encoding.encode_2a_radar"
+        module_name = "gpm.encoding.encode_2a_radar"
         return _get_encoding_function(module_name)()
     return None
 
@@ -0,0 +1,365 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module contains functions to aggregate IMERG half-hourly granules over time periods.
+
+The granules are folded one at a time into running sums, counts and maxima of each period,
+without creating a dask graph or a concatenated dataset of the whole time period.
+The granules of each period are processed in parallel by blocks, and the partial aggregates
+of the blocks are merged. The aggregates of each period are yielded as soon as the period is complete,
+so that the memory usage does not depend on the length of the time period.
+"""
+import itertools
+import os
+from collections import deque
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from gpm.imerg.extraction import check_imerg_product
+from gpm.imerg.readers import read_imerg_grid, read_imerg_window
+from gpm.io.checks import check_product_type, check_start_end_time, check_valid_time_request
+from gpm.io.find import find_filepaths
+from gpm.io.info import get_start_time_from_filepaths
+
+AGGREGATION_FREQUENCIES = {"hourly": "h", "daily": "D", "monthly": "M", "yearly": "Y"}
+AGGREGATION_STATISTICS = ["accumulation", "mean", "max", "count"]
+IMERG_TIMESTEP = np.timedelta64(30, "m")
+
+
+def check_frequency(freq):
+    """Check the aggregation frequency."""
+    if freq not in AGGREGATION_FREQUENCIES:
+        raise ValueError(f"Invalid frequency '{freq}'. Valid frequencies are {list(AGGREGATION_FREQUENCIES)}.")
+    return freq
+
+
+def check_statistics(statistics):
+    """Check the aggregation statistics."""
+    statistics = [statistics] if isinstance(statistics, str) else list(statistics)
+    invalid_statistics = [statistic for statistic in statistics if statistic not in AGGREGATION_STATISTICS]
+    if len(invalid_statistics) > 0:
+        raise ValueError(f"Invalid statistics {invalid_statistics}. Valid statistics are {AGGREGATION_STATISTICS}.")
+    return statistics
+
+
+####--------------------------------------------------------------------------.
+############################
+#### Partial aggregates ####
+############################
+
+
+def aggregate_granules(filepaths, variables):
+    """Fold IMERG granules into the running sums, counts and maxima of each variable.
+
+    Returns
+    -------
+    partial : dict
+        Dictionary with the ``sum``, ``count`` and ``max`` ``(lon, lat)`` arrays of each variable
+        and the number of aggregated granules ``n_granules``.
+
+    """
+    partial = {"sum": {}, "count": {}, "max": {}, "n_granules": 0}
+    for filepath in filepaths:
+        _, dict_arrays = read_imerg_window(filepath, variables=variables)
+        for name, arr in dict_arrays.items():
+            arr = arr.astype("float64")
+            is_valid = ~np.isnan(arr)
+            values = np.where(is_valid, arr, 0).sum(axis=0)
+            counts = is_valid.sum(axis=0, dtype="int32")
+            maxima = np.fmax.reduce(arr, axis=0)
+            if name not in partial["sum"]:
+                partial["sum"][name], partial["count"][name], partial["max"][name] = values, counts, maxima
+            else:
+                partial["sum"][name] += values
+                partial["count"][name] += counts
+                partial["max"][name] = np.fmax(partial["max"][name], maxima)
+        partial["n_granules"] += 1
+    return partial
+
+
+def merge_partial_aggregates(partial, other):
+    """Merge two partial aggregates returned by ``aggregate_granules``."""
+    if partial is None or partial["n_granules"] == 0:
+        return other
+    if other is None or other["n_granules"] == 0:
+        return partial
+    for name in partial["sum"]:
+        partial["sum"][name] += other["sum"][name]
+        partial["count"][name] += other["count"][name]
+        partial["max"][name] = np.fmax(partial["max"][name], other["max"][name])
+    partial["n_granules"] += other["n_granules"]
+    return partial
+
+
+def _get_period_dataset(partial, period, lon, lat, statistics):
+    """Compute the statistics of a period from its partial aggregates.
+
+    The ``accumulation`` is the mean rate (per hour) multiplied by the period duration (in hours):
+    the missing half-hours are filled with the period mean.
+    The statistics are computed in double precision and returned as float32 (except ``count``).
+    """
+    n_hours = (period.end_time - period.start_time + pd.Timedelta(1, "ns")) / pd.Timedelta(1, "h")
+    data_vars = {}
+    for name in partial["sum"]:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(partial["count"][name] > 0, partial["sum"][name] / partial["count"][name], np.nan)
+        dict_statistics = {
+            "accumulation": lambda mean=mean: mean * n_hours,
+            "mean": lambda mean=mean: mean,
+            "max": lambda name=name: partial["max"][name],
+            "count": lambda name=name: partial["count"][name],
+        }
+        for statistic in statistics:
+            arr = dict_statistics[statistic]()
+            if statistic != "count":
+                arr = arr.astype("float32")
+            data_vars[f"{name}_{statistic}"] = (("time", "lat", "lon"), arr.T[None, :, :])
+    coords = {
+        "time": [period.start_time],
+        "lat": lat,
+        "lon": lon,
+        "n_granules": ("time", [partial["n_granules"]]),
+    }
+    return xr.Dataset(data_vars=data_vars, coords=coords)
+
+
+####--------------------------------------------------------------------------.
+#############################
+#### Streaming reduction ####
+#############################
+
+
+def _get_periods_blocks(filepaths, periods, max_block_size):
+    """Split the (time-sorted) granules of each period into blocks of at most ``max_block_size`` granules."""
+    blocks = []
+    for period, group in itertools.groupby(zip(periods, filepaths), key=lambda item: item[0]):
+        period_filepaths = [filepath for _, filepath in group]
+        blocks += [
+            (period, period_filepaths[i : i + max_block_size]) for i in range(0, len(period_filepaths), max_block_size)
+        ]
+    return blocks
+
+
+def _iterate_blocks_aggregates(blocks, variables, parallel, max_workers):
+    """Yield the partial aggregates of the blocks of granules (in the order of ``blocks``).
+
+    At most ``2 * max_workers`` blocks are processed ahead of the consumer.
+    """
+    if not parallel:
+        for period, filepaths in blocks:
+            yield period, aggregate_granules(filepaths, variables=variables)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    from gpm import config
+    from gpm.utils.parallel import get_process_pool_context, init_pool_process
+
+    pending = deque()
+    iter_blocks = iter(blocks)
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=get_process_pool_context(),
+        initializer=init_pool_process,
+        initargs=(config.to_dict(),),
+    ) as executor:
+        while True:
+            while len(pending) < 2 * max_workers:
+                period, filepaths = next(iter_blocks, (None, None))
+                if filepaths is None:
+                    break
+                pending.append((period, executor.submit(aggregate_granules, filepaths, variables=variables)))
+            if len(pending) == 0:
+                break
+            period, future = pending.popleft()
+            yield period, future.result()
+
+
+def iterate_imerg_aggregates(
+    product,
+    start_time,
+    end_time,
+    freq="daily",
+    variables="precipitation",
+    statistics=("accumulation", "max", "count"),
+    product_type="RS",
+    version=None,
+    parallel=True,
+    max_workers=None,
+    verbose=False,
+):
+    """Yield the aggregates of IMERG half-hourly granules over each time period.
+
+    See ``aggregate_imerg`` for the description of the arguments.
+
+    Yields
+    ------
+    xarray.Dataset
+        The aggregates of a period, with a single ``time`` timestep (the period start time).
+
+    """
+    ## Check inputs
+    product_type = check_product_type(product_type=product_type)
+    product = check_imerg_product(product, product_type=product_type)
+    start_time, end_time = check_start_end_time(start_time, end_time)
+    start_time, end_time = check_valid_time_request(start_time, end_time, product)
+    freq = check_frequency(freq)
+    statistics = check_statistics(statistics)
+    variables = [variables] if isinstance(variables, str) else list(variables)
+
+    ## Find the local granules of the time period
+    filepaths = find_filepaths(
+        storage="LOCAL",
+        product=product,
+        start_time=start_time,
+        end_time=end_time,
+        product_type=product_type,
+        version=version,
+        verbose=verbose,
+    )
+    filepaths = sorted(filepaths, key=os.path.basename)
+    times = pd.DatetimeIndex(get_start_time_from_filepaths(filepaths))
+    is_within_period = (times >= pd.Timestamp(start_time)) & (times < pd.Timestamp(end_time))
+    filepaths = [filepath for filepath, flag in zip(filepaths, is_within_period) if flag]
+    if len(filepaths) == 0:
+        raise ValueError("No files found on disk. Please download them before.")
+    periods = times[is_within_period].to_period(AGGREGATION_FREQUENCIES[freq])
+
+    ## Define the blocks of granules processed by each task
+    # - Each block contains the granules of a single period
+    max_workers = min(len(filepaths), max_workers or os.cpu_count() or 1) if parallel else 1
+    max_block_size = int(np.ceil(pd.Series(periods).value_counts().max() / max_workers))
+    blocks = _get_periods_blocks(filepaths, periods=periods, max_block_size=max_block_size)
+
+    ## Merge the partial aggregates of each period
+    lon, lat = read_imerg_grid(filepaths[0])
+    current_period, current_partial = None, None
+    for period, partial in _iterate_blocks_aggregates(blocks, variables, parallel=parallel, max_workers=max_workers):
+        if current_period is not None and period != current_period:
+            yield _get_period_dataset(current_partial, current_period, lon=lon, lat=lat, statistics=statistics)
+            current_partial = None
+        current_period = period
+        current_partial = merge_partial_aggregates(current_partial, partial)
+    yield _get_period_dataset(current_partial, current_period, lon=lon, lat=lat, statistics=statistics)
+
+
+def aggregate_imerg(
+    product,
+    start_time,
+    end_time,
+    freq="daily",
+    variables="precipitation",
+    statistics=("accumulation", "max", "count"),
+    product_type="RS",
+    version=None,
+    parallel=True,
+    max_workers=None,
+    store=None,
+    verbose=False,
+):
+    """Aggregate IMERG half-hourly granules over hourly, daily, monthly or yearly periods.
+
+    The granules are folded one at a time into running sums, counts and maxima, so that the
+    memory usage depends only on the number of output periods. To aggregate long time periods
+    with constant memory, specify a Zarr ``store`` or iterate over the periods with
+    ``iterate_imerg_aggregates``.
+
+    Parameters
+    ----------
+    product : str
+        IMERG product acronym (i.e. ``'IMERG-FR'``).
+    start_time : datetime.datetime, datetime.date, numpy.datetime64 or str
+        Start time.
+    end_time : datetime.datetime, datetime.date, numpy.datetime64 or str
+        End time.
+    freq : str, optional
+        Aggregation period. Either ``'hourly'``, ``'daily'``, ``'monthly'`` or ``'yearly'``.
+        The default is ``'daily'``.
+    variables : str or list, optional
+        IMERG variables to aggregate. The default is ``'precipitation'``.
+    statistics : list, optional
+        Statistics to compute for each variable. The output variables are named ``<variable>_<statistic>``.
+        Valid statistics are:
+
+        - ``'accumulation'``: mean rate multiplied by the period duration in hours (i.e. mm for ``precipitation``).
+          The missing half-hours and pixels are filled with the period mean.
+        - ``'mean'``: mean of the valid half-hours.
+        - ``'max'``: maximum of the valid half-hours.
+        - ``'count'``: number of valid half-hours.
+
+        The default is ``('accumulation', 'max', 'count')``.
+    product_type : str, optional
+        GPM product type. Either ``'RS'`` (Research) or ``'NRT'`` (Near-Real-Time).
+        The default is ``'RS'``.
+    version : int, optional
+        GPM version of the data to retrieve if ``product_type = "RS"``.
+    parallel : bool, optional
+        Whether to aggregate the granules with a pool of processes. The default is ``True``.
+    max_workers : int, optional
+        Maximum number of processes. The default is ``None`` (the number of CPUs).
+    store : str or zarr store, optional
+        If specified, the aggregates of each period are written to the Zarr store as soon as
+        the period is complete and the dataset is lazily opened from the store.
+        An existing store is overwritten. The default is ``None``.
+    verbose : bool, optional
+        Whether to print processing details. The default is ``False``.
+
+    Returns
+    -------
+    xarray.Dataset
+        Dataset with the ``(time, lat, lon)`` statistics of each period. The ``time`` coordinate
+        is the period start time and the ``n_granules`` coordinate the number of aggregated granules.
+        The ``accumulation``, ``mean`` and ``max`` statistics are float32.
+
+    """
+    iter_ds = iterate_imerg_aggregates(
+        product=product,
+        start_time=start_time,
+        end_time=end_time,
+        freq=freq,
+        variables=variables,
+        statistics=statistics,
+        product_type=product_type,
+        version=version,
+        parallel=parallel,
+        max_workers=max_workers,
+        verbose=verbose,
+    )
+    if store is None:
+        return xr.concat(list(iter_ds), dim="time")
+
+    ## Write the aggregates of each period to the Zarr store
+    for i, ds in enumerate(iter_ds):
+        if i == 0:
+            encoding = {"time": {"units": "seconds since 1970-01-01 00:00:00", "dtype": "int64"}}
+            ds.to_zarr(store, mode="w", encoding=encoding)
+        else:
+            ds.drop_vars(["lat", "lon"]).to_zarr(store, append_dim="time")
+        if verbose:
+            print(f"IMERG aggregates of {ds['time'].dt.strftime('%Y-%m-%d %H:%M').item()} written.")
+    return xr.open_zarr(store)
@@ -0,0 +1,299 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module contains functions to build a time-major Zarr cube of IMERG half-hourly granules.
+
+The IMERG granules store a single timestep of the global grid. Reading the time series of a pixel
+requires to open every granule. The IMERG cube stores the granules in a Zarr store with chunks
+spanning many timesteps over a small area, which enables fast reading of pixel time series.
+
+The cube is written out-of-core: the granules are read by batches of ``time_chunk`` granules.
+Each granule of a batch is read once into temporary memory-mapped buffers, which store
+contiguously each longitude band of the cube chunks. The bands are then written one at a time,
+so that the memory usage is bounded by ``time_chunk * n_lat * lon_chunk`` values.
+The cube can be updated with the newly available granules: the file name of the granule ingested
+at each timestep is recorded in the ``ingested_file`` coordinate of the cube, which grows with the
+time dimension and is written only for the timesteps of each ingested batch.
+"""
+import math
+import os
+import tempfile
+
+import numpy as np
+import xarray as xr
+
+from gpm.imerg.extraction import check_imerg_product
+from gpm.imerg.readers import read_imerg_grid, read_imerg_window
+from gpm.io.checks import check_product_type, check_start_end_time, check_valid_time_request
+from gpm.io.find import find_filepaths
+from gpm.io.info import get_start_time_from_filepaths
+from gpm.utils.slices import get_list_slices_from_indices
+
+INGESTED_FILE_COORD = "ingested_file"
+INGESTED_FILE_DTYPE = "<U128"
+
+
+def _check_spatial_chunk(spatial_chunk):
+    """Return the ``(lat, lon)`` chunk sizes of the cube."""
+    if isinstance(spatial_chunk, int):
+        spatial_chunk = (spatial_chunk, spatial_chunk)
+    spatial_chunk = tuple(spatial_chunk)
+    if len(spatial_chunk) != 2 or any(not isinstance(size, int) or size < 1 for size in spatial_chunk):
+        raise ValueError("'spatial_chunk' must be a positive integer or a (lat, lon) tuple of positive integers.")
+    return spatial_chunk
+
+
+def _read_cube_record(store):
+    """Return the file names of the ingested granules and the timesteps of an existing cube."""
+    empty_record = [], np.array([], dtype="M8[ns]")
+    if isinstance(store, (str, os.PathLike)) and not os.path.exists(store):
+        return empty_record
+    try:
+        ds = xr.open_zarr(store)
+    except (FileNotFoundError, KeyError):
+        return empty_record
+    with ds:
+        # Timesteps without file name have not been ingested yet
+        ingested_filenames = [filename for filename in ds[INGESTED_FILE_COORD].to_numpy().tolist() if filename != ""]
+        return ingested_filenames, ds["time"].to_numpy()
+
+
+def _write_cube_record(store, filepaths, time_slice):
+    """Record the file names of the granules ingested in the ``time_slice`` timesteps of the cube."""
+    filenames = np.array([os.path.basename(filepath) for filepath in filepaths], dtype=INGESTED_FILE_DTYPE)
+    ds_record = xr.Dataset({INGESTED_FILE_COORD: ("time", filenames)})
+    ds_record.to_zarr(store, region={"time": time_slice})
+
+
+def _get_cube_template(times, lon, lat, variables, chunks, dtype="float32"):
+    """Return a lazy dataset with the structure of the cube timesteps (without data).
+
+    The ``ingested_file`` coordinate is not lazy and is written with the cube structure.
+    """
+    import dask.array
+
+    shape = (len(times), len(lat), len(lon))
+    data_vars = {
+        name: (("time", "lat", "lon"), dask.array.full(shape, np.nan, dtype=dtype, chunks=chunks))
+        for name in variables
+    }
+    coords = {
+        "time": times,
+        "lat": lat,
+        "lon": lon,
+        INGESTED_FILE_COORD: ("time", np.full(len(times), "", dtype=INGESTED_FILE_DTYPE)),
+    }
+    return xr.Dataset(data_vars=data_vars, coords=coords)
+
+
+def _read_cube_region(filepaths, variables, n_lon, lon_chunk, tmp_dir, dtype="float32"):
+    """Read the granules into memory-mapped ``(lon_band, time, lat, lon)`` buffers.
+
+    Each granule is opened once and read entirely, following the IMERG file chunks
+    (which span whole latitude columns). Each longitude band of ``lon_chunk`` columns
+    is stored contiguously in the buffers. The last band is padded if ``n_lon`` is not
+    a multiple of ``lon_chunk``.
+    """
+    n_bands = math.ceil(n_lon / lon_chunk)
+    dict_buffers = {}
+    for i, filepath in enumerate(filepaths):
+        _, dict_arrays = read_imerg_window(filepath, variables=variables)
+        for name, arr in dict_arrays.items():
+            arr = arr[0].T  # (lat, lon)
+            if name not in dict_buffers:
+                dict_buffers[name] = np.memmap(
+                    os.path.join(tmp_dir, f"{name}.dat"),
+                    dtype=dtype,
+                    mode="w+",
+                    shape=(n_bands, len(filepaths), arr.shape[0], lon_chunk),
+                )
+            for band in range(n_bands):
+                band_arr = arr[:, band * lon_chunk : (band + 1) * lon_chunk]
+                dict_buffers[name][band, i, :, : band_arr.shape[1]] = band_arr
+    return dict_buffers
+
+
+def _write_cube_region(store, filepaths, variables, time_slice, n_lon, lon_chunk, dtype="float32"):
+    """Write the granules into the ``time_slice`` timesteps of the cube, one longitude band at a time."""
+    with tempfile.TemporaryDirectory(prefix="gpm_imerg_cube_") as tmp_dir:
+        dict_buffers = _read_cube_region(
+            filepaths,
+            variables=variables,
+            n_lon=n_lon,
+            lon_chunk=lon_chunk,
+            tmp_dir=tmp_dir,
+            dtype=dtype,
+        )
+        for band, lon_start in enumerate(range(0, n_lon, lon_chunk)):
+            lon_slice = slice(lon_start, min(lon_start + lon_chunk, n_lon))
+            width = lon_slice.stop - lon_slice.start
+            ds_band = xr.Dataset(
+                {
+                    name: (("time", "lat", "lon"), np.asarray(buffer[band, :, :, :width]))
+                    for name, buffer in dict_buffers.items()
+                },
+            )
+            ds_band.to_zarr(store, region={"time": time_slice, "lat": slice(None), "lon": lon_slice})
+        # Release the memory maps before removing the buffers
+        del ds_band
+        dict_buffers.clear()
+
+
+def build_imerg_cube(
+    product,
+    start_time,
+    end_time,
+    store,
+    variables="precipitation",
+    spatial_chunk=50,
+    time_chunk=480,
+    product_type="RS",
+    version=None,
+    verbose=False,
+):
+    """Build (or update) a time-major Zarr cube of IMERG half-hourly granules.
+
+    The cube variables have the ``(time, lat, lon)`` dimensions and are stored with
+    ``(time_chunk, *spatial_chunk)`` chunks, enabling fast reading of pixel time series.
+    If the cube already exists, only the granules not yet ingested are added.
+    The granules more recent than the last cube timestep are appended. Older granules can not
+    be inserted and are skipped.
+
+    Each granule is read once. The granules of a batch of ``time_chunk`` timesteps are buffered
+    in temporary files (i.e. 480 * 1800 * 3600 float32 values = 12 GB per variable with the default
+    arguments) and the memory usage is bounded by ``time_chunk * n_lat * lon_chunk`` values
+    (i.e. 480 * 1800 * 50 float32 values = 173 MB). The temporary files are created in the default
+    temporary directory (see :py:func:`tempfile.gettempdir`).
+
+    Parameters
+    ----------
+    product : str
+        IMERG product acronym (i.e. ``'IMERG-FR'``, ``'IMERG-ER'``, ``'IMERG-LR'``).
+    start_time : datetime.datetime, datetime.date, numpy.datetime64 or str
+        Start time.
+    end_time : datetime.datetime, datetime.date, numpy.datetime64 or str
+        End time.
+    store : str or zarr store
+        Zarr store of the cube.
+    variables : str or list, optional
+        IMERG variables to ingest. The default is ``'precipitation'``.
+    spatial_chunk : int or tuple, optional
+        Size of the ``(lat, lon)`` chunks of the cube. The default is 50.
+    time_chunk : int, optional
+        Size of the ``time`` chunks of the cube. The default is 480 (10 days).
+    product_type : str, optional
+        GPM product type. Either ``'RS'`` (Research) or ``'NRT'`` (Near-Real-Time).
+        The default is ``'RS'``.
+    version : int, optional
+        GPM version of the data to retrieve if ``product_type = "RS"``.
+    verbose : bool, optional
+        Whether to print processing details. The default is ``False``.
+
+    Returns
+    -------
+    list
+        File paths of the ingested granules.
+
+    """
+    ## Check inputs
+    product_type = check_product_type(product_type=product_type)
+    product = check_imerg_product(product, product_type=product_type)
+    start_time, end_time = check_start_end_time(start_time, end_time)
+    start_time, end_time = check_valid_time_request(start_time, end_time, product)
+    variables = [variables] if isinstance(variables, str) else list(variables)
+    lat_chunk, lon_chunk = _check_spatial_chunk(spatial_chunk)
+    if not isinstance(time_chunk, int) or time_chunk < 1:
+        raise ValueError("'time_chunk' must be a positive integer.")
+
+    ## Find the local granules not yet ingested
+    filepaths = find_filepaths(
+        storage="LOCAL",
+        product=product,
+        start_time=start_time,
+        end_time=end_time,
+        product_type=product_type,
+        version=version,
+        verbose=verbose,
+    )
+    ingested_filenames, cube_times = _read_cube_record(store)
+    set_ingested_filenames = set(ingested_filenames)
+    filepaths = sorted(
+        [filepath for filepath in filepaths if os.path.basename(filepath) not in set_ingested_filenames],
+        key=os.path.basename,
+    )
+    # Granules older than the last cube timestep can not be inserted
+    # - Timesteps already in the cube are the granules of an interrupted update
+    times = np.array(get_start_time_from_filepaths(filepaths), dtype="M8[ns]")
+    if cube_times.size > 0:
+        is_valid = (times > cube_times[-1]) | np.isin(times, cube_times)
+        if verbose and not np.all(is_valid):
+            print(f"{np.sum(~is_valid)} granules older than the cube last timestep are skipped.")
+        filepaths = [filepath for filepath, flag in zip(filepaths, is_valid) if flag]
+        times = times[is_valid]
+    if len(filepaths) == 0:
+        if verbose:
+            print("The IMERG cube is up to date.")
+        return []
+
+    ## Create or extend the cube time dimension
+    lon, lat = read_imerg_grid(filepaths[0])
+    chunks = (time_chunk, lat_chunk, lon_chunk)
+    new_times = times[~np.isin(times, cube_times)]
+    if len(new_times) > 0:
+        template = _get_cube_template(new_times, lon=lon, lat=lat, variables=variables, chunks=chunks)
+        if cube_times.size == 0:
+            encoding = {name: {"chunks": chunks, "_FillValue": np.nan} for name in variables}
+            encoding["time"] = {"units": "seconds since 1970-01-01 00:00:00", "dtype": "int64", "chunks": (time_chunk,)}
+            encoding[INGESTED_FILE_COORD] = {"chunks": (time_chunk,)}
+            template.to_zarr(store, mode="w", compute=False, encoding=encoding)
+        else:
+            template.drop_vars(["lat", "lon"]).to_zarr(store, append_dim="time", compute=False)
+    all_times = np.concatenate([cube_times, new_times])
+    indices = np.searchsorted(all_times, times)
+
+    ## Write the granules by batches of time chunks
+    n_ingested = len(ingested_filenames)
+    chunk_indices = indices // time_chunk
+    for chunk_index in np.unique(chunk_indices):
+        is_batch = chunk_indices == chunk_index
+        batch_filepaths = np.array(filepaths)[is_batch]
+        batch_indices = indices[is_batch]
+        for time_slice in get_list_slices_from_indices(batch_indices):
+            region_filepaths = batch_filepaths[(batch_indices >= time_slice.start) & (batch_indices < time_slice.stop)]
+            _write_cube_region(
+                store,
+                filepaths=list(region_filepaths),
+                variables=variables,
+                time_slice=time_slice,
+                n_lon=len(lon),
+                lon_chunk=lon_chunk,
+            )
+            # Record the ingested granules once their data are written
+            _write_cube_record(store, filepaths=region_filepaths, time_slice=time_slice)
+        n_ingested += len(batch_filepaths)
+        if verbose:
+            print(f"{n_ingested} granules ingested in the IMERG cube.")
+    return filepaths
@@ -0,0 +1,300 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module contains functions to extract IMERG time series at a set of points.
+
+The points coordinates are converted once to the indices of the nearest IMERG pixels,
+and only these pixels (or their small bounding window) are read from each IMERG granule.
+"""
+import os
+import warnings
+from collections import deque
+from functools import partial
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from gpm.imerg.readers import read_imerg_grid, read_imerg_pixels
+from gpm.io.checks import (
+    check_product,
+    check_product_type,
+    check_start_end_time,
+    check_valid_time_request,
+)
+from gpm.io.find import find_filepaths
+from gpm.io.products import available_products
+from gpm.utils.warnings import GPM_Warning
+
+
+def check_imerg_product(product, product_type):
+    """Check the product is an IMERG product."""
+    product = check_product(product=product, product_type=product_type)
+    if product not in available_products(product_categories="IMERG"):
+        raise ValueError(f"{product} is not an IMERG product.")
+    return product
+
+
+def check_points(points):
+    """Check the ``(N, 2)`` array of ``(lon, lat)`` points."""
+    points = np.asarray(points, dtype=float)
+    if points.ndim != 2 or points.shape[1] != 2 or points.shape[0] == 0:
+        raise ValueError("'points' must be an array of shape (N, 2) with the (lon, lat) coordinates of the points.")
+    if np.any(np.abs(points[:, 0]) > 180) or np.any(np.abs(points[:, 1]) > 90):
+        raise ValueError("The 'points' longitude must be within [-180, 180] and latitude within [-90, 90].")
+    return points
+
+
+def _get_nearest_indices(coords, values):
+    """Return the indices of the nearest values of the sorted 1D ``coords``."""
+    indices = np.clip(np.searchsorted(coords, values), 1, len(coords) - 1)
+    is_left_nearest = values - coords[indices - 1] <= coords[indices] - values
+    return indices - is_left_nearest
+
+
+def get_points_grid_indices(lon, lat, points):
+    """Return the ``(lon, lat)`` indices of the grid pixels nearest to the ``(lon, lat)`` points."""
+    points = check_points(points)
+    return _get_nearest_indices(lon, points[:, 0]), _get_nearest_indices(lat, points[:, 1])
+
+
+def _read_granule_pixels(filepath, variables, lon_indices, lat_indices, max_window_size):
+    """Read the pixels time series of a granule. Returns ``None`` if the granule can not be read."""
+    try:
+        return read_imerg_pixels(
+            filepath,
+            variables=variables,
+            lon_indices=lon_indices,
+            lat_indices=lat_indices,
+            max_window_size=max_window_size,
+        )
+    except Exception as e:
+        msg = f"The following error occurred while reading the {filepath} granule: {e}"
+        warnings.warn(msg, GPM_Warning, stacklevel=2)
+        return None
+
+
+def _iterate_granules_pixels(filepaths, read_function, parallel, max_workers):
+    """Yield the pixels time series of the granules (in the order of ``filepaths``).
+
+    At most ``2 * max_workers`` granules are processed ahead of the consumer.
+    """
+    if not parallel:
+        yield from map(read_function, filepaths)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    from gpm import config
+    from gpm.utils.parallel import get_process_pool_context, init_pool_process
+
+    max_workers = min(len(filepaths), max_workers or os.cpu_count() or 1)
+    pending = deque()
+    iter_filepaths = iter(filepaths)
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=get_process_pool_context(),
+        initializer=init_pool_process,
+        initargs=(config.to_dict(),),
+    ) as executor:
+        while True:
+            while len(pending) < 2 * max_workers:
+                filepath = next(iter_filepaths, None)
+                if filepath is None:
+                    break
+                pending.append(executor.submit(read_function, filepath))
+            if len(pending) == 0:
+                break
+            yield pending.popleft().result()
+
+
+def _select_time_period(times, dict_arrays, start_time, end_time):
+    """Select the timesteps of the pixels time series within the time period."""
+    is_within_period = (times >= np.datetime64(start_time)) & (times < np.datetime64(end_time))
+    return times[is_within_period], {name: arr[is_within_period] for name, arr in dict_arrays.items()}
+
+
+def _get_points_dataframe(times, dict_arrays, station_ids):
+    """Return the pixels time series in long format."""
+    n_times, n_stations = len(times), len(station_ids)
+    data = {
+        "time": np.repeat(times, n_stations),
+        "station": np.tile(station_ids, n_times),
+    }
+    data.update({name: arr.ravel() for name, arr in dict_arrays.items()})
+    return pd.DataFrame(data)
+
+
+def extract_imerg_points(
+    product,
+    start_time,
+    end_time,
+    points,
+    variables="precipitation",
+    station_ids=None,
+    product_type="RS",
+    version=None,
+    parallel=True,
+    max_workers=None,
+    parquet_filepath=None,
+    max_window_size=2_000_000,
+    verbose=False,
+):
+    """Extract the time series of IMERG variables at a set of points (i.e. stations).
+
+    The points are assigned to their nearest IMERG pixel once, and only these pixels
+    (or their bounding window if smaller than ``max_window_size`` pixels) are read from each
+    local IMERG granule. The global grids are never loaded in memory.
+
+    Parameters
+    ----------
+    product : str
+        IMERG product acronym (i.e. ``'IMERG-FR'``).
+    start_time : datetime.datetime, datetime.date, numpy.datetime64 or str
+        Start time.
+    end_time : datetime.datetime, datetime.date, numpy.datetime64 or str
+        End time.
+    points : numpy.ndarray
+        An array of shape (N, 2) with the ``(lon, lat)`` coordinates of the points.
+    variables : str or list, optional
+        IMERG variables to extract. The default is ``'precipitation'``.
+    station_ids : list, optional
+        Identifiers of the points. The default is ``None`` (the points index).
+    product_type : str, optional
+        GPM product type. Either ``'RS'`` (Research) or ``'NRT'`` (Near-Real-Time).
+        The default is ``'RS'``.
+    version : int, optional
+        GPM version of the data to retrieve if ``product_type = "RS"``.
+    parallel : bool, optional
+        Whether to read the granules with a pool of processes. The default is ``True``.
+    max_workers : int, optional
+        Maximum number of processes. The default is ``None`` (the number of CPUs).
+    parquet_filepath : str, optional
+        If specified, the time series are written (granule by granule) in long format
+        (``time``, ``station`` and one column per variable) into this Parquet file,
+        and the file path is returned. The default is ``None``.
+    max_window_size : int, optional
+        Maximum number of pixels of the bounding window of the points read at once.
+        Above this size, each pixel is read separately. The default is 2'000'000.
+    verbose : bool, optional
+        Whether to print processing details. The default is ``False``.
+
+    Returns
+    -------
+    xarray.Dataset or str
+        Dataset with the ``(time, station)`` time series of each variable, or the Parquet file path.
+        The ``lon`` and ``lat`` coordinates are the points coordinates, while ``pixel_lon``
+        and ``pixel_lat`` are the coordinates of the IMERG pixels centroids.
+
+    """
+    ## Check inputs
+    product_type = check_product_type(product_type=product_type)
+    product = check_imerg_product(product, product_type=product_type)
+    start_time, end_time = check_start_end_time(start_time, end_time)
+    start_time, end_time = check_valid_time_request(start_time, end_time, product)
+    points = check_points(points)
+    variables = [variables] if isinstance(variables, str) else list(variables)
+    station_ids = np.arange(len(points)) if station_ids is None else np.asarray(station_ids)
+    if len(station_ids) != len(points):
+        raise ValueError("'station_ids' must have the same length as 'points'.")
+
+    ## Find the local granules
+    filepaths = find_filepaths(
+        storage="LOCAL",
+        product=product,
+        start_time=start_time,
+        end_time=end_time,
+        product_type=product_type,
+        version=version,
+        verbose=verbose,
+    )
+    if len(filepaths) == 0:
+        raise ValueError("No files found on disk. Please download them before.")
+    filepaths = sorted(filepaths, key=os.path.basename)
+
+    ## Define the pixels of the points (with the grid of the first granule)
+    lon, lat = read_imerg_grid(filepaths[0])
+    lon_indices, lat_indices = get_points_grid_indices(lon, lat, points)
+
+    ## Read the pixels time series of each granule
+    read_function = partial(
+        _read_granule_pixels,
+        variables=variables,
+        lon_indices=lon_indices,
+        lat_indices=lat_indices,
+        max_window_size=max_window_size,
+    )
+    results = _iterate_granules_pixels(
+        filepaths,
+        read_function=read_function,
+        parallel=parallel,
+        max_workers=max_workers,
+    )
+    results = (
+        _select_time_period(*result, start_time=start_time, end_time=end_time)
+        for result in results
+        if result is not None
+    )
+
+    ## Write the time series into the Parquet file
+    if parquet_filepath is not None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for times, dict_arrays in results:
+                df = _get_points_dataframe(times, dict_arrays, station_ids=station_ids)
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(parquet_filepath, schema=table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is None:
+            raise ValueError("No valid IMERG granule available for current request.")
+        return parquet_filepath
+
+    ## Concatenate the time series into a (time, station) dataset
+    list_times, dict_list_arrays = [], {name: [] for name in variables}
+    for times, dict_arrays in results:
+        list_times.append(times)
+        for name, arr in dict_arrays.items():
+            dict_list_arrays[name].append(arr)
+    if len(list_times) == 0:
+        raise ValueError("No valid IMERG granule available for current request.")
+    return xr.Dataset(
+        data_vars={name: (("time", "station"), np.concatenate(arrays)) for name, arrays in dict_list_arrays.items()},
+        coords={
+            "time": np.concatenate(list_times),
+            "station": station_ids,
+            "lon": ("station", points[:, 0]),
+            "lat": ("station", points[:, 1]),
+            "pixel_lon": ("station", lon[lon_indices]),
+            "pixel_lat": ("station", lat[lat_indices]),
+        },
+    )
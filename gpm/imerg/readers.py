@@ -0,0 +1,143 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module contains functions to read hyperslabs of IMERG half-hourly granules.
+
+The IMERG variables are read directly with netCDF4 (without creating xarray objects),
+so that only the required pixels of the global grids are read from each granule.
+The variables of the IMERG HDF5 granules have the ``(time, lon, lat)`` dimensions.
+"""
+import numpy as np
+
+IMERG_GROUP = "Grid"
+
+
+def _open_imerg_granule(filepath):
+    import netCDF4
+
+    nc = netCDF4.Dataset(filepath, "r")
+    nc.set_auto_mask(False)
+    return nc
+
+
+def _decode_imerg_time(var):
+    """Decode the IMERG ``time`` variable to ``numpy.datetime64`` values."""
+    import netCDF4
+
+    times = netCDF4.num2date(
+        var[:],
+        units=var.units,
+        only_use_cftime_datetimes=False,
+        only_use_python_datetimes=True,
+    )
+    return np.array(times, dtype="M8[ns]")
+
+
+def _mask_fill_values(arr, var):
+    """Replace the fill values of a floating variable with NaN."""
+    fill_value = getattr(var, "_FillValue", None)
+    if fill_value is not None and np.issubdtype(arr.dtype, np.floating):
+        arr = np.where(arr == fill_value, np.nan, arr)
+    return arr
+
+
+def read_imerg_grid(filepath):
+    """Return the ``lon`` and ``lat`` coordinates of an IMERG granule."""
+    from xarray.backends.netCDF4_ import NETCDF4_PYTHON_LOCK
+
+    with NETCDF4_PYTHON_LOCK, _open_imerg_granule(filepath) as nc:
+        group = nc[IMERG_GROUP]
+        return group["lon"][:], group["lat"][:]
+
+
+def read_imerg_window(filepath, variables, lon_slice=None, lat_slice=None):
+    """Read a ``(lon, lat)`` window of IMERG variables.
+
+    If ``lon_slice`` or ``lat_slice`` are ``None`` (the default), the entire dimension is read.
+
+    Returns
+    -------
+    times : numpy.ndarray
+        The granule timesteps.
+    dict_arrays : dict
+        Dictionary with the ``(time, lon, lat)`` array of each variable.
+        The fill values of floating variables are replaced with NaN.
+
+    """
+    from xarray.backends.netCDF4_ import NETCDF4_PYTHON_LOCK
+
+    lon_slice = slice(None) if lon_slice is None else lon_slice
+    lat_slice = slice(None) if lat_slice is None else lat_slice
+    with NETCDF4_PYTHON_LOCK, _open_imerg_granule(filepath) as nc:
+        group = nc[IMERG_GROUP]
+        times = _decode_imerg_time(group["time"])
+        dict_arrays = {
+            name: _mask_fill_values(group[name][:, lon_slice, lat_slice], group[name]) for name in variables
+        }
+    return times, dict_arrays
+
+
+def read_imerg_pixels(filepath, variables, lon_indices, lat_indices, max_window_size=2_000_000):
+    """Read the time series of IMERG variables at a set of pixels.
+
+    If the ``(lon, lat)`` bounding window of the pixels contains less than ``max_window_size`` pixels,
+    the window is read at once. Otherwise, each pixel is read separately.
+
+    Returns
+    -------
+    times : numpy.ndarray
+        The granule timesteps.
+    dict_arrays : dict
+        Dictionary with the ``(time, pixel)`` array of each variable.
+        The fill values of floating variables are replaced with NaN.
+
+    """
+    from xarray.backends.netCDF4_ import NETCDF4_PYTHON_LOCK
+
+    lon_indices = np.asarray(lon_indices)
+    lat_indices = np.asarray(lat_indices)
+    lon_slice = slice(int(lon_indices.min()), int(lon_indices.max()) + 1)
+    lat_slice = slice(int(lat_indices.min()), int(lat_indices.max()) + 1)
+    window_size = (lon_slice.stop - lon_slice.start) * (lat_slice.stop - lat_slice.start)
+    if window_size <= max_window_size:
+        times, dict_window = read_imerg_window(filepath, variables, lon_slice=lon_slice, lat_slice=lat_slice)
+        dict_arrays = {
+            name: arr[:, lon_indices - lon_slice.start, lat_indices - lat_slice.start]
+            for name, arr in dict_window.items()
+        }
+        return times, dict_arrays
+
+    # Read each (unique) pixel separately
+    pixels, inverse = np.unique(np.stack([lon_indices, lat_indices], axis=1), axis=0, return_inverse=True)
+    with NETCDF4_PYTHON_LOCK, _open_imerg_granule(filepath) as nc:
+        group = nc[IMERG_GROUP]
+        times = _decode_imerg_time(group["time"])
+        dict_arrays = {}
+        for name in variables:
+            var = group[name]
+            arr = np.stack([var[:, int(i), int(j)] for i, j in pixels], axis=1)
+            dict_arrays[name] = _mask_fill_values(arr, var)[:, inverse.ravel()]
+    return times, dict_arrays
@@ -0,0 +1,533 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module contains functions to maintain a catalog of the GPM granules stored on the local disk.
+
+The catalog is a SQLite database located at ``<base_dir>/GPM/catalog.sqlite``.
+It enables to search the local archive with an indexed time-range query instead of
+listing and parsing the content of each daily directory.
+The ``directories`` table stores the modification time of the daily directories when they were
+last scanned, so that the directories modified outside GPM-API are indexed again when searched.
+
+The ``integrity`` table of the database stores the integrity manifest of the local files.
+See ``gpm.io.data_integrity``.
+
+The ``access`` and ``pins`` tables store the last access time of the local files and the
+products periods which must be kept on disk when the local archive quota is enforced.
+See ``gpm.io.quota``.
+
+The ``footprints`` table stores the spatial footprint of the granules scan modes.
+See ``gpm.dataset.footprints``.
+"""
+import contextlib
+import datetime
+import os
+import re
+import sqlite3
+
+from gpm.configs import get_base_dir
+from gpm.io.checks import check_base_dir, get_current_utc_time
+from gpm.io.filter import is_granule_within_time
+from gpm.io.info import get_info_from_filepath
+from gpm.io.local import (
+    _get_local_product_base_directory,
+    get_local_product_directory,
+    is_temporary_filepath,
+)
+from gpm.utils.directories import search_leaf_files
+
+CATALOG_FILENAME = "catalog.sqlite"
+CATALOG_SCHEMA_VERSION = 1
+
+_CATALOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS granules (
+    filepath TEXT PRIMARY KEY,
+    product TEXT NOT NULL,
+    product_type TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    granule_id TEXT,
+    size INTEGER,
+    mtime REAL
+);
+CREATE INDEX IF NOT EXISTS granules_time_index
+    ON granules (product, product_type, version, start_time, end_time);
+CREATE TABLE IF NOT EXISTS products (
+    product TEXT NOT NULL,
+    product_type TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    update_time TEXT NOT NULL,
+    PRIMARY KEY (product, product_type, version)
+);
+CREATE TABLE IF NOT EXISTS directories (
+    dirpath TEXT PRIMARY KEY,
+    mtime REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS integrity (
+    filepath TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    deep INTEGER NOT NULL,
+    is_corrupted INTEGER NOT NULL,
+    check_time TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS access (
+    filepath TEXT PRIMARY KEY,
+    access_time REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pins (
+    product TEXT NOT NULL,
+    product_type TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    PRIMARY KEY (product, product_type, version, start_time, end_time)
+);
+CREATE TABLE IF NOT EXISTS footprints (
+    filepath TEXT NOT NULL,
+    scan_mode TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    block_size INTEGER NOT NULL,
+    n_scans INTEGER NOT NULL,
+    bounds BLOB NOT NULL,
+    time_bounds BLOB NOT NULL,
+    PRIMARY KEY (filepath, scan_mode)
+);
+"""
+
+
+####--------------------------------------------------------------------------.
+##########################
+#### Catalog database ####
+##########################
+
+
+def get_local_catalog_filepath(base_dir=None):
+    """Return the file path of the local granules catalog."""
+    base_dir = get_base_dir(base_dir=base_dir)
+    base_dir = check_base_dir(base_dir)
+    return os.path.join(base_dir, "GPM", CATALOG_FILENAME)
+
+
+def _migrate_catalog(connection):
+    """Upgrade the schema of a catalog created by a previous GPM-API version.
+
+    The schema version is stored in the SQLite ``user_version`` pragma.
+    The version 1 adds the ``time_bounds`` column to the ``footprints`` table. Since the footprints
+    are a cache, the outdated table is dropped and the footprints are computed again when required.
+    """
+    if connection.execute("PRAGMA user_version").fetchone()[0] >= CATALOG_SCHEMA_VERSION:
+        return
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        # Check again once the database is locked, another process might have migrated it meanwhile
+        if connection.execute("PRAGMA user_version").fetchone()[0] < CATALOG_SCHEMA_VERSION:
+            columns = [row[1] for row in connection.execute("PRAGMA table_info(footprints)")]
+            if len(columns) > 0 and "time_bounds" not in columns:
+                connection.execute("DROP TABLE footprints")
+            connection.execute(f"PRAGMA user_version = {CATALOG_SCHEMA_VERSION}")
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+
+
+@contextlib.contextmanager
+def _open_catalog(base_dir=None):
+    """Open a connection to the local granules catalog and commit changes on exit."""
+    catalog_filepath = get_local_catalog_filepath(base_dir=base_dir)
+    os.makedirs(os.path.dirname(catalog_filepath), exist_ok=True)
+    connection = sqlite3.connect(catalog_filepath, timeout=60)
+    try:
+        _migrate_catalog(connection)
+        connection.executescript(_CATALOG_SCHEMA)
+        yield connection
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def _get_catalog_version(product_type, version):
+    """Return the version used to index the catalog.
+
+    NRT products are not organized by version on disk.
+    """
+    if product_type == "NRT":
+        return 0
+    return int(version)
+
+
+def _get_time_string(time):
+    """Return the string representation of a time used in the catalog."""
+    return time.isoformat(sep=" ")
+
+
+def _get_product_type_from_local_filepath(filepath, base_dir, default):
+    """Infer the product type from the local directory structure ``GPM/<product_type>/...``."""
+    relative_path = os.path.relpath(filepath, base_dir)
+    path_parts = relative_path.split(os.path.sep)
+    if len(path_parts) > 2 and path_parts[0] == "GPM" and path_parts[1] in ["RS", "NRT"]:
+        return path_parts[1]
+    return default
+
+
+def _define_catalog_record(filepath, base_dir):
+    """Define the catalog record of a local file.
+
+    Returns ``None`` if the filename can not be parsed or if the file does not exist.
+    """
+    try:
+        info_dict = get_info_from_filepath(filepath)
+        stat = os.stat(filepath)
+    except (ValueError, OSError):
+        return None
+    product_type = _get_product_type_from_local_filepath(
+        filepath,
+        base_dir=base_dir,
+        default=info_dict["product_type"],
+    )
+    version = int(re.findall("\\d+", info_dict["version"])[0])
+    return (
+        filepath,
+        info_dict["product"],
+        product_type,
+        _get_catalog_version(product_type, version),
+        _get_time_string(info_dict["start_time"]),
+        _get_time_string(info_dict["end_time"]),
+        str(info_dict.get("granule_id", "")),
+        stat.st_size,
+        stat.st_mtime,
+    )
+
+
+####--------------------------------------------------------------------------.
+#########################
+#### Catalog updates ####
+#########################
+
+
+def update_local_catalog(filepaths, base_dir=None):
+    """Add (or refresh) local files into the local granules catalog.
+
+    File paths which do not exist anymore on disk are removed from the catalog.
+
+    Parameters
+    ----------
+    filepaths : list
+        List of local file paths.
+    base_dir : str, optional
+        The path to the GPM base directory.
+        If ``None``, it uses the ``base_dir`` specified in the GPM-API config file.
+
+    """
+    if isinstance(filepaths, str):
+        filepaths = [filepaths]
+    if len(filepaths) == 0:
+        return
+    base_dir = check_base_dir(get_base_dir(base_dir=base_dir))
+    records = []
+    missing_filepaths = []
+    for filepath in filepaths:
+        record = _define_catalog_record(filepath, base_dir=base_dir)
+        if record is None:
+            missing_filepaths.append(filepath)
+        else:
+            records.append(record)
+    with _open_catalog(base_dir=base_dir) as connection:
+        connection.executemany("INSERT OR REPLACE INTO granules VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", records)
+        connection.executemany("DELETE FROM granules WHERE filepath = ?", [(f,) for f in missing_filepaths])
+
+
+def remove_from_local_catalog(filepaths, base_dir=None):
+    """Remove file paths from the local granules catalog."""
+    if isinstance(filepaths, str):
+        filepaths = [filepaths]
+    if len(filepaths) == 0:
+        return
+    with _open_catalog(base_dir=base_dir) as connection:
+        connection.executemany("DELETE FROM granules WHERE filepath = ?", [(f,) for f in filepaths])
+
+
+def _get_directory_mtime(dir_path):
+    """Return the modification time of a directory, or ``None`` if the directory does not exist."""
+    try:
+        return os.stat(dir_path).st_mtime
+    except OSError:
+        return None
+
+
+def _get_prefix_args(dir_path):
+    """Return the arguments of the ``substr(<column>, 1, ?) = ?`` clause selecting paths within a directory."""
+    prefix = os.path.join(dir_path, "")
+    return len(prefix), prefix
+
+
+def _get_daily_directories_dates(start_time, end_time):
+    """Return the dates of the daily directories which can contain files of the time period.
+
+    Granules starting the day before ``start_time`` are stored in the previous day directory.
+    """
+    start_date = start_time.date() - datetime.timedelta(days=1)
+    n_days = (end_time.date() - start_date).days + 1
+    return [start_date + datetime.timedelta(days=i) for i in range(n_days)]
+
+
+def refresh_local_catalog(product, start_time, end_time, product_type="RS", version=7, base_dir=None):
+    """Index again the product daily directories modified since they were last scanned.
+
+    The modification time of a directory changes when files are added to or removed from it
+    (i.e. when files are copied into the local archive without GPM-API).
+
+    Parameters
+    ----------
+    product : str
+        GPM product acronym. See ``gpm.available_products()``.
+    start_time : datetime.datetime
+        Start time.
+    end_time : datetime.datetime
+        End time.
+    product_type : str, optional
+        GPM product type. Either ``RS`` (Research) or ``NRT`` (Near-Real-Time).
+        The default is ``RS``.
+    version : int, optional
+        GPM version of the data to index if ``product_type = "RS"``.
+        The default is version ``7``.
+    base_dir : str, optional
+        The path to the GPM base directory.
+        If ``None``, it uses the ``base_dir`` specified in the GPM-API config file.
+
+    Returns
+    -------
+    n_directories : int
+        Number of daily directories indexed again.
+
+    """
+    base_dir = check_base_dir(get_base_dir(base_dir=base_dir))
+    dir_paths = [
+        get_local_product_directory(
+            base_dir=base_dir,
+            product=product,
+            product_type=product_type,
+            version=version,
+            date=date,
+        )
+        for date in _get_daily_directories_dates(start_time, end_time)
+    ]
+    # Retrieve the modification times before listing the directories
+    # --> Files added while listing are indexed at the next refresh
+    mtimes = {dir_path: _get_directory_mtime(dir_path) for dir_path in dir_paths}
+    with _open_catalog(base_dir=base_dir) as connection:
+        scanned_mtimes = {}
+        for dir_path in dir_paths:
+            row = connection.execute("SELECT mtime FROM directories WHERE dirpath = ?", (dir_path,)).fetchone()
+            scanned_mtimes[dir_path] = None if row is None else row[0]
+    modified_dir_paths = [dir_path for dir_path in dir_paths if mtimes[dir_path] != scanned_mtimes[dir_path]]
+    if len(modified_dir_paths) == 0:
+        return 0
+
+    # Index the files of the modified directories
+    records = []
+    for dir_path in modified_dir_paths:
+        if mtimes[dir_path] is None:
+            continue
+        filepaths = [entry.path for entry in os.scandir(dir_path) if entry.is_file()]
+        filepaths = [filepath for filepath in filepaths if not is_temporary_filepath(filepath)]
+        dir_records = [_define_catalog_record(filepath, base_dir=base_dir) for filepath in filepaths]
+        records.extend([record for record in dir_records if record is not None and record[1] == product])
+    with _open_catalog(base_dir=base_dir) as connection:
+        for dir_path in modified_dir_paths:
+            connection.execute("DELETE FROM granules WHERE substr(filepath, 1, ?) = ?", _get_prefix_args(dir_path))
+            if mtimes[dir_path] is None:
+                connection.execute("DELETE FROM directories WHERE dirpath = ?", (dir_path,))
+            else:
+                connection.execute("INSERT OR REPLACE INTO directories VALUES (?, ?)", (dir_path, mtimes[dir_path]))
+        connection.executemany("INSERT OR REPLACE INTO granules VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", records)
+    return len(modified_dir_paths)
+
+
+def build_local_catalog(product, product_type="RS", version=7, base_dir=None):
+    """Index in the local granules catalog all the files of a product available on disk.
+
+    Existing catalog entries of the product are replaced.
+    Once a product has been indexed, ``gpm.find_files(storage="LOCAL")`` searches the
+    product files with the catalog if the ``local_catalog`` GPM-API config is ``True``.
+
+    Parameters
+    ----------
+    product : str
+        GPM product acronym. See ``gpm.available_products()``.
+    product_type : str, optional
+        GPM product type. Either ``RS`` (Research) or ``NRT`` (Near-Real-Time).
+        The default is ``RS``.
+    version : int, optional
+        GPM version of the data to index if ``product_type = "RS"``.
+        The default is version ``7``.
+    base_dir : str, optional
+        The path to the GPM base directory.
+        If ``None``, it uses the ``base_dir`` specified in the GPM-API config file.
+
+    Returns
+    -------
+    n_files : int
+        Number of files indexed in the catalog.
+
+    """
+    base_dir = check_base_dir(get_base_dir(base_dir=base_dir))
+    product_dir = _get_local_product_base_directory(
+        base_dir=base_dir,
+        product=product,
+        product_type=product_type,
+        version=version,
+    )
+    filepaths = search_leaf_files(base_dir=product_dir, parallel=True) if os.path.exists(product_dir) else []
+    filepaths = [filepath for filepath in filepaths if not is_temporary_filepath(filepath)]
+    records = [_define_catalog_record(filepath, base_dir=base_dir) for filepath in filepaths]
+    records = [record for record in records if record is not None and record[1] == product]
+    dir_records = [(dir_path, _get_directory_mtime(dir_path)) for dir_path in {os.path.dirname(f) for f in filepaths}]
+    dir_records = [(dir_path, mtime) for dir_path, mtime in dir_records if mtime is not None]
+    catalog_version = _get_catalog_version(product_type, version)
+    with _open_catalog(base_dir=base_dir) as connection:
+        connection.execute(
+            "DELETE FROM granules WHERE product = ? AND product_type = ? AND version = ?",
+            (product, product_type, catalog_version),
+        )
+        connection.execute("DELETE FROM directories WHERE substr(dirpath, 1, ?) = ?", _get_prefix_args(product_dir))
+        connection.executemany("INSERT OR REPLACE INTO granules VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", records)
+        connection.executemany("INSERT OR REPLACE INTO directories VALUES (?, ?)", dir_records)
+        connection.execute(
+            "INSERT OR REPLACE INTO products VALUES (?, ?, ?, ?)",
+            (product, product_type, catalog_version, _get_time_string(get_current_utc_time())),
+        )
+    return len(records)
+
+
+####--------------------------------------------------------------------------.
+#########################
+#### Catalog queries ####
+#########################
+
+
+def is_product_cataloged(product, product_type="RS", version=7, base_dir=None):
+    """Return ``True`` if the product files have been indexed in the local granules catalog."""
+    catalog_filepath = get_local_catalog_filepath(base_dir=base_dir)
+    if not os.path.exists(catalog_filepath):
+        return False
+    with _open_catalog(base_dir=base_dir) as connection:
+        cursor = connection.execute(
+            "SELECT 1 FROM products WHERE product = ? AND product_type = ? AND version = ?",
+            (product, product_type, _get_catalog_version(product_type, version)),
+        )
+        return cursor.fetchone() is not None
+
+
+def query_local_catalog(product, start_time, end_time, product_type="RS", version=7, base_dir=None):
+    """Search the local granules catalog for the product files within a time period.
+
+    Catalog entries pointing to files which have been removed from disk are dropped.
+
+    Parameters
+    ----------
+    product : str
+        GPM product acronym. See ``gpm.available_products()``.
+    start_time : datetime.datetime
+        Start time.
+    end_time : datetime.datetime
+        End time.
+    product_type : str, optional
+        GPM product type. Either ``RS`` (Research) or ``NRT`` (Near-Real-Time).
+        The default is ``RS``.
+    version : int, optional
+        GPM version of the data to search if ``product_type = "RS"``.
+        The default is version ``7``.
+    base_dir : str, optional
+        The path to the GPM base directory.
+        If ``None``, it uses the ``base_dir`` specified in the GPM-API config file.
+
+    Returns
+    -------
+    filepaths : list
+        Sorted list of local file paths.
+
+    """
+    with _open_catalog(base_dir=base_dir) as connection:
+        cursor = connection.execute(
+            "SELECT filepath, start_time, end_time FROM granules "
+            "WHERE product = ? AND product_type = ? AND version = ? AND start_time <= ? AND end_time >= ?",
+            (
+                product,
+                product_type,
+                _get_catalog_version(product_type, version),
+                _get_time_string(end_time),
+                _get_time_string(start_time),
+            ),
+        )
+        rows = cursor.fetchall()
+        # Refine the time selection with the same criteria used by filter_filepaths
+        filepaths = [
+            filepath
+            for filepath, file_start_time, file_end_time in rows
+            if is_granule_within_time(
+                start_time,
+                end_time,
+                datetime.datetime.fromisoformat(file_start_time),
+                datetime.datetime.fromisoformat(file_end_time),
+            )
+        ]
+        # Drop entries of files removed from disk
+        missing_filepaths = {filepath for filepath in filepaths if not os.path.exists(filepath)}
+        if len(missing_filepaths) > 0:
+            connection.executemany("DELETE FROM granules WHERE filepath = ?", [(f,) for f in missing_filepaths])
+            filepaths = [filepath for filepath in filepaths if filepath not in missing_filepaths]
+    return sorted(filepaths)
+
+
+def find_local_catalog_filepaths(product, start_time, end_time, product_type="RS", version=7, base_dir=None):
+    """Search the local product files with the local granules catalog.
+
+    If the product has not yet been indexed, the catalog is first built by scanning the product directory.
+    Otherwise, the daily directories of the time period modified since their last scan are indexed again.
+    """
+    if not is_product_cataloged(product=product, product_type=product_type, version=version, base_dir=base_dir):
+        build_local_catalog(product=product, product_type=product_type, version=version, base_dir=base_dir)
+    else:
+        refresh_local_catalog(
+            product=product,
+            start_time=start_time,
+            end_time=end_time,
+            product_type=product_type,
+            version=version,
+            base_dir=base_dir,
+        )
+    return query_local_catalog(
+        product=product,
+        start_time=start_time,
+        end_time=end_time,
+        product_type=product_type,
+        version=version,
+        base_dir=base_dir,
+    )
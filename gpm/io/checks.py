@@ -143,7 +143,7 @@ WGET_IS_AVAILABLE = check_transfer_tool_availability("wget")
 
 def check_transfer_tool(transfer_tool):
     """Check the transfer tool."""
-    valid_transfer_tools = ["CURL", "WGET"]
+    valid_transfer_tools = ["CURL", "WGET", "NATIVE"]
 
     if transfer_tool.upper() not in valid_transfer_tools:
         raise ValueError(
@@ -159,6 +159,14 @@ def check_transfer_tool(transfer_tool):
     return transfer_tool
 
 
+def check_scheduler(scheduler):
+    """Check the download scheduler."""
+    valid_schedulers = ["DAILY", "ASYNC"]
+    if not isinstance(scheduler, str) or scheduler.upper() not in valid_schedulers:
+        raise ValueError(f"'{scheduler}' is an invalid 'scheduler'. Valid values are {valid_schedulers}.")
+    return scheduler.upper()
+
+
 def check_product(product, product_type):
     """Check product validity."""
     from gpm.io.products import available_products
@@ -24,40 +24,273 @@
 # SOFTWARE.
 
 # -----------------------------------------------------------------------------.
-"""This module contains functions that check the GPM files integrity."""
+"""This module contains functions that check the GPM files integrity.
+
+The integrity check is performed in two passes:
+
+- a cheap pass checks the HDF5 superblock of each file and that the file size is not
+  smaller than the end-of-file address recorded in the superblock (i.e. truncated downloads),
+- an optional deep pass opens the files and reads every variable of every group.
+
+Files which are not HDF5 files are opened with ``netCDF4``.
+If the GPM-API ``base_dir`` is configured, the results are stored in an integrity manifest
+(in the local granules catalog database) keyed by file path, size and modification time,
+so that subsequent checks only inspect new or modified files.
+"""
 import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 import xarray as xr
 
+from gpm._config import config
+from gpm.io.catalog import _get_time_string, _open_catalog, remove_from_local_catalog
 from gpm.io.checks import (
     check_product,
     check_start_end_time,
     check_valid_time_request,
+    get_current_utc_time,
 )
 from gpm.io.find import find_filepaths
 
+HDF5_SIGNATURE = b"\x89HDF\r\n\x1a\n"
+
+####--------------------------------------------------------------------------.
+#####################
+#### File checks ####
+#####################
+
+
+def _read_hdf5_end_of_file_address(filepath):
+    """Return the file size declared in the HDF5 superblock.
+
+    Returns ``None`` if the file is not an HDF5 file.
+    The superblock can be located at byte 0, 512, 1024, 2048, ... if the file has a user block.
+    """
+    file_size = os.path.getsize(filepath)
+    with open(filepath, "rb") as f:
+        superblock_offset = 0
+        while True:
+            if superblock_offset + len(HDF5_SIGNATURE) > file_size:
+                return None
+            f.seek(superblock_offset)
+            if f.read(len(HDF5_SIGNATURE)) == HDF5_SIGNATURE:
+                break
+            superblock_offset = 512 if superblock_offset == 0 else superblock_offset * 2
+        header = f.read(64)
+    # The superblock version and the size of offsets are stored in the first 6 bytes
+    if len(header) < 6:
+        raise ValueError("Truncated HDF5 superblock.")
+    superblock_version = header[0]
+    if superblock_version in [0, 1]:
+        size_of_offsets = header[5]
+        # Skip versions, sizes, B-tree K values and file consistency flags
+        position = 16 if superblock_version == 0 else 20
+        n_addresses = 3  # base address, free-space info address, end of file address
+    elif superblock_version in [2, 3]:
+        size_of_offsets = header[1]
+        position = 4
+        n_addresses = 3  # base address, superblock extension address, end of file address
+    else:
+        raise ValueError(f"Unsupported HDF5 superblock version {superblock_version}.")
+    if len(header) < position + n_addresses * size_of_offsets:
+        raise ValueError("Truncated HDF5 superblock.")
+    addresses = [
+        int.from_bytes(header[position + i * size_of_offsets : position + (i + 1) * size_of_offsets], "little")
+        for i in range(n_addresses)
+    ]
+    # The end of file address includes the user block (if any)
+    return addresses[2]
+
+
+def _check_file_header(filepath):
+    """Check the HDF5 superblock and the size of a file.
+
+    Returns ``True`` if the file is corrupted, ``False`` if the file seems valid and
+    ``None`` if the file is not an HDF5 file.
+    """
+    try:
+        end_of_file_address = _read_hdf5_end_of_file_address(filepath)
+    except (OSError, ValueError):
+        return True
+    if end_of_file_address is None:
+        return None
+    return os.path.getsize(filepath) < end_of_file_address
 
-def get_corrupted_filepaths(filepaths):
-    """Return the file paths of corrupted files."""
-    l_corrupted = []
-    for filepath in filepaths:
-        try:
-            # Try open the HDF file
 
-            # DataTree.close() does not work yet!
-            # dt = datatree.open_datatree(filepath, engine="netcdf4")
-            # dt.close()
+def _read_netcdf_group(group):
+    """Read the data of all variables of a netCDF4 group and of its subgroups."""
+    for variable in group.variables.values():
+        _ = variable[...]
+    for subgroup in group.groups.values():
+        _read_netcdf_group(subgroup)
 
-            # h5py it's an heavy dependency !
-            # hdf = h5py.File(filepath, "r")  # h5py._hl.files.File
-            # hdf.close()
 
+def _check_file_content(filepath, deep=False):
+    """Open a file and (optionally) read all its groups. Return ``True`` if the file is corrupted."""
+    try:
+        if deep:
+            import netCDF4
+
+            with netCDF4.Dataset(filepath, "r") as ds:
+                _read_netcdf_group(ds)
+        else:
             ds = xr.open_dataset(filepath, engine="netcdf4", group="")
             ds.close()
+    except Exception:
+        return True
+    return False
 
-        except OSError:
-            l_corrupted.append(filepath)
-    return l_corrupted
+
+def _check_deep_file_content(filepath):
+    """Read all groups of a file. Return ``True`` if the file is corrupted."""
+    return _check_file_content(filepath, deep=True)
+
+
+def _run_checks(func, filepaths, executor_class, parallel, n_workers=None):
+    """Apply a file check function to a list of files, optionally in parallel."""
+    if not parallel or len(filepaths) <= 1:
+        return [func(filepath) for filepath in filepaths]
+    n_workers = min(n_workers or os.cpu_count() or 1, len(filepaths))
+    with executor_class(max_workers=n_workers) as executor:
+        return list(executor.map(func, filepaths, chunksize=max(1, len(filepaths) // (4 * n_workers))))
+
+
+####--------------------------------------------------------------------------.
+############################
+#### Integrity manifest ####
+############################
+
+
+def _get_manifest_base_dir():
+    """Return the base directory where the integrity manifest is stored, or ``None`` if not configured."""
+    return config.get("base_dir", None)
+
+
+def _get_file_signature(filepath):
+    """Return the size and modification time of a file, or ``None`` if the file does not exist."""
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime
+
+
+def read_integrity_manifest(filepaths, deep=False, base_dir=None):
+    """Return the manifest verdicts (``True`` if corrupted) of the unchanged files.
+
+    Only the files whose size and modification time did not change since their last check
+    (performed at the required depth) are returned.
+    If the manifest can not be read, no verdicts are returned.
+    """
+    base_dir = base_dir or _get_manifest_base_dir()
+    if base_dir is None or len(filepaths) == 0:
+        return {}
+    try:
+        with _open_catalog(base_dir=base_dir) as connection:
+            rows = connection.execute("SELECT filepath, size, mtime, deep, is_corrupted FROM integrity").fetchall()
+    except (OSError, sqlite3.Error):
+        return {}
+    manifest = {row[0]: row[1:] for row in rows}
+    verdicts = {}
+    for filepath in filepaths:
+        if filepath not in manifest:
+            continue
+        size, mtime, checked_deep, is_corrupted = manifest[filepath]
+        if _get_file_signature(filepath) == (size, mtime) and checked_deep >= int(deep):
+            verdicts[filepath] = bool(is_corrupted)
+    return verdicts
+
+
+def update_integrity_manifest(verdicts, deep=False, base_dir=None):
+    """Record the integrity check results (``True`` if corrupted) of files in the manifest.
+
+    If the manifest can not be written (i.e. read-only ``base_dir``), the results are not recorded.
+    """
+    base_dir = base_dir or _get_manifest_base_dir()
+    if base_dir is None or len(verdicts) == 0:
+        return
+    check_time = _get_time_string(get_current_utc_time())
+    records = []
+    for filepath, is_corrupted in verdicts.items():
+        signature = _get_file_signature(filepath)
+        if signature is not None:
+            records.append((filepath, *signature, int(deep), int(is_corrupted), check_time))
+    try:
+        with _open_catalog(base_dir=base_dir) as connection:
+            connection.executemany("INSERT OR REPLACE INTO integrity VALUES (?, ?, ?, ?, ?, ?)", records)
+    except (OSError, sqlite3.Error):
+        return
+
+
+####--------------------------------------------------------------------------.
+#########################
+#### Integrity check ####
+#########################
+
+
+def get_corrupted_filepaths(filepaths, deep=False, parallel=True, n_workers=None, use_manifest=None):
+    """Return the file paths of corrupted files.
+
+    Parameters
+    ----------
+    filepaths : list
+        List of file paths.
+    deep : bool, optional
+        If ``False`` (the default), it checks the HDF5 superblock and the size of the files.
+        If ``True``, it also reads the data of every group of the files.
+    parallel : bool, optional
+        Whether to check the files in parallel. The default is ``True``.
+        File headers are checked with threads, while files are opened with processes.
+    n_workers : int, optional
+        Number of parallel workers. If ``None`` (the default), it uses the number of CPUs.
+    use_manifest : bool, optional
+        Whether to skip the files whose integrity has already been checked and which did not change since.
+        The manifest is stored in the local granules catalog of the GPM-API ``base_dir``.
+        If ``None`` (the default), it is used only if the ``local_catalog`` GPM-API config is enabled.
+
+    Returns
+    -------
+    l_corrupted : list
+        List of corrupted file paths.
+
+    """
+    if use_manifest is None:
+        use_manifest = bool(config.get("local_catalog", False))
+    verdicts = read_integrity_manifest(filepaths, deep=deep) if use_manifest else {}
+    filepaths_to_check = [filepath for filepath in filepaths if filepath not in verdicts]
+
+    # Check the HDF5 superblock and file size
+    header_verdicts = _run_checks(
+        _check_file_header,
+        filepaths_to_check,
+        executor_class=ThreadPoolExecutor,
+        parallel=parallel,
+        n_workers=n_workers,
+    )
+    new_verdicts = dict(zip(filepaths_to_check, header_verdicts))
+
+    # Open the files which are not HDF5 files (or all valid files if deep=True)
+    filepaths_to_open = [
+        filepath
+        for filepath, is_corrupted in new_verdicts.items()
+        if is_corrupted is None or (deep and not is_corrupted)
+    ]
+    content_func = _check_deep_file_content if deep else _check_file_content
+    content_verdicts = _run_checks(
+        content_func,
+        filepaths_to_open,
+        executor_class=ProcessPoolExecutor,
+        parallel=parallel,
+        n_workers=n_workers,
+    )
+    new_verdicts.update(dict(zip(filepaths_to_open, content_verdicts)))
+
+    # Update the manifest
+    if use_manifest:
+        update_integrity_manifest(new_verdicts, deep=deep)
+    verdicts.update(new_verdicts)
+    return [filepath for filepath in filepaths if verdicts[filepath]]
 
 
 def remove_corrupted_filepaths(filepaths, verbose=True):
@@ -65,9 +298,11 @@ def remove_corrupted_filepaths(filepaths, verbose=True):
         if verbose:
             print(f"{filepath} is corrupted and is being removed.")
         os.remove(filepath)
+    if config.get("local_catalog"):
+        remove_from_local_catalog(filepaths)
 
 
-def check_filepaths_integrity(filepaths, remove_corrupted=True, verbose=True):
+def check_filepaths_integrity(filepaths, remove_corrupted=True, verbose=True, deep=False, parallel=True):
     """Check the integrity of GPM files.
 
     Parameters
@@ -79,6 +314,11 @@ def check_filepaths_integrity(filepaths, remove_corrupted=True, verbose=True):
        The default is ``True``.
     verbose : bool, optional
         Whether to verbose the corrupted files. The default is ``True``.
+    deep : bool, optional
+        Whether to read the data of every group of the files.
+        If ``False`` (the default), only the HDF5 superblock and the file size are checked.
+    parallel : bool, optional
+        Whether to check the files in parallel. The default is ``True``.
 
     Returns
     -------
@@ -86,8 +326,8 @@ def check_filepaths_integrity(filepaths, remove_corrupted=True, verbose=True):
         List of corrupted file paths.
 
     """
-    # Loop over files and list file that can't be opened
-    l_corrupted = get_corrupted_filepaths(filepaths)
+    # List the files which are corrupted
+    l_corrupted = get_corrupted_filepaths(filepaths, deep=deep, parallel=parallel)
 
     # Report corrupted and remove if asked
     if remove_corrupted:
@@ -107,6 +347,8 @@ def check_archive_integrity(
     product_type="RS",
     remove_corrupted=True,
     verbose=True,
+    deep=False,
+    parallel=True,
 ):
     """Check GPM granule file integrity over a given period.
 
@@ -128,6 +370,11 @@ def check_archive_integrity(
     remove_corrupted : bool, optional
         Whether to remove the corrupted files.
         The default is ``True``.
+    deep : bool, optional
+        Whether to read the data of every group of the files.
+        If ``False`` (the default), only the HDF5 superblock and the file size are checked.
+    parallel : bool, optional
+        Whether to check the files in parallel. The default is ``True``.
 
     Returns
     -------
@@ -160,4 +407,6 @@ def check_archive_integrity(
         filepaths=filepaths,
         remove_corrupted=remove_corrupted,
         verbose=verbose,
+        deep=deep,
+        parallel=parallel,
     )
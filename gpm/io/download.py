@@ -32,6 +32,7 @@ import platform
 import re
 import shlex
 import subprocess
+import time
 import warnings
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
@@ -40,18 +41,21 @@ import pandas as pd
 from dateutil.relativedelta import relativedelta
 from packaging.version import Version
 
+from gpm._config import config
 from gpm.configs import (
     get_password_earthdata,
     get_password_pps,
     get_username_earthdata,
     get_username_pps,
 )
+from gpm.io.catalog import update_local_catalog
 from gpm.io.checks import (
     check_date,
     check_product,
     check_product_type,
     check_product_version,
     check_remote_storage,
+    check_scheduler,
     check_start_end_time,
     check_transfer_tool,
     check_valid_time_request,
@@ -61,10 +65,19 @@ from gpm.io.data_integrity import (
     check_filepaths_integrity,
 )
 from gpm.io.find import find_daily_filepaths
-from gpm.io.ges_disc import define_ges_disc_filepath
+from gpm.io.ges_disc import define_ges_disc_filepath, get_ges_disc_product_directory
 from gpm.io.info import get_info_from_filepath
-from gpm.io.local import define_local_filepath
-from gpm.io.pps import define_pps_filepath
+from gpm.io.lease import acquire_download_lease, hold_download_lease, wait_for_download_leases
+from gpm.io.listing_cache import invalidate_cached_listing
+from gpm.io.local import (
+    define_local_filepath,
+    finalize_partial_file,
+    get_partial_filepath,
+    is_complete_local_file,
+)
+from gpm.io.pps import define_pps_filepath, get_pps_product_directory
+from gpm.io.quota import defer_local_archive_quota, protect_request_filepaths, update_local_archive_quota
+from gpm.io.transfer import get_transfer_summary, transfer_file
 from gpm.utils.list import flatten_list
 from gpm.utils.timing import print_elapsed_time
 from gpm.utils.warnings import GPMDownloadWarning
@@ -99,8 +112,12 @@ from gpm.utils.warnings import GPMDownloadWarning
 # --retry-delay 5: with 5 secs delays
 # --retry-max-time 60*10: total time before it's considered failed
 # --connect-timeout 20: limits time curl spend trying to connect to the host to 20 secs
+# -C - : resume the transfer from the size of the (partial) output file
 # -o : write to file instead of stdout
 
+# Downloads are written to <filepath>.part and moved to <filepath> once completed.
+# Interrupted downloads are resumed at the next download attempt.
+
 
 ####--------------------------------------------------------------------------.
 #####################################
@@ -189,104 +206,6 @@ def check_pps_ports_are_open():
     print("The ports in the range of 64000-65000 are open. You are ready to use GPM-API !")
 
 
-####--------------------------------------------------------------------------.
-##########################
-#### Download Utility ####
-##########################
-
-
-def _get_commands_futures(executor, commands):
-    """Submit commands and return futures dictionary."""
-    # We use shlex to correctly deal with \\ on windows.  Arguments must be entoured by '<argument>'
-    return {
-        executor.submit(
-            subprocess.check_call,
-            shlex.split(cmd),
-            shell=False,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        ): (i, cmd)
-        for i, cmd in enumerate(commands)
-    }
-
-
-def _get_list_failing_commands(dict_futures, pbar=None):
-    """List commands that failed.
-
-    pbar is a tqdm progress bar.
-    """
-    l_cmd_error = []
-    for future in as_completed(dict_futures.keys()):
-        if pbar:
-            pbar.update(1)  # Update the progress bar
-        # Collect all commands that caused problems
-        if future.exception() is not None:
-            _, cmd = dict_futures[future]  # {index: cmd}
-            l_cmd_error.append(cmd)
-    return l_cmd_error
-
-
-def _get_list_status_commands(dict_futures, pbar=None):
-    """Return a list with the status of the command execution.
-
-    A value of 1 means that the command executed successively.
-    A value of 0 means that the command execution failed.
-
-    pbar is a tqdm progress bar.
-    """
-    # TODO maybe here capture (with -1) if the file does not exists !¨
-    n_futures = len(dict_futures)
-    status = [1] * n_futures
-    for future in as_completed(dict_futures.keys()):
-        if pbar:
-            pbar.update(1)  # Update the progress bar
-        index, cmd = dict_futures[future]
-        if future.exception() is not None:
-            status[index] = 0
-    return status
-
-
-def run(commands, n_threads=10, progress_bar=True, verbose=True):
-    """Run bash commands in parallel using multithreading.
-
-    Parameters
-    ----------
-    commands : list
-        list of commands to execute in the terminal.
-    n_threads : int, optional
-        Number of parallel download. The default is 10.
-
-    Returns
-    -------
-    status : list
-        Download status of each file. 0=Failed. 1=Success.
-
-    """
-    from tqdm import tqdm
-
-    n_threads = max(n_threads, 1)
-    n_threads = min(n_threads, 10)
-    n_cmds = len(commands)
-
-    # Run with progress bar
-    if progress_bar:
-        with tqdm(total=n_cmds) as pbar, ThreadPoolExecutor(max_workers=n_threads) as executor:
-            dict_futures = _get_commands_futures(executor, commands)
-            status = _get_list_status_commands(dict_futures, pbar=pbar)
-
-    # Run without progress bar
-    elif (n_threads == 1) and (verbose is True):
-        results = [subprocess.run(shlex.split(cmd), shell=False, check=False) for cmd in commands]
-        status = [result.returncode == 0 for result in results]
-    else:
-        with ThreadPoolExecutor(max_workers=n_threads) as executor:
-            # Run commands and list those didn't work
-            dict_futures = _get_commands_futures(executor, commands)
-            status = _get_list_status_commands(dict_futures)
-
-    return status
-
-
 ####--------------------------------------------------------------------------.
 #######################################
 #### Download Single File Commands ####
@@ -310,7 +229,7 @@ def curl_pps_cmd(remote_filepath, local_filepath, username, password):
     # - Define authentication settings
     auth = f"--ipv4 --insecure -n --user '{username}:{password}' {CURL_FTPS_FLAG} --header 'Connection: close'"
     # - Define options
-    options = "--connect-timeout 20 --retry 5 --retry-delay 10"  # --verbose
+    options = "--connect-timeout 20 --retry 5 --retry-delay 10 -C -"  # --verbose
     # - Define command
     return f"curl {auth} {options} --url {remote_filepath} -o '{local_filepath}'"
 
@@ -322,7 +241,7 @@ def curl_ges_disc_cmd(remote_filepath, local_filepath, username="dummy", passwor
     # - Define authentication settings
     auth = f"-n -c '{urs_cookies_path}' -b '{urs_cookies_path}' -L"
     # - Define options
-    options = "--connect-timeout 20 --retry 5 --retry-delay 10"
+    options = "--connect-timeout 20 --retry 5 --retry-delay 10 -C -"
     # - Define command
     return f"curl {auth} {options} --url {remote_filepath} -o '{local_filepath}'"
 
@@ -396,6 +315,53 @@ def _ensure_local_directories_exists(local_filepaths):
     _ = [os.makedirs(os.path.dirname(path), exist_ok=True) for path in local_filepaths]
 
 
+def _transfer_file_with_tool(remote_filepath, local_filepath, storage, transfer_tool, username, password):
+    """Download a file with a ``curl`` or ``wget`` subprocess.
+
+    Returns the transfer result (see ``gpm.io.transfer.transfer_file``).
+    """
+    get_single_file_cmd = _get_single_file_cmd_function(transfer_tool, storage)
+    cmd = get_single_file_cmd(remote_filepath, get_partial_filepath(local_filepath), username, password)
+    t_start = time.perf_counter()
+    # We use shlex to correctly deal with \\ on windows.  Arguments must be entoured by '<argument>'
+    returncode = subprocess.call(shlex.split(cmd), shell=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    success = returncode == 0 and finalize_partial_file(local_filepath)
+    return {
+        "status": int(success),
+        "n_bytes": os.path.getsize(local_filepath) if success else 0,
+        "elapsed_time": time.perf_counter() - t_start,
+        "error": None if success else f"{transfer_tool} exited with code {returncode}",
+    }
+
+
+def _download_leased_file(remote_filepath, local_filepath, storage, transfer_tool, username, password):
+    """Download a file if its download lease can be acquired.
+
+    The lease is acquired just before the transfer and kept alive during the transfer.
+    Returns ``None`` if another process holds the lease, otherwise the transfer result
+    (see ``gpm.io.transfer.transfer_file``).
+    """
+    if not acquire_download_lease(local_filepath):
+        return None
+    with hold_download_lease(local_filepath):
+        if transfer_tool == "NATIVE":
+            return transfer_file(
+                remote_filepath=remote_filepath,
+                local_filepath=local_filepath,
+                storage=storage,
+                username=username,
+                password=password,
+            )
+        return _transfer_file_with_tool(
+            remote_filepath=remote_filepath,
+            local_filepath=local_filepath,
+            storage=storage,
+            transfer_tool=transfer_tool,
+            username=username,
+            password=password,
+        )
+
+
 def _download_files(
     remote_filepaths,
     local_filepaths,
@@ -407,23 +373,76 @@ def _download_files(
 ):
     """Download a list of remote files to their GPM-API local file paths.
 
-    This function open a connection to the server for each file to download !.
+    Files currently downloaded by another process sharing the same ``base_dir`` are not downloaded again.
+    The function waits for their download to complete, and downloads them only if the other process fails.
+
+    Returns
+    -------
+    status : list
+        Download status of each file. 0=Failed. 1=Success. -1=Downloaded by another process.
+
     """
+    from tqdm import tqdm
+
     transfer_tool = check_transfer_tool(transfer_tool)
     _ensure_local_directories_exists(local_filepaths)
-
-    # Retrieve username and password
     username, password = _get_storage_username_password(storage)
 
-    # Define command list
-    get_single_file_cmd = _get_single_file_cmd_function(transfer_tool, storage)
-    list_cmd = [
-        get_single_file_cmd(remote_filepath, local_filepath, username, password)
-        for remote_filepath, local_filepath in zip(remote_filepaths, local_filepaths)
-    ]
-
-    ## Download the data (in parallel)
-    return run(list_cmd, n_threads=n_threads, progress_bar=progress_bar, verbose=verbose)
+    status = [0] * len(local_filepaths)
+    results = []
+    indices = list(range(len(local_filepaths)))
+    n_threads = min(max(n_threads, 1), 10) if transfer_tool != "NATIVE" else max(n_threads, 1)
+    while len(indices) > 0:
+        # Download the files not being downloaded by other processes
+        # - Each lease is acquired only when the transfer of the file starts
+        awaited_indices = []
+        pbar = tqdm(total=len(indices), disable=not progress_bar)
+        with ThreadPoolExecutor(max_workers=n_threads) as executor:
+            dict_futures = {
+                executor.submit(
+                    _download_leased_file,
+                    remote_filepath=remote_filepaths[i],
+                    local_filepath=local_filepaths[i],
+                    storage=storage,
+                    transfer_tool=transfer_tool,
+                    username=username,
+                    password=password,
+                ): i
+                for i in indices
+            }
+            for future in as_completed(dict_futures):
+                i = dict_futures[future]
+                result = future.result()
+                if result is None:
+                    awaited_indices.append(i)
+                else:
+                    status[i] = result["status"]
+                    results.append(result)
+                pbar.update(1)
+        pbar.close()
+
+        # Wait for the files downloaded by other processes
+        # - If the download of the other process failed, try to download the file again
+        awaited_indices = sorted(awaited_indices)
+        if verbose and len(awaited_indices) > 0:
+            print(f"Waiting for {len(awaited_indices)} files being downloaded by other processes.")
+        completed = wait_for_download_leases([local_filepaths[i] for i in awaited_indices])
+        for i, is_completed in zip(awaited_indices, completed):
+            if is_completed:
+                status[i] = -1
+        indices = [i for i, is_completed in zip(awaited_indices, completed) if not is_completed]
+
+    ## Report the transfers performed by this process
+    if verbose and len(results) > 0:
+        print(get_transfer_summary(results))
+
+    ## Register the downloaded files into the local granules catalog
+    if config.get("local_catalog"):
+        update_local_catalog([filepath for filepath, flag in zip(local_filepaths, status) if flag == 1])
+
+    ## Remove the least recently used files if the local archive exceeds the quota
+    update_local_archive_quota(local_filepaths, status=status, verbose=verbose)
+    return status
 
 
 ####--------------------------------------------------------------------------.
@@ -455,8 +474,8 @@ def filter_download_list(remote_filepaths, local_filepaths, force_download=False
     # -------------------------------------------------------------------------.
     # Check if data already exists
     if force_download is False:
-        # Get index of files which does not exist on disk
-        idx_not_existing = [i for i, filepath in enumerate(local_filepaths) if not os.path.exists(filepath)]
+        # Get index of files which does not exist (or are incomplete) on disk
+        idx_not_existing = [i for i, filepath in enumerate(local_filepaths) if not is_complete_local_file(filepath)]
         # Select paths of files not present on disk
         local_filepaths = [local_filepaths[i] for i in idx_not_existing]
         remote_filepaths = [remote_filepaths[i] for i in idx_not_existing]
@@ -537,6 +556,7 @@ def get_filepaths_from_filenames(filepaths, storage, product_type):
 ###############################
 
 
+@defer_local_archive_quota
 def download_files(
     filepaths,
     product_type="RS",
@@ -563,10 +583,12 @@ def download_files(
         Either ``pps`` or ``ges_disc``. The default is "PPS".
     n_threads : int, optional
         Number of parallel downloads. The default is set to 10.
+        With ``curl`` and ``wget``, at most 10 parallel downloads are performed.
     progress_bar : bool, optional
         Whether to display progress. The default is ``True``.
     transfer_tool : str, optional
-        Whether to use ``curl`` or ``wget`` for data download. The default is  ``curl``.
+        Whether to use ``curl``, ``wget`` or the in-process ``native`` backend for data download.
+        The default is  ``curl``.
     verbose : bool, optional
         Whether to print processing details. The default is ``False``.
     force_download : bool, optional
@@ -617,6 +639,7 @@ def download_files(
     )
 
     # If force_download is False, select only data not present on disk
+    protect_request_filepaths(local_filepaths)
     new_remote_filepaths, new_local_filepaths = filter_download_list(
         local_filepaths=local_filepaths,
         remote_filepaths=remote_filepaths,
@@ -771,7 +794,7 @@ def _download_daily_data(
     verbose,
     warn_missing_files,
 ):
-    """Download GPM data from NASA servers using curl or wget.
+    """Download GPM data from NASA servers using curl, wget or the native transfer backend.
 
     Parameters
     ----------
@@ -795,7 +818,7 @@ def _download_daily_data(
     progress_bar : bool
         Whether to display progress.
     transfer_tool : str
-        Whether to use ``curl`` or ``wget`` for data download.
+        Whether to use ``curl``, ``wget`` or the in-process ``native`` backend for data download.
     force_download : bool
         Whether to redownload data if already existing on disk.
     verbose : bool
@@ -841,6 +864,8 @@ def _download_daily_data(
         storage="LOCAL",
         product_type=product_type,
     )
+    # The files of the request already on disk must not be removed to respect the local archive quota
+    protect_request_filepaths(local_filepaths)
     # -------------------------------------------------------------------------.
     ## If force_download is False, select only data not present on disk
     remote_filepaths, local_filepaths = filter_download_list(
@@ -862,9 +887,33 @@ def _download_daily_data(
         progress_bar=progress_bar,
         verbose=verbose,
     )
+    # Refresh the directory listing at next query if some downloads failed
+    if 0 in status:
+        _invalidate_daily_listing(
+            storage=storage,
+            product=product,
+            product_type=product_type,
+            date=date,
+            version=version,
+        )
     return status, available_version
 
 
+def _invalidate_daily_listing(storage, product, product_type, date, version):
+    """Remove the cached listing of the NASA server product directory at a specific date."""
+    if storage == "PPS":
+        url_product_dir = get_pps_product_directory(
+            product=product,
+            product_type=product_type,
+            date=date,
+            version=version,
+            server_type="text",
+        )
+    else:
+        url_product_dir = get_ges_disc_product_directory(product=product, date=date, version=version)
+    invalidate_cached_listing(url_product_dir)
+
+
 def _check_download_status(status, product, verbose):
     """Check download status.
 
@@ -909,6 +958,7 @@ def _check_download_status(status, product, verbose):
     return True
 
 
+@defer_local_archive_quota
 def download_archive(
     product,
     start_time,
@@ -924,6 +974,7 @@ def download_archive(
     remove_corrupted=True,
     retry=1,
     verbose=True,
+    scheduler="daily",
 ):
     """Download GPM data from NASA servers (day by day).
 
@@ -948,10 +999,12 @@ def download_archive(
         Either ``pps`` or ``ges_disc``. The default is ``pps``.
     n_threads : int, optional
         Number of parallel downloads. The default is set to 10.
+        With ``curl`` and ``wget``, at most 10 parallel downloads are performed.
     progress_bar : bool, optional
         Whether to display progress. The default is ``True``.
     transfer_tool : str, optional
-        Whether to use ``curl`` or ``wget`` for data download. The default is  ``curl``.
+        Whether to use ``curl``, ``wget`` or the in-process ``native`` backend for data download.
+        The default is  ``curl``.
     force_download : bool, optional
         Whether to redownload data if already existing on disk. The default is ``False``.
     verbose : bool, optional
@@ -965,10 +1018,16 @@ def download_archive(
     retry : int, optional,
         The number of attempts to redownload the corrupted files. The default is 1.
         Only applies if ``check_integrity=True``!
+    scheduler : str, optional
+        If ``daily`` (the default), the files are listed and downloaded one day at a time.
+        If ``async``, the daily listings and the downloads are pipelined by an asyncio scheduler
+        which adapts the number of parallel downloads (up to ``n_threads``) to the observed throughput.
+        See ``gpm.io.scheduler.download_archive_async`` for the awaitable API.
 
     """
     # -------------------------------------------------------------------------.
     ## Checks input arguments
+    scheduler = check_scheduler(scheduler)
     storage = check_remote_storage(storage)
     product_type = check_product_type(product_type=product_type)
     product = check_product(product=product, product_type=product_type)
@@ -987,29 +1046,53 @@ def download_archive(
     dates = list(date_range.to_pydatetime())
 
     # -------------------------------------------------------------------------.
-    # Loop over dates and download the files
+    # Download the files
     list_status = []
     list_versions = []
-    for i, date in enumerate(dates):
-        warn_missing_files = not (i == 0 or i == len(dates) - 1 and date == end_time)
+    # - Pipeline the daily listings and the downloads with the asyncio scheduler
+    if scheduler == "ASYNC":
+        from gpm.io.scheduler import download_archive_async, run_coroutine
 
-        status, available_version = _download_daily_data(
-            date=date,
-            version=version,
-            product=product,
-            product_type=product_type,
-            start_time=start_time,
-            end_time=end_time,
-            storage=storage,
-            n_threads=n_threads,
-            transfer_tool=transfer_tool,
-            progress_bar=progress_bar,
-            force_download=force_download,
-            verbose=verbose,
-            warn_missing_files=warn_missing_files,
+        results = run_coroutine(
+            download_archive_async(
+                product=product,
+                start_time=start_time,
+                end_time=end_time,
+                product_type=product_type,
+                version=version,
+                storage=storage,
+                max_concurrency=n_threads,
+                initial_host_concurrency=min(n_threads, 4),
+                transfer_tool=transfer_tool,
+                force_download=force_download,
+                progress_bar=progress_bar,
+                verbose=verbose,
+            ),
         )
-        list_status += status
-        list_versions += available_version
+        list_status = [result["status"] for result in results]
+        list_versions = [result["version"] for result in results]
+    # - Loop over dates and download the files
+    else:
+        for i, date in enumerate(dates):
+            warn_missing_files = not (i == 0 or i == len(dates) - 1 and date == end_time)
+
+            status, available_version = _download_daily_data(
+                date=date,
+                version=version,
+                product=product,
+                product_type=product_type,
+                start_time=start_time,
+                end_time=end_time,
+                storage=storage,
+                n_threads=n_threads,
+                transfer_tool=transfer_tool,
+                progress_bar=progress_bar,
+                force_download=force_download,
+                verbose=verbose,
+                warn_missing_files=warn_missing_files,
+            )
+            list_status += status
+            list_versions += available_version
 
     # -------------------------------------------------------------------------.
     # Check download status
@@ -38,7 +38,7 @@ from gpm.io.checks import (
     get_current_utc_time,
 )
 from gpm.io.info import (
-    get_info_from_filepath,
+    get_info_from_filepaths,
     get_start_end_time_from_filepaths,
     get_version_from_filepaths,
 )
@@ -46,24 +46,27 @@ from gpm.io.products import get_product_pattern
 
 
 def is_granule_within_time(start_time, end_time, file_start_time, file_end_time):
-    """Check if a granule is within start_time and end_time."""
+    """Check if a granule is within start_time and end_time.
+
+    ``file_start_time`` and ``file_end_time`` can also be arrays of granules times.
+    """
     # - Case 1
     #     s               e
     #     |               |
     #   ---------> (-------->)
-    is_case1 = file_start_time <= start_time and file_end_time > start_time
+    is_case1 = (file_start_time <= start_time) & (file_end_time > start_time)
     # - Case 2
     #     s               e
     #     |               |
     #          --------
-    is_case2 = file_start_time >= start_time and file_end_time < end_time
+    is_case2 = (file_start_time >= start_time) & (file_end_time < end_time)
     # - Case 3
     #     s               e
     #     |               |
     #                ------------->
-    is_case3 = file_start_time < end_time and file_end_time > end_time
+    is_case3 = (file_start_time < end_time) & (file_end_time > end_time)
     # - Check if one of the conditions occurs
-    return is_case1 or is_case2 or is_case3
+    return is_case1 | is_case2 | is_case3
 
 
 ####--------------------------------------------------------------------------.
@@ -77,63 +80,6 @@ def _string_match(pattern, string):
     return bool(re.search(pattern, string))
 
 
-def _filter_filepath(filepath, product=None, version=None, start_time=None, end_time=None):
-    """Check if a single filepath pass the filtering parameters.
-
-    If do not match the filtering criteria, it returns ``None``.
-
-    Parameters
-    ----------
-    filepath : str
-        Filepath string.
-    product : str
-        GPM product name. See ``gpm.available_products()``.
-        The default is ``None``.
-    start_time : datetime.datetime
-        Start time
-        The default is ``None``.
-    end_time : datetime.datetime
-        End time.
-        The default is ``None``.
-    version: int
-        GPM product version.
-        The default is ``None``.
-
-    Returns
-    -------
-    filepaths : list
-        Returns the filepaths subset.
-        If no valid filepaths, return an empty list.
-
-    """
-    try:
-        info_dict = get_info_from_filepath(filepath)
-    except ValueError:
-        return None
-
-    # Filter by version
-    if version is not None:
-        file_version = info_dict["version"]
-        file_version = int(re.findall("\\d+", file_version)[0])
-        if file_version != version:
-            return None
-
-    # Filter by product
-    if product is not None:
-        product_pattern = get_product_pattern(product)
-        if not _string_match(pattern=product_pattern, string=filepath):
-            return None
-
-    # Filter by start_time and end_time
-    if start_time is not None and end_time is not None:
-        file_start_time = info_dict["start_time"]
-        file_end_time = info_dict["end_time"]
-        if not is_granule_within_time(start_time, end_time, file_start_time, file_end_time):
-            return None
-
-    return filepath
-
-
 def filter_filepaths(
     filepaths,
     product=None,
@@ -184,19 +130,26 @@ def filter_filepaths(
             start_time = datetime.datetime(1998, 1, 1, 0, 0, 0)  # GPM start mission
         if end_time is None:
             end_time = get_current_utc_time()  # Current time
-    # Filter filepaths
-    filepaths = [
-        _filter_filepath(
-            filepath,
-            product=product,
-            version=version,
-            start_time=start_time,
-            end_time=end_time,
+    # Retrieve file information (discarding unparsable filepaths)
+    df = get_info_from_filepaths(filepaths, ignore_errors=True)
+    is_selected = np.ones(len(df), dtype=bool)
+    # Filter by version
+    if version is not None:
+        file_version = df["version"].str.extract(r"(\d+)", expand=False).astype(int)
+        is_selected &= (file_version == version).to_numpy()
+    # Filter by product
+    if product is not None:
+        product_pattern = get_product_pattern(product)
+        is_selected &= df["filepath"].str.contains(product_pattern, regex=True).to_numpy(dtype=bool)
+    # Filter by start_time and end_time
+    if start_time is not None and end_time is not None:
+        is_selected &= is_granule_within_time(
+            np.datetime64(start_time),
+            np.datetime64(end_time),
+            df["start_time"].to_numpy(),
+            df["end_time"].to_numpy(),
         )
-        for filepath in filepaths
-    ]
-    # Remove None from the list
-    return [filepath for filepath in filepaths if filepath is not None]
+    return df["filepath"][is_selected].tolist()
 
 
 def filter_by_product(filepaths, product, product_type="RS"):
@@ -26,6 +26,7 @@
 # -----------------------------------------------------------------------------.
 """This module contains functions to find data on local and NASA servers."""
 import datetime
+import itertools
 import os
 import warnings
 
@@ -34,6 +35,7 @@ import numpy as np
 import pandas as pd
 
 from gpm._config import config
+from gpm.io.catalog import find_local_catalog_filepaths
 from gpm.io.checks import (
     check_date,
     check_product,
@@ -218,6 +220,30 @@ def find_daily_filepaths(
     return filepaths, [available_version]
 
 
+def _check_local_catalog_filepaths(filepaths, product, product_type, version, start_time, end_time):
+    """Apply to the local catalog search results the filtering and checks of the daily directories search.
+
+    As with ``find_daily_filepaths``, the file version is checked separately for each daily directory.
+    """
+    list_filepaths = []
+    for _, dir_filepaths in itertools.groupby(sorted(filepaths), key=os.path.dirname):
+        dir_filepaths = filter_filepaths(
+            list(dir_filepaths),
+            product=product,
+            product_type=product_type,
+            version=None,  # important to not filter !
+            start_time=start_time,
+            end_time=end_time,
+        )
+        dir_filepaths, _ = _check_correct_version(
+            filepaths=dir_filepaths,
+            product=product,
+            version=version,
+        )
+        list_filepaths += dir_filepaths
+    return list_filepaths
+
+
 def find_filepaths(
     storage,
     product,
@@ -274,6 +300,27 @@ def find_filepaths(
     start_time, end_time = check_start_end_time(start_time, end_time)
     start_time, end_time = check_valid_time_request(start_time, end_time, product)
 
+    # -------------------------------------------------------------------------.
+    # If enabled, search the local files with the local granules catalog
+    if storage == "LOCAL" and config.get("local_catalog"):
+        filepaths = find_local_catalog_filepaths(
+            product=product,
+            product_type=product_type,
+            version=version,
+            start_time=start_time,
+            end_time=end_time,
+        )
+        filepaths = _check_local_catalog_filepaths(
+            filepaths,
+            product=product,
+            product_type=product_type,
+            version=version,
+            start_time=start_time,
+            end_time=end_time,
+        )
+        return group_filepaths(filepaths, groups=groups)
+
+    # -------------------------------------------------------------------------.
     # Retrieve sequence of dates
     # - Specify start_date - 1 day to include data potentially on previous day directory
     # --> Example granules starting at 23:XX:XX in the day before and extending to 01:XX:XX
@@ -31,6 +31,7 @@ import re
 import shlex
 import subprocess
 
+from gpm.io.listing_cache import get_cached_listing, get_listing_ttl
 from gpm.io.products import get_product_info, is_trmm_product
 
 ###---------------------------------------------------------------------------.
@@ -170,13 +171,28 @@ def get_ges_disc_product_directory(product, date, version):
 ############################
 
 
-def _get_ges_disc_file_list(url_product_dir, product, date, version, verbose=True):
+def _list_ges_disc_directory(url_product_dir):
+    """Return the file paths of a GES DISC directory.
+
+    An empty list is returned for an empty directory, so that empty directory listings are cached.
+    """
+    try:
+        return _get_ges_disc_list_path(url_product_dir)
+    except ValueError as e:
+        if "directory is empty" in str(e):
+            return []
+        raise
+
+
+def _get_ges_disc_file_list(url_product_dir, product, date, version, verbose=True, product_type="RS"):
     """Retrieve NASA GES DISC filepaths for a specific day and product.
 
     The query is done using https !
     The function does return the full GES DISC url file paths.
     The returned file paths refers to a single product !!!
 
+    If the listing cache is enabled, the directory listing is retrieved from the cache when available.
+
     Parameters
     ----------
     url_product_dir : str
@@ -187,13 +203,22 @@ def _get_ges_disc_file_list(url_product_dir, product, date, version, verbose=Tru
         Single date for which to retrieve the data.
     verbose : bool, optional
         Default is ``False``. Whether to specify when data are not available for a specific date.
+    product_type : str, optional
+        GPM product type. Either ``RS`` (Research) or ``NRT`` (Near-Real-Time).
+        It defines how long the directory listing is cached. The default is ``RS``.
 
     """
     try:
-        filepaths = _get_ges_disc_list_path(url_product_dir)
+        filepaths = get_cached_listing(
+            url_product_dir,
+            list_function=_list_ges_disc_directory,
+            ttl=get_listing_ttl(product_type=product_type, date=date),
+        )
+        if len(filepaths) == 0:
+            raise ValueError(f"The GES DISC {url_product_dir} directory is empty.")
     except Exception as e:
         # If url not exist, raise an error
-        if "was not found on the GES DISC server" in str(e):
+        if "was not found on the GES DISC server" in str(e) or "listing cache" in str(e):
             raise e
         # If no filepath (empty directory), print message if verbose=True
         if verbose:
@@ -238,6 +263,7 @@ def get_ges_disc_daily_filepaths(product, product_type, date, version, verbose=T
         date=date,
         version=version,
         verbose=verbose,
+        product_type=product_type,
     )
 
 
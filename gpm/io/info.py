@@ -27,11 +27,13 @@
 """This module provide tools to extraction information from the granules' filenames."""
 
 import datetime
+import functools
 import os
 import re
 from collections import defaultdict
 
 import numpy as np
+import pandas as pd
 
 ####---------------------------------------------------------------------------
 ########################
@@ -45,6 +47,28 @@ NASA_NRT_filename_PATTERN = "{product_level:s}.{satellite:s}.{sensor:s}.{algorit
 # - Pattern for 1B-Ku and 1B-Ka
 JAXA_filename_PATTERN = "{mission_id}_{sensor:s}_{start_date_time:%y%m%d%H%M}_{end_time:%H%M}_{granule_id}_{product_level:2s}{product_type}_{algorithm:s}_{version}.{data_format}"  # noqa
 
+# Regular expressions equivalent to the filename patterns
+NASA_RS_filename_REGEX = (
+    r"^(?P<product_level>.+?)\.(?P<satellite>.+?)\.(?P<sensor>.+?)\.(?P<algorithm>.+?)\."
+    r"(?P<start_date>\d{8})-S(?P<start_time>\d{6})-E(?P<end_time>\d{6})\."
+    r"(?P<granule_id>.+?)\.(?P<version>.+?)\.(?P<data_format>.+)$"
+)
+NASA_NRT_filename_REGEX = (
+    r"^(?P<product_level>.+?)\.(?P<satellite>.+?)\.(?P<sensor>.+?)\.(?P<algorithm>.+?)\."
+    r"(?P<start_date>\d{8})-S(?P<start_time>\d{6})-E(?P<end_time>\d{6})\."
+    r"(?P<version>.+?)\.(?P<data_format>.+)$"
+)
+JAXA_filename_REGEX = (
+    r"^(?P<mission_id>.+?)_(?P<sensor>.+?)_(?P<start_date_time>\d{10})_(?P<end_time>\d{4})_"
+    r"(?P<granule_id>.+?)_(?P<product_level>.{2})(?P<product_type>.+?)_(?P<algorithm>.+?)_"
+    r"(?P<version>.+?)\.(?P<data_format>.+)$"
+)
+_NASA_RS_FILENAME_PARSER = re.compile(NASA_RS_filename_REGEX)
+_NASA_NRT_FILENAME_PARSER = re.compile(NASA_NRT_filename_REGEX)
+_JAXA_FILENAME_PARSER = re.compile(JAXA_filename_REGEX)
+
+_JAXA_PRODUCT_TYPES = {"S": "RS", "R": "NRT"}
+
 
 ####---------------------------------------------------------------------------.
 ##########################
@@ -53,35 +77,23 @@ JAXA_filename_PATTERN = "{mission_id}_{sensor:s}_{start_date_time:%y%m%d%H%M}_{e
 
 
 def _parse_gpm_filename(filename):
-    from trollsift import Parser
-
     # Retrieve information from filename
-    try:
-        p = Parser(NASA_RS_filename_PATTERN)
-        info_dict = p.parse(filename)
-        info_dict["product_type"] = "RS"
-    except ValueError:
-        p = Parser(NASA_NRT_filename_PATTERN)
-        info_dict = p.parse(filename)
-        info_dict["product_type"] = "NRT"
+    match = _NASA_RS_FILENAME_PARSER.match(filename)
+    product_type = "RS"
+    if match is None:
+        match = _NASA_NRT_FILENAME_PARSER.match(filename)
+        product_type = "NRT"
+    if match is None:
+        raise ValueError(f"'{filename}' does not match the NASA filename patterns.")
+    info_dict = match.groupdict()
+    info_dict["product_type"] = product_type
 
     # Retrieve correct start_time and end_time
-    start_date = info_dict["start_date"]
-    start_time = info_dict["start_time"]
-    end_time = info_dict["end_time"]
-    start_datetime = start_date.replace(
-        hour=start_time.hour,
-        minute=start_time.minute,
-        second=start_time.second,
-    )
-    end_datetime = start_date.replace(
-        hour=end_time.hour,
-        minute=end_time.minute,
-        second=end_time.second,
-    )
-    if end_time < start_time:
+    start_date = info_dict.pop("start_date")
+    start_datetime = datetime.datetime.strptime(start_date + info_dict["start_time"], "%Y%m%d%H%M%S")
+    end_datetime = datetime.datetime.strptime(start_date + info_dict["end_time"], "%Y%m%d%H%M%S")
+    if end_datetime < start_datetime:
         end_datetime = end_datetime + datetime.timedelta(days=1)
-    info_dict.pop("start_date")
     info_dict["start_time"] = start_datetime
     info_dict["end_time"] = end_datetime
 
@@ -92,31 +104,23 @@ def _parse_gpm_filename(filename):
 
 
 def _parse_jaxa_filename(filename):
-    from trollsift import Parser
-
-    p = Parser(JAXA_filename_PATTERN)
-    info_dict = p.parse(filename)
+    match = _JAXA_FILENAME_PARSER.match(filename)
+    if match is None:
+        raise ValueError(f"'{filename}' does not match the JAXA filename pattern.")
+    info_dict = match.groupdict()
     # Retrieve correct start_time and end_time
-    start_datetime = info_dict["start_date_time"]
-    end_time = info_dict["end_time"]
-    end_datetime = start_datetime.replace(
-        hour=end_time.hour,
-        minute=end_time.minute,
-        second=end_time.second,
-    )
+    start_datetime = datetime.datetime.strptime(info_dict.pop("start_date_time"), "%y%m%d%H%M")
+    end_time = datetime.datetime.strptime(info_dict["end_time"], "%H%M")
+    end_datetime = start_datetime.replace(hour=end_time.hour, minute=end_time.minute, second=0)
     if end_datetime < start_datetime:
         end_datetime = end_datetime + datetime.timedelta(days=1)
-    info_dict.pop("start_date_time")
     info_dict["start_time"] = start_datetime
     info_dict["end_time"] = end_datetime
     # Product type
     product_type = info_dict["product_type"]
-    if product_type == "S":
-        info_dict["product_type"] = "RS"
-    elif product_type == "R":
-        info_dict["product_type"] = "NRT"
-    else:
+    if product_type not in _JAXA_PRODUCT_TYPES:
         raise ValueError("Report the bug.")
+    info_dict["product_type"] = _JAXA_PRODUCT_TYPES[product_type]
 
     # Infer satellite
     mission_id = info_dict["mission_id"]
@@ -166,7 +170,187 @@ def get_key_from_filepaths(filepaths, key):
     """Extract specific key information from a list of filepaths."""
     if isinstance(filepaths, str):
         filepaths = [filepaths]
-    return [get_key_from_filepath(filepath, key=key) for filepath in filepaths]
+    if key not in FILE_KEYS:
+        return [get_key_from_filepath(filepath, key=key) for filepath in filepaths]
+    return _get_column_values(get_info_from_filepaths(filepaths), key=key)
+
+
+####--------------------------------------------------------------------------.
+###################################
+#### Columnar file information ####
+###################################
+
+
+@functools.cache
+def _get_product_from_filename_prefix(prefix):
+    """Infer the ``product`` from the filename prefix. Return ``None`` if unknown."""
+    try:
+        return get_product_from_filepath(prefix)
+    except ValueError:
+        return None
+
+
+def _parse_filenames(filenames, parser):
+    """Return a table with the regex groups of the filenames matching the parser.
+
+    The table index corresponds to the position of the matching filenames.
+    """
+    indices = []
+    groups = []
+    for i, filename in enumerate(filenames):
+        match = parser.match(filename)
+        if match is not None:
+            indices.append(i)
+            groups.append(match.groups())
+    if len(groups) == 0:
+        return pd.DataFrame(columns=list(parser.groupindex), dtype=object)
+    return pd.DataFrame.from_records(groups, index=indices, columns=list(parser.groupindex))
+
+
+def _get_time_offset(series, fmt):
+    """Convert ``HHMMSS`` or ``HHMM`` strings to timedeltas. Invalid values are set to ``NaT``."""
+    values = series.to_numpy().astype(np.int64)
+    if fmt == "%H%M%S":
+        hours, minutes, seconds = values // 10000, values // 100 % 100, values % 100
+    else:  # "%H%M"
+        hours, minutes, seconds = values // 100, values % 100, np.zeros_like(values)
+    is_valid = (hours < 24) & (minutes < 60) & (seconds < 60)
+    offset = pd.to_timedelta(hours * 3600 + minutes * 60 + seconds, unit="s")
+    return pd.Series(offset, index=series.index).where(is_valid)
+
+
+def _get_start_end_time(date, start_time, end_time, date_format, time_format):
+    """Return the granule start and end time.
+
+    The end time is assumed to occur on the following day if it is before the start time.
+    """
+    # The date parsing is cached across duplicated values
+    date = pd.to_datetime(date, format=date_format, errors="coerce", cache=True)
+    start_time = date + _get_time_offset(start_time, fmt=time_format)
+    end_time = date + _get_time_offset(end_time, fmt=time_format)
+    end_time = end_time.where(end_time >= start_time, end_time + pd.Timedelta(days=1))
+    return start_time, end_time
+
+
+def _get_nasa_info_table(filenames, parser, product_type):
+    """Retrieve the file information of NASA filenames matching the parser."""
+    df = _parse_filenames(filenames, parser=parser)
+    df["start_time"], df["end_time"] = _get_start_end_time(
+        date=df.pop("start_date"),
+        start_time=df["start_time"],
+        end_time=df["end_time"],
+        date_format="%Y%m%d",
+        time_format="%H%M%S",
+    )
+    df["product_type"] = product_type
+    df["product_prefix"] = (
+        df["product_level"] + "." + df["satellite"] + "." + df["sensor"] + "." + df["algorithm"] + "."
+    )
+    if product_type == "NRT":
+        df["granule_id"] = None
+    return df
+
+
+def _get_jaxa_info_table(filenames):
+    """Retrieve the file information of JAXA filenames."""
+    df = _parse_filenames(filenames, parser=_JAXA_FILENAME_PARSER)
+    start_date_time = df.pop("start_date_time")
+    df["start_time"], df["end_time"] = _get_start_end_time(
+        date=start_date_time.str[0:6],
+        start_time=start_date_time.str[6:10],
+        end_time=df["end_time"],
+        date_format="%y%m%d",
+        time_format="%H%M",
+    )
+    df["product_type"] = df["product_type"].map(_JAXA_PRODUCT_TYPES)
+    df["satellite"] = None
+    df.loc[df["mission_id"].str.contains("GPM", regex=False), "satellite"] = "GPM"
+    df.loc[df["mission_id"].str.contains("TRMM", regex=False), "satellite"] = "TRMM"
+    df["product_prefix"] = df.pop("mission_id") + "_" + df["sensor"] + "_"
+    return df
+
+
+def _get_column_values(df, key):
+    """Return the values of a file information table column as a list of Python objects."""
+    if key in ["start_time", "end_time"]:
+        return df[key].to_numpy().astype("datetime64[us]").astype(object).tolist()
+    return [None if pd.isna(value) else value for value in df[key].astype(object)]
+
+
+def get_info_from_filepaths(filepaths, ignore_errors=False):
+    """Retrieve the file information of many file paths at once.
+
+    The filenames are parsed with vectorized operations, which is much faster than calling
+    ``get_info_from_filepath`` on each file path.
+
+    Parameters
+    ----------
+    filepaths : list
+        List of file paths.
+    ignore_errors : bool, optional
+        If ``True``, file paths which can not be parsed are dropped from the returned table.
+        If ``False``, an error is raised when a file path can not be parsed.
+        The default is ``False``.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Table with one row per (valid) file path and the ``filepath`` column followed by the
+        ``FILE_KEYS`` columns. ``start_time`` and ``end_time`` have ``datetime64[ns]`` dtype.
+        The row order follows the input file paths order.
+
+    """
+    if isinstance(filepaths, str):
+        filepaths = [filepaths]
+    if not all(isinstance(filepath, str) for filepath in filepaths):
+        raise TypeError("'filepaths' must be a list of strings.")
+    filenames = [os.path.basename(filepath) for filepath in filepaths]
+    if len(filenames) == 0:
+        return pd.DataFrame(columns=["filepath", *FILE_KEYS])
+
+    # Parse filenames against each filename pattern
+    list_df = []
+    is_unparsed = np.ones(len(filenames), dtype=bool)
+    for get_info_table in [
+        functools.partial(_get_nasa_info_table, parser=_NASA_RS_FILENAME_PARSER, product_type="RS"),
+        functools.partial(_get_nasa_info_table, parser=_NASA_NRT_FILENAME_PARSER, product_type="NRT"),
+        _get_jaxa_info_table,
+    ]:
+        unparsed_indices = np.where(is_unparsed)[0]
+        if len(unparsed_indices) == 0:
+            break
+        df = get_info_table([filenames[i] for i in unparsed_indices])
+        df.index = unparsed_indices[df.index]
+        is_unparsed[df.index] = False
+        list_df.append(df)
+    df = pd.concat(list_df).reindex(range(len(filenames)))
+
+    # Cast granule_id to integer
+    granule_id = df["granule_id"].astype("string")
+    is_integer = granule_id.str.fullmatch(r"\s*[+-]?\d+\s*").fillna(False).astype(bool)
+    df["granule_id"] = pd.to_numeric(granule_id.where(is_integer), errors="coerce").astype("Int64")
+    is_valid_granule_id = is_integer | ((df["product_type"] == "NRT") & granule_id.isna())
+
+    # Infer product (once per unique filename prefix)
+    products = {prefix: _get_product_from_filename_prefix(prefix) for prefix in df["product_prefix"].dropna().unique()}
+    df["product"] = df["product_prefix"].map(products)
+
+    # Identify invalid filenames
+    is_valid = (
+        df["start_time"].notna()
+        & df["end_time"].notna()
+        & df["product_type"].notna()
+        & df["product"].notna()
+        & is_valid_granule_id
+    )
+    if not ignore_errors and not is_valid.all():
+        filename = filenames[np.where(~is_valid)[0][0]]
+        raise ValueError(f"Impossible to infer file information from '{filename}'")
+
+    # Define table
+    df["filepath"] = filepaths
+    df = df.loc[is_valid, ["filepath", *FILE_KEYS]]
+    return df.reset_index(drop=True)
 
 
 ####--------------------------------------------------------------------------.
@@ -205,7 +389,10 @@ def get_version_from_filepaths(filepaths, integer=True):
     """Infer granules ``version`` from file paths."""
     if isinstance(filepaths, str):
         filepaths = [filepaths]
-    return [get_version_from_filepath(filepath, integer=integer) for filepath in filepaths]
+    versions = get_info_from_filepaths(filepaths)["version"]
+    if integer:
+        versions = versions.str.extract(r"(\d+)", expand=False).astype(int)
+    return versions.tolist()
 
 
 def get_granule_from_filepaths(filepaths):
@@ -225,8 +412,11 @@ def get_end_time_from_filepaths(filepaths):
 
 def get_start_end_time_from_filepaths(filepaths):
     """Infer granules ``start_time`` and ``end_time`` from file paths."""
-    list_start_time = get_key_from_filepaths(filepaths, key="start_time")
-    list_end_time = get_key_from_filepaths(filepaths, key="end_time")
+    if isinstance(filepaths, str):
+        filepaths = [filepaths]
+    df = get_info_from_filepaths(filepaths)
+    list_start_time = _get_column_values(df, key="start_time")
+    list_end_time = _get_column_values(df, key="end_time")
     return np.array(list_start_time), np.array(list_end_time)
 
 
@@ -310,27 +500,45 @@ def get_time_component(time, component):
     return str(func_dict[component](time))
 
 
-def _get_groups_value(groups, filepath):
-    """Return the value associated to the groups keys.
+def _get_time_components(times, component):
+    """Get time component from a :py:class:`pandas.Series` of ``datetime64`` values."""
+    func_dict = {
+        "year": lambda times: times.dt.year,
+        "month": lambda times: times.dt.month,
+        "day": lambda times: times.dt.day,
+        "doy": lambda times: times.dt.dayofyear,
+        "dow": lambda times: times.dt.weekday,
+        "hour": lambda times: times.dt.hour,
+        "minute": lambda times: times.dt.minute,
+        "second": lambda times: times.dt.second,
+        # Additional
+        "month_name": lambda times: times.dt.month_name(),
+        "quarter": lambda times: times.dt.quarter,
+        "season": lambda times: times.dt.month.map(lambda month: get_season(datetime.date(2000, month, 1))),
+    }
+    return func_dict[component](times).astype(str).tolist()
+
+
+def _get_groups_values(groups, filepaths):
+    """Return the values associated to the groups keys for each file path.
 
-    If multiple keys are specified, the value returned is a string of format: ``<group_value_1>/<group_value_2>/...``
+    If multiple keys are specified, the values are strings of format: ``<group_value_1>/<group_value_2>/...``
 
-    If a single key is specified and is ``start_time`` or ``end_time``, the function
-    returns a :py:class:`datetime.datetime` object.
+    If a single key is specified and is ``start_time`` or ``end_time``, the values
+    are :py:class:`datetime.datetime` objects.
     """
     single_key = len(groups) == 1
-    info_dict = get_info_from_filepath(filepath)
-    start_time = info_dict["start_time"]
+    df = get_info_from_filepaths(filepaths)
     list_key_values = []
     for key in groups:
         if key in TIME_KEYS:
-            list_key_values.append(get_time_component(start_time, component=key))
+            list_key_values.append(_get_time_components(df["start_time"], component=key))
         else:
-            value = info_dict.get(key, f"{key}=None")
-            list_key_values.append(value if single_key else str(value))
+            values = [f"{key}=None" if value is None else value for value in _get_column_values(df, key=key)]
+            list_key_values.append(values if single_key else [str(value) for value in values])
     if single_key:
         return list_key_values[0]
-    return "/".join(list_key_values)
+    return ["/".join(values) for values in zip(*list_key_values)]
 
 
 def group_filepaths(filepaths, groups=None):
@@ -363,5 +571,10 @@ def group_filepaths(filepaths, groups=None):
         return filepaths
     groups = check_groups(groups)
     filepaths_dict = defaultdict(list)
-    _ = [filepaths_dict[_get_groups_value(groups, filepath)].append(filepath) for filepath in filepaths]
+    if len(filepaths) == 0:
+        return {}
+    _ = [
+        filepaths_dict[group_value].append(filepath)
+        for group_value, filepath in zip(_get_groups_values(groups, filepaths), filepaths)
+    ]
     return dict(filepaths_dict)
@@ -0,0 +1,220 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module contains functions to coordinate the downloads of multiple processes sharing a ``base_dir``.
+
+Before downloading a file, a process creates the lease file ``<filepath>.lock`` with an exclusive
+creation (``O_CREAT | O_EXCL``), which succeeds for a single process only.
+The other processes wait until the lease is released instead of downloading the file again.
+
+A lease is considered stale (i.e. the process holding it died) when neither the lease file nor the
+partial download file ``<filepath>.part`` have been modified since ``download_lease_timeout`` seconds.
+Stale leases are reclaimed by the waiting processes. While downloading a file, the process holding
+the lease touches the lease file periodically (see ``hold_download_lease``), so that queued or slow
+transfers are not considered stale.
+
+The lease file contains a unique owner identifier, so that a process does not release or refresh
+a lease which has been reclaimed and acquired by another process.
+"""
+import contextlib
+import os
+import socket
+import threading
+import time
+import uuid
+
+from gpm._config import config
+from gpm.io.local import get_lock_filepath, get_partial_filepath, is_complete_local_file
+
+POLL_INTERVAL = 2
+# Owner identifier of the leases held by the current process
+_LEASE_OWNERS = {}
+_LEASE_OWNERS_LOCK = threading.Lock()
+
+
+def get_lease_timeout():
+    """Return the number of seconds after which an inactive download lease is considered stale."""
+    return config.get("download_lease_timeout", 600)
+
+
+def _get_last_activity_time(filepath):
+    """Return the last modification time of the lease and partial files of a file being downloaded."""
+    mtimes = []
+    for activity_filepath in [get_lock_filepath(filepath), get_partial_filepath(filepath)]:
+        with contextlib.suppress(OSError):
+            mtimes.append(os.path.getmtime(activity_filepath))
+    return max(mtimes) if len(mtimes) > 0 else None
+
+
+def is_lease_stale(filepath, timeout=None):
+    """Return ``True`` if the download lease of a file has not shown any activity within ``timeout`` seconds."""
+    timeout = get_lease_timeout() if timeout is None else timeout
+    last_activity_time = _get_last_activity_time(filepath)
+    if last_activity_time is None:
+        return False
+    return time.time() - last_activity_time > timeout
+
+
+def _read_lease_owner(lock_filepath):
+    """Return the owner identifier written in a lease file. Returns ``None`` if the lease file does not exist."""
+    try:
+        with open(lock_filepath) as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def acquire_download_lease(filepath):
+    """Try to acquire the download lease of a file.
+
+    Returns ``True`` if the lease has been acquired, ``False`` if another process holds it.
+    """
+    lock_filepath = get_lock_filepath(filepath)
+    os.makedirs(os.path.dirname(lock_filepath), exist_ok=True)
+    try:
+        fd = os.open(lock_filepath, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    owner = f"{socket.gethostname()} {os.getpid()} {uuid.uuid4().hex}"
+    with os.fdopen(fd, "w") as f:
+        f.write(owner)
+    with _LEASE_OWNERS_LOCK:
+        _LEASE_OWNERS[lock_filepath] = owner
+    return True
+
+
+def is_download_lease_owner(filepath):
+    """Return ``True`` if the download lease of a file is held by the current process."""
+    lock_filepath = get_lock_filepath(filepath)
+    with _LEASE_OWNERS_LOCK:
+        owner = _LEASE_OWNERS.get(lock_filepath)
+    return owner is not None and _read_lease_owner(lock_filepath) == owner
+
+
+def refresh_download_lease(filepath):
+    """Touch the download lease of a file held by the current process.
+
+    Returns ``False`` if the lease is not held anymore by the current process.
+    """
+    if not is_download_lease_owner(filepath):
+        return False
+    with contextlib.suppress(FileNotFoundError):
+        os.utime(get_lock_filepath(filepath))
+        return True
+    return False
+
+
+def release_download_lease(filepath):
+    """Release the download lease of a file.
+
+    The lease file is removed only if it is still held by the current process
+    (i.e. it has not been reclaimed and acquired by another process).
+    """
+    lock_filepath = get_lock_filepath(filepath)
+    if is_download_lease_owner(filepath):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(lock_filepath)
+    with _LEASE_OWNERS_LOCK:
+        _LEASE_OWNERS.pop(lock_filepath, None)
+
+
+@contextlib.contextmanager
+def hold_download_lease(filepath, interval=None):
+    """Keep the download lease of a file alive while downloading it.
+
+    The lease file is touched every ``interval`` seconds (by default, a quarter of the lease timeout)
+    and the lease is released when exiting the context.
+    """
+    interval = max(get_lease_timeout() / 4, 0.1) if interval is None else interval
+    stop_event = threading.Event()
+
+    def _heartbeat():
+        while not stop_event.wait(interval) and refresh_download_lease(filepath):
+            pass
+
+    thread = threading.Thread(target=_heartbeat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop_event.set()
+        thread.join()
+        release_download_lease(filepath)
+
+
+def reclaim_download_lease(filepath, timeout=None):
+    """Remove the download lease of a file if it is stale.
+
+    The lease file is first atomically renamed, so that a single process reclaims it.
+    If the renamed lease is not the stale lease (i.e. another process reclaimed the stale lease and
+    a new lease was acquired in the meantime), the renamed lease is restored.
+    Returns ``True`` if the lease has been removed.
+    """
+    timeout = get_lease_timeout() if timeout is None else timeout
+    lock_filepath = get_lock_filepath(filepath)
+    owner = _read_lease_owner(lock_filepath)
+    if owner is None or not is_lease_stale(filepath, timeout=timeout):
+        return False
+    # The renamed lease keeps the lease file suffix to be ignored by the local archive listings
+    stale_lock_filepath = get_lock_filepath(f"{filepath}.{uuid.uuid4().hex}")
+    try:
+        os.rename(lock_filepath, stale_lock_filepath)
+    except FileNotFoundError:
+        return False
+    # Check the renamed lease is the stale lease
+    is_stale = (
+        _read_lease_owner(stale_lock_filepath) == owner
+        and time.time() - os.path.getmtime(stale_lock_filepath) > timeout
+    )
+    if not is_stale:
+        # Restore the active lease (unless yet another lease has been acquired)
+        with contextlib.suppress(OSError):
+            os.link(stale_lock_filepath, lock_filepath)
+    os.remove(stale_lock_filepath)
+    return is_stale
+
+
+def wait_for_download_leases(filepaths, timeout=None, poll_interval=POLL_INTERVAL):
+    """Wait for the files being downloaded by other processes.
+
+    The function returns when all leases have been released or reclaimed.
+
+    Returns
+    -------
+    completed : list
+        For each file, ``True`` if the file is now available on disk,
+        ``False`` if the download of the other process failed (or died).
+
+    """
+    pending = set(filepaths)
+    while True:
+        for filepath in list(pending):
+            if not os.path.exists(get_lock_filepath(filepath)) or reclaim_download_lease(filepath, timeout=timeout):
+                pending.remove(filepath)
+        if len(pending) == 0:
+            break
+        time.sleep(poll_interval)
+    return [is_complete_local_file(filepath) for filepath in filepaths]
@@ -0,0 +1,159 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module contains functions to cache the listings of the NASA servers directories.
+
+The directory listings are saved as JSON files in the ``listing_cache_dir`` GPM-API config directory.
+The cache is disabled if ``listing_cache_dir`` is ``None`` (the default).
+
+- RS directories listings are kept indefinitely, unless the directory date is within the last
+  ``RS_LISTING_LATENCY_DAYS`` days, since files can still be added to such directories.
+- NRT directories listings are refreshed once older than ``listing_cache_ttl`` seconds.
+
+If ``listing_cache_offline`` is ``True``, the NASA servers are never queried and only the
+cached listings are used. This enables to replay previous queries without network access.
+"""
+import datetime
+import glob
+import hashlib
+import json
+import os
+import time
+
+from gpm._config import config
+from gpm.io.checks import get_current_utc_time
+
+RS_LISTING_LATENCY_DAYS = 30
+
+
+def get_listing_cache_dir():
+    """Return the directory where directory listings are cached. Return ``None`` if the cache is disabled."""
+    cache_dir = config.get("listing_cache_dir", None)
+    if cache_dir is None:
+        return None
+    return os.path.expanduser(str(cache_dir))
+
+
+def get_listing_ttl(product_type, date):
+    """Return the number of seconds a directory listing is considered valid.
+
+    Returns ``None`` if the listing never expires.
+    """
+    if product_type == "RS":
+        date = datetime.datetime(date.year, date.month, date.day)
+        if get_current_utc_time() - date > datetime.timedelta(days=RS_LISTING_LATENCY_DAYS):
+            return None
+    return config.get("listing_cache_ttl", 600)
+
+
+def _get_listing_filepath(url, cache_dir):
+    """Return the file path of the cached listing of a directory url."""
+    url = url.rstrip("/")
+    filename = hashlib.sha256(url.encode()).hexdigest() + ".json"
+    return os.path.join(cache_dir, filename)
+
+
+def read_cached_listing(url, ttl=None):
+    """Read the cached listing of a directory url.
+
+    Returns ``None`` if the listing is not cached or is older than ``ttl`` seconds.
+    """
+    cache_dir = get_listing_cache_dir()
+    if cache_dir is None:
+        return None
+    filepath = _get_listing_filepath(url, cache_dir=cache_dir)
+    try:
+        with open(filepath) as f:
+            listing = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if ttl is not None and time.time() - listing["time"] > ttl:
+        return None
+    return listing["filepaths"]
+
+
+def write_cached_listing(url, filepaths):
+    """Save the listing of a directory url into the cache."""
+    cache_dir = get_listing_cache_dir()
+    if cache_dir is None:
+        return
+    os.makedirs(cache_dir, exist_ok=True)
+    filepath = _get_listing_filepath(url, cache_dir=cache_dir)
+    listing = {"url": url.rstrip("/"), "time": time.time(), "filepaths": list(filepaths)}
+    # Write to a temporary file first so that concurrent readers never see a partial file
+    tmp_filepath = f"{filepath}.{os.getpid()}.tmp"
+    with open(tmp_filepath, "w") as f:
+        json.dump(listing, f)
+    os.replace(tmp_filepath, filepath)
+
+
+def get_cached_listing(url, list_function, ttl=None):
+    """Return the listing of a directory url, querying the server only if required.
+
+    Parameters
+    ----------
+    url : str
+        The directory url.
+    list_function : callable
+        Function returning the list of file paths of the directory url.
+        Errors raised by ``list_function`` are not cached.
+    ttl : int, optional
+        Number of seconds a cached listing is considered valid.
+        If ``None``, the cached listing never expires.
+
+    Returns
+    -------
+    filepaths : list
+        List of file paths.
+
+    """
+    filepaths = read_cached_listing(url, ttl=None if config.get("listing_cache_offline", False) else ttl)
+    if filepaths is not None:
+        return filepaths
+    if config.get("listing_cache_offline", False):
+        raise ValueError(f"The listing of {url} is not available in the listing cache (offline mode).")
+    filepaths = list_function(url)
+    write_cached_listing(url, filepaths)
+    return filepaths
+
+
+def invalidate_cached_listing(url):
+    """Remove the cached listing of a directory url."""
+    cache_dir = get_listing_cache_dir()
+    if cache_dir is None:
+        return
+    filepath = _get_listing_filepath(url, cache_dir=cache_dir)
+    if os.path.exists(filepath):
+        os.remove(filepath)
+
+
+def clear_listing_cache():
+    """Remove all cached directory listings."""
+    cache_dir = get_listing_cache_dir()
+    if cache_dir is None:
+        return
+    for filepath in glob.glob(os.path.join(cache_dir, "*.json")):
+        os.remove(filepath)
@@ -33,6 +33,10 @@ from gpm.io.checks import check_base_dir
 from gpm.io.products import get_product_category
 from gpm.utils.directories import search_leaf_files
 
+PARTIAL_FILE_SUFFIX = ".part"
+LOCK_FILE_SUFFIX = ".lock"
+MIRROR_DIRNAMES = ["OPTIMIZED", "REFERENCES"]
+
 ####--------------------------------------------------------------------------.
 #####################
 #### Directories ####
@@ -213,7 +217,9 @@ def get_local_daily_filepaths(product, product_type, date, version, base_dir=Non
         return []
 
     # Retrieve the file names in the directory
+    # - Exclude the files which are being downloaded
     filenames = sorted(os.listdir(dir_path))  # returns [] if empty
+    filenames = [filename for filename in filenames if not is_temporary_filepath(filename)]
 
     # Retrieve the filepaths
     return [os.path.join(dir_path, filename) for filename in filenames]
@@ -272,6 +278,84 @@ def get_local_filepath_from_filename(filepath, product_type="RS", base_dir=None)
     return os.path.join(dir_tree, filename)
 
 
+####--------------------------------------------------------------------------.
+#########################
+#### Temporary files ####
+#########################
+
+
+def get_partial_filepath(filepath):
+    """Return the path of the temporary file where a file is written while being downloaded."""
+    return f"{filepath}{PARTIAL_FILE_SUFFIX}"
+
+
+def is_partial_filepath(filepath):
+    """Return ``True`` if the file path refers to a file which is being downloaded."""
+    return filepath.endswith(PARTIAL_FILE_SUFFIX)
+
+
+def get_lock_filepath(filepath):
+    """Return the path of the lease file signaling that a file is being downloaded."""
+    return f"{filepath}{LOCK_FILE_SUFFIX}"
+
+
+def is_temporary_filepath(filepath):
+    """Return ``True`` if the file path refers to a partial or lease file used during downloads."""
+    return filepath.endswith((PARTIAL_FILE_SUFFIX, LOCK_FILE_SUFFIX))
+
+
+def finalize_partial_file(filepath):
+    """Atomically move a downloaded partial file to its final file path.
+
+    Returns ``True`` if the final file exists.
+    """
+    partial_filepath = get_partial_filepath(filepath)
+    if os.path.exists(partial_filepath) and os.path.getsize(partial_filepath) > 0:
+        os.replace(partial_filepath, filepath)
+    return os.path.exists(filepath)
+
+
+def is_complete_local_file(filepath):
+    """Return ``True`` if a complete file exists at the local file path.
+
+    Downloads are written to a partial file and moved to the final path only once completed.
+    Empty files are considered incomplete.
+    """
+    return os.path.isfile(filepath) and os.path.getsize(filepath) > 0
+
+
+####--------------------------------------------------------------------------.
+########################
+#### Archive mirror ####
+########################
+
+
+def get_mirror_filepath(filepath, dirname, extension, base_dir=None):
+    """Return the file path of a local granule derived file stored in the ``<base_dir>/GPM/<dirname>`` mirror.
+
+    The mirror has the same directory structure of the local archive and
+    the derived file is named ``<filename><extension>``.
+    Returns ``None`` if the granule is not located in the local GPM archive.
+    """
+    try:
+        base_dir = check_base_dir(get_base_dir(base_dir=base_dir))
+    except ValueError:
+        return None
+    archive_dir = os.path.join(base_dir, "GPM")
+    relative_path = os.path.relpath(os.path.abspath(filepath), os.path.abspath(archive_dir))
+    if relative_path.startswith(os.pardir) or relative_path.split(os.sep)[0] in MIRROR_DIRNAMES:
+        return None
+    filename = f"{os.path.basename(relative_path)}{extension}"
+    return os.path.join(archive_dir, dirname, os.path.dirname(relative_path), filename)
+
+
+def is_mirror_file_updated(filepath, mirror_filepath):
+    """Return ``True`` if the mirror file exists and is more recent than the granule."""
+    if mirror_filepath is None or not os.path.exists(mirror_filepath):
+        return False
+    return not os.path.exists(filepath) or os.path.getmtime(mirror_filepath) >= os.path.getmtime(filepath)
+
+
 ####--------------------------------------------------------------------------.
 #################
 #### Utility ####
@@ -320,7 +404,7 @@ def get_local_filepaths(product, version=7, product_type="RS", base_dir=None, gr
 
     # Retrieve the filepaths
     filepaths = search_leaf_files(base_dir=product_dir, parallel=True)
-    filepaths = sorted(filepaths)
+    filepaths = sorted(filepath for filepath in filepaths if not is_temporary_filepath(filepath))
 
     # Group filepaths if groups is not None
     return group_filepaths(filepaths, groups=groups)
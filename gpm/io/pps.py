@@ -36,6 +36,7 @@ from gpm.io.checks import (
     check_product_validity,
     check_product_version,
 )
+from gpm.io.listing_cache import get_cached_listing, get_listing_ttl
 from gpm.io.products import available_products, get_product_info
 
 ####--------------------------------------------------------------------------.
@@ -250,7 +251,20 @@ def _try_get_pps_file_list(url_product_dir):
     return stdout.split()
 
 
-def _get_pps_file_list(url_product_dir, product, date, version, verbose=True):
+def _list_pps_directory(url_product_dir):
+    """Return the filepaths of a PPS directory.
+
+    An empty list is returned for an empty directory, so that empty directory listings are cached.
+    """
+    try:
+        return _try_get_pps_file_list(url_product_dir)
+    except ValueError as e:
+        if "No data found on PPS." in str(e):
+            return []
+        raise
+
+
+def _get_pps_file_list(url_product_dir, product, date, version, verbose=True, product_type="RS"):
     """Retrieve the filepaths of the files available on the NASA PPS server for a specific day.
 
     The query is done using https !
@@ -258,6 +272,8 @@ def _get_pps_file_list(url_product_dir, product, date, version, verbose=True):
     from the server root: i.e: ``'/gpmdata/2020/07/05/radar/<...>.HDF5'``
     The returned filepaths can includes more than one product !!!
 
+    If the listing cache is enabled, the directory listing is retrieved from the cache when available.
+
     Parameters
     ----------
     url_product_dir : str
@@ -268,13 +284,22 @@ def _get_pps_file_list(url_product_dir, product, date, version, verbose=True):
         Single date for which to retrieve the data.
     verbose : bool, optional
         Default is ``False``. Whether to specify when data are not available for a specific date.
+    product_type : str, optional
+        GPM product type. Either ``RS`` (Research) or ``NRT`` (Near-Real-Time).
+        It defines how long the directory listing is cached. The default is ``RS``.
 
     """
     try:
-        filepaths = _try_get_pps_file_list(url_product_dir)
+        filepaths = get_cached_listing(
+            url_product_dir,
+            list_function=_list_pps_directory,
+            ttl=get_listing_ttl(product_type=product_type, date=date),
+        )
+        if len(filepaths) == 0:
+            raise ValueError("No data found on PPS.")
     except Exception as e:
         # If url not exist, raise an error
-        if "The PPS server is currently unavailable." in str(e):
+        if "The PPS server is currently unavailable." in str(e) or "listing cache" in str(e):
             raise e
         if "No data found on PPS." in str(e):
             # If no filepath (empty directory), print message if verbose=True
@@ -323,6 +348,7 @@ def get_pps_daily_filepaths(product, product_type, date, version, verbose=True):
         date=date,
         version=version,
         verbose=verbose,
+        product_type=product_type,
     )
     # Define the complete url of pps filepaths
     # Filepaths start with a "/"
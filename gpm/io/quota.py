@@ -0,0 +1,505 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module contains functions to bound the size of the local GPM archive.
+
+If the ``local_archive_quota`` GPM-API config is specified (i.e. ``"500GB"``), the local archive
+behaves as a cache:
+
+- the last access time of the local files is recorded when files are downloaded or opened,
+- once new files are downloaded, the least recently used files are removed from disk
+  until the archive size is below the quota.
+
+The size of a granule includes the size of its derived files in the ``OPTIMIZED`` and ``REFERENCES``
+mirrors of the local archive, which are removed together with the granule.
+
+The quota is enforced once at the end of each download request (see ``defer_local_archive_quota``),
+and the files of the request are never removed by the request itself.
+If the ``local_catalog`` GPM-API config is ``True``, the granules sizes are read from the local
+granules catalog and only the granules indexed in the catalog are accounted and removed.
+
+The files of pinned products periods (see ``pin_local_product``) are never removed.
+The access times and the pins are stored in the local granules catalog (see ``gpm.io.catalog``).
+"""
+import contextlib
+import contextvars
+import datetime
+import functools
+import os
+import re
+import time
+import warnings
+
+import numpy as np
+
+from gpm._config import config
+from gpm.configs import get_base_dir
+from gpm.io.catalog import (
+    _get_catalog_version,
+    _get_product_type_from_local_filepath,
+    _get_time_string,
+    _open_catalog,
+)
+from gpm.io.checks import check_base_dir, check_product, check_product_type, check_time
+from gpm.io.info import get_info_from_filepaths
+from gpm.io.local import MIRROR_DIRNAMES, is_temporary_filepath
+from gpm.utils.directories import convert_size_to_bytes, search_leaf_files
+from gpm.utils.warnings import GPM_Warning
+
+_MIN_TIME_STRING = _get_time_string(datetime.datetime.min)
+_MAX_TIME_STRING = _get_time_string(datetime.datetime.max.replace(microsecond=0))
+# Files of the current download request (see local_archive_quota_request)
+_QUOTA_REQUEST = contextvars.ContextVar("local_archive_quota_request", default=None)
+
+
+def get_local_archive_quota():
+    """Return the maximum size (in bytes) of the local archive, or ``None`` if the archive is unbounded."""
+    quota = config.get("local_archive_quota", None)
+    if quota is None:
+        return None
+    return convert_size_to_bytes(quota)
+
+
+####--------------------------------------------------------------------------.
+#####################
+#### Access time ####
+#####################
+
+
+def record_local_access(filepaths, base_dir=None):
+    """Record the current time as last access time of local files.
+
+    The access time is recorded only if the ``local_archive_quota`` GPM-API config is specified.
+    """
+    if isinstance(filepaths, str):
+        filepaths = [filepaths]
+    if get_local_archive_quota() is None or len(filepaths) == 0:
+        return
+    access_time = time.time()
+    with _open_catalog(base_dir=base_dir) as connection:
+        connection.executemany(
+            "INSERT OR REPLACE INTO access VALUES (?, ?)",
+            [(filepath, access_time) for filepath in filepaths],
+        )
+
+
+def _get_last_access_times(filepaths, mtimes, connection):
+    """Return the last access time of local files.
+
+    Files without recorded access are considered accessed at their last modification time.
+    """
+    access_times = dict(connection.execute("SELECT filepath, access_time FROM access").fetchall())
+    return np.array(
+        [max(access_times.get(filepath, mtime), mtime) for filepath, mtime in zip(filepaths, mtimes)],
+    )
+
+
+####--------------------------------------------------------------------------.
+##############
+#### Pins ####
+##############
+
+
+def _define_pin(product, start_time, end_time, product_type, version):
+    """Define the catalog record of a pinned product period."""
+    product_type = check_product_type(product_type)
+    product = check_product(product, product_type=product_type)
+    start_time = _MIN_TIME_STRING if start_time is None else _get_time_string(check_time(start_time))
+    end_time = _MAX_TIME_STRING if end_time is None else _get_time_string(check_time(end_time))
+    if start_time > end_time:
+        raise ValueError("Provide 'start_time' occurring before of 'end_time'.")
+    return (product, product_type, _get_catalog_version(product_type, version), start_time, end_time)
+
+
+def pin_local_product(product, start_time=None, end_time=None, product_type="RS", version=7, base_dir=None):
+    """Protect the local files of a product period from the removal when the archive quota is exceeded.
+
+    Parameters
+    ----------
+    product : str
+        GPM product acronym. See ``gpm.available_products()``.
+    start_time : datetime.datetime, datetime.date, numpy.datetime64 or str, optional
+        Start time of the period to keep on disk.
+        If ``None`` (the default), the period starts with the first product file.
+    end_time : datetime.datetime, datetime.date, numpy.datetime64 or str, optional
+        End time of the period to keep on disk.
+        If ``None`` (the default), the period ends with the last product file.
+    product_type : str, optional
+        GPM product type. Either ``RS`` (Research) or ``NRT`` (Near-Real-Time).
+        The default is ``RS``.
+    version : int, optional
+        GPM version of the data to keep if ``product_type = "RS"``.
+        The default is version ``7``.
+    base_dir : str, optional
+        The path to the GPM base directory.
+        If ``None``, it uses the ``base_dir`` specified in the GPM-API config file.
+
+    """
+    pin = _define_pin(product, start_time, end_time, product_type=product_type, version=version)
+    with _open_catalog(base_dir=base_dir) as connection:
+        connection.execute("INSERT OR REPLACE INTO pins VALUES (?, ?, ?, ?, ?)", pin)
+
+
+def unpin_local_product(product, start_time=None, end_time=None, product_type="RS", version=7, base_dir=None):
+    """Remove a pin defined with ``pin_local_product``.
+
+    If ``start_time`` and ``end_time`` are not specified, all the pins of the product are removed.
+    """
+    pin = _define_pin(product, start_time, end_time, product_type=product_type, version=version)
+    with _open_catalog(base_dir=base_dir) as connection:
+        if start_time is None and end_time is None:
+            connection.execute("DELETE FROM pins WHERE product = ? AND product_type = ? AND version = ?", pin[0:3])
+        else:
+            connection.execute(
+                "DELETE FROM pins WHERE product = ? AND product_type = ? AND version = ? "
+                "AND start_time = ? AND end_time = ?",
+                pin,
+            )
+
+
+def get_local_pins(base_dir=None):
+    """Return the list of pinned products periods."""
+    with _open_catalog(base_dir=base_dir) as connection:
+        rows = connection.execute("SELECT * FROM pins ORDER BY product, product_type, version, start_time").fetchall()
+    keys = ["product", "product_type", "version", "start_time", "end_time"]
+    pins = [dict(zip(keys, row)) for row in rows]
+    for pin in pins:
+        for key, unbounded_time in [("start_time", _MIN_TIME_STRING), ("end_time", _MAX_TIME_STRING)]:
+            pin[key] = None if pin[key] == unbounded_time else datetime.datetime.fromisoformat(pin[key])
+    return pins
+
+
+def _get_pinned_mask(filepaths, base_dir, connection):
+    """Return a boolean array indicating which files belong to a pinned product period."""
+    pinned = np.zeros(len(filepaths), dtype=bool)
+    pins = connection.execute("SELECT * FROM pins").fetchall()
+    if len(pins) == 0 or len(filepaths) == 0:
+        return pinned
+    df = get_info_from_filepaths(filepaths, ignore_errors=True)
+    if len(df) == 0:
+        return pinned
+    product_types = np.array(
+        [
+            _get_product_type_from_local_filepath(filepath, base_dir=base_dir, default=product_type)
+            for filepath, product_type in zip(df["filepath"], df["product_type"])
+        ],
+    )
+    versions = np.array(
+        [
+            _get_catalog_version(product_type, re.findall("\\d+", version)[0])
+            for product_type, version in zip(product_types, df["version"])
+        ],
+    )
+    products = df["product"].to_numpy()
+    start_times = df["start_time"].dt.strftime("%Y-%m-%d %H:%M:%S").to_numpy()
+    end_times = df["end_time"].dt.strftime("%Y-%m-%d %H:%M:%S").to_numpy()
+    is_pinned = np.zeros(len(df), dtype=bool)
+    for product, product_type, version, pin_start_time, pin_end_time in pins:
+        is_pinned |= (
+            (products == product)
+            & (product_types == product_type)
+            & (versions == version)
+            & (start_times <= pin_end_time)
+            & (end_times >= pin_start_time)
+        )
+    pinned_filepaths = set(df["filepath"][is_pinned])
+    return np.array([filepath in pinned_filepaths for filepath in filepaths], dtype=bool)
+
+
+####--------------------------------------------------------------------------.
+########################
+#### Quota eviction ####
+########################
+
+
+def _get_granules_mirror_files(filepaths, base_dir):
+    """Return the derived files of each local granule stored in the local archive mirrors.
+
+    The mirror files are named ``<granule filename>.<scan_mode>.<extension>`` (see ``get_mirror_filepath``).
+    """
+    archive_dir = os.path.join(base_dir, "GPM")
+    dict_indices = {os.path.relpath(filepath, archive_dir): i for i, filepath in enumerate(filepaths)}
+    mirror_filepaths = [[] for _ in filepaths]
+    for dirname in MIRROR_DIRNAMES:
+        mirror_dir = os.path.join(archive_dir, dirname)
+        if not os.path.exists(mirror_dir):
+            continue
+        for mirror_filepath in search_leaf_files(base_dir=mirror_dir, parallel=True):
+            # Strip the scan mode, the extension and the optional partial file suffix
+            parts = os.path.relpath(mirror_filepath, mirror_dir).split(".")
+            for n in range(2, min(len(parts), 4)):
+                i = dict_indices.get(".".join(parts[:-n]))
+                if i is not None:
+                    mirror_filepaths[i].append(mirror_filepath)
+                    break
+    return mirror_filepaths
+
+
+def _get_file_size(filepath):
+    """Return the size of a file, or 0 if the file does not exist."""
+    try:
+        return os.path.getsize(filepath)
+    except OSError:
+        return 0
+
+
+def _search_local_granules_files(base_dir):
+    """Return the file paths, sizes and modification times of the granules found on disk."""
+    filepaths = []
+    for product_type in ["RS", "NRT"]:
+        product_type_dir = os.path.join(base_dir, "GPM", product_type)
+        if os.path.exists(product_type_dir):
+            filepaths += search_leaf_files(base_dir=product_type_dir, parallel=True)
+    sizes = []
+    mtimes = []
+    existing_filepaths = []
+    for filepath in filepaths:
+        with contextlib.suppress(FileNotFoundError):
+            stat = os.stat(filepath)
+            sizes.append(stat.st_size)
+            mtimes.append(stat.st_mtime)
+            existing_filepaths.append(filepath)
+    return existing_filepaths, sizes, mtimes
+
+
+def _get_cataloged_granules_files(base_dir):
+    """Return the file paths, sizes and modification times of the granules of the local catalog.
+
+    The sizes and modification times are recorded in the catalog when the files are indexed.
+    """
+    with _open_catalog(base_dir=base_dir) as connection:
+        rows = connection.execute("SELECT filepath, size, mtime FROM granules").fetchall()
+    filepaths = []
+    sizes = []
+    mtimes = []
+    for filepath, size, mtime in rows:
+        # Records without size have been indexed by a previous GPM-API version
+        if size is None or mtime is None:
+            try:
+                stat = os.stat(filepath)
+            except FileNotFoundError:
+                continue
+            size, mtime = stat.st_size, stat.st_mtime
+        filepaths.append(filepath)
+        sizes.append(size)
+        mtimes.append(mtime)
+    return filepaths, sizes, mtimes
+
+
+def _get_local_archive_files(base_dir):
+    """Return the file paths, sizes and modification times of the granules of the local archive.
+
+    If the ``local_catalog`` GPM-API config is ``True``, the granules are retrieved from the local
+    catalog instead of searching the whole local archive on disk.
+    The size of a granule includes the size of its mirror files, which are also returned.
+    """
+    if config.get("local_catalog"):
+        filepaths, sizes, mtimes = _get_cataloged_granules_files(base_dir)
+    else:
+        filepaths, sizes, mtimes = _search_local_granules_files(base_dir)
+    mirror_filepaths = _get_granules_mirror_files(filepaths, base_dir=base_dir)
+    sizes = [size + sum(map(_get_file_size, mirror)) for size, mirror in zip(sizes, mirror_filepaths)]
+    return filepaths, np.array(sizes, dtype=np.int64), np.array(mtimes, dtype=float), mirror_filepaths
+
+
+def get_local_archive_size(base_dir=None):
+    """Return the size (in bytes) of the local archive."""
+    base_dir = check_base_dir(get_base_dir(base_dir=base_dir))
+    _, sizes, _, _ = _get_local_archive_files(base_dir)
+    return int(sizes.sum())
+
+
+def _remove_empty_directories(dir_path, base_dir):
+    """Remove empty directories from ``dir_path`` up to the ``<base_dir>/GPM`` directory (excluded)."""
+    stop_dir = os.path.join(base_dir, "GPM")
+    while os.path.abspath(dir_path) != os.path.abspath(stop_dir) and dir_path.startswith(stop_dir):
+        try:
+            os.rmdir(dir_path)
+        except OSError:
+            break
+        dir_path = os.path.dirname(dir_path)
+
+
+def _evict_local_files(filepaths, mirror_filepaths, base_dir, connection):
+    """Remove local files and their mirror files from disk and from the catalog tables."""
+    for filepath in [*filepaths, *mirror_filepaths]:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(filepath)
+        _remove_empty_directories(os.path.dirname(filepath), base_dir=base_dir)
+    records = [(filepath,) for filepath in filepaths]
+    for table in ["granules", "integrity", "access", "footprints"]:
+        connection.executemany(f"DELETE FROM {table} WHERE filepath = ?", records)
+
+
+def enforce_local_archive_quota(quota=None, protected_filepaths=None, base_dir=None, verbose=False):
+    """Remove the least recently used files until the local archive size is below the quota.
+
+    Files being downloaded, files of pinned products periods (see ``pin_local_product``)
+    and ``protected_filepaths`` are never removed.
+
+    Parameters
+    ----------
+    quota : int or str, optional
+        Maximum size of the local archive. Either the number of bytes or a string such as ``"500GB"``.
+        If ``None``, it uses the ``local_archive_quota`` specified in the GPM-API config.
+        If no quota is specified, no files are removed.
+    protected_filepaths : list, optional
+        Local file paths which must be kept on disk.
+    base_dir : str, optional
+        The path to the GPM base directory.
+        If ``None``, it uses the ``base_dir`` specified in the GPM-API config file.
+    verbose : bool, optional
+        Whether to print the removed files. The default is ``False``.
+
+    Returns
+    -------
+    evicted_filepaths : list
+        List of the removed file paths.
+
+    """
+    quota = get_local_archive_quota() if quota is None else convert_size_to_bytes(quota)
+    if quota is None:
+        return []
+    base_dir = check_base_dir(get_base_dir(base_dir=base_dir))
+    filepaths, sizes, mtimes, mirror_filepaths = _get_local_archive_files(base_dir)
+    archive_size = int(sizes.sum())
+    if archive_size <= quota:
+        return []
+
+    # Define the files which can be removed
+    protected_filepaths = set(protected_filepaths or [])
+    is_candidate = np.array(
+        [not is_temporary_filepath(filepath) and filepath not in protected_filepaths for filepath in filepaths],
+        dtype=bool,
+    )
+    filepaths = [filepath for filepath, flag in zip(filepaths, is_candidate) if flag]
+    mirror_filepaths = [mirror for mirror, flag in zip(mirror_filepaths, is_candidate) if flag]
+    sizes = sizes[is_candidate]
+    mtimes = mtimes[is_candidate]
+    with _open_catalog(base_dir=base_dir) as connection:
+        is_pinned = _get_pinned_mask(filepaths, base_dir=base_dir, connection=connection)
+        access_times = _get_last_access_times(filepaths, mtimes=mtimes, connection=connection)
+
+        # Remove the least recently used files until the archive size is below the quota
+        indices = np.flatnonzero(~is_pinned)
+        indices = indices[np.argsort(access_times[indices], kind="stable")]
+        n_bytes_to_remove = archive_size - quota
+        n_evicted = int(np.searchsorted(np.cumsum(sizes[indices]), n_bytes_to_remove) + 1)
+        evicted_indices = indices[:n_evicted]
+        evicted_filepaths = [filepaths[i] for i in evicted_indices]
+        _evict_local_files(
+            evicted_filepaths,
+            mirror_filepaths=[filepath for i in evicted_indices for filepath in mirror_filepaths[i]],
+            base_dir=base_dir,
+            connection=connection,
+        )
+
+    archive_size -= int(sizes[evicted_indices].sum())
+    if verbose:
+        for filepath in evicted_filepaths:
+            print(f"{filepath} has been removed to respect the local archive quota.")
+    if archive_size > quota:
+        msg = (
+            f"The local archive size ({archive_size} bytes) exceeds the quota of {quota} bytes. "
+            "The remaining files are pinned, protected or being downloaded."
+        )
+        warnings.warn(msg, GPM_Warning, stacklevel=2)
+    return evicted_filepaths
+
+
+####--------------------------------------------------------------------------.
+##########################
+#### Download request ####
+##########################
+
+
+@contextlib.contextmanager
+def local_archive_quota_request(verbose=False):
+    """Enforce the local archive quota once at the end of a download request.
+
+    Within the context, the files of the request are accumulated with ``protect_request_filepaths``
+    and ``update_local_archive_quota``, and the quota is enforced once when exiting the context
+    (if files have been downloaded). The files of the request are protected from eviction.
+    Nested requests are merged into the outermost request.
+    """
+    if _QUOTA_REQUEST.get() is not None:
+        yield
+        return
+    request = {"protected_filepaths": set(), "has_downloads": False}
+    token = _QUOTA_REQUEST.set(request)
+    try:
+        yield
+    finally:
+        _QUOTA_REQUEST.reset(token)
+        if request["has_downloads"]:
+            enforce_local_archive_quota(protected_filepaths=request["protected_filepaths"], verbose=verbose)
+
+
+def defer_local_archive_quota(function):
+    """Decorate a download function to enforce the local archive quota once at the end of the request."""
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with local_archive_quota_request(verbose=kwargs.get("verbose", False)):
+            return function(*args, **kwargs)
+
+    return wrapper
+
+
+def protect_request_filepaths(filepaths):
+    """Protect local files from eviction until the end of the current download request."""
+    request = _QUOTA_REQUEST.get()
+    if request is not None:
+        request["protected_filepaths"].update(filepaths)
+
+
+def update_local_archive_quota(local_filepaths, status, verbose=False):
+    """Record the access of downloaded files and enforce the local archive quota.
+
+    Within a download request (see ``local_archive_quota_request``), the quota is enforced
+    only at the end of the request.
+
+    Parameters
+    ----------
+    local_filepaths : list
+        Local file paths of the downloads.
+    status : list
+        Download status of each file. 0=Failed. 1=Success. -1=Downloaded by another process.
+    verbose : bool, optional
+        Whether to print the removed files. The default is ``False``.
+
+    """
+    if get_local_archive_quota() is None:
+        return
+    protect_request_filepaths(local_filepaths)
+    if 1 not in status:
+        return
+    record_local_access([filepath for filepath, flag in zip(local_filepaths, status) if flag != 0])
+    request = _QUOTA_REQUEST.get()
+    if request is not None:
+        request["has_downloads"] = True
+        return
+    enforce_local_archive_quota(protected_filepaths=local_filepaths, verbose=verbose)
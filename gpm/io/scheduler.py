@@ -0,0 +1,497 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module contains the asyncio download scheduler.
+
+Contrary to ``download_archive(scheduler="daily")``, which lists and downloads one day at a time,
+the scheduler pipelines the daily directory listings with the downloads:
+
+- the daily listings run concurrently in background threads and feed a single global queue of transfers,
+- the transfers are dispatched as soon as they are queued, under a global concurrency limit,
+- the number of concurrent transfers per host is adapted from the observed throughput and errors
+  (additive increase while the aggregated throughput improves, multiplicative decrease on errors),
+- the files being downloaded by other processes are awaited (see ``gpm.io.lease``).
+
+The scheduler can be awaited with ``await download_archive_async(...)`` or used through
+``gpm.download(..., scheduler="async")``.
+"""
+import asyncio
+import contextvars
+import datetime
+import os
+import shlex
+import subprocess
+import threading
+import time
+import urllib.parse
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from gpm._config import config
+from gpm.io.catalog import update_local_catalog
+from gpm.io.checks import (
+    check_product,
+    check_product_type,
+    check_product_version,
+    check_remote_storage,
+    check_start_end_time,
+    check_transfer_tool,
+    check_valid_time_request,
+)
+from gpm.io.download import (
+    _get_single_file_cmd_function,
+    _get_storage_username_password,
+    _invalidate_daily_listing,
+    filter_download_list,
+    get_filepaths_from_filenames,
+)
+from gpm.io.find import find_daily_filepaths
+from gpm.io.lease import acquire_download_lease, hold_download_lease, wait_for_download_leases
+from gpm.io.local import finalize_partial_file, get_partial_filepath
+from gpm.io.quota import update_local_archive_quota
+from gpm.io.transfer import transfer_file
+from gpm.utils.warnings import GPMDownloadWarning
+
+N_LISTING_THREADS = 4
+
+
+####--------------------------------------------------------------------------.
+##############################
+#### Adaptive concurrency ####
+##############################
+
+
+class AdaptiveHostLimiter:
+    """Limit the number of concurrent transfers to a host and adapt it to the observed performance.
+
+    The transfers are evaluated by windows of ``limit`` completed transfers:
+
+    - if the aggregated throughput of the window is at least ``tolerance`` times the best
+      observed throughput, the limit is increased by one,
+    - otherwise the host is considered saturated and the limit is decreased by one.
+
+    A failed transfer halves the limit.
+    """
+
+    def __init__(self, initial_limit=4, min_limit=1, max_limit=16, tolerance=0.9):
+        self.min_limit = max(min_limit, 1)
+        self.max_limit = max(max_limit, self.min_limit)
+        self.limit = min(max(initial_limit, self.min_limit), self.max_limit)
+        self.tolerance = tolerance
+        self.n_active = 0
+        self.best_throughput = 0
+        self._condition = None
+        self._reset_window(time.monotonic())
+
+    def _reset_window(self, now):
+        self._window_start = now
+        self._window_bytes = 0
+        self._window_transfers = 0
+
+    def record_transfer(self, success, n_bytes=0, now=None):
+        """Update the concurrency limit with the result of a completed transfer."""
+        now = time.monotonic() if now is None else now
+        if not success:
+            self.limit = max(self.min_limit, self.limit // 2)
+            self._reset_window(now)
+            return
+        self._window_bytes += n_bytes
+        self._window_transfers += 1
+        if self._window_transfers < self.limit:
+            return
+        elapsed_time = now - self._window_start
+        throughput = self._window_bytes / elapsed_time if elapsed_time > 0 else 0
+        if throughput >= self.tolerance * self.best_throughput:
+            self.limit = min(self.max_limit, self.limit + 1)
+        else:
+            self.limit = max(self.min_limit, self.limit - 1)
+        self.best_throughput = max(self.best_throughput, throughput)
+        self._reset_window(now)
+
+    async def acquire(self):
+        """Wait until a new transfer to the host is allowed."""
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.n_active < self.limit)
+            self.n_active += 1
+
+    async def release(self, success, n_bytes=0):
+        """Signal the completion of a transfer to the host."""
+        async with self._condition:
+            self.n_active -= 1
+            self.record_transfer(success=success, n_bytes=n_bytes)
+            self._condition.notify_all()
+
+    async def cancel(self):
+        """Signal that an allowed transfer to the host did not take place."""
+        async with self._condition:
+            self.n_active -= 1
+            self._condition.notify_all()
+
+
+####--------------------------------------------------------------------------.
+###################
+#### Transfers ####
+###################
+
+
+async def _transfer_with_tool(remote_filepath, local_filepath, storage, transfer_tool, username, password):
+    """Download a file with a ``curl`` or ``wget`` subprocess."""
+    os.makedirs(os.path.dirname(local_filepath), exist_ok=True)
+    get_single_file_cmd = _get_single_file_cmd_function(transfer_tool, storage)
+    cmd = get_single_file_cmd(remote_filepath, get_partial_filepath(local_filepath), username, password)
+    t_start = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        *shlex.split(cmd),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    returncode = await process.wait()
+    success = returncode == 0 and finalize_partial_file(local_filepath)
+    return {
+        "status": int(success),
+        "n_bytes": os.path.getsize(local_filepath) if success else 0,
+        "elapsed_time": time.perf_counter() - t_start,
+        "error": None if success else f"{transfer_tool} exited with code {returncode}",
+    }
+
+
+async def _transfer(item, storage, transfer_tool, username, password, executor):
+    """Download a queued file with the specified transfer tool."""
+    if transfer_tool == "NATIVE":
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor,
+            lambda: transfer_file(
+                remote_filepath=item["remote_filepath"],
+                local_filepath=item["local_filepath"],
+                storage=storage,
+                username=username,
+                password=password,
+            ),
+        )
+    return await _transfer_with_tool(
+        remote_filepath=item["remote_filepath"],
+        local_filepath=item["local_filepath"],
+        storage=storage,
+        transfer_tool=transfer_tool,
+        username=username,
+        password=password,
+    )
+
+
+####--------------------------------------------------------------------------.
+#################
+#### Listing ####
+#################
+
+
+def _list_daily_transfers(date, product, product_type, version, storage, start_time, end_time, force_download):
+    """List the files of a day to download and those already on disk."""
+    remote_filepaths, available_version = find_daily_filepaths(
+        storage=storage,
+        product=product,
+        product_type=product_type,
+        version=version,
+        date=date,
+        start_time=start_time,
+        end_time=end_time,
+        verbose=False,
+    )
+    if len(remote_filepaths) == 0:
+        return [], [], None
+    local_filepaths = get_filepaths_from_filenames(remote_filepaths, storage="LOCAL", product_type=product_type)
+    new_remote_filepaths, new_local_filepaths = filter_download_list(
+        local_filepaths=local_filepaths,
+        remote_filepaths=remote_filepaths,
+        force_download=force_download,
+    )
+    already_local_filepaths = sorted(set(local_filepaths) - set(new_local_filepaths))
+    transfers = [
+        {"remote_filepath": remote_filepath, "local_filepath": local_filepath}
+        for remote_filepath, local_filepath in zip(new_remote_filepaths, new_local_filepaths)
+    ]
+    return transfers, already_local_filepaths, available_version[0]
+
+
+def _get_dates(start_time, end_time):
+    """Return the dates of the directories to list.
+
+    The day before ``start_time`` is included to retrieve the granules starting the day before.
+    """
+    start_date = datetime.datetime(start_time.year, start_time.month, start_time.day)
+    start_date = start_date - datetime.timedelta(days=1)
+    end_date = datetime.datetime(end_time.year, end_time.month, end_time.day)
+    return list(pd.date_range(start=start_date, end=end_date, freq="D").to_pydatetime())
+
+
+####--------------------------------------------------------------------------.
+###################
+#### Scheduler ####
+###################
+
+
+async def download_archive_async(
+    product,
+    start_time,
+    end_time,
+    product_type="RS",
+    version=None,
+    storage="PPS",
+    max_concurrency=16,
+    initial_host_concurrency=4,
+    transfer_tool="NATIVE",
+    force_download=False,
+    progress_bar=False,
+    verbose=False,
+):
+    """Download GPM data from NASA servers pipelining the directory listings and the downloads.
+
+    Parameters
+    ----------
+    product : str
+        GPM product acronym. See ``gpm.available_products()``.
+    start_time : datetime.datetime, datetime.date, numpy.datetime64 or str
+        Start time.
+    end_time : datetime.datetime, datetime.date, numpy.datetime64 or str
+        End time.
+    product_type : str, optional
+        GPM product type. Either ``RS`` (Research) or ``NRT`` (Near-Real-Time).
+    version : int, optional
+        GPM version of the data to retrieve if ``product_type = "RS"``.
+    storage : str, optional
+        The remote repository from where to download.
+        Either ``pps`` or ``ges_disc``. The default is ``pps``.
+    max_concurrency : int, optional
+        Maximum number of concurrent downloads. The default is 16.
+    initial_host_concurrency : int, optional
+        Initial number of concurrent downloads per host. The default is 4.
+        It is then adapted to the observed throughput and errors.
+    transfer_tool : str, optional
+        Whether to use ``curl``, ``wget`` or the in-process ``native`` backend for data download.
+        The default is ``native``.
+    force_download : bool, optional
+        Whether to redownload data if already existing on disk. The default is ``False``.
+    progress_bar : bool, optional
+        Whether to display progress. The default is ``False``.
+    verbose : bool, optional
+        Whether to print processing details. The default is ``False``.
+
+    Returns
+    -------
+    results : list
+        List of dictionaries with the ``remote_filepath``, ``local_filepath``, ``version``,
+        ``status`` (-1=Already on disk, 0=Failed, 1=Success), ``n_bytes`` and ``elapsed_time``
+        of each file.
+
+    """
+    from tqdm import tqdm
+
+    # -------------------------------------------------------------------------.
+    ## Checks input arguments
+    storage = check_remote_storage(storage)
+    product_type = check_product_type(product_type=product_type)
+    product = check_product(product=product, product_type=product_type)
+    version = check_product_version(version, product)
+    transfer_tool = check_transfer_tool(transfer_tool)
+    start_time, end_time = check_start_end_time(start_time, end_time)
+    start_time, end_time = check_valid_time_request(start_time, end_time, product)
+    max_concurrency = max(max_concurrency, 1)
+    username, password = _get_storage_username_password(storage)
+    dates = _get_dates(start_time, end_time)
+
+    # -------------------------------------------------------------------------.
+    ## Define scheduler state
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    results = []
+    failed_dates = set()
+    limiters = {}
+    global_semaphore = asyncio.Semaphore(max_concurrency)
+    pbar = tqdm(total=0, disable=not progress_bar)
+
+    # -------------------------------------------------------------------------.
+    ## Define the listing producer (one per day)
+    async def list_day(i, date, listing_executor):
+        transfers, already_local_filepaths, available_version = await loop.run_in_executor(
+            listing_executor,
+            lambda: _list_daily_transfers(
+                date=date,
+                product=product,
+                product_type=product_type,
+                version=version,
+                storage=storage,
+                start_time=start_time,
+                end_time=end_time,
+                force_download=force_download,
+            ),
+        )
+        warn_missing_files = not (i == 0 or i == len(dates) - 1 and date == end_time)
+        if len(transfers) == 0 and len(already_local_filepaths) == 0 and warn_missing_files:
+            msg = f"No data found on {storage} on date {date} for product {product}"
+            warnings.warn(msg, GPMDownloadWarning, stacklevel=2)
+        results.extend(
+            {"local_filepath": filepath, "version": available_version, "status": -1, "n_bytes": 0, "elapsed_time": 0}
+            for filepath in already_local_filepaths
+        )
+        pbar.total += len(transfers)
+        pbar.refresh()
+        for transfer in transfers:
+            await queue.put({**transfer, "date": date, "version": available_version})
+
+    # -------------------------------------------------------------------------.
+    ## Define the transfer task
+    async def run_transfer(item, limiter, transfer_executor):
+        # The lease is kept alive until the transfer finishes and is then released
+        try:
+            with hold_download_lease(item["local_filepath"]):
+                result = await _transfer(
+                    item,
+                    storage=storage,
+                    transfer_tool=transfer_tool,
+                    username=username,
+                    password=password,
+                    executor=transfer_executor,
+                )
+        except Exception as e:
+            result = {"status": 0, "n_bytes": 0, "elapsed_time": 0, "error": str(e)}
+        await limiter.release(success=bool(result["status"]), n_bytes=result["n_bytes"])
+        global_semaphore.release()
+        if not result["status"]:
+            failed_dates.add(item["date"])
+        results.append({**item, **result})
+        pbar.update(1)
+
+    # -------------------------------------------------------------------------.
+    ## Define the dispatch of a transfer
+    # - The lease is acquired only once the transfer can start, so that queued transfers do not hold
+    #   leases which could be considered stale by other processes
+    # - Files being downloaded by other processes are awaited instead of being downloaded again
+    transfer_tasks = set()
+    awaited_items = []
+
+    async def dispatch(item, transfer_executor):
+        host = urllib.parse.urlsplit(item["remote_filepath"]).hostname
+        if host not in limiters:
+            limiters[host] = AdaptiveHostLimiter(
+                initial_limit=initial_host_concurrency,
+                max_limit=max_concurrency,
+            )
+        await global_semaphore.acquire()
+        await limiters[host].acquire()
+        if not acquire_download_lease(item["local_filepath"]):
+            await limiters[host].cancel()
+            global_semaphore.release()
+            awaited_items.append(item)
+            return
+        task = asyncio.ensure_future(run_transfer(item, limiters[host], transfer_executor))
+        transfer_tasks.add(task)
+        task.add_done_callback(transfer_tasks.discard)
+
+    # -------------------------------------------------------------------------.
+    ## Run listings and dispatch the transfers as soon as they are queued
+    listing_executor = ThreadPoolExecutor(max_workers=N_LISTING_THREADS)
+    transfer_executor = ThreadPoolExecutor(max_workers=max_concurrency)
+    try:
+        listing_tasks = [asyncio.ensure_future(list_day(i, date, listing_executor)) for i, date in enumerate(dates)]
+        listing_done = asyncio.ensure_future(asyncio.gather(*listing_tasks))
+        listing_done.add_done_callback(lambda _: queue.put_nowait(None))
+        while (item := await queue.get()) is not None:
+            await dispatch(item, transfer_executor)
+        await asyncio.gather(*list(transfer_tasks))
+        await listing_done  # raise listing errors
+
+        # Wait for the files downloaded by other processes and download those whose download failed
+        while len(awaited_items) > 0:
+            items = awaited_items.copy()
+            awaited_items.clear()
+            completed = await loop.run_in_executor(
+                listing_executor,
+                wait_for_download_leases,
+                [item["local_filepath"] for item in items],
+            )
+            for item, is_completed in zip(items, completed):
+                if is_completed:
+                    results.append({**item, "status": -1, "n_bytes": 0, "elapsed_time": 0})
+                    pbar.update(1)
+                else:
+                    await dispatch(item, transfer_executor)
+            await asyncio.gather(*list(transfer_tasks))
+    finally:
+        listing_executor.shutdown()
+        transfer_executor.shutdown()
+    pbar.close()
+
+    # -------------------------------------------------------------------------.
+    ## Post-process the downloads
+    if config.get("local_catalog"):
+        update_local_catalog([result["local_filepath"] for result in results if result["status"] == 1])
+    update_local_archive_quota(
+        [result["local_filepath"] for result in results],
+        status=[result["status"] for result in results],
+        verbose=verbose,
+    )
+    for date in failed_dates:
+        _invalidate_daily_listing(
+            storage=storage,
+            product=product,
+            product_type=product_type,
+            date=date,
+            version=version,
+        )
+    if verbose:
+        n_bytes = sum(result["n_bytes"] for result in results)
+        n_downloads = sum(result["status"] == 1 for result in results)
+        print(f"{n_downloads} files ({n_bytes / 1e6:.1f} MB) have been downloaded.")
+    return results
+
+
+def run_coroutine(coroutine):
+    """Run a coroutine to completion, also when called from a running event loop (i.e. in Jupyter)."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    # Run the coroutine in a separate thread with its own event loop
+    # - The context variables (i.e. the deferred local archive quota request) are copied to the thread
+    output = {}
+    context = contextvars.copy_context()
+
+    def _run():
+        try:
+            output["result"] = context.run(asyncio.run, coroutine)
+        except BaseException as e:
+            output["error"] = e
+
+    thread = threading.Thread(target=_run)
+    thread.start()
+    thread.join()
+    if "error" in output:
+        raise output["error"]
+    return output["result"]
@@ -0,0 +1,350 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module contains the in-process (``transfer_tool="NATIVE"``) download backend.
+
+Instead of spawning a ``curl`` or ``wget`` process per file, the files are streamed
+to disk by worker threads sharing persistent authenticated sessions:
+
+- PPS files are retrieved through FTPS. Each pool keeps logged-in ``ftplib.FTP_TLS`` sessions,
+  so that the TLS handshake and the login are performed once per connection instead of once per file.
+- GES DISC files are retrieved through HTTPS. A single opener keeps the NASA Earthdata
+  authentication cookies, so that the Earthdata login redirection is performed only once.
+
+Sessions are kept open across calls and closed at interpreter exit.
+"""
+import atexit
+import base64
+import contextlib
+import ftplib
+import hashlib
+import http.cookiejar
+import os
+import queue
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from gpm.io.local import get_partial_filepath
+
+CHUNK_SIZE = 1024 * 1024
+TIMEOUT = 60
+N_RETRIES = 3
+RETRY_DELAY = 5
+EARTHDATA_URS_URL = "https://urs.earthdata.nasa.gov"
+
+
+####--------------------------------------------------------------------------.
+##################
+#### Sessions ####
+##################
+
+
+class FTPSessionPool:
+    """Pool of logged-in FTPS sessions to a host.
+
+    Idle sessions are reused by the next transfer. Broken sessions are discarded.
+    """
+
+    def __init__(self, host, username, password, timeout=TIMEOUT):
+        self.host = host
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self._idle_sessions = queue.LifoQueue()
+
+    def _connect(self):
+        ftp = ftplib.FTP_TLS(self.host, timeout=self.timeout)
+        ftp.login(user=self.username, passwd=self.password)
+        ftp.prot_p()  # Switch to secure data connection
+        return ftp
+
+    def acquire(self):
+        """Return an idle session or open a new one."""
+        try:
+            return self._idle_sessions.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def release(self, ftp):
+        """Make a session available to other transfers."""
+        self._idle_sessions.put(ftp)
+
+    def discard(self, ftp):
+        """Close a (possibly broken) session."""
+        with contextlib.suppress(Exception):
+            ftp.close()
+
+    def close(self):
+        """Close all idle sessions."""
+        while True:
+            try:
+                ftp = self._idle_sessions.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                ftp.quit()
+            except Exception:
+                self.discard(ftp)
+
+
+_FTP_POOLS = {}
+_HTTPS_OPENERS = {}
+_LOCK = threading.Lock()
+
+
+def get_ftp_session_pool(host, username, password):
+    """Return the FTPS sessions pool of a host and user."""
+    key = (host, username)
+    with _LOCK:
+        if key not in _FTP_POOLS or _FTP_POOLS[key].password != password:
+            _FTP_POOLS[key] = FTPSessionPool(host=host, username=username, password=password)
+        return _FTP_POOLS[key]
+
+
+def get_earthdata_opener(username, password):
+    """Return an HTTPS opener authenticated with NASA Earthdata.
+
+    The opener stores the Earthdata session cookies and is shared by all transfers.
+    """
+    key = (username, password)
+    with _LOCK:
+        if key not in _HTTPS_OPENERS:
+            password_manager = urllib.request.HTTPPasswordMgrWithDefaultRealm()
+            password_manager.add_password(None, EARTHDATA_URS_URL, username, password)
+            _HTTPS_OPENERS[key] = urllib.request.build_opener(
+                urllib.request.HTTPBasicAuthHandler(password_manager),
+                urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+            )
+        return _HTTPS_OPENERS[key]
+
+
+def close_sessions():
+    """Close all the sessions opened by the native transfer backend."""
+    with _LOCK:
+        for pool in _FTP_POOLS.values():
+            pool.close()
+        _FTP_POOLS.clear()
+        _HTTPS_OPENERS.clear()
+
+
+atexit.register(close_sessions)
+
+
+####--------------------------------------------------------------------------.
+########################
+#### File transfers ####
+########################
+
+
+def _get_file_size(filepath):
+    """Return the size of a file, or 0 if the file does not exist."""
+    try:
+        return os.path.getsize(filepath)
+    except OSError:
+        return 0
+
+
+def _get_http_expected_size(headers, offset):
+    """Return the full size of a file from the HTTP response headers. Return ``None`` if unknown."""
+    content_range = headers.get("Content-Range")  # i.e. bytes 100-199/200 or bytes */200
+    if content_range is not None and not content_range.endswith("/*"):
+        return int(content_range.rsplit("/", 1)[-1])
+    content_length = headers.get("Content-Length")
+    if content_length is not None:
+        return offset + int(content_length)
+    return None
+
+
+def _get_http_md5(headers):
+    """Return the MD5 checksum of the HTTP response body if provided by the server."""
+    content_md5 = headers.get("Content-MD5")
+    if content_md5 is not None:
+        return base64.b64decode(content_md5).hex()
+    for digest in headers.get("Digest", "").split(","):
+        algorithm, _, value = digest.strip().partition("=")
+        if algorithm.lower() == "md5" and value:
+            return base64.b64decode(value).hex()
+    return None
+
+
+def _transfer_pps_file(remote_filepath, local_filepath, username, password, chunk_size=CHUNK_SIZE):
+    """Stream a PPS file to its partial file through FTPS, resuming a previously interrupted transfer.
+
+    Returns the number of bytes transferred and the expected file size and checksum.
+    """
+    url = urllib.parse.urlsplit(remote_filepath)
+    partial_filepath = get_partial_filepath(local_filepath)
+    pool = get_ftp_session_pool(host=url.hostname, username=username, password=password)
+    ftp = pool.acquire()
+    n_bytes = 0
+    try:
+        ftp.voidcmd("TYPE I")
+        expected_size = ftp.size(url.path)
+        offset = _get_file_size(partial_filepath)
+        if offset > expected_size:
+            offset = 0
+        with open(partial_filepath, "ab" if offset > 0 else "wb") as f:
+
+            def write(chunk):
+                nonlocal n_bytes
+                f.write(chunk)
+                n_bytes += len(chunk)
+
+            if offset < expected_size:
+                ftp.retrbinary(f"RETR {url.path}", write, blocksize=chunk_size, rest=offset or None)
+    except Exception:
+        pool.discard(ftp)
+        raise
+    pool.release(ftp)
+    return n_bytes, expected_size, None
+
+
+def _transfer_ges_disc_file(remote_filepath, local_filepath, username, password, chunk_size=CHUNK_SIZE):
+    """Stream a GES DISC file to its partial file through HTTPS, resuming a previously interrupted transfer.
+
+    Returns the number of bytes transferred and the expected file size and checksum.
+    """
+    opener = get_earthdata_opener(username=username, password=password)
+    partial_filepath = get_partial_filepath(local_filepath)
+    offset = _get_file_size(partial_filepath)
+    request = urllib.request.Request(remote_filepath)
+    if offset > 0:
+        request.add_header("Range", f"bytes={offset}-")
+    try:
+        response = opener.open(request, timeout=TIMEOUT)
+    except urllib.error.HTTPError as e:
+        # The partial file is already complete
+        if e.code == 416:
+            return 0, _get_http_expected_size(e.headers, offset=0), None
+        raise
+    n_bytes = 0
+    with response:
+        # Restart from scratch if the server does not support byte ranges
+        if offset > 0 and response.status != 206:
+            offset = 0
+        expected_size = _get_http_expected_size(response.headers, offset=offset)
+        md5 = _get_http_md5(response.headers) if offset == 0 else None
+        with open(partial_filepath, "ab" if offset > 0 else "wb") as f:
+            while chunk := response.read(chunk_size):
+                f.write(chunk)
+                n_bytes += len(chunk)
+    return n_bytes, expected_size, md5
+
+
+def _get_transfer_function(storage):
+    """Return the function transferring a single file from the specified storage."""
+    dict_fun = {
+        "PPS": _transfer_pps_file,
+        "GES_DISC": _transfer_ges_disc_file,
+    }
+    return dict_fun[storage]
+
+
+def _verify_partial_file(partial_filepath, expected_size, md5):
+    """Check the size and checksum of a downloaded partial file.
+
+    The partial file is removed if it is invalid.
+    """
+    size = _get_file_size(partial_filepath)
+    if expected_size is not None and size != expected_size:
+        if size > expected_size:
+            os.remove(partial_filepath)
+        raise ValueError(f"The downloaded file size ({size} bytes) differs from the expected size ({expected_size}).")
+    if md5 is not None:
+        file_md5 = hashlib.md5()
+        with open(partial_filepath, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                file_md5.update(chunk)
+        if file_md5.hexdigest() != md5:
+            os.remove(partial_filepath)
+            raise ValueError("The downloaded file checksum differs from the server checksum.")
+
+
+def transfer_file(remote_filepath, local_filepath, storage, username, password, n_retries=N_RETRIES):
+    """Download a single file with the native transfer backend.
+
+    The file is written to ``<local_filepath>.part``, which is resumed if an interrupted
+    transfer left it on disk. Once its size (and checksum if provided by the server)
+    is verified, the file is atomically moved to ``local_filepath``.
+
+    Returns
+    -------
+    result : dict
+        Dictionary with the transfer ``status`` (1=Success, 0=Failed), the number of
+        bytes transferred (``n_bytes``), the transfer duration in seconds (``elapsed_time``)
+        and the last ``error`` message (``None`` if the transfer succeeded).
+
+    """
+    transfer_function = _get_transfer_function(storage)
+    os.makedirs(os.path.dirname(local_filepath), exist_ok=True)
+    partial_filepath = get_partial_filepath(local_filepath)
+    t_start = time.perf_counter()
+    n_bytes = 0
+    error = None
+    for attempt in range(n_retries + 1):
+        if attempt > 0:
+            time.sleep(RETRY_DELAY)
+        try:
+            n_transferred_bytes, expected_size, md5 = transfer_function(
+                remote_filepath,
+                local_filepath,
+                username=username,
+                password=password,
+            )
+            n_bytes += n_transferred_bytes
+            _verify_partial_file(partial_filepath, expected_size=expected_size, md5=md5)
+            os.replace(partial_filepath, local_filepath)
+        except Exception as e:
+            error = str(e)
+            continue
+        return {
+            "status": 1,
+            "n_bytes": n_bytes,
+            "elapsed_time": time.perf_counter() - t_start,
+            "error": None,
+        }
+    # The partial file is kept on disk to resume the transfer at the next attempt
+    return {
+        "status": 0,
+        "n_bytes": n_bytes,
+        "elapsed_time": time.perf_counter() - t_start,
+        "error": error,
+    }
+
+
+def get_transfer_summary(results):
+    """Return a summary string of the transfers results."""
+    n_bytes = sum(result["n_bytes"] for result in results)
+    elapsed_time = sum(result["elapsed_time"] for result in results)
+    n_success = sum(result["status"] for result in results)
+    throughput = n_bytes / elapsed_time / 1e6 if elapsed_time > 0 else 0
+    return (
+        f"{n_success}/{len(results)} files downloaded ({n_bytes / 1e6:.1f} MB, "
+        f"{throughput:.1f} MB/s per transfer on average)."
+    )
@@ -219,3 +219,21 @@ def test_passed_arguments_dataarray(
     returned = da_accessor_method(**args_kwargs_dict)
 
     assert returned == expected, f"Arguments not passed correctly in {get_function_location(accessor_method)}"
+
+
+def test_memoized_quality_checks(mocker: MockFixture) -> None:
+    """Test that the accessor quality checks are run only once for an xarray object."""
+    mock_is_regular = mocker.patch("gpm.utils.checks.is_regular", return_value=True)
+    ds = xr.Dataset(coords={"lon": ("x", [0, 1]), "lat": ("x", [0, 1])})
+    assert ds.gpm.is_regular
+    assert ds.gpm.is_regular
+    assert mock_is_regular.call_count == 1
+
+    # Test the check is run again if a coordinate is replaced
+    ds["lon"] = ("x", [0, 2])
+    assert ds.gpm.is_regular
+    assert mock_is_regular.call_count == 2
+
+    # Test the results are not shared between xarray objects
+    assert ds.copy().gpm.is_regular
+    assert mock_is_regular.call_count == 3
@@ -25,3 +25,40 @@
 
 # -----------------------------------------------------------------------------.
 """This module defines pytest fixtures used for the testing of GPM-API Dataset."""
+import pytest
+
+import gpm
+from gpm.dataset.structure_cache import clear_structure_cache
+from gpm.tests.utils.fake_granules import FILENAME, create_hdf5_granule
+
+
+@pytest.fixture
+def granule_filepath(tmp_path):
+    """Create a small HDF5 file with the structure of a 2A-DPR granule."""
+    pytest.importorskip("h5py")
+    return create_hdf5_granule(str(tmp_path / FILENAME))
+
+
+@pytest.fixture
+def archive_granule_kwargs():
+    """Return the ``create_hdf5_granule`` arguments of the local archive granule.
+
+    Override this fixture (or parametrize it) to customize the granule (i.e. chunks or compression).
+    """
+    return {}
+
+
+@pytest.fixture
+def archive_granule_filepath(tmp_path, archive_granule_kwargs):
+    """Create a small HDF5 file with the structure of a 2A-DPR granule in the local archive.
+
+    The ``base_dir`` GPM-API config is set to the local archive while the fixture is in use.
+    """
+    pytest.importorskip("h5py")
+    dir_path = tmp_path / "GPM" / "RS" / "V07" / "RADAR" / "2A-DPR" / "2020" / "07" / "05"
+    dir_path.mkdir(parents=True)
+    filepath = create_hdf5_granule(str(dir_path / FILENAME), **archive_granule_kwargs)
+    clear_structure_cache()
+    with gpm.config.set({"base_dir": str(tmp_path)}):
+        yield filepath
+    clear_structure_cache()
@@ -0,0 +1,131 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module test the decoding utilities."""
+import pickle
+
+import dask.array
+import numpy as np
+import pytest
+import xarray as xr
+
+from gpm.dataset.decoding.decode_2a_radar import (
+    decode_flagShallowRain,
+    decode_landSurfaceType,
+    decode_phase,
+    decode_phaseNearSurface,
+)
+from gpm.dataset.decoding.utils import (
+    apply_lookup_table,
+    compile_lookup_table,
+    get_decoded_dtype,
+    remap_numeric_array,
+)
+
+
+def _decode_double(values):
+    return np.where(values >= 0, values * 2, np.nan)
+
+
+def test_get_decoded_dtype():
+    """Test the dtype of the decoded values."""
+    assert get_decoded_dtype("uint8") == np.float32
+    assert get_decoded_dtype("int16") == np.float32
+    assert get_decoded_dtype("int32") == np.float64
+    assert get_decoded_dtype("float32") == np.float32
+
+
+def test_compile_lookup_table():
+    """Test the lookup table covers the small integer dtypes or the valid range."""
+    lut, vmin = compile_lookup_table(_decode_double, np.dtype("int8"), (0, 3))
+    assert vmin == -128
+    assert lut.size == 256
+    assert lut.dtype == np.float32
+    assert np.isnan(lut[0])
+    assert lut[128 + 3] == 6
+
+    lut, vmin = compile_lookup_table(_decode_double, np.dtype("int32"), (0, 3))
+    assert vmin == 0
+    np.testing.assert_equal(lut, [0, 2, 4, 6])
+
+
+@pytest.mark.parametrize("use_dask", [False, True])
+def test_apply_lookup_table(use_dask):
+    """Test the lookup table decoding of numeric arrays."""
+    lut, vmin = compile_lookup_table(_decode_double, np.dtype("int32"), (0, 3))
+    arr = np.array([[-9999, 0, 1], [2, 3, 4]], dtype="int32")
+    expected = np.array([[np.nan, 0, 2], [4, 6, np.nan]])
+    if use_dask:
+        arr = dask.array.from_array(arr, chunks=1)
+    decoded = apply_lookup_table(arr, lut, vmin)
+    assert hasattr(decoded, "chunks") == use_dask
+    np.testing.assert_equal(np.asarray(decoded), expected)
+
+    # Test float arrays with NaN (i.e. CF-decoded integers)
+    decoded = apply_lookup_table(np.array([np.nan, 3.0, -1.0]), lut, vmin)
+    np.testing.assert_equal(decoded, [np.nan, 6, np.nan])
+
+    # Test the values outside the lookup table are decoded with the elementwise function
+    decoded = apply_lookup_table(arr, lut, vmin, decode_values=_decode_double)
+    np.testing.assert_equal(np.asarray(decoded), [[np.nan, 0, 2], [4, 6, 8]])
+
+
+def test_apply_lookup_table_shared_graph_key():
+    """Test the lookup table is added once to the dask graph."""
+    lut, vmin = compile_lookup_table(_decode_double, np.dtype("int16"), (0, 3))
+    arr = apply_lookup_table(dask.array.zeros((8, 8), dtype="int16", chunks=2), lut, vmin)
+    graph = dict(arr.__dask_graph__())
+    lut_key = dask.delayed(lut, pure=True).key
+    assert lut_key in graph
+    assert all(len(pickle.dumps(task)) < lut.nbytes for key, task in graph.items() if key != lut_key)
+
+
+@pytest.mark.parametrize("dtype", ["int16", "int32", "float32"])
+def test_lookup_table_decoders(dtype):
+    """Test the lookup table decoders reproduce the xarray operations decoding."""
+    # Include codes outside the lookup tables valid ranges (i.e. -100, >= 400)
+    values = np.array([-9999, -100, -1, 0, 1, 10, 11, 20, 21, 99, 100, 101, 250, 299, 400, 401, 1250], dtype=dtype)
+    da = xr.DataArray(dask.array.from_array(values, chunks=4), dims="x", attrs={"gpm_api_product": "2A-DPR"})
+
+    # landSurfaceType
+    expected = np.ceil(da.where(da >= 0) / 100)
+    decoded = decode_landSurfaceType(da.copy())
+    assert decoded.chunks == da.chunks
+    assert decoded.dtype == expected.dtype
+    xr.testing.assert_equal(decoded.compute().drop_attrs(), expected.compute().drop_attrs())
+
+    # phase and phaseNearSurface (the codes from -99 to -1 are decoded to 0)
+    expected = np.ceil(da / 100)
+    expected = expected.where(expected >= 0)
+    for decode_function in [decode_phase, decode_phaseNearSurface]:
+        decoded = decode_function(da.copy())
+        xr.testing.assert_equal(decoded.compute().drop_attrs(), expected.compute().drop_attrs())
+
+    # flagShallowRain
+    expected = remap_numeric_array(da.where(da >= 0).to_numpy(), {0: 0, 10: 1, 11: 2, 20: 3, 21: 4})
+    decoded = decode_flagShallowRain(da.copy())
+    np.testing.assert_equal(decoded.to_numpy(), expected)
+    assert decoded.attrs["flag_values"] == [0, 1, 2, 3, 4]
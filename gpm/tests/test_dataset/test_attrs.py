@@ -143,6 +143,31 @@ def test_get_granule_attrs(monkeypatch):
     assert returned_dict == expected_dict
 
 
+def test_get_granule_attrs_with_static_attrs(monkeypatch):
+    """Test get_granule_attrs parses only the granule specific attributes."""
+    monkeypatch.setattr("gpm.dataset.attrs.STATIC_GLOBAL_ATTRS", ("key_1",))
+    monkeypatch.setattr("gpm.dataset.attrs.GRANULE_ONLY_GLOBAL_ATTRS", ("key_2",))
+    monkeypatch.setattr("gpm.dataset.attrs.DYNAMIC_GLOBAL_ATTRS", ("key_3",))
+
+    dt = DataTree()
+    dt.attrs = {
+        "base_key_1": "\tkey_1=value_1;\n\tkey_2=value_2;\n",
+        "base_key_2": "\tkey_3=3;\n\tinvalid_key=value_4;\n",
+    }
+    static_attrs = attrs.get_static_granule_attrs(dt.attrs)
+    assert static_attrs == {"key_1": "value_1"}
+
+    returned_dict = attrs.get_granule_attrs(dt, static_attrs={"key_1": "cached_value"})
+    assert returned_dict == {"key_2": "value_2", "key_3": 3, "key_1": "cached_value"}
+
+
+def test_search_attrs_values():
+    """Test _search_attrs_values."""
+    attrs_dict = {"FileHeader": "DOI=10.5067;\nEmptyGranule=NOT_EMPTY;\nNotEmptyGranule=EMPTY;\n"}
+    assert attrs._search_attrs_values(attrs_dict, keys=("EmptyGranule",)) == {"EmptyGranule": "NOT_EMPTY"}
+    assert attrs._search_attrs_values(attrs_dict, keys=("Dummy",)) == {}
+
+
 def test_add_history():
     """Test add_history."""
     ds = xr.Dataset()
@@ -0,0 +1,124 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module test the automatic chunking policy of the GPM datasets."""
+import dask.array
+import numpy as np
+import pytest
+import xarray as xr
+
+import gpm
+from gpm.dataset.chunks import chunk_dataset, get_auto_chunks, get_chunks_target_size
+from gpm.tests.utils.fake_granules import FILENAME, create_hdf5_granule
+
+
+def test_get_chunks_target_size():
+    """Test the chunks target size is read from the GPM-API config."""
+    with gpm.config.set({"chunks_target_size": "2KB"}):
+        assert get_chunks_target_size() == 2048
+    with gpm.config.set({"chunks_target_size": 0}), pytest.raises(ValueError):
+        get_chunks_target_size()
+
+
+@pytest.mark.parametrize(
+    ("file_chunks", "target_size", "expected_chunks"),
+    [
+        # The other dimensions are read entirely and the along-track chunks fill the budget
+        ((2, 5, 10), 4 * 20 * 10 * 4, (4, 20, 10)),
+        # The largest dimensions are halved if a chunk does not fit the budget
+        ((2, 5, 10), 2 * 10 * 10 * 4, (2, 10, 10)),
+        # The chunks are at least the file chunks
+        ((2, 5, 10), 100, (2, 5, 10)),
+        # The along-track chunks do not exceed the dimension size
+        ((2, 5, 10), 10**6, (100, 20, 10)),
+    ],
+)
+def test_get_auto_chunks(file_chunks, target_size, expected_chunks):
+    """Test the chunk sizes are multiples of the file chunks within the budget."""
+    chunks = get_auto_chunks(
+        dims=("along_track", "cross_track", "range"),
+        shape=(100, 20, 10),
+        itemsize=4,
+        file_chunks=file_chunks,
+        target_size=target_size,
+    )
+    assert chunks == dict(zip(["along_track", "cross_track", "range"], expected_chunks))
+
+
+def test_get_auto_chunks_without_concat_dim():
+    """Test the chunks of a variable without the concatenation dimension."""
+    chunks = get_auto_chunks(dims=("lat", "lon"), shape=(40, 80), itemsize=8, file_chunks=(5, 5), target_size=8000)
+    assert chunks == {"lat": 20, "lon": 40}
+
+
+def test_chunk_dataset():
+    """Test the dataset variables are rechunked consistently whatever the along-track size."""
+    rng = np.random.default_rng(123)
+
+    def _create_dataset(n_along_track):
+        data = dask.array.from_array(rng.random((n_along_track, 4), dtype="float32"), chunks=(2, 4))
+        ds = xr.Dataset(
+            data_vars={
+                "var": (("along_track", "cross_track"), data),
+                "var_3d": (("along_track", "cross_track", "range"), dask.array.ones((n_along_track, 4, 2), chunks=2)),
+                "not_chunked": ("along_track", dask.array.ones(n_along_track, chunks=-1)),
+                "flag": ("along_track", np.array(["a"] * n_along_track, dtype=object)),
+            },
+            coords={"cross_track": np.arange(4)},
+        )
+        ds["var"].encoding["preferred_chunks"] = {"phony_dim_0": 2, "phony_dim_1": 4}
+        ds["var_3d"].encoding["chunksizes"] = (2, 2, 2)
+        return ds
+
+    # var_3d scan size: 4 x 2 x 8 bytes = 64 bytes
+    ds1 = chunk_dataset(_create_dataset(10), target_size=4 * 64)
+    ds2 = chunk_dataset(_create_dataset(20), target_size=4 * 64)
+    assert ds1.chunks == {"along_track": (4, 4, 2), "cross_track": (4,), "range": (2,)}
+    assert ds2.chunksizes["along_track"] == (4, 4, 4, 4, 4)
+    # Variables not chunked on disk are rechunked consistently
+    assert ds1["not_chunked"].chunks == ((4, 4, 2),)
+    # Object variables and indexes are not rechunked
+    assert not isinstance(ds1["flag"].data, dask.array.Array)
+    assert ds1["cross_track"].chunks is None
+
+
+def test_open_granule_auto_chunks(tmp_path):
+    """Test opening a granule with chunks='auto'."""
+    pytest.importorskip("h5py")
+    filepath = create_hdf5_granule(str(tmp_path / FILENAME), chunks=2)
+    # zFactorFinal scan size: 4 x 3 x 2 x 4 bytes = 96 bytes
+    with gpm.config.set({"chunks_target_size": 4 * 96}):
+        ds = gpm.open_granule(filepath, chunks="auto", validate="off")
+    assert ds.chunksizes["along_track"] == (4, 4, 2)
+    assert ds["zFactorFinal"].chunksizes["range"] == (3,)
+    ds_file_chunks = gpm.open_granule(filepath, chunks={}, validate="off")
+    xr.testing.assert_identical(ds.compute(), ds_file_chunks.compute())
+    # Each chunk is read by a single task (without rechunking the file chunks)
+    data = ds["zFactorFinal"].data
+    graph = data.__dask_graph__()
+    assert not any("rechunk" in name for name in graph.layers)
+    # - Source array, chunks read and (y, x) transposition tasks
+    assert len(graph) == 1 + 2 * data.npartitions
@@ -0,0 +1,198 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module test the GPM-API Dataset multi-granules reader."""
+import warnings
+
+import dask.array
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+import gpm
+from gpm.dataset import dataset
+from gpm.utils.checks import has_missing_granules
+
+RNG = np.random.default_rng(seed=0)
+
+
+def _get_granule_dataset(n_along_track, start_time, n_cross_track=3, chunks=None):
+    ds = xr.Dataset(
+        data_vars={
+            "var": (("cross_track", "along_track"), RNG.random((n_cross_track, n_along_track)), {"units": "mm"}),
+            "height": (("cross_track", "along_track", "range"), RNG.random((n_cross_track, n_along_track, 2))),
+        },
+        coords={
+            "lon": (("cross_track", "along_track"), RNG.random((n_cross_track, n_along_track))),
+            "time": ("along_track", pd.date_range(start_time, periods=n_along_track, freq="s")),
+            "gpm_cross_track_id": ("cross_track", np.arange(n_cross_track)),
+        },
+        attrs={"start_time": start_time},
+    )
+    ds["var"].encoding = {"dtype": "float32"}
+    if chunks is not None:
+        ds = ds.chunk(chunks)
+    return ds
+
+
+@pytest.mark.parametrize("chunks", [None, -1])
+def test_concat_datasets(chunks):
+    """Test the concatenation of datasets with identical variables is equal to xarray.concat."""
+    l_datasets = [
+        _get_granule_dataset(4, "2020-07-05 17:00:00", chunks=chunks),
+        _get_granule_dataset(5, "2020-07-05 18:00:00", chunks=chunks),
+        _get_granule_dataset(3, "2020-07-05 19:00:00", chunks=chunks),
+    ]
+    assert dataset._is_stackable(l_datasets, concat_dim="along_track")
+    ds = dataset._concat_datasets(l_datasets)
+    ds_expected = xr.concat(
+        l_datasets,
+        dim="along_track",
+        coords="minimal",
+        compat="override",
+        combine_attrs="override",
+    )
+    xr.testing.assert_identical(ds, ds_expected)
+    assert ds.attrs == {"start_time": "2020-07-05 17:00:00"}
+    assert ds["var"].encoding == {"dtype": "float32"}
+    if chunks is not None:
+        assert isinstance(ds["var"].data, dask.array.Array)
+        assert ds["var"].chunks == ((3,), (4, 5, 3))
+
+
+def test_concat_grid_datasets():
+    """Test the concatenation of grid datasets along the time dimension."""
+    l_datasets = [
+        xr.Dataset(
+            {"var": (("time", "lat", "lon"), RNG.random((1, 2, 3)))},
+            coords={"time": [np.datetime64(f"2020-07-05T0{i}:00:00", "ns")], "lat": [0, 1], "lon": [0, 1, 2]},
+        )
+        for i in range(3)
+    ]
+    ds = dataset._concat_datasets(l_datasets)
+    xr.testing.assert_identical(ds, xr.concat(l_datasets, dim="time", coords="minimal", compat="override"))
+    assert ds.indexes["time"].size == 3
+
+
+def test_concat_datasets_fallback():
+    """Test xarray.concat is used when the datasets do not have the same structure."""
+    l_datasets = [
+        _get_granule_dataset(4, "2020-07-05 17:00:00"),
+        _get_granule_dataset(5, "2020-07-05 18:00:00", n_cross_track=2),
+    ]
+    assert not dataset._is_stackable(l_datasets, concat_dim="along_track")
+
+    # Test data variables without the concatenation dimension are expanded by xarray.concat
+    l_datasets = [_get_granule_dataset(4, "2020-07-05 17:00:00"), _get_granule_dataset(5, "2020-07-05 18:00:00")]
+    l_datasets = [ds.assign({"flag": ("cross_track", np.zeros(3))}) for ds in l_datasets]
+    assert not dataset._is_stackable(l_datasets, concat_dim="along_track")
+    ds = dataset._concat_datasets(l_datasets)
+    assert ds["flag"].dims == ("along_track", "cross_track")
+
+
+def test_subset_granule_by_time():
+    """Test the selection of the granule scans within a time period."""
+    ds = _get_granule_dataset(10, "2020-07-05 17:00:00", chunks=-1)
+    ds_subset = dataset._subset_granule_by_time(ds, start_time="2020-07-05 17:00:02", end_time="2020-07-05 17:00:04")
+    xr.testing.assert_identical(ds_subset, ds.isel(along_track=slice(2, 5)))
+    assert dataset._subset_granule_by_time(ds, start_time="2020-07-05 17:00:10") is None
+    assert dataset._subset_granule_by_time(ds) is ds
+
+    # Test unsorted scan times are not subsetted
+    ds_unsorted = ds.isel(along_track=[1, 0, *range(2, 10)])
+    assert dataset._subset_granule_by_time(ds_unsorted, start_time="2020-07-05 17:00:02") is ds_unsorted
+
+
+@pytest.mark.parametrize("archive_granule_kwargs", [{}, {"chunks": 4, "compression": "gzip"}])
+def test_open_dataset_time_window(archive_granule_filepath):
+    """Test only the granule scans within the time period are returned."""
+    ds = gpm.open_dataset(
+        "2A-DPR",
+        start_time="2020-07-05 17:00:05",
+        end_time="2020-07-05 17:01:00",
+        variables=["precipRateNearSurface"],
+        validate="off",
+    )
+    assert ds.sizes["along_track"] == 5
+    assert ds["time"].to_numpy()[0] == np.datetime64("2020-07-05T17:00:05")
+
+
+@pytest.mark.parametrize(("validate", "warns"), [("eager", True), ("lazy", True), ("off", False)])
+def test_open_dataset_missing_granules_warning(archive_granule_filepath, monkeypatch, validate, warns):
+    """Test the missing granules warning is skipped only with validate='off'."""
+    # Simulate a gap in the granules after the fifth scan
+    def _has_missing_granules(ds):
+        granule_id = ds["gpm_granule_id"].to_numpy()
+        granule_id = np.where(np.arange(granule_id.size) < 5, granule_id, granule_id + 2)
+        return has_missing_granules(ds.assign_coords(gpm_granule_id=("along_track", granule_id)))
+
+    monkeypatch.setattr(dataset, "has_missing_granules", _has_missing_granules)
+    with warnings.catch_warnings(record=True) as records:
+        warnings.simplefilter("always")
+        gpm.open_dataset(
+            "2A-DPR",
+            start_time="2020-07-05 17:00:00",
+            end_time="2020-07-05 17:00:10",
+            variables=["precipRateNearSurface"],
+            validate=validate,
+        )
+    messages = [str(record.message) for record in records]
+    assert ("The GPM Dataset has missing granules !" in messages) == warns
+
+
+def test_open_dataset_parallel_without_chunks(archive_granule_filepath):
+    """Test opening the granules in parallel without chunks raises an error."""
+    with pytest.raises(ValueError, match="'chunks' can not be None"):
+        gpm.open_dataset(
+            "2A-DPR",
+            start_time="2020-07-05 17:00:00",
+            end_time="2020-07-05 17:01:00",
+            variables=["precipRateNearSurface"],
+            parallel=True,
+            chunks=None,
+        )
+
+
+def test_open_dataset_with_processes(archive_granule_filepath):
+    """Test opening the granules with a pool of processes."""
+    kwargs = {
+        "product": "2A-DPR",
+        "start_time": "2020-07-05 17:00:00",
+        "end_time": "2020-07-05 17:01:00",
+        "variables": ["precipRateNearSurface", "zFactorFinal"],
+        "validate": "off",
+    }
+    ds = gpm.open_dataset(parallel="processes", **kwargs)
+    assert not ds["zFactorFinal"].chunks
+    ds_expected = gpm.open_dataset(parallel=False, **kwargs).compute()
+    # Remove history attribute (it contains the opening time)
+    ds.attrs.pop("history")
+    ds_expected.attrs.pop("history")
+    xr.testing.assert_identical(ds, ds_expected)
+
+    with pytest.raises(ValueError, match="Invalid parallel"):
+        gpm.open_dataset(parallel="threads", **kwargs)
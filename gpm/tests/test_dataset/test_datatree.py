@@ -25,3 +25,227 @@
 
 # -----------------------------------------------------------------------------.
 """This module test the GPM-API DataTree."""
+
+import os
+
+import numpy as np
+import pytest
+import xarray as xr
+from pytest_mock.plugin import MockerFixture
+
+import gpm
+from gpm.dataset import datatree, granule
+from gpm.dataset.structure_cache import (
+    clear_structure_cache,
+    get_cached_structure,
+    get_structure_key,
+    set_cached_structure,
+)
+from gpm.tests.utils.fake_granules import FILENAME
+
+
+@pytest.fixture(autouse=True)
+def _clear_structure_cache():
+    """Ensure each test starts with an empty granule structure cache."""
+    clear_structure_cache()
+    yield
+    clear_structure_cache()
+
+
+def test_get_hdf5_structure(granule_filepath):
+    """Test the retrieval of the HDF5 groups and variables."""
+    structure = datatree.get_hdf5_structure(granule_filepath)
+    assert structure["/"] == []
+    assert structure["/FS"] == ["Latitude", "Longitude"]
+    assert structure["/FS/SLV"] == ["precipRateNearSurface", "zFactorFinal"]
+    assert set(structure) == {"/", "/FS", "/FS/ScanTime", "/FS/SLV", "/FS/scanStatus", "/FS/PRE"}
+
+
+def test_get_required_groups_variables(granule_filepath):
+    """Test only the requested variables and the coordinates variables are read."""
+    structure = datatree.get_hdf5_structure(granule_filepath)
+    required = datatree._get_required_groups_variables(structure, scan_mode="FS", variables=["precipRateNearSurface"])
+    assert required == {
+        "/": [],
+        "/FS": ["Latitude", "Longitude"],
+        "/FS/ScanTime": datatree.SCAN_TIME_VARIABLES,
+        "/FS/SLV": ["precipRateNearSurface"],
+        "/FS/scanStatus": ["dataQuality"],
+        "/FS/PRE": ["height"],
+    }
+    # Test all variables of the requested groups are read
+    required = datatree._get_required_groups_variables(structure, scan_mode="FS", groups=["PRE"])
+    assert required["/FS/PRE"] is None
+    assert "/FS/SLV" not in required
+
+
+@pytest.mark.parametrize(
+    ("variables", "groups"),
+    [
+        (None, None),
+        (["precipRateNearSurface"], None),
+        (None, ["PRE"]),
+        (["zFactorFinal"], ["scanStatus"]),
+    ],
+)
+def test_open_partial_datatree(granule_filepath, variables, groups):
+    """Test the partial datatree provides the same scan mode dataset of the entire datatree."""
+    dt = datatree.open_datatree(granule_filepath)
+    ds_expected = granule._get_scan_mode_dataset(dt, scan_mode="FS", variables=variables, groups=groups)
+    ds_expected = granule.remove_unused_var_dims(ds_expected)
+
+    ds = granule._open_granule(
+        granule_filepath,
+        scan_mode="FS",
+        groups=groups,
+        variables=variables,
+        decode_cf=False,
+        chunks={},
+        prefix_group=False,
+    )
+    xr.testing.assert_identical(ds, ds_expected)
+    ds.close()
+
+
+def test_open_partial_datatree_invalid_arguments(granule_filepath):
+    """Test open_partial_datatree raises errors for invalid arguments."""
+    with pytest.raises(ValueError, match="scan mode"):
+        datatree.open_partial_datatree(granule_filepath, scan_mode="HS")
+    with pytest.raises(ValueError, match="not available"):
+        datatree.open_partial_datatree(granule_filepath, scan_mode="FS", variables=["dummy"])
+    with gpm.config.set({"granule_reader_engine": "dummy"}), pytest.raises(ValueError):
+        datatree.open_partial_datatree(granule_filepath, scan_mode="FS")
+
+
+def test_open_partial_datatree_h5netcdf(granule_filepath):
+    """Test the partial datatree can be read with the h5netcdf engine."""
+    pytest.importorskip("h5netcdf")
+    with gpm.config.set({"granule_reader_engine": "h5netcdf"}):
+        structure = datatree.get_hdf5_structure(granule_filepath, engine="h5netcdf")
+        assert structure["/FS/SLV"] == ["precipRateNearSurface", "zFactorFinal"]
+        dt = datatree.open_partial_datatree(granule_filepath, scan_mode="FS", variables=["precipRateNearSurface"])
+        assert list(dt["FS/SLV"].data_vars) == ["precipRateNearSurface"]
+        assert dt["FS/SLV"]["precipRateNearSurface"].dims == ("along_track", "cross_track")
+
+
+def test_get_hdf5_metadata(granule_filepath):
+    """Test the retrieval of the variables dimension names and root attributes."""
+    metadata = datatree.get_hdf5_metadata(granule_filepath)
+    assert metadata["dimensions"]["/FS/SLV"]["zFactorFinal"] == ["nscan", "nrayFS", "nbinFS", "nfreq"]
+    assert "EmptyGranule=NOT_EMPTY" in metadata["attrs"]["FileHeader"]
+
+
+def test_get_granule_structure(granule_filepath, tmp_path):
+    """Test the granule structure is read only once per product, product type, version and scan mode."""
+    with gpm.config.set({"structure_cache_dir": str(tmp_path / "cache")}):
+        granule_structure = datatree.get_granule_structure(granule_filepath, scan_mode="FS")
+        assert granule_structure["static_attrs"] == {"DOI": "10.5067/GPM/DPR/GPM/2A/07"}
+        assert granule_structure["variables"] == datatree.get_hdf5_structure(granule_filepath)
+        assert os.path.exists(tmp_path / "cache" / "2A-DPR_RS_V07A_FS.json")
+
+        # Test the structure is not read again from the granule
+        assert datatree.get_granule_structure("/dummy/" + FILENAME, scan_mode="FS") is granule_structure
+
+        # Test the structure is read from disk in a new session
+        clear_structure_cache()
+        granule_structure_from_disk = datatree.get_granule_structure("/dummy/" + FILENAME, scan_mode="FS")
+        assert granule_structure_from_disk == granule_structure
+
+    # Test the structure of another scan mode is read from the granule
+    with pytest.raises(ValueError, match="scan mode"):
+        datatree.get_granule_structure(granule_filepath, scan_mode="HS")
+
+
+def test_get_structure_key(tmp_path):
+    """Test the structure key distinguishes the product types of the local archive."""
+    assert get_structure_key("/dummy/" + FILENAME, scan_mode="FS") == "2A-DPR_RS_V07A_FS"
+    assert get_structure_key("/dummy/invalid.HDF5", scan_mode="FS") is None
+    with gpm.config.set({"base_dir": str(tmp_path)}):
+        rs_filepath = os.path.join(str(tmp_path), "GPM", "RS", "V07", "RADAR", "2A-DPR", FILENAME)
+        nrt_filepath = os.path.join(str(tmp_path), "GPM", "NRT", "RADAR", "2A-DPR", FILENAME)
+        assert get_structure_key(rs_filepath, scan_mode="FS") == "2A-DPR_RS_V07A_FS"
+        assert get_structure_key(nrt_filepath, scan_mode="FS") == "2A-DPR_NRT_V07A_FS"
+
+
+def test_set_cached_structure_not_serializable(tmp_path):
+    """Test the structures that can not be serialized are only kept in memory."""
+    cache_dir = tmp_path / "cache"
+    with gpm.config.set({"structure_cache_dir": str(cache_dir)}):
+        # Test numpy and bytes values are converted
+        structure = {"attrs": {"scalar": np.float32(1.5), "array": np.arange(2), "bytes": b"DPR"}}
+        assert set_cached_structure("numpy", structure) is structure
+        clear_structure_cache()
+        assert get_cached_structure("numpy") == {"attrs": {"scalar": 1.5, "array": [0, 1], "bytes": "DPR"}}
+
+        # Test non serializable structures are not saved to disk
+        structure = {"attrs": {"dummy": object()}}
+        assert set_cached_structure("dummy", structure) is structure
+        assert get_cached_structure("dummy") is structure
+        assert sorted(os.listdir(cache_dir)) == ["numpy.json"]
+
+
+def test_get_structure_groups_variables(granule_filepath):
+    """Test the relevant groups and variables are memoized."""
+    granule_structure = datatree.get_granule_structure(granule_filepath, scan_mode="FS")
+    groups, variables, required = datatree.get_structure_groups_variables(
+        granule_structure,
+        scan_mode="FS",
+        variables=["precipRateNearSurface"],
+    )
+    structure = granule_structure["variables"]
+    assert required == datatree._get_required_groups_variables(
+        structure,
+        scan_mode="FS",
+        variables=["precipRateNearSurface"],
+    )
+    assert sorted(groups) == ["PRE", "SLV", "scanStatus"]
+    assert variables == ["dataQuality", "height", "precipRateNearSurface"]
+    assert len(granule_structure["_groups_variables"]) == 1
+
+    # Test the memoized values can not be modified by the caller
+    variables.append("dummy")
+    _, variables, _ = datatree.get_structure_groups_variables(
+        granule_structure,
+        scan_mode="FS",
+        variables=["precipRateNearSurface"],
+    )
+    assert "dummy" not in variables
+
+
+def test_open_partial_datatree_with_cached_structure(granule_filepath):
+    """Test the granules opened with a cached structure are identical."""
+    kwargs = {"scan_mode": "FS", "groups": None, "variables": None, "decode_cf": False, "chunks": {}}
+    ds_expected = granule._open_granule(granule_filepath, prefix_group=False, **kwargs)
+    ds = granule._open_granule(granule_filepath, prefix_group=False, **kwargs)
+    xr.testing.assert_identical(ds, ds_expected)
+    assert ds.attrs == ds_expected.attrs
+    ds.close()
+    ds_expected.close()
+
+
+def test_open_partial_datatree_empty_granule(granule_filepath):
+    """Test empty granules are detected with a cached structure."""
+    h5py = pytest.importorskip("h5py")
+    _ = datatree.get_granule_structure(granule_filepath, scan_mode="FS")
+    with h5py.File(granule_filepath, "a") as f:
+        f.attrs["FileHeader"] = np.bytes_("DOI=10.5067/GPM/DPR/GPM/2A/07;\nEmptyGranule=EMPTY;\n")
+    with pytest.raises(ValueError, match="EMPTY granule"):
+        datatree.open_partial_datatree(granule_filepath, scan_mode="FS")
+
+
+def test_open_partial_datatree_closes_opened_groups(granule_filepath, mocker: MockerFixture):
+    """Test the groups already opened are closed if the granule can not be opened."""
+    open_dataset = xr.open_dataset
+    opened_datasets = []
+
+    def _open_dataset(*args, **kwargs):
+        ds = open_dataset(*args, **kwargs)
+        opened_datasets.append(ds)
+        return ds
+
+    mocker.patch.object(datatree.xr, "open_dataset", side_effect=_open_dataset)
+    mocker.patch.object(datatree, "_rename_dataset_dimensions", side_effect=RuntimeError("Failure"))
+    with pytest.raises(ValueError, match="Failure"):
+        datatree.open_partial_datatree(granule_filepath, scan_mode="FS")
+    assert len(opened_datasets) > 1
+    assert all(ds._close is None for ds in opened_datasets)
@@ -0,0 +1,162 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module test the spatial footprint of the GPM granules."""
+import os
+import sqlite3
+
+import numpy as np
+import pytest
+
+import gpm
+from gpm.dataset import footprints, granule
+
+# The latitude of the fake granule scans increase from -10 (first scan) to 10 (last scan)
+# The longitude of the fake granule pixels is the latitude + 10
+# - With EXTENT_LAST_SCANS, the last 3 scans have pixels within the extent
+EXTENT_LAST_SCANS = [0, 30, 5, 15]
+LAT = np.linspace(-10, 10, 40, dtype="float32").reshape(10, 4)
+
+
+@pytest.fixture(autouse=True)
+def _small_footprint_blocks(monkeypatch):
+    """Compute the footprints of the test granule with several blocks."""
+    monkeypatch.setattr(footprints, "FOOTPRINT_BLOCK_SIZE", 4)
+
+
+def test_compute_granule_footprint(archive_granule_filepath):
+    """Test the computation of the footprint of a granule."""
+    footprint = footprints.compute_granule_footprint(archive_granule_filepath, scan_mode="FS")
+    assert footprint["block_size"] == 4
+    assert footprint["n_scans"] == 10
+    expected_lat_bounds = [[LAT[i : i + 4].min(), LAT[i : i + 4].max()] for i in [0, 4, 8]]
+    np.testing.assert_allclose(footprint["bounds"][:, 2:], expected_lat_bounds)
+    np.testing.assert_allclose(footprint["bounds"][:, :2], np.array(expected_lat_bounds) + 10)
+    expected_time_bounds = np.array([["2020-07-05T17:00:00", "2020-07-05T17:00:03"]], dtype="M8[s]")
+    np.testing.assert_equal(footprint["time_bounds"][:1], expected_time_bounds)
+
+
+def test_cached_footprints(archive_granule_filepath):
+    """Test the footprints are cached in the local granules catalog."""
+    filepaths = [archive_granule_filepath]
+    assert footprints.read_cached_footprints(filepaths, scan_mode="FS") == {}
+    with gpm.config.set({"local_catalog": True}):
+        expected_footprint = footprints.get_granules_footprints(filepaths, scan_mode="FS")[archive_granule_filepath]
+    cached_footprint = footprints.read_cached_footprints(filepaths, scan_mode="FS")[archive_granule_filepath]
+    np.testing.assert_allclose(cached_footprint["bounds"], expected_footprint["bounds"])
+    np.testing.assert_equal(cached_footprint["time_bounds"], expected_footprint["time_bounds"])
+    assert cached_footprint["n_scans"] == expected_footprint["n_scans"]
+    assert footprints.read_cached_footprints(filepaths, scan_mode="HS") == {}
+
+    # Test the footprint is not used if the granule changed
+    mtime = os.path.getmtime(archive_granule_filepath) + 10
+    os.utime(archive_granule_filepath, (mtime, mtime))
+    assert footprints.read_cached_footprints(filepaths, scan_mode="FS") == {}
+
+    # Test the footprint of unreadable granules is None (and is not cached)
+    corrupted_filepath = archive_granule_filepath.replace(".HDF5", ".corrupted.HDF5")
+    with open(corrupted_filepath, "w") as f:
+        f.write("corrupted")
+    footprint = footprints.get_granules_footprints([corrupted_filepath], scan_mode="FS", use_cache=True)
+    assert footprint == {corrupted_filepath: None}
+    assert footprints.read_cached_footprints([corrupted_filepath], scan_mode="FS") == {}
+
+
+def test_footprints_without_cache(archive_granule_filepath, mocker):
+    """Test the footprints are computed in memory without the local catalog or if it can not be opened."""
+    filepaths = [archive_granule_filepath]
+    with gpm.config.set({"local_catalog": False}):
+        assert footprints.get_granules_footprints(filepaths, scan_mode="FS")[archive_granule_filepath] is not None
+    assert footprints.read_cached_footprints(filepaths, scan_mode="FS") == {}
+
+    # Test a catalog which can not be opened (i.e. read-only base_dir)
+    mocker.patch.object(footprints, "_open_catalog", side_effect=sqlite3.OperationalError("readonly database"))
+    footprint = footprints.get_granules_footprints(filepaths, scan_mode="FS", use_cache=True)
+    assert footprint[archive_granule_filepath]["n_scans"] == 10
+
+
+def test_get_granules_isel_dicts(archive_granule_filepath):
+    """Test the selection of the granules hyperslab intersecting an extent."""
+    filepaths = [archive_granule_filepath]
+    isel_dicts = footprints.get_granules_isel_dicts(filepaths, scan_mode="FS", extent=EXTENT_LAST_SCANS)
+    assert isel_dicts == {archive_granule_filepath: {"along_track": slice(4, 10)}}
+    isel_dicts = footprints.get_granules_isel_dicts(filepaths, scan_mode="FS", extent=[-180, 180, 50, 60])
+    assert isel_dicts == {}
+    isel_dicts = footprints.get_granules_isel_dicts(filepaths, scan_mode="Grid", extent=[-180, 180, 50, 60])
+    assert isel_dicts == {archive_granule_filepath: {}}
+
+
+def test_get_footprint_along_track_slice():
+    """Test the along-track slice of the footprint blocks intersecting an extent."""
+    bounds = np.array([[0, 10, 0, 10], [5, 15, 10, 20], [np.nan, np.nan, np.nan, np.nan], [10, 20, 20, 30]])
+    footprint = {"bounds": bounds, "block_size": 5, "n_scans": 18}
+    assert footprints.get_footprint_along_track_slice(footprint, extent=[0, 1, 0, 1]) == slice(0, 5)
+    assert footprints.get_footprint_along_track_slice(footprint, extent=[12, 13, 12, 25]) == slice(5, 18)
+    assert footprints.get_footprint_along_track_slice(footprint, extent=[40, 50, 0, 30]) is None
+
+
+def test_get_blocks_lon_bounds():
+    """Test the longitude bounds of blocks crossing the antimeridian are not the entire globe."""
+    lon = np.array([[170, 175], [178, -179], [-170, -160]], dtype="float64")
+    lon_min, lon_max = footprints._get_blocks_lon_bounds(lon, block_size=1)
+    np.testing.assert_allclose(lon_min, [170, 178, -170])
+    np.testing.assert_allclose(lon_max, [175, 181, -160])
+    footprint = {"bounds": np.stack([lon_min, lon_max, [0, 0, 0], [1, 1, 1]], axis=1)}
+    np.testing.assert_equal(footprints.get_intersecting_blocks(footprint, [-180, -179.5, 0, 1]), [False, True, False])
+    np.testing.assert_equal(footprints.get_intersecting_blocks(footprint, [100, 179, 0, 1]), [True, True, False])
+
+
+def test_crop_granule(archive_granule_filepath):
+    """Test the cropping of a granule over an extent."""
+    open_kwargs = {"scan_mode": "FS", "groups": None, "decode_cf": False, "chunks": {}, "prefix_group": False}
+    ds = granule._open_granule(archive_granule_filepath, variables=["precipRateNearSurface"], **open_kwargs)
+    ds_cropped = footprints.crop_granule(ds, extent=EXTENT_LAST_SCANS, isel_dict={"along_track": slice(4, 10)})
+    np.testing.assert_allclose(ds_cropped["lat"].transpose("along_track", ...), LAT[7:])
+    assert footprints.crop_granule(ds, extent=[-180, 180, 50, 60]) is None
+    ds.close()
+
+
+def test_open_dataset_extent(archive_granule_filepath):
+    """Test the opening of the granules intersecting an extent."""
+    open_kwargs = {"product": "2A-DPR", "start_time": "2020-07-05 17:00:00", "end_time": "2020-07-05 17:30:00"}
+    ds = gpm.open_dataset(**open_kwargs, variables=["precipRateNearSurface"], extent=EXTENT_LAST_SCANS)
+    np.testing.assert_allclose(ds["lat"].transpose("along_track", ...), LAT[7:])
+    with pytest.raises(ValueError, match="No granules intersect"):
+        gpm.open_dataset(**open_kwargs, extent=[-180, 180, 50, 60])
+
+
+def test_get_request_extent():
+    """Test the definition of the extent of a spatial request."""
+    assert footprints.get_request_extent() is None
+    assert list(footprints.get_request_extent(extent=[0, 10, 20, 30])) == [0, 10, 20, 30]
+    assert len(footprints.get_request_extent(country="Switzerland")) == 4
+    extent = footprints.get_request_extent(point=(10, 20), distance=10_000)
+    assert extent[0] < 10 < extent[1]
+    assert extent[2] < 20 < extent[3]
+    with pytest.raises(ValueError):
+        footprints.get_request_extent(point=(10, 20))
+    with pytest.raises(ValueError):
+        footprints.get_request_extent(extent=[0, 10, 20, 30], country="Switzerland")
@@ -116,7 +116,8 @@ def test_open_granule(monkeypatch):
     monkeypatch.setattr(granule, "finalize_dataset", patch_finalize_dataset)
 
     # Mock datatree opening from filepath
-    monkeypatch.setattr(datatree, "open_datatree", lambda *args, **kwargs: dt)
+    monkeypatch.setattr(datatree, "get_granule_structure", lambda *args, **kwargs: None)
+    monkeypatch.setattr(datatree, "open_partial_datatree", lambda *args, **kwargs: dt)
 
     returned_dataset = granule.open_granule(filepath)
     expected_attribute_keys = ["attribute", "ScanMode", "finalized"]
@@ -466,3 +467,31 @@ def test_finalize_dataset_attrs(monkeypatch):
     assert ds.attrs["coords_attrs"]
     assert ds.attrs["history"]
     assert ds.attrs["gpm_api_product"] == product
+
+
+def test_finalize_dataset_validate(monkeypatch):
+    """Test the validation modes of finalize_dataset."""
+    product = "product"
+    scan_mode = "scan_mode"
+    calls = []
+
+    def mock_warn_dataset_quality(ds):
+        calls.append("quality")
+        return ds
+
+    def mock_check_time_period_coverage(ds, *args, **kwargs):
+        calls.append("coverage")
+
+    monkeypatch.setattr(conventions, "_warn_dataset_quality", mock_warn_dataset_quality)
+    monkeypatch.setattr(conventions, "_check_time_period_coverage", mock_check_time_period_coverage)
+
+    expected_calls = {"eager": ["coverage", "quality"], "lazy": ["coverage"], "off": []}
+    for validate, expected in expected_calls.items():
+        calls.clear()
+        ds = get_sample_orbit_dataset().chunk()
+        ds = finalize_dataset(ds, product=product, scan_mode=scan_mode, decode_cf=False, validate=validate)
+        assert calls == expected
+        assert hasattr(ds["lon"].data, "dask")
+
+    with pytest.raises(ValueError):
+        conventions.check_validate("deferred")
@@ -0,0 +1,202 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module test the optimized mirror of the local GPM archive."""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+from pytest_mock.plugin import MockerFixture
+
+import gpm
+from gpm.dataset import granule, optimize
+from gpm.tests.utils.fake_granules import FILENAME
+
+
+def get_raw_granule_dataset(filepath, scan_mode, groups, variables, **kwargs):
+    """Return a dataset mimicking the dataset of a raw granule before the GPM-API conventions are applied."""
+    n_along_track, n_cross_track = 20, 5
+    attrs = {"_FillValue": np.float32(-9999.9), "units": "mm/hr"}
+    ds = xr.Dataset(
+        data_vars={
+            "precipRateNearSurface": (("along_track", "cross_track"), np.ones((20, 5), dtype="float32"), attrs),
+            "zFactorFinalNearSurface": (("along_track", "cross_track"), np.zeros((20, 5), dtype="float32")),
+            "flagPrecip": (("along_track", "cross_track"), np.ones((20, 5), dtype="int32")),
+        },
+        coords={
+            "lon": (("along_track", "cross_track"), np.linspace(0, 10, 100).reshape(n_along_track, n_cross_track)),
+            "lat": (("along_track", "cross_track"), np.linspace(0, 5, 100).reshape(n_along_track, n_cross_track)),
+            "time": ("along_track", pd.date_range("2020-07-05 17:00:44", periods=n_along_track, freq="s")),
+        },
+        attrs={"ScanMode": scan_mode, "EmptyGranule": "NOT_EMPTY", "flag": True, "missing": None},
+    )
+    ds["precipRateNearSurface"].encoding = {"chunksizes": (2, 2), "source": filepath}
+    if variables is not None:
+        ds = ds[variables]
+    return ds
+
+
+def test_get_optimized_filepath(tmp_path, archive_granule_filepath):
+    """Test the definition of the optimized granule file path."""
+    expected_filepath = os.path.join(
+        str(tmp_path),
+        "GPM",
+        "OPTIMIZED",
+        "RS",
+        "V07",
+        "RADAR",
+        "2A-DPR",
+        "2020",
+        "07",
+        "05",
+        f"{FILENAME}.FS.nc",
+    )
+    with gpm.config.set({"base_dir": str(tmp_path)}):
+        assert optimize.get_optimized_filepath(archive_granule_filepath, scan_mode="FS") == expected_filepath
+        # Test granules outside of the local archive
+        assert optimize.get_optimized_filepath("/tmp/" + FILENAME, scan_mode="FS") is None
+        assert optimize.get_optimized_filepath(expected_filepath, scan_mode="FS") is None
+    with gpm.config.set({"base_dir": None}):
+        assert optimize.get_optimized_filepath(archive_granule_filepath, scan_mode="FS") is None
+
+
+def test_get_optimized_encoding_dict():
+    """Test the encodings of the optimized granule variables."""
+    ds = get_raw_granule_dataset(FILENAME, scan_mode="FS", groups=None, variables=None)
+    encoding_dict = optimize.get_optimized_encoding_dict(ds, compression="zlib", complevel=4, chunks={"along_track": 8})
+    assert encoding_dict["precipRateNearSurface"] == {
+        "zlib": True,
+        "complevel": 4,
+        "shuffle": True,
+        "chunksizes": (8, 5),
+    }
+    assert "time" not in encoding_dict
+    encoding_dict = optimize.get_optimized_encoding_dict(ds, compression=None, chunks={"along_track": 100})
+    assert encoding_dict["lon"] == {"chunksizes": (20, 5)}
+
+    with pytest.raises(ValueError):
+        optimize.check_compression("lz4")
+
+
+@pytest.mark.parametrize("compression", ["zstd", "zlib", None])
+def test_optimize_granule(tmp_path, archive_granule_filepath, mocker: MockerFixture, compression):
+    """Test the optimized granule is read in place of the raw granule."""
+    variables = ["precipRateNearSurface", "flagPrecip"]
+    if compression == "zstd":
+        try:
+            optimize.check_compression(compression)
+        except ValueError:
+            pytest.skip("zstd compression is not available.")
+
+    with gpm.config.set({"base_dir": str(tmp_path)}):
+        mock_open_granule = mocker.patch.object(granule, "_open_granule", side_effect=get_raw_granule_dataset)
+        optimized_filepath = optimize.optimize_granule(
+            archive_granule_filepath,
+            variables=variables,
+            compression=compression,
+            chunks={"along_track": 10},
+        )
+        assert os.path.exists(optimized_filepath)
+        assert not os.path.exists(optimized_filepath + ".part")
+
+        # Test the optimized granule is not recreated
+        optimize.optimize_granule(archive_granule_filepath, variables=variables)
+        assert mock_open_granule.call_count == 1
+        mocker.stopall()
+
+        # Test the optimized granule content
+        with xr.open_dataset(optimized_filepath) as ds:
+            assert set(ds.data_vars) == set(variables)
+            assert ds["precipRateNearSurface"].encoding["chunksizes"] == (10, 5)
+            assert ds.attrs["flag"] == 1
+
+        # Test the optimized granule is opened by _open_granule
+        open_kwargs = {"scan_mode": "FS", "groups": None, "decode_cf": True, "chunks": {}, "prefix_group": False}
+        ds = granule._open_granule(archive_granule_filepath, variables=["precipRateNearSurface"], **open_kwargs)
+        expected_ds = get_raw_granule_dataset(archive_granule_filepath, scan_mode="FS", groups=None, variables=None)
+        assert list(ds.data_vars) == ["precipRateNearSurface"]
+        xr.testing.assert_allclose(ds["precipRateNearSurface"], expected_ds["precipRateNearSurface"])
+        assert "gpm_api_optimized_all_variables" not in ds.attrs
+        ds.close()
+
+        # Test the optimized granule is not used if it does not contain all the requested variables
+        assert optimize.open_optimized_granule(archive_granule_filepath, variables=None, **open_kwargs) is None
+        variables_not_optimized = ["zFactorFinalNearSurface"]
+        assert (
+            optimize.open_optimized_granule(archive_granule_filepath, variables=variables_not_optimized, **open_kwargs)
+            is None
+        )
+
+        # Test the optimized granule is not used if the raw granule is more recent
+        mtime = os.path.getmtime(optimized_filepath) + 10
+        os.utime(archive_granule_filepath, (mtime, mtime))
+        assert optimize.open_optimized_granule(archive_granule_filepath, variables=variables, **open_kwargs) is None
+
+        # Test the optimized granules can be disabled
+        with gpm.config.set({"use_optimized_archive": False}):
+            os.utime(archive_granule_filepath, (0, 0))
+            assert optimize.open_optimized_granule(archive_granule_filepath, variables=variables, **open_kwargs) is None
+        ds = optimize.open_optimized_granule(archive_granule_filepath, variables=variables, **open_kwargs)
+        assert ds is not None
+        ds.close()
+
+
+def test_optimize_archive(tmp_path, archive_granule_filepath, mocker: MockerFixture):
+    """Test the optimization of the local archive granules."""
+    mocker.patch.object(granule, "_open_granule", side_effect=get_raw_granule_dataset)
+    with gpm.config.set({"base_dir": str(tmp_path)}):
+        errors = optimize.optimize_archive(
+            product="2A-DPR",
+            start_time="2020-07-05 17:00:00",
+            end_time="2020-07-05 18:00:00",
+            compression="zlib",
+            parallel=False,
+        )
+        assert errors == []
+        optimized_filepath = optimize.get_optimized_filepath(archive_granule_filepath, scan_mode="FS")
+        with xr.open_dataset(optimized_filepath) as ds:
+            assert ds.attrs["gpm_api_optimized_all_variables"] == 1
+
+        # Test errors are reported
+        mocker.patch.object(granule, "_open_granule", side_effect=ValueError("Corrupted"))
+        errors = optimize.optimize_archive(
+            product="2A-DPR",
+            start_time="2020-07-05 17:00:00",
+            end_time="2020-07-05 18:00:00",
+            force=True,
+            parallel=True,
+        )
+        assert errors == [(archive_granule_filepath, "Corrupted")]
+
+        # Test no files
+        with pytest.raises(ValueError):
+            optimize.optimize_archive(
+                product="2A-DPR",
+                start_time="2020-07-06 17:00:00",
+                end_time="2020-07-06 18:00:00",
+            )
@@ -0,0 +1,80 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module test the search of the satellite overpasses of an area of interest."""
+import numpy as np
+import pytest
+
+import gpm
+from gpm.dataset import footprints
+from gpm.dataset.overpasses import OVERPASSES_COLUMNS, get_granule_overpasses
+
+
+def test_get_granule_overpasses():
+    """Test the overpasses of an extent in a granule footprint."""
+    bounds = np.array([[0, 10, 0, 10], [0, 10, 20, 30], [0, 10, 0, 10], [0, 10, 0, 10]], dtype="float64")
+    time_bounds = np.array(
+        [[f"2020-07-05T17:00:{i * 10:02d}", f"2020-07-05T17:00:{i * 10 + 9:02d}"] for i in range(4)],
+        dtype="M8[s]",
+    )
+    footprint = {"bounds": bounds, "time_bounds": time_bounds, "block_size": 10, "n_scans": 35}
+    overpasses = get_granule_overpasses(footprint, extent=[5, 6, 5, 6])
+    assert len(overpasses) == 2
+    assert overpasses[0]["along_track_slice"] == slice(0, 10)
+    assert overpasses[1]["along_track_slice"] == slice(20, 35)
+    assert overpasses[1]["start_time"] == np.datetime64("2020-07-05T17:00:20")
+    assert overpasses[1]["end_time"] == np.datetime64("2020-07-05T17:00:39")
+    assert get_granule_overpasses(footprint, extent=[50, 60, 5, 6]) == []
+
+
+def test_find_overpasses(archive_granule_filepath, monkeypatch):
+    """Test the search of the overpasses in the local archive."""
+    monkeypatch.setattr(footprints, "FOOTPRINT_BLOCK_SIZE", 4)
+    kwargs = {"product": "2A-DPR", "start_time": "2020-07-05 17:00:00", "end_time": "2020-07-05 18:00:00"}
+    df = gpm.find_overpasses(**kwargs, extent=[0, 30, 5, 15])
+    assert list(df.columns) == OVERPASSES_COLUMNS
+    assert len(df) == 1
+    assert df["filepath"].iloc[0] == archive_granule_filepath
+    assert df["granule_id"].iloc[0] == 36092
+    assert df["along_track_slice"].iloc[0] == slice(4, 10)
+    assert df["start_time"].iloc[0] == np.datetime64("2020-07-05T17:00:04")
+    assert df["end_time"].iloc[0] == np.datetime64("2020-07-05T17:00:09")
+
+    # Test the footprints are cached with the local catalog enabled
+    with gpm.config.set({"local_catalog": True}):
+        assert len(gpm.find_overpasses(**kwargs, extent=[0, 30, 5, 15])) == 1
+        with monkeypatch.context() as m:
+            m.setattr(footprints, "_read_granule_geolocation", None)
+            assert len(gpm.find_overpasses(**kwargs, point=(15, 0), distance=10_000)) == 1
+
+    # Test no overpasses
+    assert len(gpm.find_overpasses(**kwargs, extent=[-180, 180, 50, 60])) == 0
+    kwargs["start_time"] = "2020-07-05 17:00:10"
+    assert len(gpm.find_overpasses(**kwargs, extent=[0, 30, 5, 15])) == 0
+
+    # Test the area of interest must be specified
+    with pytest.raises(ValueError):
+        gpm.find_overpasses(**kwargs)
@@ -0,0 +1,198 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module test the virtual references of the local GPM granules."""
+import json
+import os
+
+import dask.array
+import numpy as np
+import pytest
+import xarray as xr
+
+from gpm.dataset import granule, references
+from gpm.dataset.dataset import _check_engine
+from gpm.tests.utils.fake_granules import FILENAME
+
+
+@pytest.fixture
+def archive_granule_kwargs(monkeypatch):
+    """Return the arguments to create a chunked and compressed HDF5 granule in the local archive."""
+    # Do not inline the small variables of the test granule
+    monkeypatch.setattr(references, "INLINE_THRESHOLD", 0)
+    return {"chunks": 4, "compression": "gzip", "shuffle": True, "fletcher32": True}
+
+
+def test_get_references_filepath(tmp_path, archive_granule_filepath):
+    """Test the definition of the reference file path."""
+    expected_filepath = os.path.join(
+        str(tmp_path),
+        "GPM",
+        "REFERENCES",
+        "RS",
+        "V07",
+        "RADAR",
+        "2A-DPR",
+        "2020",
+        "07",
+        "05",
+        f"{FILENAME}.FS.json",
+    )
+    assert references.get_references_filepath(archive_granule_filepath, scan_mode="FS") == expected_filepath
+    assert references.get_references_filepath(expected_filepath, scan_mode="FS") is None
+    assert not references.is_references_available(archive_granule_filepath, scan_mode="FS")
+
+
+def test_get_granule_references(archive_granule_filepath):
+    """Test the references of the chunked variables and the inlined variables."""
+    refs = references.get_granule_references(archive_granule_filepath, scan_mode="FS")["refs"]
+    zarray = json.loads(refs["FS/SLV/precipRateNearSurface/.zarray"])
+    assert zarray["chunks"] == [4, 4]
+    assert zarray["filters"] == [
+        {"id": "shuffle", "elementsize": 4},
+        {"id": "zlib", "level": 4},
+        {"id": "fletcher32"},
+    ]
+    # Test 3 chunks along the first dimension (of size 10)
+    assert refs["FS/SLV/precipRateNearSurface/2.0"][0] == archive_granule_filepath
+    assert "FS/SLV/precipRateNearSurface/3.0" not in refs
+    # Test the time variables are inlined
+    assert refs["FS/ScanTime/Year/0"].startswith("base64:")
+    attrs = json.loads(refs["FS/SLV/zFactorFinal/.zattrs"])
+    assert attrs["_ARRAY_DIMENSIONS"] == ["nscan", "nrayFS", "nbinFS", "nfreq"]
+
+    with pytest.raises(ValueError, match="scan mode"):
+        references.get_granule_references(archive_granule_filepath, scan_mode="HS")
+
+
+def test_index_granule(archive_granule_filepath):
+    """Test the reference file is written only if not up-to-date."""
+    references_filepath = references.index_granule(archive_granule_filepath, scan_mode="FS")
+    assert os.path.exists(references_filepath)
+    assert references.is_references_available(archive_granule_filepath, scan_mode="FS")
+    mtime = os.path.getmtime(references_filepath)
+    assert references.index_granule(archive_granule_filepath, scan_mode="FS") == references_filepath
+    assert os.path.getmtime(references_filepath) == mtime
+
+    with pytest.raises(ValueError, match="not located in the local GPM archive"):
+        references.index_granule("/tmp/" + FILENAME, scan_mode="FS")
+
+
+@pytest.mark.parametrize(
+    ("variables", "groups"),
+    [
+        (None, None),
+        (["precipRateNearSurface"], None),
+        (None, ["PRE"]),
+    ],
+)
+def test_open_references_granule(archive_granule_filepath, variables, groups):
+    """Test the granule opened from the references is identical to the granule opened from the HDF5 file."""
+    kwargs = {"scan_mode": "FS", "groups": groups, "variables": variables, "decode_cf": False, "prefix_group": False}
+    references.index_granule(archive_granule_filepath, scan_mode="FS")
+    ds_expected = granule._open_granule(archive_granule_filepath, chunks={}, **kwargs)
+    ds = granule._open_granule(archive_granule_filepath, chunks={}, engine="references", **kwargs)
+    assert isinstance(ds["lon"].data, dask.array.Array)
+    assert ds["lon"].chunks == ((4, 4, 2), (4,))
+    xr.testing.assert_identical(ds.compute(), ds_expected.compute())
+    for name in ds.data_vars:
+        assert ds[name].encoding["chunksizes"] == ds_expected[name].encoding["chunksizes"]
+    ds_expected.close()
+
+    # Test rechunking
+    ds = granule._open_granule(archive_granule_filepath, chunks=-1, engine="references", **kwargs)
+    assert ds["lon"].chunks == ((10,), (4,))
+    assert isinstance(ds["time"].data, type(ds_expected["time"].data))
+
+
+def test_open_references_datatree_does_not_open_granule(archive_granule_filepath, monkeypatch):
+    """Test the HDF5 granule is not opened once the reference file exists."""
+    references.index_granule(archive_granule_filepath, scan_mode="FS")
+    monkeypatch.setattr(references, "get_granule_references", lambda *args, **kwargs: pytest.fail("HDF5 opened"))
+    dt = references.open_references_datatree(
+        archive_granule_filepath,
+        scan_mode="FS",
+        variables=["precipRateNearSurface"],
+    )
+    assert list(dt["FS/SLV"].data_vars) == ["precipRateNearSurface"]
+    assert dt["FS/SLV"]["precipRateNearSurface"].dims == ("along_track", "cross_track")
+
+
+def test_open_references_datatree_without_reference_file(archive_granule_filepath, monkeypatch):
+    """Test an error is raised (without opening the HDF5 granule) if the reference file is missing."""
+    monkeypatch.setattr(references, "get_granule_references", lambda *args, **kwargs: pytest.fail("HDF5 opened"))
+    with pytest.raises(ValueError, match="gpm.index_archive"):
+        references.open_references_datatree(archive_granule_filepath, scan_mode="FS")
+
+
+@pytest.mark.parametrize("fill_value", [-9999.9, float("nan")])
+def test_unwritten_chunks_fill_value(tmp_path, monkeypatch, fill_value):
+    """Test the unwritten HDF5 chunks are read with the HDF5 fill value."""
+    h5py = pytest.importorskip("h5py")
+    monkeypatch.setattr(references, "INLINE_THRESHOLD", 0)
+    filepath = str(tmp_path / "test.h5")
+    with h5py.File(filepath, "w") as f:
+        dset = f.create_dataset("var", shape=(8, 4), chunks=(4, 4), dtype="float32", fillvalue=fill_value)
+        dset[:4] = 1
+        expected = dset[()]
+        refs = references._get_variable_references(dset, filepath=filepath)
+    # Test the NaN fill value is not encoded with the invalid JSON NaN constant
+    zarray = json.loads(refs["var/.zarray"], parse_constant=lambda name: pytest.fail(f"Invalid JSON {name}"))
+    assert "var/1.0" not in refs
+    data = references._get_reference_dask_array(refs, key="var", zarray=zarray).compute()
+    np.testing.assert_array_equal(data, expected)
+    assert np.all(data[:4] == 1)
+
+
+def test_corrupted_chunk_fletcher32(tmp_path, monkeypatch):
+    """Test reading a chunk with an invalid fletcher32 checksum raises an error."""
+    h5py = pytest.importorskip("h5py")
+    monkeypatch.setattr(references, "INLINE_THRESHOLD", 0)
+    filepath = str(tmp_path / "test.h5")
+    expected = np.arange(16, dtype="float32").reshape(4, 4)
+    with h5py.File(filepath, "w") as f:
+        dset = f.create_dataset("var", data=expected, chunks=(4, 4), fletcher32=True)
+        refs = references._get_variable_references(dset, filepath=filepath)
+    zarray = json.loads(refs["var/.zarray"])
+    data = references._get_reference_dask_array(refs, key="var", zarray=zarray).compute()
+    np.testing.assert_array_equal(data, expected)
+    # Corrupt the first byte of the chunk
+    _, offset, _ = refs["var/0.0"]
+    with open(filepath, "r+b") as f:
+        f.seek(offset)
+        byte = f.read(1)
+        f.seek(offset)
+        f.write(bytes([byte[0] ^ 0xFF]))
+    with pytest.raises(RuntimeError, match="checksum"):
+        references._get_reference_dask_array(refs, key="var", zarray=zarray).compute()
+
+
+def test_check_engine():
+    """Test the validity of the open_dataset engine."""
+    assert _check_engine(None) is None
+    assert _check_engine("references") == "references"
+    with pytest.raises(ValueError):
+        _check_engine("dummy")
@@ -0,0 +1,130 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module test the streaming of the GPM granules while they are downloaded."""
+import os
+import threading
+
+import pytest
+from pytest_mock.plugin import MockerFixture
+
+import gpm
+from gpm.dataset import stream
+from gpm.tests.utils.fake_granules import FILENAME, create_hdf5_granule
+from gpm.utils.warnings import GPMDownloadWarning
+
+REMOTE_DIR = "https://arthurhouhttps.pps.eosdis.nasa.gov/gpmdata/2020/07/05/radar"
+FILENAMES = [
+    FILENAME,
+    "2A.GPM.DPR.V9-20211125.20200705-S183318-E200551.036093.V07A.HDF5",
+    "2A.GPM.DPR.V9-20211125.20200705-S200552-E213825.036094.V07A.HDF5",
+]
+
+
+@pytest.fixture
+def remote_filepaths(mocker: MockerFixture):
+    """Mock the listing of the granules available on the NASA server."""
+    filepaths = [f"{REMOTE_DIR}/{filename}" for filename in FILENAMES]
+    mocker.patch.object(stream, "find_filepaths", return_value=filepaths[::-1])
+    return filepaths
+
+
+def _fake_download_files(remote_filepaths, local_filepaths, **kwargs):
+    for local_filepath in local_filepaths:
+        create_hdf5_granule(local_filepath)
+    return [1] * len(local_filepaths)
+
+
+def test_stream_granules(archive_granule_filepath, remote_filepaths, mocker: MockerFixture):
+    """Test the granules are yielded in time order while the next granules are downloaded."""
+    mock_download = mocker.patch.object(stream, "_download_files", side_effect=_fake_download_files)
+    iterator = stream.stream_granules(
+        "2A-DPR",
+        start_time="2020-07-05 17:00:00",
+        end_time="2020-07-05 21:00:00",
+        variables="precipRateNearSurface",
+        prefetch=2,
+        validate="off",
+        ordered=True,
+    )
+    # The granule available on disk is yielded first and only the prefetched granule is downloaded
+    ds = next(iterator)
+    assert list(ds.data_vars) == ["precipRateNearSurface"]
+    assert mock_download.call_count <= 2
+    list_ds = [ds, *iterator]
+    assert len(list_ds) == 3
+    assert mock_download.call_count == 2
+    local_dir = os.path.dirname(archive_granule_filepath)
+    assert all(os.path.exists(os.path.join(local_dir, filename)) for filename in FILENAMES)
+
+
+def test_stream_granules_local_granules_first(archive_granule_filepath, remote_filepaths, mocker: MockerFixture):
+    """Test the granules already on disk are yielded before the granules being downloaded."""
+    local_dir = os.path.dirname(archive_granule_filepath)
+    create_hdf5_granule(os.path.join(local_dir, FILENAMES[2]))
+    download_event = threading.Event()
+
+    def _slow_download_files(remote_filepaths, local_filepaths, **kwargs):
+        download_event.wait(timeout=10)
+        return _fake_download_files(remote_filepaths, local_filepaths)
+
+    mocker.patch.object(stream, "_download_files", side_effect=_slow_download_files)
+    spy_open_granule = mocker.spy(stream, "open_granule")
+    iterator = stream.stream_granules(
+        "2A-DPR",
+        start_time="2020-07-05 17:00:00",
+        end_time="2020-07-05 21:00:00",
+        variables="precipRateNearSurface",
+        prefetch=2,
+        validate="off",
+    )
+    # The local granule queued after the slow download is yielded without waiting for the download
+    next(iterator)
+    next(iterator)
+    assert not download_event.is_set()
+    download_event.set()
+    assert len(list(iterator)) == 1
+    opened_filenames = [os.path.basename(call.args[0]) for call in spy_open_granule.call_args_list]
+    assert opened_filenames == [FILENAMES[0], FILENAMES[2], FILENAMES[1]]
+
+
+def test_stream_granules_failed_download(archive_granule_filepath, remote_filepaths, mocker: MockerFixture):
+    """Test the granules which can not be downloaded are skipped."""
+    mocker.patch.object(stream, "_download_files", return_value=[0])
+    with pytest.warns(GPMDownloadWarning, match="download"):
+        list_ds = list(
+            stream.stream_granules(
+                "2A-DPR",
+                start_time="2020-07-05 17:00:00",
+                end_time="2020-07-05 21:00:00",
+                ordered=False,
+                validate="off",
+            ),
+        )
+    assert len(list_ds) == 1
+
+    with pytest.raises(ValueError):
+        next(gpm.stream_granules("2A-DPR", "2020-07-05 17:00:00", "2020-07-05 21:00:00", prefetch=0))
@@ -31,6 +31,20 @@ import pytest
 from unittest import mock
 
 
+@pytest.fixture(autouse=True)
+def _restore_config():
+    """Restore the GPM-API config object replaced when reloading the ``gpm`` modules.
+
+    The modules importing ``config`` from ``gpm._config`` keep a reference to the original object.
+    """
+    import gpm
+
+    config = gpm._config.config
+    yield
+    gpm._config.config = config
+    gpm.config = config
+
+
 def test_donfig_takes_environment_variable():
     """Test that the donfig config file takes the environment defaults."""
     from importlib import reload
@@ -0,0 +1,58 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module defines pytest fixtures used for the testing of the IMERG routines."""
+import pandas as pd
+import pytest
+
+import gpm
+from gpm.tests.utils.fake_granules import create_imerg_granule, get_imerg_filename
+
+IMERG_START_TIMES = pd.date_range("2020-07-05 17:00:00", periods=4, freq="30min")
+IMERG_OFFSET = 100_000
+
+
+@pytest.fixture
+def imerg_archive(tmp_path):
+    """Create a local archive with 4 IMERG-FR half-hourly granules.
+
+    The precipitation of the ``i``-th granule is offset by ``i * IMERG_OFFSET``.
+    The pixel ``(0, 0)`` of the second granule is missing.
+    """
+    pytest.importorskip("h5py")
+    dir_path = tmp_path / "GPM" / "RS" / "V07" / "IMERG" / "IMERG-FR" / "2020" / "07" / "05"
+    dir_path.mkdir(parents=True)
+    filepaths = [
+        create_imerg_granule(
+            str(dir_path / get_imerg_filename(start_time)),
+            start_time=start_time,
+            offset=i * IMERG_OFFSET,
+            fill_pixel=(0, 0) if i == 1 else None,
+        )
+        for i, start_time in enumerate(IMERG_START_TIMES)
+    ]
+    with gpm.config.set({"base_dir": str(tmp_path)}):
+        yield filepaths
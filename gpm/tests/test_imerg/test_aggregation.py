@@ -0,0 +1,137 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module test the streaming aggregation of IMERG granules over time periods."""
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from gpm.imerg.aggregation import aggregate_imerg, iterate_imerg_aggregates, merge_partial_aggregates
+
+START_TIME = "2020-07-05 17:00:00"
+END_TIME = "2020-07-05 19:00:00"
+
+
+def _get_expected_precipitation(i):
+    """Return the (lat, lon) precipitation of the i-th granule of the ``imerg_archive`` fixture."""
+    lon_idx, lat_idx = np.meshgrid(np.arange(360), np.arange(180))
+    arr = (lon_idx * 180 + lat_idx + i * 100_000).astype(float)
+    if i == 1:
+        arr[0, 0] = np.nan
+    return arr
+
+
+def test_merge_partial_aggregates():
+    """Test the partial aggregates are merged."""
+    partial = {"sum": {"a": np.array([1.0, 0])}, "count": {"a": np.array([1, 0])}}
+    partial["max"] = {"a": np.array([1.0, np.nan])}
+    other = {"sum": {"a": np.array([2.0, 3])}, "count": {"a": np.array([1, 1])}, "max": {"a": np.array([2.0, 3])}}
+    partial["n_granules"], other["n_granules"] = 1, 1
+    merged = merge_partial_aggregates(partial, other)
+    np.testing.assert_equal(merged["sum"]["a"], [3, 3])
+    np.testing.assert_equal(merged["count"]["a"], [2, 1])
+    np.testing.assert_equal(merged["max"]["a"], [2, 3])
+    assert merged["n_granules"] == 2
+    assert merge_partial_aggregates(None, other) is other
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_aggregate_imerg_hourly(imerg_archive, parallel):
+    """Test the hourly aggregation of IMERG granules."""
+    ds = aggregate_imerg(
+        "IMERG-FR",
+        start_time=START_TIME,
+        end_time=END_TIME,
+        freq="hourly",
+        statistics=["accumulation", "mean", "max", "count"],
+        parallel=parallel,
+        max_workers=2,
+    )
+    np.testing.assert_equal(ds["time"].to_numpy(), pd.to_datetime(["2020-07-05 17:00", "2020-07-05 18:00"]).to_numpy())
+    np.testing.assert_equal(ds["n_granules"].to_numpy(), [2, 2])
+    assert ds["precipitation_accumulation"].dims == ("time", "lat", "lon")
+    for statistic in ["accumulation", "mean", "max"]:
+        assert ds[f"precipitation_{statistic}"].dtype == "float32"
+
+    # First hour: pixel (0, 0) is missing in the second granule
+    arr0, arr1 = _get_expected_precipitation(0), _get_expected_precipitation(1)
+    expected_mean = np.nanmean(np.stack([arr0, arr1]), axis=0)
+    np.testing.assert_allclose(ds["precipitation_mean"].isel(time=0), expected_mean)
+    np.testing.assert_allclose(ds["precipitation_accumulation"].isel(time=0), expected_mean)
+    np.testing.assert_allclose(ds["precipitation_max"].isel(time=0), np.fmax(arr0, arr1))
+    assert ds["precipitation_count"].isel(time=0, lat=0, lon=0).item() == 1
+    assert ds["precipitation_count"].isel(time=0, lat=1, lon=0).item() == 2
+
+    # Second hour
+    arr2, arr3 = _get_expected_precipitation(2), _get_expected_precipitation(3)
+    np.testing.assert_allclose(ds["precipitation_accumulation"].isel(time=1), (arr2 + arr3) / 2)
+    np.testing.assert_allclose(ds["precipitation_max"].isel(time=1), arr3)
+
+
+def test_aggregate_imerg_daily(imerg_archive):
+    """Test the daily accumulation accounts for the missing half-hours."""
+    ds = aggregate_imerg(
+        "IMERG-FR",
+        start_time=START_TIME,
+        end_time=END_TIME,
+        freq="daily",
+        statistics="accumulation",
+        parallel=False,
+    )
+    assert list(ds.data_vars) == ["precipitation_accumulation"]
+    assert ds["n_granules"].item() == 4
+    expected_mean = (np.stack([_get_expected_precipitation(i) for i in range(4)])).mean(axis=0)
+    np.testing.assert_allclose(ds["precipitation_accumulation"].isel(time=0, lat=1, lon=0), expected_mean[1, 0] * 24)
+
+
+def test_iterate_imerg_aggregates(imerg_archive):
+    """Test the aggregates are yielded period by period."""
+    list_ds = list(
+        iterate_imerg_aggregates("IMERG-FR", start_time=START_TIME, end_time=END_TIME, freq="hourly", parallel=False),
+    )
+    assert len(list_ds) == 2
+    xr.testing.assert_identical(
+        xr.concat(list_ds, dim="time"),
+        aggregate_imerg("IMERG-FR", start_time=START_TIME, end_time=END_TIME, freq="hourly", parallel=False),
+    )
+
+
+def test_aggregate_imerg_store(imerg_archive, tmp_path):
+    """Test the aggregates of each period are written to a Zarr store."""
+    pytest.importorskip("zarr")
+    kwargs = {"start_time": START_TIME, "end_time": END_TIME, "freq": "hourly", "parallel": False}
+    ds = aggregate_imerg("IMERG-FR", store=str(tmp_path / "aggregates.zarr"), **kwargs)
+    assert ds["precipitation_accumulation"].chunks is not None
+    xr.testing.assert_identical(ds.compute(), aggregate_imerg("IMERG-FR", **kwargs))
+
+
+def test_aggregate_imerg_invalid_arguments(imerg_archive):
+    """Test invalid frequencies and statistics raise an error."""
+    with pytest.raises(ValueError):
+        aggregate_imerg("IMERG-FR", start_time=START_TIME, end_time=END_TIME, freq="weekly")
+    with pytest.raises(ValueError):
+        aggregate_imerg("IMERG-FR", start_time=START_TIME, end_time=END_TIME, statistics="median")
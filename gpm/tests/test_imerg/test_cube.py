@@ -0,0 +1,100 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module test the time-major Zarr cube of IMERG granules."""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+from pytest_mock.plugin import MockerFixture
+
+from gpm.imerg import cube
+from gpm.imerg.cube import INGESTED_FILE_COORD, _check_spatial_chunk, build_imerg_cube
+
+
+def test_check_spatial_chunk():
+    """Test the definition of the cube spatial chunks."""
+    assert _check_spatial_chunk(10) == (10, 10)
+    assert _check_spatial_chunk([10, 20]) == (10, 20)
+    with pytest.raises(ValueError):
+        _check_spatial_chunk((10, 0))
+
+
+def test_build_imerg_cube(imerg_archive, tmp_path):
+    """Test the creation and the update of the IMERG cube."""
+    pytest.importorskip("zarr")
+    store = str(tmp_path / "cube.zarr")
+    kwargs = {"product": "IMERG-FR", "store": store, "spatial_chunk": (50, 100), "time_chunk": 2}
+    filepaths = build_imerg_cube(start_time="2020-07-05 17:00:00", end_time="2020-07-05 18:00:00", **kwargs)
+    assert filepaths == imerg_archive[:2]
+
+    # Update the cube with the new granules
+    filepaths = build_imerg_cube(start_time="2020-07-05 17:00:00", end_time="2020-07-05 19:00:00", **kwargs)
+    assert filepaths == imerg_archive[2:]
+    assert build_imerg_cube(start_time="2020-07-05 17:00:00", end_time="2020-07-05 19:00:00", **kwargs) == []
+
+    with xr.open_zarr(store) as ds:
+        expected_filenames = [os.path.basename(filepath) for filepath in imerg_archive]
+        assert ds[INGESTED_FILE_COORD].to_numpy().tolist() == expected_filenames
+        assert ds[INGESTED_FILE_COORD].dims == ("time",)
+        assert INGESTED_FILE_COORD not in ds.attrs
+        assert ds["precipitation"].dims == ("time", "lat", "lon")
+        assert ds["precipitation"].encoding["chunks"] == (2, 50, 100)
+        np.testing.assert_equal(ds["time"].to_numpy(), pd.date_range("2020-07-05 17:00", periods=4, freq="30min"))
+        precipitation = ds["precipitation"].to_numpy()
+    expected = np.arange(360)[None, :] * 180 + np.arange(180)[:, None]
+    np.testing.assert_equal(precipitation[3], expected + 300_000)
+    assert np.isnan(precipitation[1, 0, 0])
+
+
+def test_build_imerg_cube_reads_granules_once(imerg_archive, tmp_path, mocker: MockerFixture):
+    """Test each granule is read only once when building the IMERG cube."""
+    pytest.importorskip("zarr")
+    spy = mocker.spy(cube, "read_imerg_window")
+    filepaths = build_imerg_cube(
+        product="IMERG-FR",
+        start_time="2020-07-05 17:00:00",
+        end_time="2020-07-05 19:00:00",
+        store=str(tmp_path / "cube.zarr"),
+        spatial_chunk=(50, 100),
+        time_chunk=2,
+    )
+    assert sorted(call.args[0] for call in spy.call_args_list) == filepaths
+
+
+def test_build_imerg_cube_interrupted_update(imerg_archive, tmp_path, mocker: MockerFixture):
+    """Test the granules of an interrupted batch are ingested again at the next update."""
+    pytest.importorskip("zarr")
+    store = str(tmp_path / "cube.zarr")
+    kwargs = {"product": "IMERG-FR", "store": store, "spatial_chunk": (50, 100), "time_chunk": 2}
+    mocker.patch.object(cube, "_write_cube_record", side_effect=[None, RuntimeError("Interrupted")])
+    with pytest.raises(RuntimeError, match="Interrupted"):
+        build_imerg_cube(start_time="2020-07-05 17:00:00", end_time="2020-07-05 19:00:00", **kwargs)
+    mocker.stopall()
+    filepaths = build_imerg_cube(start_time="2020-07-05 17:00:00", end_time="2020-07-05 19:00:00", **kwargs)
+    assert filepaths == imerg_archive[2:]
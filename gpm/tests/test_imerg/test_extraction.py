@@ -0,0 +1,133 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module test the extraction of IMERG time series at a set of points."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from gpm.imerg.extraction import _iterate_granules_pixels, extract_imerg_points, get_points_grid_indices
+from gpm.imerg.readers import read_imerg_pixels
+
+POINTS = np.array([[-179.9, -89.9], [8.6, 46.2], [8.4, 46.9], [179.9, 89.9]])
+# Nearest pixels of the 1 degree grid
+LON_INDICES = np.array([0, 188, 188, 359])
+LAT_INDICES = np.array([0, 136, 136, 179])
+
+
+def test_get_points_grid_indices():
+    """Test the points are assigned to their nearest pixel."""
+    lon = np.arange(-179.5, 180, 1)
+    lat = np.arange(-89.5, 90, 1)
+    lon_indices, lat_indices = get_points_grid_indices(lon, lat, POINTS)
+    np.testing.assert_equal(lon_indices, LON_INDICES)
+    np.testing.assert_equal(lat_indices, LAT_INDICES)
+    with pytest.raises(ValueError):
+        get_points_grid_indices(lon, lat, np.array([[0, 95]]))
+    with pytest.raises(ValueError):
+        get_points_grid_indices(lon, lat, np.array([0, 5]))
+
+
+@pytest.mark.parametrize("max_window_size", [10, 2_000_000])
+def test_read_imerg_pixels(imerg_archive, max_window_size):
+    """Test the pixels are read from the bounding window or separately."""
+    times, dict_arrays = read_imerg_pixels(
+        imerg_archive[1],
+        variables=["precipitation"],
+        lon_indices=LON_INDICES,
+        lat_indices=LAT_INDICES,
+        max_window_size=max_window_size,
+    )
+    np.testing.assert_equal(times, [np.datetime64("2020-07-05T17:30:00")])
+    expected = (LON_INDICES * 180 + LAT_INDICES + 100_000).astype(float)
+    expected[0] = np.nan
+    np.testing.assert_equal(dict_arrays["precipitation"], expected[None, :])
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_extract_imerg_points(imerg_archive, parallel):
+    """Test the extraction of the IMERG time series at a set of points."""
+    ds = extract_imerg_points(
+        "IMERG-FR",
+        start_time="2020-07-05 17:00:00",
+        end_time="2020-07-05 18:30:00",
+        points=POINTS,
+        station_ids=["a", "b", "c", "d"],
+        parallel=parallel,
+    )
+    assert ds["precipitation"].dims == ("time", "station")
+    np.testing.assert_equal(ds["time"].to_numpy(), pd.date_range("2020-07-05 17:00", periods=3, freq="30min"))
+    assert ds["station"].to_numpy().tolist() == ["a", "b", "c", "d"]
+    np.testing.assert_allclose(ds["pixel_lon"], [-179.5, 8.5, 8.5, 179.5])
+    expected = LON_INDICES * 180 + LAT_INDICES + np.array([0, 100_000, 200_000])[:, None]
+    np.testing.assert_equal(ds["precipitation"].to_numpy()[[0, 2]], expected[[0, 2]])
+    assert np.isnan(ds["precipitation"].to_numpy()[1, 0])
+
+
+def test_iterate_granules_pixels_is_bounded(mocker):
+    """Test at most ``2 * max_workers`` granules are processed ahead of the consumer."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    submitted = []
+
+    class _MockProcessPoolExecutor(ThreadPoolExecutor):
+        def __init__(self, max_workers, **kwargs):
+            super().__init__(max_workers=max_workers)
+
+        def submit(self, fn, *args):
+            submitted.append(args[0])
+            return super().submit(fn, *args)
+
+    mocker.patch("concurrent.futures.ProcessPoolExecutor", _MockProcessPoolExecutor)
+    iterator = _iterate_granules_pixels(list(range(10)), read_function=str, parallel=True, max_workers=2)
+    assert next(iterator) == "0"
+    assert len(submitted) == 4
+    assert list(iterator) == [str(i) for i in range(1, 10)]
+
+
+def test_extract_imerg_points_parquet(imerg_archive, tmp_path):
+    """Test the IMERG time series are written into a Parquet file."""
+    pytest.importorskip("pyarrow")
+    parquet_filepath = str(tmp_path / "stations.parquet")
+    result = extract_imerg_points(
+        "IMERG-FR",
+        start_time="2020-07-05 17:00:00",
+        end_time="2020-07-05 19:00:00",
+        points=POINTS,
+        parallel=False,
+        parquet_filepath=parquet_filepath,
+    )
+    assert result == parquet_filepath
+    df = pd.read_parquet(parquet_filepath)
+    assert list(df.columns) == ["time", "station", "precipitation"]
+    assert len(df) == 4 * len(POINTS)
+    assert df["precipitation"].isna().sum() == 1
+
+
+def test_extract_imerg_points_invalid_product():
+    """Test only IMERG products are accepted."""
+    with pytest.raises(ValueError):
+        extract_imerg_points("2A-DPR", "2020-07-05 17:00:00", "2020-07-05 18:00:00", points=POINTS)
@@ -0,0 +1,245 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module test the local granules catalog routines."""
+
+import datetime
+import os
+import sqlite3
+
+import pytest
+from pytest_mock.plugin import MockerFixture
+
+import gpm
+from gpm.io import catalog
+from gpm.io.find import find_filepaths
+
+PRODUCT = "2A-DPR"
+FILENAMES = [
+    "2A.GPM.DPR.V9-20211125.20200705-S145933-E163206.036180.V07A.HDF5",
+    "2A.GPM.DPR.V9-20211125.20200705-S163207-E180440.036181.V07A.HDF5",
+    "2A.GPM.DPR.V9-20211125.20200705-S180441-E193713.036182.V07A.HDF5",
+]
+
+
+def create_fake_files(base_dir, filenames=FILENAMES, date=datetime.date(2020, 7, 5)):
+    from gpm.io.local import get_local_product_directory
+
+    dir_path = get_local_product_directory(
+        base_dir=base_dir,
+        product=PRODUCT,
+        product_type="RS",
+        version=7,
+        date=date,
+    )
+    os.makedirs(dir_path, exist_ok=True)
+    filepaths = []
+    for filename in filenames:
+        filepath = os.path.join(dir_path, filename)
+        with open(filepath, "w") as f:
+            f.write("Hello World")
+        filepaths.append(filepath)
+    return filepaths
+
+
+def test_build_and_query_local_catalog(tmp_path):
+    """Test the catalog indexes the product files and answer time-range queries."""
+    base_dir = str(tmp_path)
+    filepaths = create_fake_files(base_dir)
+
+    assert not catalog.is_product_cataloged(PRODUCT, base_dir=base_dir)
+    assert catalog.build_local_catalog(PRODUCT, base_dir=base_dir) == 3
+    assert catalog.is_product_cataloged(PRODUCT, base_dir=base_dir)
+    assert os.path.exists(catalog.get_local_catalog_filepath(base_dir=base_dir))
+
+    # Query a time period covering the second granule only
+    returned_filepaths = catalog.query_local_catalog(
+        PRODUCT,
+        start_time=datetime.datetime(2020, 7, 5, 17, 0, 0),
+        end_time=datetime.datetime(2020, 7, 5, 17, 30, 0),
+        base_dir=base_dir,
+    )
+    assert returned_filepaths == [filepaths[1]]
+
+    # Query a time period covering all granules
+    returned_filepaths = catalog.query_local_catalog(
+        PRODUCT,
+        start_time=datetime.datetime(2020, 7, 5, 0, 0, 0),
+        end_time=datetime.datetime(2020, 7, 6, 0, 0, 0),
+        base_dir=base_dir,
+    )
+    assert returned_filepaths == filepaths
+
+    # Test another version is not indexed
+    assert not catalog.is_product_cataloged(PRODUCT, version=6, base_dir=base_dir)
+
+
+def test_query_local_catalog_drop_removed_files(tmp_path):
+    """Test entries of files removed from disk are dropped from the catalog."""
+    base_dir = str(tmp_path)
+    filepaths = create_fake_files(base_dir)
+    catalog.build_local_catalog(PRODUCT, base_dir=base_dir)
+    os.remove(filepaths[0])
+    returned_filepaths = catalog.query_local_catalog(
+        PRODUCT,
+        start_time=datetime.datetime(2020, 7, 5, 0, 0, 0),
+        end_time=datetime.datetime(2020, 7, 6, 0, 0, 0),
+        base_dir=base_dir,
+    )
+    assert returned_filepaths == filepaths[1:]
+
+
+def test_refresh_local_catalog(tmp_path, mocker: MockerFixture):
+    """Test the daily directories modified outside GPM-API are indexed again."""
+    base_dir = str(tmp_path)
+    filepaths = create_fake_files(base_dir, filenames=FILENAMES[0:2])
+    dir_path = os.path.dirname(filepaths[0])
+    start_time = datetime.datetime(2020, 7, 5, 0, 0, 0)
+    end_time = datetime.datetime(2020, 7, 6, 0, 0, 0)
+    kwargs = {"product": PRODUCT, "start_time": start_time, "end_time": end_time, "base_dir": base_dir}
+    assert catalog.find_local_catalog_filepaths(**kwargs) == filepaths
+
+    # Test unchanged directories are not scanned again
+    spy = mocker.spy(catalog, "_define_catalog_record")
+    assert catalog.refresh_local_catalog(**kwargs) == 0
+    assert spy.call_count == 0
+
+    # Test files added outside GPM-API are indexed
+    filepaths.extend(create_fake_files(base_dir, filenames=FILENAMES[2:]))
+    os.utime(dir_path, (0, 0))
+    assert catalog.find_local_catalog_filepaths(**kwargs) == filepaths
+    assert spy.call_count == 3
+
+    # Test files removed outside GPM-API are dropped
+    os.remove(filepaths[0])
+    os.utime(dir_path, (1, 1))
+    assert catalog.refresh_local_catalog(**kwargs) == 1
+    assert catalog.query_local_catalog(**kwargs) == filepaths[1:]
+
+    # Test removed directories are dropped
+    for filepath in filepaths[1:]:
+        os.remove(filepath)
+    os.rmdir(dir_path)
+    assert catalog.refresh_local_catalog(**kwargs) == 1
+    assert catalog.query_local_catalog(**kwargs) == []
+    assert catalog.refresh_local_catalog(**kwargs) == 0
+
+
+def test_update_and_remove_from_local_catalog(tmp_path):
+    """Test incremental updates of the catalog."""
+    base_dir = str(tmp_path)
+    catalog.build_local_catalog(PRODUCT, base_dir=base_dir)
+    start_time = datetime.datetime(2020, 7, 5, 0, 0, 0)
+    end_time = datetime.datetime(2020, 7, 6, 0, 0, 0)
+    assert catalog.query_local_catalog(PRODUCT, start_time, end_time, base_dir=base_dir) == []
+
+    # Add files
+    filepaths = create_fake_files(base_dir)
+    catalog.update_local_catalog(filepaths[0:2], base_dir=base_dir)
+    assert catalog.query_local_catalog(PRODUCT, start_time, end_time, base_dir=base_dir) == filepaths[0:2]
+
+    # Update with files not existing on disk remove them from the catalog
+    os.remove(filepaths[0])
+    catalog.update_local_catalog(filepaths[0], base_dir=base_dir)
+    assert catalog.query_local_catalog(PRODUCT, start_time, end_time, base_dir=base_dir) == [filepaths[1]]
+
+    # Remove files from the catalog
+    catalog.remove_from_local_catalog(filepaths[1], base_dir=base_dir)
+    assert catalog.query_local_catalog(PRODUCT, start_time, end_time, base_dir=base_dir) == []
+
+
+def test_migrate_local_catalog(tmp_path):
+    """Test the catalogs created with a previous schema are upgraded."""
+    base_dir = str(tmp_path)
+    catalog_filepath = catalog.get_local_catalog_filepath(base_dir=base_dir)
+    os.makedirs(os.path.dirname(catalog_filepath))
+    connection = sqlite3.connect(catalog_filepath)
+    connection.execute(
+        "CREATE TABLE footprints (filepath TEXT NOT NULL, scan_mode TEXT NOT NULL, size INTEGER NOT NULL, "
+        "mtime REAL NOT NULL, block_size INTEGER NOT NULL, n_scans INTEGER NOT NULL, bounds BLOB NOT NULL, "
+        "PRIMARY KEY (filepath, scan_mode))",
+    )
+    connection.execute("INSERT INTO footprints VALUES ('dummy.HDF5', 'FS', 1, 1.0, 4, 10, x'00')")
+    connection.commit()
+    connection.close()
+
+    with catalog._open_catalog(base_dir=base_dir) as connection:
+        assert connection.execute("PRAGMA user_version").fetchone()[0] == catalog.CATALOG_SCHEMA_VERSION
+        columns = [row[1] for row in connection.execute("PRAGMA table_info(footprints)")]
+        assert "time_bounds" in columns
+        assert connection.execute("SELECT COUNT(*) FROM footprints").fetchone()[0] == 0
+        connection.execute("INSERT INTO footprints VALUES ('dummy.HDF5', 'FS', 1, 1.0, 4, 10, x'00', x'00')")
+
+    # Test up-to-date catalogs are not modified
+    with catalog._open_catalog(base_dir=base_dir) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM footprints").fetchone()[0] == 1
+
+
+def test_find_filepaths_with_local_catalog(tmp_path):
+    """Test find_filepaths returns the same files with and without the local catalog."""
+    base_dir = str(tmp_path)
+    filepaths = create_fake_files(base_dir)
+    kwargs = {
+        "storage": "LOCAL",
+        "product": PRODUCT,
+        "start_time": datetime.datetime(2020, 7, 5, 16, 0, 0),
+        "end_time": datetime.datetime(2020, 7, 5, 18, 0, 0),
+        "version": 7,
+        "parallel": False,
+    }
+    with gpm.config.set({"base_dir": base_dir}):
+        expected_filepaths = find_filepaths(**kwargs)
+        with gpm.config.set({"local_catalog": True}):
+            returned_filepaths = find_filepaths(**kwargs)
+            assert catalog.is_product_cataloged(PRODUCT)
+
+    assert expected_filepaths == filepaths[0:2]
+    assert returned_filepaths == expected_filepaths
+
+
+def test_find_filepaths_with_local_catalog_checks_version(tmp_path, mocker: MockerFixture):
+    """Test find_filepaths checks the version of the local catalog files as the daily directories search."""
+    from gpm.io import find
+
+    base_dir = str(tmp_path)
+    filepaths = create_fake_files(base_dir)
+    kwargs = {
+        "storage": "LOCAL",
+        "product": PRODUCT,
+        "start_time": datetime.datetime(2020, 7, 5, 16, 0, 0),
+        "end_time": datetime.datetime(2020, 7, 5, 18, 0, 0),
+        "version": 7,
+        "parallel": False,
+    }
+    spy = mocker.spy(find, "_check_correct_version")
+    with gpm.config.set({"base_dir": base_dir, "local_catalog": True}):
+        assert find_filepaths(**kwargs) == filepaths[0:2]
+        spy.assert_called_once_with(filepaths=filepaths[0:2], product=PRODUCT, version=7)
+
+        # Test multiple file versions in a daily directory raise the same error
+        mocker.patch.object(find, "get_version_from_filepaths", return_value=[6, 7])
+        with pytest.raises(ValueError, match="Multiple file versions found"):
+            find_filepaths(**kwargs)
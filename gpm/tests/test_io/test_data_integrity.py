@@ -28,10 +28,12 @@
 import datetime
 import os
 
+import numpy as np
 import pytest
 import xarray as xr
 from pytest_mock.plugin import MockerFixture
 
+import gpm
 from gpm.io import data_integrity as di
 
 
@@ -181,3 +183,98 @@ def test_check_archive_integrity(
             verbose=verbose,
         )
         assert l_corrupted == filepaths
+
+
+def test_check_file_header(tmp_path) -> None:
+    """Test the HDF5 superblock and file size check."""
+    filepath = str(tmp_path / "test.nc")
+    xr.DataArray(np.arange(1000)).to_netcdf(filepath)
+    assert di._read_hdf5_end_of_file_address(filepath) == os.path.getsize(filepath)
+    assert di._check_file_header(filepath) is False
+
+    # Test truncated file
+    with open(filepath, "r+") as f:
+        f.truncate(os.path.getsize(filepath) - 10)
+    assert di._check_file_header(filepath) is True
+
+    # Test file truncated right after the HDF5 signature
+    for n_bytes in [0, 2]:
+        with open(filepath, "r+b") as f:
+            f.truncate(len(di.HDF5_SIGNATURE) + n_bytes)
+        with pytest.raises(ValueError, match="Truncated HDF5 superblock"):
+            di._read_hdf5_end_of_file_address(filepath)
+        assert di._check_file_header(filepath) is True
+
+    # Test not an HDF5 file
+    dummy_filepath = str(tmp_path / "dummy.HDF5")
+    _write_dummy_file(dummy_filepath)
+    assert di._check_file_header(dummy_filepath) is None
+
+    # Test non-existent file
+    assert di._check_file_header(str(tmp_path / "nonexistent.HDF5")) is True
+
+
+@pytest.mark.parametrize("parallel", [True, False])
+def test_get_corrupted_filepaths_deep(tmp_path, parallel) -> None:
+    """Test the deep integrity check reading all file groups."""
+    filepaths = [str(tmp_path / f"test{i}.nc") for i in range(3)]
+    for filepath in filepaths:
+        xr.Dataset({"var": xr.DataArray(np.arange(1000))}).to_netcdf(filepath)
+        xr.Dataset({"var": xr.DataArray(np.arange(10))}).to_netcdf(filepath, group="group", mode="a")
+    dummy_filepath = str(tmp_path / "dummy.HDF5")
+    _write_dummy_file(dummy_filepath)
+    filepaths.append(dummy_filepath)
+    assert di.get_corrupted_filepaths(filepaths, deep=True, parallel=parallel) == [dummy_filepath]
+
+
+def test_integrity_manifest(tmp_path, mocker: MockerFixture) -> None:
+    """Test that the integrity manifest avoids checking unchanged files again."""
+    filepaths = [str(tmp_path / f"test{i}.nc") for i in range(2)]
+    for filepath in filepaths:
+        xr.DataArray(np.arange(1000)).to_netcdf(filepath)
+
+    spy = mocker.spy(di, "_check_file_header")
+    with gpm.config.set({"base_dir": str(tmp_path), "local_catalog": True}):
+        assert di.get_corrupted_filepaths(filepaths, parallel=False) == []
+        assert spy.call_count == 2
+
+        # Test unchanged files are not checked again
+        assert di.get_corrupted_filepaths(filepaths, parallel=False) == []
+        assert spy.call_count == 2
+
+        # Test modified files are checked again
+        with open(filepaths[1], "r+") as f:
+            f.truncate(100)
+        assert di.get_corrupted_filepaths(filepaths, parallel=False) == [filepaths[1]]
+        assert spy.call_count == 3
+
+        # Test deep checks are not satisfied by previous cheap checks
+        spy_content = mocker.spy(di, "_check_file_content")
+        assert di.get_corrupted_filepaths(filepaths, parallel=False, deep=True) == [filepaths[1]]
+        assert spy_content.call_count == 1
+        assert spy.call_count == 5
+        assert di.read_integrity_manifest(filepaths, deep=True) == {filepaths[0]: False, filepaths[1]: True}
+
+        # Test the manifest can be disabled
+        assert di.get_corrupted_filepaths(filepaths, parallel=False, use_manifest=False) == [filepaths[1]]
+        assert spy.call_count == 7
+
+
+def test_integrity_manifest_disabled_without_local_catalog(tmp_path, mocker: MockerFixture) -> None:
+    """Test that the integrity manifest is not created if the local catalog is disabled."""
+    filepath = str(tmp_path / "test.nc")
+    xr.DataArray(np.arange(1000)).to_netcdf(filepath)
+    base_dir = tmp_path / "base_dir"
+    with gpm.config.set({"base_dir": str(base_dir), "local_catalog": False}):
+        assert di.get_corrupted_filepaths([filepath], parallel=False) == []
+    assert not base_dir.exists()
+
+
+def test_integrity_manifest_unavailable(tmp_path, mocker: MockerFixture) -> None:
+    """Test that the integrity check does not fail if the manifest can not be opened."""
+    filepath = str(tmp_path / "test.nc")
+    xr.DataArray(np.arange(1000)).to_netcdf(filepath)
+    mocker.patch.object(di, "_open_catalog", side_effect=PermissionError("Read-only file system"))
+    with gpm.config.set({"base_dir": str(tmp_path), "local_catalog": True}):
+        assert di.get_corrupted_filepaths([filepath], parallel=False) == []
+        assert di.read_integrity_manifest([filepath]) == {}
@@ -28,9 +28,7 @@
 import datetime
 import os
 import platform
-from concurrent.futures import ThreadPoolExecutor
 from typing import Any
-from unittest.mock import patch
 
 import pytest
 from pytest_mock.plugin import MockerFixture
@@ -67,7 +65,7 @@ def test_construct_curl_pps_cmd(
         "curl --ipv4 --insecure -n "
         "--user '{username}:{password}' {ftps_flag} "
         "--header 'Connection: close' --connect-timeout 20 "
-        "--retry 5 --retry-delay 10 --url {remote_filepath} -o '{local_filepath}'"
+        "--retry 5 --retry-delay 10 -C - --url {remote_filepath} -o '{local_filepath}'"
     )
 
     username_pps = "test_username_pps"
@@ -150,81 +148,6 @@ def test_construct_wget_pps_cmd(
         ), f"Folder {os.path.dirname(local_filepath)} was not created"
 
 
-class TestDownloadUtility:
-    def test_get_commands_futures(self):
-        """Test _get_commands_futures."""
-        commands = ["echo 'Hello, World!'", "exit 1"]
-
-        with (
-            ThreadPoolExecutor() as executor,
-            patch("subprocess.check_call", return_value=0) as mock_check_call,
-        ):
-            futures = dl._get_commands_futures(executor, commands)
-            assert len(futures) == len(
-                commands,
-            ), "Number of futures should match number of commands"
-            # Ensure each future is for a subprocess.check_call call
-            for future in futures:
-                assert futures[future][1] in commands, "Future command should be in commands list"
-            mock_check_call.assert_called()
-
-    def test_get_list_failing_commands(self):
-        """Test _get_list_failing_commands."""
-        commands = ["echo 'Hello, World!'", "exit 1"]  # Second command simulates a failure
-
-        with ThreadPoolExecutor() as executor:
-            futures = dl._get_commands_futures(executor, commands)
-            failing_commands = dl._get_list_failing_commands(futures)
-            # Check the failing command is in the failing_commands list
-            assert commands[1] in failing_commands, "Failing command should be in the list of failed commands"
-            # Check the valid command is not in the failing_commands list
-            assert (
-                commands[0] not in failing_commands
-            ), "Successful command should not be in the list of failed commands"
-
-    def test_get_list_status_commands(self):
-        """Test _get_list_status_commands."""
-        commands = ["echo 'Hello, World!'", "exit 1"]  # Second command simulates a failure
-
-        with ThreadPoolExecutor() as executor:
-            futures = dl._get_commands_futures(executor, commands)
-            status_list = dl._get_list_status_commands(futures)
-            assert len(status_list) == len(
-                commands,
-            ), "Status list length should match number of commands"
-            # Assuming the first command does not fails, its status should be 1
-            assert status_list[0] == 1, "Status for valid command should be 1"
-            # Assuming the second command fails, its status should be 0
-            assert status_list[1] == 0, "Status for failing command should be 0"
-
-    @pytest.mark.parametrize("verbose", [True, False])
-    @pytest.mark.parametrize("progress_bar", [True, False])
-    @pytest.mark.parametrize(
-        "n_threads",
-        [0, 1, 2, 20],
-    )  # [Error, Single, Multiple Threads, n_threads > n_commands]
-    def test_run(self, mocker: MockerFixture, verbose, progress_bar, n_threads) -> None:
-        """Test run function."""
-        commands = [
-            "echo 'Hello, World!'",  # returncode: 2 (not 1)
-            "ls /nonexistent_directory",  # returncode: 2 (not 0)
-        ]
-        # subprocess.run(shlex.split("echo 'Hello, World!'"), shell=False)
-        # subprocess.run(shlex.split("ls /nonexistent_directory"), shell=False)
-
-        expected_status = [1, 0]  # [Terminated, Failed]
-
-        if progress_bar:
-            mock_tqdm = mocker.patch("tqdm.tqdm")
-
-        status = dl.run(commands, progress_bar=progress_bar, verbose=verbose, n_threads=n_threads)
-        assert status == expected_status
-
-        # Assert tqdm is called
-        if progress_bar:
-            mock_tqdm.assert_called_once_with(total=len(commands))
-
-
 class TestGetFilepathsFromFilenames:
     """Test get_filepaths_from_filenames function."""
 
@@ -306,8 +229,8 @@ def test_private_download_files(
     if platform.system() == "Windows" and transfer_tool == "WGET":
         return
 
-    # Don't actually download anything, so mock the run function
-    mocker.patch.object(dl, "run", autospec=True, return_value=None)
+    # Don't actually download anything, so mock the subprocess call
+    mocker.patch.object(dl.subprocess, "call", autospec=True, return_value=1)
 
     mock_config = {
         "username_pps": "test_username_pps",
@@ -383,6 +306,144 @@ def test_download_files(
     assert dl.download_files(filepaths=list(remote_filepaths.keys())) is None
 
 
+def test_filter_download_list(tmp_path) -> None:
+    """Test filter_download_list consider only complete files as present on disk."""
+    local_filepaths = [str(tmp_path / f"file{i}.HDF5") for i in range(3)]
+    remote_filepaths = [f"ftps://server/file{i}.HDF5" for i in range(3)]
+    # - Complete file
+    with open(local_filepaths[0], "wb") as f:
+        f.write(b"data")
+    # - Empty file
+    open(local_filepaths[1], "wb").close()
+    # - Partial file
+    with open(local_filepaths[2] + ".part", "wb") as f:
+        f.write(b"data")
+
+    new_remote_filepaths, new_local_filepaths = dl.filter_download_list(
+        remote_filepaths=remote_filepaths,
+        local_filepaths=local_filepaths,
+    )
+    assert new_local_filepaths == local_filepaths[1:]
+    assert new_remote_filepaths == remote_filepaths[1:]
+
+    # Test force_download
+    assert dl.filter_download_list(remote_filepaths, local_filepaths, force_download=True)[1] == local_filepaths
+
+
+def test_download_files_to_partial_files(tmp_path, mocker: MockerFixture) -> None:
+    """Test curl writes into partial files which are moved to the final path once completed."""
+    local_filepaths = [str(tmp_path / f"file{i}.HDF5") for i in range(2)]
+    remote_filepaths = [f"ftps://server/file{i}.HDF5" for i in range(2)]
+
+    def call(args, **kwargs):
+        # Each file is transferred while holding its download lease
+        # - First download succeeds, second is interrupted
+        cmd = " ".join(args)
+        assert ".part" in cmd
+        i = 0 if "file0" in cmd else 1
+        assert os.path.exists(local_filepaths[i] + ".lock")
+        with open(local_filepaths[i] + ".part", "wb") as f:
+            f.write(b"data")
+        return 0 if i == 0 else 1
+
+    mocker.patch.object(dl.subprocess, "call", side_effect=call)
+    with gpm.config.set({"username_pps": "user", "password_pps": "password"}):
+        status = dl._download_files(
+            remote_filepaths=remote_filepaths,
+            local_filepaths=local_filepaths,
+            storage="PPS",
+            transfer_tool="CURL",
+        )
+    assert status == [1, 0]
+    assert os.path.exists(local_filepaths[0])
+    assert not os.path.exists(local_filepaths[0] + ".part")
+    assert not os.path.exists(local_filepaths[1])
+    assert os.path.exists(local_filepaths[1] + ".part")
+    assert not any(os.path.exists(filepath + ".lock") for filepath in local_filepaths)
+
+
+def test_download_files_leased_by_another_process(tmp_path, mocker: MockerFixture) -> None:
+    """Test files downloaded by another process are awaited instead of being downloaded again."""
+    local_filepaths = [str(tmp_path / f"file{i}.HDF5") for i in range(2)]
+    remote_filepaths = [f"ftps://server/file{i}.HDF5" for i in range(2)]
+
+    # Simulate another process which has completed the download of the second file
+    # but has not released its lease yet
+    lock_filepath = local_filepaths[1] + ".lock"
+    open(lock_filepath, "w").close()
+    with open(local_filepaths[1], "wb") as f:
+        f.write(b"data")
+
+    def call(args, **kwargs):
+        assert "file0" in " ".join(args)
+        with open(local_filepaths[0] + ".part", "wb") as f:
+            f.write(b"data")
+        # The other process releases its lease
+        os.remove(lock_filepath)
+        return 0
+
+    mocker.patch.object(dl.subprocess, "call", side_effect=call)
+    with gpm.config.set({"username_pps": "user", "password_pps": "password"}):
+        status = dl._download_files(
+            remote_filepaths=remote_filepaths,
+            local_filepaths=local_filepaths,
+            storage="PPS",
+            transfer_tool="CURL",
+        )
+    assert status == [1, -1]
+    assert not os.path.exists(local_filepaths[0] + ".lock")
+
+
+def test_download_files_with_local_archive_quota(tmp_path, mocker: MockerFixture) -> None:
+    """Test the least recently used files are removed once the local archive exceeds the quota."""
+    product_dir = tmp_path / "GPM" / "RS" / "V07" / "RADAR" / "2A-DPR" / "2020" / "07"
+    filename = "2A.GPM.DPR.V9-20211125.202007{day:02d}-S000000-E013000.0360{day:02d}.V07A.HDF5"
+    old_filepath = str(product_dir / "01" / filename.format(day=1))
+    os.makedirs(os.path.dirname(old_filepath))
+    with open(old_filepath, "wb") as f:
+        f.write(b"0" * 100)
+    local_filepaths = [str(product_dir / "02" / filename.format(day=2))]
+
+    def call(args, **kwargs):
+        os.makedirs(os.path.dirname(local_filepaths[0]), exist_ok=True)
+        with open(local_filepaths[0] + ".part", "wb") as f:
+            f.write(b"0" * 100)
+        return 0
+
+    mocker.patch.object(dl.subprocess, "call", side_effect=call)
+    config = {"base_dir": str(tmp_path), "local_archive_quota": 150, "username_pps": "user", "password_pps": "pwd"}
+    with gpm.config.set(config):
+        status = dl._download_files(
+            remote_filepaths=["ftps://server/file.HDF5"],
+            local_filepaths=local_filepaths,
+            storage="PPS",
+            transfer_tool="CURL",
+        )
+    assert status == [1]
+    assert os.path.exists(local_filepaths[0])
+    assert not os.path.exists(old_filepath)
+
+
+def test_download_files_transfer_summary(tmp_path, mocker: MockerFixture, capsys) -> None:
+    """Test a single summary of the native transfers is reported."""
+    local_filepaths = [str(tmp_path / f"file{i}.HDF5") for i in range(3)]
+    remote_filepaths = [f"ftps://server/file{i}.HDF5" for i in range(3)]
+    result = {"status": 1, "n_bytes": 2_000_000, "elapsed_time": 1, "error": None}
+    mock_transfer = mocker.patch.object(dl, "transfer_file", return_value=result)
+    with gpm.config.set({"username_pps": "user", "password_pps": "password"}):
+        status = dl._download_files(
+            remote_filepaths=remote_filepaths,
+            local_filepaths=local_filepaths,
+            storage="PPS",
+            transfer_tool="NATIVE",
+            progress_bar=False,
+            verbose=True,
+        )
+    assert status == [1, 1, 1]
+    assert mock_transfer.call_count == 3
+    assert capsys.readouterr().out.count("3/3 files downloaded (6.0 MB") == 1
+
+
 @pytest.mark.parametrize("storage", ["PPS", "GES_DISC"])
 def test__download_daily_data(
     versions: list[str],
@@ -29,6 +29,7 @@
 import datetime
 from typing import Any
 
+import pandas as pd
 import pytest
 
 from gpm.io.info import (
@@ -38,6 +39,7 @@ from gpm.io.info import (
     get_end_time_from_filepaths,
     get_granule_from_filepaths,
     get_info_from_filepath,
+    get_info_from_filepaths,
     get_product_from_filepaths,
     get_season,
     get_start_end_time_from_filepaths,
@@ -141,6 +143,54 @@ def test_invalid_filepaths():
         get_info_from_filepath(123)
 
 
+def test_get_info_from_filepaths(
+    remote_filepaths: dict[str, dict[str, Any]],
+) -> None:
+    """Test get_info_from_filepaths returns the same information of get_info_from_filepath."""
+    filepaths = list(remote_filepaths.keys())
+    df = get_info_from_filepaths(filepaths)
+    assert df["filepath"].tolist() == filepaths
+    assert list(df.columns) == ["filepath", *FILE_KEYS]
+    assert df["start_time"].dtype == "datetime64[ns]"
+    for i, filepath in enumerate(filepaths):
+        info_dict = get_info_from_filepath(filepath)
+        row = df.iloc[i]
+        for key in FILE_KEYS:
+            if key in info_dict:
+                assert row[key] == info_dict[key]
+            else:
+                assert pd.isna(row[key])
+
+
+def test_get_info_from_filepaths_invalid_filepaths(
+    remote_filepaths: dict[str, dict[str, Any]],
+) -> None:
+    """Test get_info_from_filepaths with unparsable file paths."""
+    filepaths = list(remote_filepaths.keys())
+    invalid_filepaths = [
+        "invalid_filepath",
+        # Invalid JAXA product type
+        "GPMCOR_KAR_2007050002_0135_036081_1B😵_DAB_07A.h5",
+        # Unknown product
+        "😥.GPM.DPR.V9-20211125.20200705-S170044-E183317.036092.V07A.HDF5",
+        # Invalid time
+        "2A.GPM.DPR.V9-20211125.20200705-S250044-E183317.036092.V07A.HDF5",
+    ]
+    for invalid_filepath in invalid_filepaths:
+        with pytest.raises(ValueError):
+            get_info_from_filepaths([*filepaths, invalid_filepath])
+
+    df = get_info_from_filepaths(invalid_filepaths + filepaths, ignore_errors=True)
+    assert df["filepath"].tolist() == filepaths
+
+    # Test empty list
+    assert len(get_info_from_filepaths([])) == 0
+
+    # Filepath not a string
+    with pytest.raises(TypeError):
+        get_info_from_filepaths([123])
+
+
 def test_check_groups():
     """Test check_groups function."""
     valid_groups = ["product_level", "satellite", "sensor", "year"]
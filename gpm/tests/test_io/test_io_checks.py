@@ -218,6 +218,9 @@ def test_check_transfer_tool():
     transfer_tool = "CURL"  # "WGET" is not mandatory
     assert checks.check_transfer_tool(transfer_tool=transfer_tool) == transfer_tool
 
+    # Assert the native backend is always available
+    assert checks.check_transfer_tool(transfer_tool="native") == "NATIVE"
+
     # Test the function with an invalid transfer tool
     invalid_tool = "invalid_tool"
     with pytest.raises(ValueError) as exc_info:
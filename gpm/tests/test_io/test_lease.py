@@ -0,0 +1,146 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module test the download leases shared between processes."""
+import os
+import time
+
+import pytest
+
+from gpm.io import lease
+from gpm.io.local import is_temporary_filepath
+
+
+def test_acquire_release_download_lease(tmp_path):
+    """Test a download lease can be held by a single process at a time."""
+    filepath = str(tmp_path / "dir" / "file.HDF5")
+    assert lease.acquire_download_lease(filepath)
+    assert os.path.exists(filepath + ".lock")
+    assert not lease.acquire_download_lease(filepath)
+
+    lease.release_download_lease(filepath)
+    assert not os.path.exists(filepath + ".lock")
+    assert lease.acquire_download_lease(filepath)
+
+    # Test releasing twice does not raise
+    lease.release_download_lease(filepath)
+    lease.release_download_lease(filepath)
+
+
+def test_reclaim_download_lease(tmp_path):
+    """Test only inactive download leases are reclaimed."""
+    filepath = str(tmp_path / "file.HDF5")
+    assert not lease.is_lease_stale(filepath, timeout=10)
+    assert not lease.reclaim_download_lease(filepath, timeout=10)
+
+    assert lease.acquire_download_lease(filepath)
+    assert not lease.is_lease_stale(filepath, timeout=10)
+    assert not lease.reclaim_download_lease(filepath, timeout=10)
+
+    # Test an old lease with a recently updated partial file is active
+    old_time = time.time() - 100
+    os.utime(filepath + ".lock", (old_time, old_time))
+    with open(filepath + ".part", "wb") as f:
+        f.write(b"data")
+    assert not lease.is_lease_stale(filepath, timeout=10)
+
+    # Test an inactive lease is reclaimed
+    os.utime(filepath + ".part", (old_time, old_time))
+    assert lease.is_lease_stale(filepath, timeout=10)
+    assert lease.reclaim_download_lease(filepath, timeout=10)
+    assert not os.path.exists(filepath + ".lock")
+    assert os.listdir(tmp_path) == ["file.HDF5.part"]
+    assert lease.acquire_download_lease(filepath)
+
+
+@pytest.mark.parametrize("completed", [True, False])
+def test_wait_for_download_leases(tmp_path, completed):
+    """Test waiting for files downloaded by other processes."""
+    filepaths = [str(tmp_path / f"file{i}.HDF5") for i in range(2)]
+    assert lease.acquire_download_lease(filepaths[0])
+    old_time = time.time() - 100
+    os.utime(filepaths[0] + ".lock", (old_time, old_time))
+    if completed:
+        with open(filepaths[0], "wb") as f:
+            f.write(b"data")
+
+    # The stale lease is reclaimed, the file without lease is not awaited
+    assert lease.wait_for_download_leases(filepaths, timeout=10, poll_interval=0) == [completed, False]
+    assert not os.path.exists(filepaths[0] + ".lock")
+
+
+def test_release_download_lease_of_another_process(tmp_path):
+    """Test a lease reclaimed and acquired by another process is not released."""
+    filepath = str(tmp_path / "file.HDF5")
+    assert lease.acquire_download_lease(filepath)
+    # Another process reclaims the lease and acquires it
+    with open(filepath + ".lock", "w") as f:
+        f.write("otherhost 1 owner")
+    assert not lease.is_download_lease_owner(filepath)
+    assert not lease.refresh_download_lease(filepath)
+    lease.release_download_lease(filepath)
+    assert os.path.exists(filepath + ".lock")
+
+
+def test_reclaim_download_lease_acquired_in_the_meantime(tmp_path, monkeypatch):
+    """Test a lease acquired after the staleness check is not reclaimed."""
+    filepath = str(tmp_path / "file.HDF5")
+    assert lease.acquire_download_lease(filepath)
+    old_time = time.time() - 100
+    os.utime(filepath + ".lock", (old_time, old_time))
+
+    # Another process reclaims the stale lease and acquires a new lease after the staleness check
+    def is_lease_stale(filepath, timeout):
+        os.remove(filepath + ".lock")
+        with open(filepath + ".lock", "w") as f:
+            f.write("otherhost 1 owner")
+        return True
+
+    # Test the renamed lease is a temporary file
+    os_rename = os.rename
+
+    def rename(src, dst):
+        assert is_temporary_filepath(dst)
+        os_rename(src, dst)
+
+    monkeypatch.setattr(lease, "is_lease_stale", is_lease_stale)
+    monkeypatch.setattr(lease.os, "rename", rename)
+    assert not lease.reclaim_download_lease(filepath, timeout=10)
+    with open(filepath + ".lock") as f:
+        assert f.read() == "otherhost 1 owner"
+    assert os.listdir(tmp_path) == ["file.HDF5.lock"]
+
+
+def test_hold_download_lease(tmp_path):
+    """Test the lease is kept alive while downloading and released afterwards."""
+    filepath = str(tmp_path / "file.HDF5")
+    assert lease.acquire_download_lease(filepath)
+    old_time = time.time() - 100
+    os.utime(filepath + ".lock", (old_time, old_time))
+    with lease.hold_download_lease(filepath, interval=0.01):
+        time.sleep(0.1)
+        assert not lease.is_lease_stale(filepath, timeout=10)
+    assert not os.path.exists(filepath + ".lock")
@@ -0,0 +1,180 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module test the caching of the NASA servers directory listings."""
+import datetime
+import time
+
+import pytest
+from pytest_mock.plugin import MockerFixture
+
+import gpm
+from gpm.io import ges_disc, listing_cache, pps
+from gpm.io.checks import get_current_utc_time
+from gpm.io.listing_cache import (
+    clear_listing_cache,
+    get_cached_listing,
+    get_listing_ttl,
+    invalidate_cached_listing,
+    read_cached_listing,
+)
+
+URL = "https://arthurhouhttps.pps.eosdis.nasa.gov/text/gpmdata/2020/07/05/radar/"
+FILEPATHS = [
+    "/gpmdata/2020/07/05/radar/2A.GPM.DPR.V9-20211125.20200705-S170044-E183317.036092.V07A.HDF5",
+    "/gpmdata/2020/07/05/radar/2A.GPM.DPR.V9-20211125.20200705-S183318-E200550.036093.V07A.HDF5",
+]
+
+
+@pytest.fixture
+def listing_cache_dir(tmp_path):
+    """Enable the listing cache in a temporary directory."""
+    cache_dir = tmp_path / "listings"
+    with gpm.config.set({"listing_cache_dir": str(cache_dir)}):
+        yield cache_dir
+
+
+def test_cache_disabled(mocker: MockerFixture) -> None:
+    """Test that the server is queried at each call if the cache is disabled."""
+    list_function = mocker.MagicMock(return_value=FILEPATHS)
+    with gpm.config.set({"listing_cache_dir": None}):
+        assert get_cached_listing(URL, list_function=list_function) == FILEPATHS
+        assert get_cached_listing(URL, list_function=list_function) == FILEPATHS
+    assert list_function.call_count == 2
+
+
+def test_get_cached_listing(mocker: MockerFixture, listing_cache_dir) -> None:
+    """Test that a cached listing is reused until it expires."""
+    list_function = mocker.MagicMock(return_value=FILEPATHS)
+    assert get_cached_listing(URL, list_function=list_function, ttl=60) == FILEPATHS
+    assert get_cached_listing(URL.rstrip("/"), list_function=list_function, ttl=60) == FILEPATHS
+    assert list_function.call_count == 1
+
+    # Test listing expiration
+    mocker.patch.object(time, "time", return_value=time.time() + 120)
+    assert read_cached_listing(URL, ttl=60) is None
+    assert read_cached_listing(URL, ttl=None) == FILEPATHS
+    assert get_cached_listing(URL, list_function=list_function, ttl=60) == FILEPATHS
+    assert list_function.call_count == 2
+
+
+def test_errors_are_not_cached(mocker: MockerFixture, listing_cache_dir) -> None:
+    """Test that failing listings are not cached."""
+    list_function = mocker.MagicMock(side_effect=ValueError("The PPS server is currently unavailable."))
+    with pytest.raises(ValueError):
+        get_cached_listing(URL, list_function=list_function)
+    assert read_cached_listing(URL) is None
+
+
+def test_offline_mode(mocker: MockerFixture, listing_cache_dir) -> None:
+    """Test that the offline mode only uses the cached listings."""
+    list_function = mocker.MagicMock(return_value=FILEPATHS)
+    with gpm.config.set({"listing_cache_offline": True}):
+        with pytest.raises(ValueError, match="listing cache"):
+            get_cached_listing(URL, list_function=list_function)
+        assert list_function.call_count == 0
+
+    get_cached_listing(URL, list_function=list_function, ttl=60)
+    mocker.patch.object(time, "time", return_value=time.time() + 120)
+    with gpm.config.set({"listing_cache_offline": True}):
+        assert get_cached_listing(URL, list_function=list_function, ttl=60) == FILEPATHS
+    assert list_function.call_count == 1
+
+
+def test_invalidate_cached_listing(mocker: MockerFixture, listing_cache_dir) -> None:
+    """Test removal of cached listings."""
+    list_function = mocker.MagicMock(return_value=FILEPATHS)
+    other_url = URL.replace("radar", "1B")
+    get_cached_listing(URL, list_function=list_function)
+    get_cached_listing(other_url, list_function=list_function)
+
+    invalidate_cached_listing(URL)
+    assert read_cached_listing(URL) is None
+    assert read_cached_listing(other_url) == FILEPATHS
+
+    clear_listing_cache()
+    assert read_cached_listing(other_url) is None
+
+
+def test_get_listing_ttl() -> None:
+    """Test the listing time to live depends on the product type and date."""
+    old_date = datetime.date(2020, 7, 5)
+    recent_date = get_current_utc_time().date()
+    with gpm.config.set({"listing_cache_ttl": 300}):
+        assert get_listing_ttl(product_type="RS", date=old_date) is None
+        assert get_listing_ttl(product_type="RS", date=recent_date) == 300
+        assert get_listing_ttl(product_type="NRT", date=old_date) == 300
+        assert get_listing_ttl(product_type="NRT", date=recent_date) == 300
+    assert listing_cache.RS_LISTING_LATENCY_DAYS > 0
+
+
+def test_pps_file_list_cache(mocker: MockerFixture, listing_cache_dir) -> None:
+    """Test the PPS directory listing is retrieved from the cache."""
+    mock_list = mocker.patch.object(pps, "_try_get_pps_file_list", return_value=FILEPATHS)
+    kwargs = {
+        "url_product_dir": URL,
+        "product": "2A-DPR",
+        "date": datetime.date(2020, 7, 5),
+        "version": 7,
+        "verbose": False,
+    }
+    assert pps._get_pps_file_list(**kwargs) == FILEPATHS
+    assert pps._get_pps_file_list(**kwargs) == FILEPATHS
+    assert mock_list.call_count == 1
+
+    # Test offline mode error is propagated
+    clear_listing_cache()
+    with gpm.config.set({"listing_cache_offline": True}), pytest.raises(ValueError, match="listing cache"):
+        pps._get_pps_file_list(**kwargs)
+
+
+def test_empty_directory_listing_cache(mocker: MockerFixture, listing_cache_dir) -> None:
+    """Test the listings of empty directories are cached."""
+    mock_list = mocker.patch.object(pps, "_try_get_pps_file_list", side_effect=ValueError("No data found on PPS."))
+    kwargs = {
+        "url_product_dir": URL,
+        "product": "2A-DPR",
+        "date": datetime.date(2020, 7, 5),
+        "version": 7,
+        "verbose": False,
+    }
+    assert pps._get_pps_file_list(**kwargs) == []
+    assert pps._get_pps_file_list(**kwargs) == []
+    assert mock_list.call_count == 1
+    # Test the empty listing is available offline
+    with gpm.config.set({"listing_cache_offline": True}):
+        assert pps._get_pps_file_list(**kwargs) == []
+
+    # Test GES DISC empty directories
+    kwargs["url_product_dir"] = "https://gpm2.gesdisc.eosdis.nasa.gov/data/GPM_L2/GPM_2ADPR.07/2020/187"
+    mock_list = mocker.patch.object(
+        ges_disc,
+        "_get_ges_disc_list_path",
+        side_effect=ValueError("The GES DISC directory is empty."),
+    )
+    assert ges_disc._get_ges_disc_file_list(**kwargs) == []
+    assert ges_disc._get_ges_disc_file_list(**kwargs) == []
+    assert mock_list.call_count == 1
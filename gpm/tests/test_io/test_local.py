@@ -108,6 +108,49 @@ def test_get_local_filepaths(tmp_path):
         )
         assert returned_filepaths == sorted(expected_filepaths)
 
+        # Test files being downloaded are not returned
+        for filename in ["file3.HDF5.part", "file3.HDF5.lock"]:
+            create_fake_file(
+                base_dir=base_dir,
+                filename=filename,
+                product=product,
+                product_type=product_type,
+                version=version,
+            )
+        returned_filepaths = local.get_local_filepaths(
+            product=product,
+            product_type=product_type,
+            version=version,
+        )
+        assert returned_filepaths == sorted(expected_filepaths)
+        returned_filepaths = local.get_local_daily_filepaths(
+            product=product,
+            product_type=product_type,
+            version=version,
+            date=datetime.date(2022, 1, 1),
+        )
+        assert returned_filepaths == sorted(expected_filepaths)
+
+
+def test_finalize_partial_file(tmp_path):
+    """Test partial files are moved to their final path only once completed."""
+    filepath = str(tmp_path / "file.HDF5")
+    partial_filepath = local.get_partial_filepath(filepath)
+    assert local.is_partial_filepath(partial_filepath)
+    assert not local.is_partial_filepath(filepath)
+
+    # Test empty partial file
+    open(partial_filepath, "wb").close()
+    assert not local.finalize_partial_file(filepath)
+    assert not local.is_complete_local_file(filepath)
+
+    # Test completed partial file
+    with open(partial_filepath, "wb") as f:
+        f.write(b"data")
+    assert local.finalize_partial_file(filepath)
+    assert local.is_complete_local_file(filepath)
+    assert not os.path.exists(partial_filepath)
+
 
 def test__get_local_dir_pattern(
     products: list[str],
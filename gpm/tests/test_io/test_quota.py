@@ -0,0 +1,234 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module test the local archive quota."""
+import datetime
+import os
+import time
+
+import pytest
+
+import gpm
+from gpm.io import quota
+from gpm.io.catalog import get_local_catalog_filepath
+from gpm.utils.warnings import GPM_Warning
+
+FILENAME = "2A.GPM.DPR.V9-20211125.202007{day:02d}-S000000-E013000.0360{day:02d}.V07A.HDF5"
+
+
+def create_archive_file(base_dir, day, size=100, mtime=None):
+    """Create a fake 2A-DPR granule in the local archive."""
+    dir_path = os.path.join(base_dir, "GPM", "RS", "V07", "RADAR", "2A-DPR", "2020", "07", f"{day:02d}")
+    os.makedirs(dir_path, exist_ok=True)
+    filepath = os.path.join(dir_path, FILENAME.format(day=day))
+    with open(filepath, "wb") as f:
+        f.write(b"0" * size)
+    mtime = time.time() - 1000 + day if mtime is None else mtime
+    os.utime(filepath, (mtime, mtime))
+    return filepath
+
+
+def test_get_local_archive_quota():
+    """Test the quota can be specified in bytes or with a human readable string."""
+    with gpm.config.set({"local_archive_quota": None}):
+        assert quota.get_local_archive_quota() is None
+    with gpm.config.set({"local_archive_quota": 10}):
+        assert quota.get_local_archive_quota() == 10
+    with gpm.config.set({"local_archive_quota": "2KB"}):
+        assert quota.get_local_archive_quota() == 2048
+    with gpm.config.set({"local_archive_quota": "dummy"}), pytest.raises(ValueError):
+        quota.get_local_archive_quota()
+
+
+def test_enforce_local_archive_quota_mirror_files(tmp_path):
+    """Test the mirror files of the granules are counted in the quota and removed with the granules."""
+    from gpm.io.catalog import _open_catalog
+    from gpm.io.local import get_mirror_filepath
+
+    base_dir = str(tmp_path)
+    filepaths = [create_archive_file(base_dir, day=day) for day in [1, 2]]
+    mirror_filepaths = [
+        get_mirror_filepath(filepaths[0], dirname="OPTIMIZED", extension=".FS.nc", base_dir=base_dir),
+        get_mirror_filepath(filepaths[0], dirname="OPTIMIZED", extension=".HS.nc.part", base_dir=base_dir),
+        get_mirror_filepath(filepaths[0], dirname="REFERENCES", extension=".FS.json", base_dir=base_dir),
+    ]
+    for mirror_filepath in mirror_filepaths:
+        os.makedirs(os.path.dirname(mirror_filepath), exist_ok=True)
+        with open(mirror_filepath, "wb") as f:
+            f.write(b"0" * 50)
+    with _open_catalog(base_dir=base_dir) as connection:
+        connection.execute("INSERT INTO footprints VALUES (?, 'FS', 1, 1.0, 4, 10, x'00', x'00')", (filepaths[0],))
+
+    with gpm.config.set({"base_dir": base_dir}):
+        assert quota.get_local_archive_size() == 350
+        assert quota.enforce_local_archive_quota(quota=200) == [filepaths[0]]
+        assert quota.get_local_archive_size() == 100
+    assert not any(os.path.exists(filepath) for filepath in mirror_filepaths)
+    assert not os.path.exists(os.path.join(base_dir, "GPM", "OPTIMIZED", "RS"))
+    with _open_catalog(base_dir=base_dir) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM footprints").fetchone()[0] == 0
+
+
+def test_record_local_access(tmp_path):
+    """Test the access times are recorded only if the quota is enabled."""
+    base_dir = str(tmp_path)
+    filepaths = [create_archive_file(base_dir, day=day) for day in [1, 2]]
+    with gpm.config.set({"base_dir": base_dir, "local_archive_quota": None}):
+        quota.record_local_access(filepaths)
+        assert not os.path.exists(get_local_catalog_filepath())
+
+    with gpm.config.set({"base_dir": base_dir, "local_archive_quota": 150}):
+        # Accessing the oldest file protects it from the eviction
+        quota.record_local_access(filepaths[0])
+        assert quota.enforce_local_archive_quota() == [filepaths[1]]
+        assert quota.get_local_archive_size() == 100
+
+
+def test_enforce_local_archive_quota(tmp_path):
+    """Test the least recently used files are removed until the archive size is below the quota."""
+    base_dir = str(tmp_path)
+    filepaths = [create_archive_file(base_dir, day=day) for day in range(1, 6)]
+    partial_filepath = create_archive_file(base_dir, day=6)
+    os.rename(partial_filepath, partial_filepath + ".part")
+    with gpm.config.set({"base_dir": base_dir}):
+        assert quota.get_local_archive_size() == 600
+
+        # Test without quota
+        assert quota.enforce_local_archive_quota() == []
+
+        # Test the archive below the quota
+        assert quota.enforce_local_archive_quota(quota="1KB") == []
+
+        # Test eviction of the oldest files, excluding the protected files
+        evicted_filepaths = quota.enforce_local_archive_quota(quota=350, protected_filepaths=[filepaths[0]])
+        assert evicted_filepaths == filepaths[1:4]
+        assert [os.path.exists(filepath) for filepath in filepaths] == [True, False, False, False, True]
+        assert os.path.exists(partial_filepath + ".part")
+
+        # Test the empty directories are removed
+        assert not os.path.exists(os.path.dirname(filepaths[1]))
+        assert os.path.exists(os.path.join(base_dir, "GPM", "RS"))
+
+        # Test a warning is raised if the quota can not be respected
+        with pytest.warns(GPM_Warning):
+            evicted_filepaths = quota.enforce_local_archive_quota(quota=50, protected_filepaths=[filepaths[0]])
+        assert evicted_filepaths == [filepaths[4]]
+
+
+def test_enforce_local_archive_quota_with_local_catalog(tmp_path, mocker):
+    """Test the granules sizes are read from the local catalog without searching the local archive."""
+    from gpm.io.catalog import _open_catalog, update_local_catalog
+
+    base_dir = str(tmp_path)
+    filepaths = [create_archive_file(base_dir, day=day) for day in range(1, 4)]
+    with gpm.config.set({"base_dir": base_dir, "local_catalog": True}):
+        update_local_catalog(filepaths)
+        # Granules not indexed in the catalog are not accounted
+        create_archive_file(base_dir, day=4)
+        mocker.patch.object(quota, "search_leaf_files", side_effect=AssertionError("Local archive searched"))
+        assert quota.get_local_archive_size() == 300
+        assert quota.enforce_local_archive_quota(quota=200) == [filepaths[0]]
+        assert not os.path.exists(filepaths[0])
+        with _open_catalog() as connection:
+            rows = connection.execute("SELECT filepath FROM granules ORDER BY filepath").fetchall()
+        assert [row[0] for row in rows] == filepaths[1:]
+
+
+def test_pinned_files_are_not_evicted(tmp_path):
+    """Test the files of pinned products periods are kept on disk."""
+    base_dir = str(tmp_path)
+    filepaths = [create_archive_file(base_dir, day=day) for day in range(1, 5)]
+    with gpm.config.set({"base_dir": base_dir}):
+        quota.pin_local_product("2A-DPR", start_time="2020-07-01 00:00:00", end_time="2020-07-02 00:30:00")
+        # Pins of other products or versions are not considered
+        quota.pin_local_product("2A-DPR", version=6)
+        quota.pin_local_product("1B-Ku")
+
+        evicted_filepaths = quota.enforce_local_archive_quota(quota=250)
+        assert evicted_filepaths == filepaths[2:4]
+
+        # Test pinning the entire product
+        quota.pin_local_product("2A-DPR")
+        with pytest.warns(GPM_Warning):
+            assert quota.enforce_local_archive_quota(quota=0) == []
+
+
+def test_pin_unpin_local_product(tmp_path):
+    """Test pins definition and removal."""
+    with gpm.config.set({"base_dir": str(tmp_path)}):
+        quota.pin_local_product("2A-DPR")
+        quota.pin_local_product("2A-DPR", start_time="2020-07-01 00:00:00", end_time="2020-07-02 00:00:00")
+        quota.pin_local_product("2A-DPR", product_type="NRT")
+        pins = quota.get_local_pins()
+        assert len(pins) == 3
+        assert pins[0]["product_type"] == "NRT"
+        assert pins[0]["version"] == 0
+        assert pins[1] == {
+            "product": "2A-DPR",
+            "product_type": "RS",
+            "version": 7,
+            "start_time": None,
+            "end_time": None,
+        }
+        assert pins[2]["start_time"] == datetime.datetime(2020, 7, 1)
+
+        # Test removal of a single pin
+        quota.unpin_local_product("2A-DPR", start_time="2020-07-01 00:00:00", end_time="2020-07-02 00:00:00")
+        assert len(quota.get_local_pins()) == 2
+
+        # Test removal of all pins of a product
+        quota.pin_local_product("2A-DPR", start_time="2020-07-01 00:00:00", end_time="2020-07-02 00:00:00")
+        quota.unpin_local_product("2A-DPR")
+        assert len(quota.get_local_pins()) == 1
+
+        # Test invalid pins
+        with pytest.raises(ValueError):
+            quota.pin_local_product("2A-DPR", start_time="2020-07-02 00:00:00", end_time="2020-07-01 00:00:00")
+        with pytest.raises(ValueError):
+            quota.pin_local_product("invalid")
+
+
+def test_local_archive_quota_request(tmp_path, mocker):
+    """Test the quota is enforced once at the end of a request, without removing the request files."""
+    base_dir = str(tmp_path)
+    old_filepath = create_archive_file(base_dir, day=1)
+    mock_enforce = mocker.spy(quota, "enforce_local_archive_quota")
+    with gpm.config.set({"base_dir": base_dir, "local_archive_quota": 150}):
+        with quota.local_archive_quota_request():
+            # Files of the request downloaded on different days
+            filepaths = [create_archive_file(base_dir, day=day) for day in [2, 3]]
+            quota.update_local_archive_quota(filepaths[:1], status=[1])
+            with quota.local_archive_quota_request():
+                quota.update_local_archive_quota(filepaths[1:], status=[1])
+            assert mock_enforce.call_count == 0
+        assert mock_enforce.call_count == 1
+        assert not os.path.exists(old_filepath)
+        assert all(os.path.exists(filepath) for filepath in filepaths)
+
+        # Test the quota is enforced immediately outside a request
+        quota.update_local_archive_quota(filepaths[1:], status=[1])
+        assert mock_enforce.call_count == 2
+        assert not os.path.exists(filepaths[0])
@@ -0,0 +1,262 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module test the asyncio download scheduler."""
+import asyncio
+import contextvars
+import datetime
+import glob
+import os
+import time
+
+import pytest
+from pytest_mock.plugin import MockerFixture
+
+import gpm
+from gpm.io import download as dl
+from gpm.io import scheduler
+from gpm.io.scheduler import AdaptiveHostLimiter, download_archive_async, run_coroutine
+
+PPS_DIR = "ftps://arthurhouftps.pps.eosdis.nasa.gov/gpmdata/{date:%Y/%m/%d}/radar/"
+FILENAME = "2A.GPM.DPR.V9-20211125.{date:%Y%m%d}-S{start}-E{end}.0{orbit}.V07A.HDF5"
+
+
+def _get_daily_remote_filepaths(date):
+    """Return two fake PPS 2A-DPR granules per day."""
+    orbit = 36000 + 2 * date.day
+    return [
+        PPS_DIR.format(date=date) + FILENAME.format(date=date, start="000000", end="013000", orbit=orbit),
+        PPS_DIR.format(date=date) + FILENAME.format(date=date, start="013001", end="030000", orbit=orbit + 1),
+    ]
+
+
+def _mock_find_daily_filepaths(storage, date, product, product_type, version, **kwargs):
+    return _get_daily_remote_filepaths(date), [7]
+
+
+def _mock_transfer_file(remote_filepath, local_filepath, storage, username, password):
+    if remote_filepath.endswith("036011.V07A.HDF5"):
+        return {"status": 0, "n_bytes": 0, "elapsed_time": 0.1, "error": "Failure"}
+    os.makedirs(os.path.dirname(local_filepath), exist_ok=True)
+    with open(local_filepath, "wb") as f:
+        f.write(b"data")
+    return {"status": 1, "n_bytes": 4, "elapsed_time": 0.1, "error": None}
+
+
+class TestAdaptiveHostLimiter:
+    def test_increase_while_throughput_improves(self):
+        limiter = AdaptiveHostLimiter(initial_limit=2, max_limit=4)
+        limiter.record_transfer(success=True, n_bytes=100, now=limiter._window_start + 1)
+        assert limiter.limit == 2
+        limiter.record_transfer(success=True, n_bytes=100, now=limiter._window_start + 1)
+        assert limiter.limit == 3
+        # Limit does not exceed max_limit
+        for _ in range(10):
+            limiter.record_transfer(success=True, n_bytes=1000, now=limiter._window_start + 1)
+        assert limiter.limit == 4
+
+    def test_decrease_when_throughput_drops(self):
+        limiter = AdaptiveHostLimiter(initial_limit=1, max_limit=4)
+        limiter.record_transfer(success=True, n_bytes=1000, now=limiter._window_start + 1)
+        assert limiter.limit == 2
+        for _ in range(2):
+            limiter.record_transfer(success=True, n_bytes=10, now=limiter._window_start + 1)
+        assert limiter.limit == 1
+
+    def test_decrease_on_error(self):
+        limiter = AdaptiveHostLimiter(initial_limit=8, max_limit=16)
+        limiter.record_transfer(success=False)
+        assert limiter.limit == 4
+        for _ in range(5):
+            limiter.record_transfer(success=False)
+        assert limiter.limit == 1
+
+    def test_acquire_respects_limit(self):
+        async def run():
+            limiter = AdaptiveHostLimiter(initial_limit=1, max_limit=1)
+            await limiter.acquire()
+            waiter = asyncio.ensure_future(limiter.acquire())
+            await asyncio.sleep(0)
+            assert not waiter.done()
+            await limiter.release(success=True, n_bytes=1)
+            await asyncio.wait_for(waiter, timeout=1)
+            assert limiter.n_active == 1
+
+        run_coroutine(run())
+
+
+def test_download_archive_async(tmp_path, mocker: MockerFixture) -> None:
+    """Test the scheduler downloads the files of all days and reports the failures."""
+    mocker.patch.object(scheduler, "find_daily_filepaths", side_effect=_mock_find_daily_filepaths)
+    mocker.patch.object(scheduler, "transfer_file", side_effect=_mock_transfer_file)
+    mocker.patch.object(scheduler, "_get_storage_username_password", return_value=("user", "password"))
+    mock_invalidate = mocker.patch.object(scheduler, "_invalidate_daily_listing")
+    with gpm.config.set({"base_dir": str(tmp_path)}):
+        results = run_coroutine(
+            download_archive_async(
+                product="2A-DPR",
+                start_time=datetime.datetime(2020, 7, 5, 0, 0, 0),
+                end_time=datetime.datetime(2020, 7, 6, 23, 0, 0),
+                max_concurrency=3,
+            ),
+        )
+        assert len(results) == 6
+        status = {os.path.basename(result["local_filepath"]): result["status"] for result in results}
+        assert sorted(status.values()) == [0, 1, 1, 1, 1, 1]
+        assert all(result["version"] == 7 for result in results)
+        mock_invalidate.assert_called_once()
+        assert mock_invalidate.call_args.kwargs["date"] == datetime.datetime(2020, 7, 5)
+
+        # Test files already on disk are not downloaded again
+        results = run_coroutine(
+            download_archive_async(
+                product="2A-DPR",
+                start_time=datetime.datetime(2020, 7, 5, 0, 0, 0),
+                end_time=datetime.datetime(2020, 7, 6, 23, 0, 0),
+            ),
+        )
+        assert sorted(result["status"] for result in results) == [-1, -1, -1, -1, -1, 0]
+
+
+def test_download_archive_async_stale_lease(tmp_path, mocker: MockerFixture) -> None:
+    """Test the scheduler downloads the files whose lease has been abandoned by another process."""
+    mocker.patch.object(scheduler, "find_daily_filepaths", side_effect=_mock_find_daily_filepaths)
+    mock_transfer = mocker.patch.object(scheduler, "transfer_file", side_effect=_mock_transfer_file)
+    mocker.patch.object(scheduler, "_get_storage_username_password", return_value=("user", "password"))
+    mocker.patch.object(scheduler, "_invalidate_daily_listing")
+    with gpm.config.set({"base_dir": str(tmp_path), "download_lease_timeout": 10}):
+        # Simulate a process which died while downloading the first granule
+        filename = os.path.basename(_get_daily_remote_filepaths(datetime.datetime(2020, 7, 6))[0])
+        product_dir = tmp_path / "GPM" / "RS" / "V07" / "RADAR" / "2A-DPR" / "2020" / "07" / "06"
+        product_dir.mkdir(parents=True)
+        lock_filepath = str(product_dir / f"{filename}.lock")
+        open(lock_filepath, "w").close()
+        old_time = datetime.datetime.now().timestamp() - 100
+        os.utime(lock_filepath, (old_time, old_time))
+
+        results = run_coroutine(
+            download_archive_async(
+                product="2A-DPR",
+                start_time=datetime.datetime(2020, 7, 6, 0, 0, 0),
+                end_time=datetime.datetime(2020, 7, 6, 23, 0, 0),
+            ),
+        )
+    status = {os.path.basename(result["local_filepath"]): result["status"] for result in results}
+    assert status[filename] == 1
+    assert mock_transfer.call_count == len(results)
+    assert not os.path.exists(lock_filepath)
+
+
+def test_download_archive_async_lease(tmp_path, mocker: MockerFixture) -> None:
+    """Test the leases are acquired when the transfers start and kept alive during slow transfers."""
+    from gpm.io.lease import is_lease_stale
+
+    lease_states = []
+
+    def _slow_transfer_file(remote_filepath, local_filepath, **kwargs):
+        time.sleep(0.5)
+        lock_filepaths = glob.glob(os.path.join(str(tmp_path), "**", "*.lock"), recursive=True)
+        lease_states.append((len(lock_filepaths), is_lease_stale(local_filepath)))
+        return _mock_transfer_file(remote_filepath, local_filepath, **kwargs)
+
+    mocker.patch.object(scheduler, "find_daily_filepaths", side_effect=_mock_find_daily_filepaths)
+    mocker.patch.object(scheduler, "transfer_file", side_effect=_slow_transfer_file)
+    mocker.patch.object(scheduler, "_get_storage_username_password", return_value=("user", "password"))
+    mocker.patch.object(scheduler, "_invalidate_daily_listing")
+    with gpm.config.set({"base_dir": str(tmp_path), "download_lease_timeout": 0.2}):
+        results = run_coroutine(
+            download_archive_async(
+                product="2A-DPR",
+                start_time=datetime.datetime(2020, 7, 6, 0, 0, 0),
+                end_time=datetime.datetime(2020, 7, 6, 23, 0, 0),
+                max_concurrency=1,
+            ),
+        )
+    assert len(results) == len(lease_states) == 4
+    # Only the lease of the running transfer exists and it is not stale
+    assert lease_states == [(1, False)] * 4
+    assert glob.glob(os.path.join(str(tmp_path), "**", "*.lock"), recursive=True) == []
+
+
+def test_download_archive_async_scheduler(tmp_path, mocker: MockerFixture) -> None:
+    """Test download_archive with the asyncio scheduler."""
+    mocker.patch.object(scheduler, "find_daily_filepaths", side_effect=_mock_find_daily_filepaths)
+    mocker.patch.object(scheduler, "transfer_file", side_effect=_mock_transfer_file)
+    mocker.patch.object(scheduler, "_get_storage_username_password", return_value=("user", "password"))
+    mocker.patch.object(scheduler, "_invalidate_daily_listing")
+    mock_daily = mocker.patch.object(dl, "_download_daily_data")
+    spy_download_archive_async = mocker.spy(scheduler, "download_archive_async")
+    with gpm.config.set({"base_dir": str(tmp_path)}):
+        dl.download_archive(
+            product="2A-DPR",
+            start_time=datetime.datetime(2020, 7, 5, 0, 0, 0),
+            end_time=datetime.datetime(2020, 7, 5, 23, 0, 0),
+            transfer_tool="native",
+            scheduler="async",
+            check_integrity=False,
+            progress_bar=False,
+            verbose=True,
+        )
+    assert mock_daily.call_count == 0
+    assert spy_download_archive_async.call_args.kwargs["verbose"] is True
+    # The second granule of 2020-07-05 fails to download
+    product_dir = tmp_path / "GPM" / "RS" / "V07" / "RADAR" / "2A-DPR" / "2020" / "07"
+    assert len(os.listdir(product_dir / "04")) == 2
+    assert len(os.listdir(product_dir / "05")) == 1
+
+    with pytest.raises(ValueError):
+        dl.download_archive(
+            product="2A-DPR",
+            start_time=datetime.datetime(2020, 7, 5, 0, 0, 0),
+            end_time=datetime.datetime(2020, 7, 5, 23, 0, 0),
+            scheduler="invalid",
+        )
+
+
+def test_run_coroutine_within_event_loop() -> None:
+    """Test run_coroutine can be called from a running event loop."""
+
+    async def inner():
+        return 1
+
+    async def outer():
+        return run_coroutine(inner())
+
+    assert asyncio.run(outer()) == 1
+
+
+def test_run_coroutine_within_event_loop_context() -> None:
+    """Test the context variables are available to the coroutine run from a running event loop."""
+    variable = contextvars.ContextVar("variable", default=None)
+
+    async def inner():
+        return variable.get()
+
+    async def outer():
+        variable.set("request")
+        return run_coroutine(inner())
+
+    assert asyncio.run(outer()) == "request"
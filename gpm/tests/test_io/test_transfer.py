@@ -0,0 +1,212 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module test the native transfer backend."""
+import base64
+import hashlib
+import io
+import os
+
+import pytest
+from pytest_mock.plugin import MockerFixture
+
+from gpm.io import transfer
+from gpm.io.local import get_partial_filepath
+from gpm.io.transfer import (
+    close_sessions,
+    get_transfer_summary,
+    transfer_file,
+)
+
+PPS_URL = "ftps://arthurhouftps.pps.eosdis.nasa.gov/gpmdata/2020/07/05/radar/{}.HDF5"
+GES_DISC_URL = "https://gpm1.gesdisc.eosdis.nasa.gov/data/GPM_L2/GPM_2ADPR.07/2020/187/{}.HDF5"
+
+
+@pytest.fixture(autouse=True)
+def _reset_sessions(mocker: MockerFixture):
+    """Ensure each test starts without cached sessions and does not wait between retries."""
+    mocker.patch.object(transfer, "RETRY_DELAY", 0)
+    close_sessions()
+    yield
+    close_sessions()
+
+
+def _mock_ftp_tls(mocker: MockerFixture, content=b"data", fail=False):
+    """Patch ftplib.FTP_TLS with a mock serving ``content`` at each RETR."""
+
+    def retrbinary(cmd, callback, blocksize, rest=None):
+        if fail:
+            raise OSError("Connection reset by peer")
+        callback(content[rest or 0 :])
+
+    ftp = mocker.MagicMock()
+    ftp.size.return_value = len(content)
+    ftp.retrbinary.side_effect = retrbinary
+    return mocker.patch.object(transfer.ftplib, "FTP_TLS", return_value=ftp)
+
+
+class _MockHTTPResponse(io.BytesIO):
+    """Mock of an HTTP response supporting byte ranges."""
+
+    def __init__(self, content, offset=0, headers=None):
+        super().__init__(content[offset:])
+        self.status = 206 if offset > 0 else 200
+        self.headers = {"Content-Length": str(len(content) - offset), **(headers or {})}
+
+
+def _mock_opener(mocker: MockerFixture, content=b"0123456789", headers=None):
+    """Mock the Earthdata opener serving ``content``."""
+
+    def open_url(request, timeout):
+        range_header = request.get_header("Range")
+        offset = int(range_header[len("bytes=") : -1]) if range_header else 0
+        return _MockHTTPResponse(content, offset=offset, headers=headers)
+
+    opener = mocker.MagicMock()
+    opener.open.side_effect = open_url
+    return opener
+
+
+def test_pps_sessions_are_reused(tmp_path, mocker: MockerFixture) -> None:
+    """Test that a single FTPS session is opened for sequential transfers."""
+    mock_ftp_tls = _mock_ftp_tls(mocker)
+    remote_filepaths = [PPS_URL.format(i) for i in range(3)]
+    local_filepaths = [str(tmp_path / "dir" / f"{i}.HDF5") for i in range(3)]
+    results = [
+        transfer_file(remote_filepath, local_filepath, storage="PPS", username="user", password="password")
+        for remote_filepath, local_filepath in zip(remote_filepaths, local_filepaths)
+    ]
+    assert [result["status"] for result in results] == [1, 1, 1]
+    assert [result["n_bytes"] for result in results] == [4, 4, 4]
+    assert all(os.path.exists(filepath) for filepath in local_filepaths)
+    assert not any(os.path.exists(get_partial_filepath(filepath)) for filepath in local_filepaths)
+    assert mock_ftp_tls.call_count == 1
+    mock_ftp_tls.return_value.retrbinary.assert_called_with(
+        "RETR /gpmdata/2020/07/05/radar/2.HDF5",
+        mocker.ANY,
+        blocksize=transfer.CHUNK_SIZE,
+        rest=None,
+    )
+    assert "3/3 files downloaded" in get_transfer_summary(results)
+
+
+def test_pps_transfer_resume(tmp_path, mocker: MockerFixture) -> None:
+    """Test that an interrupted PPS transfer is resumed from the partial file."""
+    mock_ftp_tls = _mock_ftp_tls(mocker, content=b"0123456789")
+    local_filepath = str(tmp_path / "file.HDF5")
+    with open(get_partial_filepath(local_filepath), "wb") as f:
+        f.write(b"0123")
+    result = transfer_file(PPS_URL.format(0), local_filepath, storage="PPS", username="user", password="password")
+    assert result["status"] == 1
+    assert result["n_bytes"] == 6
+    mock_ftp_tls.return_value.retrbinary.assert_called_once_with(mocker.ANY, mocker.ANY, blocksize=mocker.ANY, rest=4)
+    with open(local_filepath, "rb") as f:
+        assert f.read() == b"0123456789"
+
+
+def test_failed_transfer(tmp_path, mocker: MockerFixture) -> None:
+    """Test that failed transfers are retried and reported."""
+    mock_ftp_tls = _mock_ftp_tls(mocker, fail=True)
+    local_filepath = str(tmp_path / "file.HDF5")
+    result = transfer_file(
+        remote_filepath=PPS_URL.format(0),
+        local_filepath=local_filepath,
+        storage="PPS",
+        username="user",
+        password="password",
+        n_retries=2,
+    )
+    assert result["status"] == 0
+    assert result["n_bytes"] == 0
+    assert "Connection reset by peer" in result["error"]
+    assert not os.path.exists(local_filepath)
+    # Broken sessions are discarded and a new session is opened at each attempt
+    assert mock_ftp_tls.call_count == 3
+
+
+def test_truncated_transfer(tmp_path, mocker: MockerFixture) -> None:
+    """Test that a truncated file is not moved to the final path and is kept to resume the transfer."""
+    mock_ftp_tls = _mock_ftp_tls(mocker, content=b"data")
+    mock_ftp_tls.return_value.size.return_value = 10
+    local_filepath = str(tmp_path / "file.HDF5")
+    result = transfer_file(PPS_URL.format(0), local_filepath, "PPS", "user", "password", n_retries=0)
+    assert result["status"] == 0
+    assert "differs from the expected size" in result["error"]
+    assert not os.path.exists(local_filepath)
+    assert os.path.getsize(get_partial_filepath(local_filepath)) == 4
+
+
+def test_ges_disc_transfer(tmp_path, mocker: MockerFixture) -> None:
+    """Test GES DISC files are streamed to disk with the shared opener."""
+    opener = _mock_opener(mocker)
+    mock_get_opener = mocker.patch.object(transfer, "get_earthdata_opener", return_value=opener)
+    remote_filepaths = [GES_DISC_URL.format(i) for i in range(2)]
+    local_filepaths = [str(tmp_path / f"{i}.HDF5") for i in range(2)]
+    results = [
+        transfer_file(remote_filepath, local_filepath, storage="GES_DISC", username="user", password="password")
+        for remote_filepath, local_filepath in zip(remote_filepaths, local_filepaths)
+    ]
+    assert [result["n_bytes"] for result in results] == [10, 10]
+    assert mock_get_opener.call_count == 2
+    with open(local_filepaths[0], "rb") as f:
+        assert f.read() == b"0123456789"
+
+    # Test resume with byte ranges
+    with open(get_partial_filepath(local_filepaths[0]), "wb") as f:
+        f.write(b"01234")
+    result = transfer_file(remote_filepaths[0], local_filepaths[0], "GES_DISC", "user", "password")
+    assert result["n_bytes"] == 5
+    assert opener.open.call_args.args[0].get_header("Range") == "bytes=5-"
+    with open(local_filepaths[0], "rb") as f:
+        assert f.read() == b"0123456789"
+
+
+def test_ges_disc_transfer_checksum(tmp_path, mocker: MockerFixture) -> None:
+    """Test GES DISC files are verified against the checksum provided by the server."""
+    content = b"0123456789"
+    local_filepath = str(tmp_path / "file.HDF5")
+    valid_md5 = base64.b64encode(hashlib.md5(content).digest()).decode()
+    opener = _mock_opener(mocker, content=content, headers={"Content-MD5": valid_md5})
+    mocker.patch.object(transfer, "get_earthdata_opener", return_value=opener)
+    result = transfer_file(GES_DISC_URL.format(0), local_filepath, "GES_DISC", "user", "password")
+    assert result["status"] == 1
+
+    os.remove(local_filepath)
+    invalid_md5 = base64.b64encode(hashlib.md5(b"corrupted").digest()).decode()
+    opener = _mock_opener(mocker, content=content, headers={"Digest": f"MD5={invalid_md5}"})
+    mocker.patch.object(transfer, "get_earthdata_opener", return_value=opener)
+    result = transfer_file(GES_DISC_URL.format(0), local_filepath, "GES_DISC", "user", "password", n_retries=0)
+    assert result["status"] == 0
+    assert "checksum" in result["error"]
+    assert not os.path.exists(local_filepath)
+    assert not os.path.exists(get_partial_filepath(local_filepath))
+
+
+def test_get_earthdata_opener_is_shared() -> None:
+    """Test the Earthdata opener is created once per user."""
+    opener = transfer.get_earthdata_opener(username="user", password="password")
+    assert transfer.get_earthdata_opener(username="user", password="password") is opener
+    assert transfer.get_earthdata_opener(username="other", password="password") is not opener
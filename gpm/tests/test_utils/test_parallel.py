@@ -25,13 +25,22 @@
 
 # -----------------------------------------------------------------------------.
 """This module test the parallel utilities."""
-
+import mmap
+import pickle
 
 import dask
+import numpy as np
+import pandas as pd
 import pytest
+import xarray as xr
 from dask import delayed
 
-from gpm.utils.parallel import compute_list_delayed
+from gpm.utils.parallel import (
+    compute_list_delayed,
+    dataset_from_shared_memory,
+    dataset_to_shared_memory,
+    release_shared_memory,
+)
 
 
 # Test function to be used with dask.delayed
@@ -71,3 +80,40 @@ def test_compute_list_delayed():
     # Test with max_concurrent_tasks  > len(list_delayed)
     results = compute_list_delayed(list_delayed, max_concurrent_tasks=20)
     assert expected_results == results
+
+
+def test_dataset_shared_memory_roundtrip():
+    """Test a dataset is recreated from shared memory without copying the data."""
+    rng = np.random.default_rng(123)
+    ds = xr.Dataset(
+        data_vars={
+            "var": (("along_track", "cross_track"), rng.random((5, 3)), {"units": "mm"}),
+            "flag": ("along_track", np.array(["a", "b", "c", "d", "e"], dtype=object)),
+            "empty": ("range", np.array([], dtype="float32")),
+        },
+        coords={"time": ("along_track", pd.date_range("2020-07-05", periods=5, freq="s"))},
+        attrs={"ScanMode": "FS"},
+    )
+    ds["var"].encoding = {"dtype": "float32"}
+    description = dataset_to_shared_memory(ds)
+    # The description is picklable
+    description = pickle.loads(pickle.dumps(description))
+    assert "shared_memory" in description["variables"]["var"]["data"]
+    ds_shared = dataset_from_shared_memory(description)
+    xr.testing.assert_identical(ds_shared, ds)
+    assert ds_shared["var"].encoding == {"dtype": "float32"}
+    assert isinstance(ds_shared["var"].data.base, mmap.mmap)
+
+
+def test_release_shared_memory():
+    """Test the shared memory blocks of a description not converted to a dataset are unlinked."""
+    from multiprocessing.shared_memory import SharedMemory
+
+    ds = xr.Dataset({"var": ("along_track", np.arange(5.0))})
+    description = dataset_to_shared_memory(ds)
+    name = description["variables"]["var"]["data"]["shared_memory"]["name"]
+    release_shared_memory(description)
+    with pytest.raises(FileNotFoundError):
+        SharedMemory(name=name)
+    # Releasing twice does not raise errors
+    release_shared_memory(description)
@@ -40,6 +40,7 @@ from gpm.tests.test_utils.utils import (
 from gpm.utils.time import (
     ensure_time_validity,
     get_dataset_start_end_time,
+    get_time_subset_slice,
     has_nat,
     infill_timesteps,
     interpolate_nat,
@@ -155,6 +156,32 @@ class TestSubsetByTime:
         with pytest.raises(ValueError):
             subset_by_time(data_array, start_time=None, end_time=end_time)
 
+    def test_unsorted_time(self, data_array: xr.DataArray) -> None:
+        """Test subsetting of unsorted timesteps."""
+        data_array = data_array.isel(time=np.roll(np.arange(len(self.time)), 5))
+        start_time = datetime.datetime(2020, 12, 31, 6, 0, 0)
+        end_time = datetime.datetime(2020, 12, 31, 18, 0, 0)
+        returned_da = subset_by_time(data_array, start_time=start_time, end_time=end_time)
+        assert returned_da["time"].min() == np.datetime64(start_time)
+        assert returned_da["time"].max() == np.datetime64(end_time)
+        assert len(returned_da) == 13
+
+
+def test_get_time_subset_slice():
+    """Test get_time_subset_slice."""
+    time = get_time_range(0, 24)
+    start_time = datetime.datetime(2020, 12, 31, 6, 0, 0)
+    end_time = datetime.datetime(2020, 12, 31, 18, 0, 0)
+    assert get_time_subset_slice(time, start_time=start_time, end_time=end_time) == slice(6, 19)
+    assert get_time_subset_slice(time, start_time=start_time) == slice(6, 24)
+    assert get_time_subset_slice(time, end_time="2020-12-31 05:30:00") == slice(0, 6)
+    assert get_time_subset_slice(time, start_time="2021-01-02 00:00:00") == slice(24, 24)
+    # Test binary search is not used with unsorted timesteps or NaT
+    assert get_time_subset_slice(time[::-1], start_time=start_time) is None
+    time_with_nat = time.copy()
+    time_with_nat[3] = np.datetime64("NaT")
+    assert get_time_subset_slice(time_with_nat, start_time=start_time) is None
+
 
 def test_subset_by_time_slice():
     """Test subset_by_time_slice."""
@@ -0,0 +1,133 @@
+# -----------------------------------------------------------------------------.
+# MIT License
+
+# Copyright (c) 2024 GPM-API developers
+#
+# This file is part of GPM-API.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# -----------------------------------------------------------------------------.
+"""This module contains functions to create fake GPM granules for testing."""
+import numpy as np
+
+FILENAME = "2A.GPM.DPR.V9-20211125.20200705-S170044-E183317.036092.V07A.HDF5"
+
+
+def _create_dataset(group, name, data, dimension_names, dataset_kwargs, **attrs):
+    # Small 1D variables are stored contiguously
+    dataset_kwargs = dict(dataset_kwargs) if data.ndim > 1 else {}
+    if "chunks" in dataset_kwargs:
+        dataset_kwargs["chunks"] = (dataset_kwargs["chunks"], *data.shape[1:])
+    dataset = group.create_dataset(name, data=data, **dataset_kwargs)
+    dataset.attrs["DimensionNames"] = np.bytes_(dimension_names)
+    for key, value in attrs.items():
+        dataset.attrs[key] = value
+
+
+def create_hdf5_granule(filepath, **dataset_kwargs):
+    """Create a small HDF5 file with the structure of a 2A-DPR granule.
+
+    The ``dataset_kwargs`` (i.e. ``compression``) are used to create the multi-dimensional variables.
+    If specified, ``chunks`` is the chunk size along the first dimension.
+    """
+    import h5py
+
+    n_scan, n_ray, n_bin = 10, 4, 3
+    with h5py.File(filepath, "w") as f:
+        file_header = "DOI=10.5067/GPM/DPR/GPM/2A/07;\nGranuleNumber=36092;\nEmptyGranule=NOT_EMPTY;\n"
+        f.attrs["FileHeader"] = np.bytes_(file_header)
+        group = f.create_group("FS")
+        lat = np.linspace(-10, 10, n_scan * n_ray).reshape(n_scan, n_ray).astype("float32")
+        _create_dataset(group, "Latitude", lat, "nscan,nrayFS", dataset_kwargs)
+        _create_dataset(group, "Longitude", lat + 10, "nscan,nrayFS", dataset_kwargs)
+        group = f.create_group("FS/ScanTime")
+        for name, value in [("Year", 2020), ("Month", 7), ("DayOfMonth", 5), ("Hour", 17), ("Minute", 0)]:
+            _create_dataset(group, name, np.full(n_scan, value, dtype="int16"), "nscan", dataset_kwargs)
+        _create_dataset(group, "Second", np.arange(n_scan, dtype="int8"), "nscan", dataset_kwargs)
+        _create_dataset(group, "MilliSecond", np.zeros(n_scan, dtype="int16"), "nscan", dataset_kwargs)
+        group = f.create_group("FS/SLV")
+        _create_dataset(
+            group,
+            "precipRateNearSurface",
+            np.arange(n_scan * n_ray, dtype="float32").reshape(n_scan, n_ray),
+            "nscan,nrayFS",
+            dataset_kwargs,
+            _FillValue=np.float32(-9999.9),
+        )
+        zfactor = np.arange(n_scan * n_ray * n_bin * 2, dtype="float32").reshape(n_scan, n_ray, n_bin, 2)
+        _create_dataset(group, "zFactorFinal", zfactor, "nscan,nrayFS,nbinFS,nfreq", dataset_kwargs)
+        group = f.create_group("FS/scanStatus")
+        _create_dataset(group, "dataQuality", np.zeros(n_scan, dtype="int8"), "nscan", dataset_kwargs)
+        group = f.create_group("FS/PRE")
+        height = np.arange(n_scan * n_ray * n_bin, dtype="float32").reshape(n_scan, n_ray, n_bin)
+        _create_dataset(group, "height", height, "nscan,nrayFS,nbinFS", dataset_kwargs)
+        _create_dataset(group, "elevation", np.ones((n_scan, n_ray), dtype="float32"), "nscan,nrayFS", dataset_kwargs)
+    return filepath
+
+
+def get_imerg_filename(start_time):
+    """Return the IMERG-FR filename of the half-hour starting at ``start_time`` (a ``pandas.Timestamp``)."""
+    end_time = start_time + np.timedelta64(29, "m") + np.timedelta64(59, "s")
+    minutes = start_time.hour * 60 + start_time.minute
+    return (
+        f"3B-HHR.MS.MRG.3IMERG.{start_time:%Y%m%d}-S{start_time:%H%M%S}-E{end_time:%H%M%S}.{minutes:04d}.V07B.HDF5"
+    )
+
+
+def create_imerg_granule(filepath, start_time, offset=0, fill_pixel=None):
+    """Create a small HDF5 file with the structure of an IMERG half-hourly granule.
+
+    The granule has a 1 degree global grid. The ``precipitation`` value of the pixel
+    ``(lon_index, lat_index)`` is ``lon_index * 180 + lat_index + offset``.
+    If ``fill_pixel=(lon_index, lat_index)``, the pixel precipitation is missing.
+    """
+    import h5py
+
+    n_lon, n_lat = 360, 180
+    lon = np.arange(-179.5, 180, 1, dtype="float32")
+    lat = np.arange(-89.5, 90, 1, dtype="float32")
+    precipitation = (np.arange(n_lon)[:, None] * n_lat + np.arange(n_lat)[None, :] + offset).astype("float32")
+    if fill_pixel is not None:
+        precipitation[fill_pixel] = -9999.9
+    with h5py.File(filepath, "w") as f:
+        file_header = "DOI=10.5067/GPM/IMERG/3B-HH/07;\nEmptyGranule=NOT_EMPTY;\n"
+        f.attrs["FileHeader"] = np.bytes_(file_header)
+        group = f.create_group("Grid")
+        _create_dataset(group, "lon", lon, "lon", {})
+        _create_dataset(group, "lat", lat, "lat", {})
+        seconds = (np.datetime64(start_time, "s") - np.datetime64("1970-01-01", "s")).astype("int32")
+        _create_dataset(
+            group,
+            "time",
+            np.array([seconds], dtype="int32"),
+            "time",
+            {},
+            units=np.bytes_("seconds since 1970-01-01 00:00:00 UTC"),
+        )
+        _create_dataset(
+            group,
+            "precipitation",
+            precipitation[None, :, :],
+            "time,lon,lat",
+            {"chunks": 1},
+            _FillValue=np.float32(-9999.9),
+            units=np.bytes_("mm/hr"),
+        )
+    return filepath
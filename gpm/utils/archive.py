@@ -206,7 +206,8 @@ def check_archive_completeness(
     n_threads : int, optional
         Number of parallel downloads. The default is set to 10.
     transfer_tool : str, optional
-        Whether to use ``curl`` or ``wget`` for data download. The default is  ``curl``.
+        Whether to use ``curl``, ``wget`` or the in-process ``native`` backend for data download.
+        The default is  ``curl``.
     verbose : bool, optional
         Whether to print processing details. The default is ``False``.
 
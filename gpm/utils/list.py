@@ -35,3 +35,8 @@ def flatten_list(nested_list):
     if isinstance(nested_list, list) and not isinstance(nested_list[0], list):
         return nested_list
     return [item for sublist in nested_list for item in sublist] if isinstance(nested_list, list) else [nested_list]
+
+
+def split_list_in_blocks(values, block_size):
+    """Split a list in blocks of ``block_size`` elements."""
+    return [values[i : i + block_size] for i in range(0, len(values), block_size)]
@@ -25,7 +25,10 @@
 
 # -----------------------------------------------------------------------------.
 """This module contains utilities for parallel processing."""
+import weakref
+
 import dask
+import numpy as np
 
 
 def compute_list_delayed(list_delayed, max_concurrent_tasks=None):
@@ -53,3 +56,131 @@ def compute_list_delayed(list_delayed, max_concurrent_tasks=None):
         subset_delayed = list_delayed[i : (i + max_concurrent_tasks)]
         computed_results.extend(dask.compute(*subset_delayed))
     return computed_results
+
+
+####--------------------------------------------------------------------------.
+########################################
+#### Shared memory dataset transfer ####
+########################################
+
+
+def get_process_pool_context():
+    """Return the multiprocessing context of the GPM-API process pools.
+
+    The processes are not forked from the main process, which can hold the HDF5, netCDF4
+    and dask threads locks and would deadlock the forked processes.
+    """
+    import multiprocessing
+
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+def init_pool_process(config_dict):
+    """Initialize a pool process with the GPM-API config of the main process."""
+    from gpm import config
+
+    config.update(config_dict)
+
+
+def _array_to_shared_memory(arr):
+    """Copy a numpy array into a new shared memory block and return its description."""
+    from multiprocessing.shared_memory import SharedMemory
+
+    shm = SharedMemory(create=True, size=arr.nbytes)
+    try:
+        shm_arr = np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)
+        shm_arr[...] = arr
+        del shm_arr
+    except Exception:
+        shm.close()
+        shm.unlink()
+        raise
+    shm.close()
+    return {"name": shm.name, "shape": arr.shape, "dtype": arr.dtype.str}
+
+
+def _array_from_shared_memory(spec):
+    """Map a numpy array to the shared memory block created by ``_array_to_shared_memory``.
+
+    The shared memory block is unlinked: it is released when the array is garbage collected.
+    """
+    from multiprocessing.shared_memory import SharedMemory
+
+    shm = SharedMemory(name=spec["name"])
+    shm.unlink()
+    arr = np.ndarray(spec["shape"], dtype=np.dtype(spec["dtype"]), buffer=shm.buf)
+    # Close the shared memory block only when the array (and its views) are released
+    weakref.finalize(arr, shm.close)
+    return arr
+
+
+def _unlink_shared_memory(spec):
+    """Unlink a shared memory block created by ``_array_to_shared_memory`` if it still exists."""
+    from multiprocessing.shared_memory import SharedMemory
+
+    try:
+        shm = SharedMemory(name=spec["name"])
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
+
+
+def _is_shareable_array(arr):
+    return isinstance(arr, np.ndarray) and arr.dtype != object and arr.nbytes > 0
+
+
+def release_shared_memory(description):
+    """Unlink the shared memory blocks of a description returned by ``dataset_to_shared_memory``.
+
+    It must be called if the description is not converted with ``dataset_from_shared_memory``.
+    """
+    for var_dict in description["variables"].values():
+        if "shared_memory" in var_dict["data"]:
+            _unlink_shared_memory(var_dict["data"]["shared_memory"])
+
+
+def dataset_to_shared_memory(ds):
+    """Copy the data of an in-memory xarray Dataset into shared memory blocks.
+
+    It returns a picklable description of the dataset, which can be sent to another process
+    and converted back to a Dataset with ``dataset_from_shared_memory`` without copying the data.
+    Object arrays are pickled with the description.
+    """
+    variables = {}
+    description = {"variables": variables, "coords": list(ds.coords), "attrs": ds.attrs}
+    try:
+        for name, var in ds.variables.items():
+            arr = var.to_numpy()
+            data = {"shared_memory": _array_to_shared_memory(arr)} if _is_shareable_array(arr) else {"array": arr}
+            variables[name] = {"dims": var.dims, "data": data, "attrs": var.attrs, "encoding": var.encoding}
+    except Exception:
+        release_shared_memory(description)
+        raise
+    return description
+
+
+def dataset_from_shared_memory(description):
+    """Create an xarray Dataset from the description returned by ``dataset_to_shared_memory``.
+
+    The Dataset arrays map the shared memory blocks, which are released when the arrays are garbage collected.
+    If an error occurs, the shared memory blocks of the description are unlinked.
+    """
+    import xarray as xr
+
+    variables = {}
+    try:
+        for name, var_dict in description["variables"].items():
+            data = var_dict["data"]
+            arr = _array_from_shared_memory(data["shared_memory"]) if "shared_memory" in data else data["array"]
+            variables[name] = xr.Variable(var_dict["dims"], arr, attrs=var_dict["attrs"], encoding=var_dict["encoding"])
+    except Exception:
+        release_shared_memory(description)
+        raise
+    coords = description["coords"]
+    return xr.Dataset(
+        data_vars={name: var for name, var in variables.items() if name not in coords},
+        coords={name: var for name, var in variables.items() if name in coords},
+        attrs=description["attrs"],
+    )
@@ -43,6 +43,25 @@ from gpm.io.checks import (
 ############################
 
 
+def get_time_subset_slice(timesteps, start_time=None, end_time=None):
+    """Return the slice of the timesteps between ``start_time`` and ``end_time`` (included).
+
+    The slice is searched with a binary search, which requires sorted timesteps.
+    If the timesteps are not sorted (or contain NaT), ``None`` is returned.
+    The returned slice is empty if no timesteps are within the time period.
+    """
+    timesteps = np.asarray(timesteps)
+    if not np.issubdtype(timesteps.dtype, np.datetime64) or not pd.Index(timesteps).is_monotonic_increasing:
+        return None
+    start = 0
+    stop = len(timesteps)
+    if start_time is not None:
+        start = int(np.searchsorted(timesteps, pd.Timestamp(start_time).to_datetime64(), side="left"))
+    if end_time is not None:
+        stop = int(np.searchsorted(timesteps, pd.Timestamp(end_time).to_datetime64(), side="right"))
+    return slice(start, max(start, stop))
+
+
 def subset_by_time(xr_obj, start_time=None, end_time=None):
     """Filter a GPM xarray object by start_time and end_time.
 
@@ -87,6 +106,15 @@ def subset_by_time(xr_obj, start_time=None, end_time=None):
 
     dim_coord = dim_coords[0]
 
+    # Subset sorted timesteps with a binary search
+    time_slice = get_time_subset_slice(xr_obj["time"].to_numpy(), start_time=start_time, end_time=end_time)
+    if time_slice is not None:
+        if start_time is not None and time_slice.start == xr_obj["time"].size:
+            raise ValueError(f"No timesteps to return with start_time {start_time}.")
+        if end_time is not None and time_slice.start == time_slice.stop:
+            raise ValueError(f"No timesteps to return with end_time {end_time}.")
+        return xr_obj.isel({dim_coord: time_slice})
+
     # Subset by start_time
     if start_time is not None:
         isel_bool = xr_obj["time"] >= pd.Timestamp(start_time)